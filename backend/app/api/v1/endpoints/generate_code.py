@@ -1,13 +1,21 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Response
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Request, Response
 from fastapi.responses import StreamingResponse, FileResponse
 from fastapi.background import BackgroundTasks
+from app.core.admission import AdmissionRejected, stage_slot
+from app.core.config import settings
+from app.core.cancellation import ClientDisconnected, StageTracker, cancel_on_disconnect
+from app.core.usage import BudgetExceeded, RequestUsage, begin_request_usage
 from app.models.figma_input import FigmaInput
+from app.models.generated_code import GeneratedCode
 from app.services.ai_service import AIService
 from app.services.code_generator import CodeGenerator
 from app.services.project_assembler_service import ProjectAssemblerService
 from app.services.packaging_service import PackagingService
 from app.services.figma_service import FigmaService
+from app.utils.image_analysis import ImageAnalysis
+from app.utils.image_processing import read_image_upload
 from typing import Dict, Any, Optional
+import asyncio
 import io
 import tempfile
 import os
@@ -15,8 +23,83 @@ import logging
 
 router = APIRouter()
 
+# Stages of each pipeline, in order; used to report the work avoided when a client disconnects
+IMAGE_STAGES = ["describe", "generate", "assemble", "package"]
+FIGMA_STAGES = ["figma_fetch", "generate", "assemble", "package"]
+
+# Non-standard status (as used by nginx) for requests the client abandoned
+CLIENT_CLOSED_REQUEST = 499
+
+async def _package_project(
+    generated_code: GeneratedCode,
+    project_assembler: ProjectAssemblerService,
+    packaging_service: PackagingService,
+    tracker: StageTracker
+) -> bytes:
+    """
+    Assemble the generated components into a project and zip it.
+    
+    Args:
+        generated_code: The generated code
+        project_assembler: Service assembling the project structure
+        packaging_service: Service creating the ZIP archive
+        tracker: Stage tracker of the request
+        
+    Returns:
+        The ZIP archive bytes
+    """
+    # Extract components and routing information
+    components = generated_code.components or []
+    routing = generated_code.routing
+    
+    # If no components were generated, use the main component
+    if not components:
+        components = [{
+            "componentName": generated_code.component_name,
+            "typescript": generated_code.component_ts,
+            "html": generated_code.component_html,
+            "scss": generated_code.component_scss
+        }]
+    
+    # Assembly and zipping hold the whole project in memory, so they share the package slots
+    async with stage_slot("package"):
+        # Assemble the project structure
+        tracker.enter("assemble")
+        virtual_fs = project_assembler.assemble_project(components, routing)
+        logging.info(f"Project structure assembled with {len(virtual_fs)} files")
+        
+        # Create the complete ZIP archive off the event loop, so disconnects are still noticed
+        tracker.enter("package")
+        try:
+            zip_bytes = await asyncio.to_thread(packaging_service.create_zip_archive, virtual_fs)
+        except Exception as e:
+            logging.error(f"Error creating ZIP archive: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Error creating ZIP archive: {str(e)}")
+    logging.info(f"Successfully created ZIP archive, size: {len(zip_bytes)} bytes")
+    return zip_bytes
+
+def _retry_after_headers(retry_after: int) -> Optional[Dict[str, str]]:
+    """Return the Retry-After header of a temporary rejection, None for a permanent one."""
+    return {"Retry-After": str(retry_after)} if retry_after else None
+
+def _zip_response(zip_bytes: bytes) -> Response:
+    """Return the ZIP archive as a browser download."""
+    # Set headers for browser download
+    headers = {
+        "Content-Disposition": f"attachment; filename=generated_angular_project.zip",
+        "Access-Control-Expose-Headers": "Content-Disposition"
+    }
+    
+    # Return the ZIP file as a direct response
+    return Response(
+        content=zip_bytes,
+        media_type="application/zip",
+        headers=headers
+    )
+
 @router.post("/image")
 async def generate_project_from_image(
+    request: Request,
     file: UploadFile = File(...),
     ai_service: AIService = Depends(),
     code_generator: CodeGenerator = Depends(),
@@ -25,66 +108,59 @@ async def generate_project_from_image(
 ):
     """
     Generate a complete Angular project from an uploaded image file and return it as a downloadable ZIP archive.
+    
+    The generation is cancelled if the client disconnects before it finishes.
     """
-    # Validate file type
-    if not file.content_type.startswith("image/"):
-        raise HTTPException(status_code=400, detail="File must be an image")
+    # Stream the upload, rejecting non-images and oversized files before buffering them
+    upload, mime_type = await read_image_upload(file, settings.MAX_CONTENT_LENGTH, settings.UPLOAD_SPOOL_THRESHOLD_BYTES)
     
-    try:
-        logging.info(f"Processing image upload: {file.filename}")
-        
-        # Process the image
-        image_content = await file.read()
+    tracker = StageTracker("image", IMAGE_STAGES)
+    usage = RequestUsage("image")
+    
+    async def pipeline() -> bytes:
+        begin_request_usage(usage)
         
-        # Get AI description of the image
-        ai_description = await ai_service.process_image(image_content)
+        # Get AI description of the image; the spooled upload is only read into memory
+        # once a describe slot is held
+        tracker.enter("describe")
+        async with stage_slot("describe"):
+            image = ImageAnalysis(upload.read(), mime_type)
+            upload.close()
+            ai_description = await ai_service.process_image(image)
+            del image
         
         # Generate code from the description
-        generated_code = await code_generator.generate_from_image_description(ai_description)
-        
-        # Extract components and routing information
-        components = generated_code.components or []
-        routing = generated_code.routing
-        
-        # If no components were generated, use the main component
-        if not components:
-            components = [{
-                "componentName": generated_code.component_name,
-                "typescript": generated_code.component_ts,
-                "html": generated_code.component_html,
-                "scss": generated_code.component_scss
-            }]
+        tracker.enter("generate")
+        async with stage_slot("generate"):
+            generated_code = await code_generator.generate_from_image_description(ai_description)
         
-        # Assemble the project structure
-        virtual_fs = project_assembler.assemble_project(components, routing)
-        logging.info(f"Project structure assembled with {len(virtual_fs)} files")
-        
-        # Create the complete ZIP archive
-        try:
-            zip_bytes = packaging_service.create_zip_archive(virtual_fs)
-            logging.info(f"Successfully created ZIP archive, size: {len(zip_bytes)} bytes")
-            
-            # Set headers for browser download
-            headers = {
-                "Content-Disposition": f"attachment; filename=generated_angular_project.zip",
-                "Access-Control-Expose-Headers": "Content-Disposition"
-            }
-            
-            # Return the ZIP file as a direct response
-            return Response(
-                content=zip_bytes,
-                media_type="application/zip",
-                headers=headers
-            )
-        except Exception as e:
-            logging.error(f"Error creating ZIP archive: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Error creating ZIP archive: {str(e)}")
+        return await _package_project(generated_code, project_assembler, packaging_service, tracker)
+    
+    try:
+        logging.info(f"Processing image upload: {file.filename}")
+        zip_bytes = await cancel_on_disconnect(request, pipeline(), tracker)
+        return _zip_response(zip_bytes)
+    except ClientDisconnected:
+        logging.info(f"Client disconnected during stage '{tracker.current}', generation cancelled")
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
+    except AdmissionRejected as e:
+        logging.warning(str(e))
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except BudgetExceeded as e:
+        logging.warning(str(e))
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers=_retry_after_headers(e.retry_after))
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error in generate_project_from_image: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error generating project: {str(e)}")
+    finally:
+        upload.close()
+        logging.info(f"Token usage: {usage.finish()}")
 
 @router.post("/figma")
 async def generate_project_from_figma(
+    request: Request,
     figma_input: FigmaInput,
     figma_service: FigmaService = Depends(),
     code_generator: CodeGenerator = Depends(),
@@ -93,57 +169,48 @@ async def generate_project_from_figma(
 ):
     """
     Generate a complete Angular project from a Figma design URL and return it as a downloadable ZIP archive.
+    
+    The generation is cancelled if the client disconnects before it finishes.
     """
-    try:
-        logging.info(f"Processing Figma design: {figma_input.file_url}")
+    tracker = StageTracker("figma", FIGMA_STAGES)
+    usage = RequestUsage("figma")
+    
+    async def pipeline() -> bytes:
+        begin_request_usage(usage)
         
         # Fetch Figma design data
-        figma_data = await figma_service.fetch_figma_design(
-            figma_input.file_url,
-            figma_input.node_id,
-            figma_input.access_token
-        )
+        tracker.enter("figma_fetch")
+        async with stage_slot("figma_fetch"):
+            figma_data = await figma_service.fetch_figma_design(
+                str(figma_input.file_url),
+                figma_input.node_id,
+                figma_input.access_token
+            )
         
         # Generate code from Figma data
-        generated_code = await code_generator.generate_from_figma_data(figma_data)
-        
-        # Extract components and routing information
-        components = generated_code.components or []
-        routing = generated_code.routing
+        tracker.enter("generate")
+        async with stage_slot("generate"):
+            generated_code = await code_generator.generate_from_figma_data(figma_data)
         
-        # If no components were generated, use the main component
-        if not components:
-            components = [{
-                "componentName": generated_code.component_name,
-                "typescript": generated_code.component_ts,
-                "html": generated_code.component_html,
-                "scss": generated_code.component_scss
-            }]
-        
-        # Assemble the project structure
-        virtual_fs = project_assembler.assemble_project(components, routing)
-        logging.info(f"Project structure assembled with {len(virtual_fs)} files")
-        
-        # Create the complete ZIP archive
-        try:
-            zip_bytes = packaging_service.create_zip_archive(virtual_fs)
-            logging.info(f"Successfully created ZIP archive, size: {len(zip_bytes)} bytes")
-            
-            # Set headers for browser download
-            headers = {
-                "Content-Disposition": f"attachment; filename=generated_angular_project.zip",
-                "Access-Control-Expose-Headers": "Content-Disposition"
-            }
-            
-            # Return the ZIP file as a direct response
-            return Response(
-                content=zip_bytes,
-                media_type="application/zip",
-                headers=headers
-            )
-        except Exception as e:
-            logging.error(f"Error creating ZIP archive: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Error creating ZIP archive: {str(e)}")
+        return await _package_project(generated_code, project_assembler, packaging_service, tracker)
+    
+    try:
+        logging.info(f"Processing Figma design: {figma_input.file_url}")
+        zip_bytes = await cancel_on_disconnect(request, pipeline(), tracker)
+        return _zip_response(zip_bytes)
+    except ClientDisconnected:
+        logging.info(f"Client disconnected during stage '{tracker.current}', generation cancelled")
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
+    except AdmissionRejected as e:
+        logging.warning(str(e))
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except BudgetExceeded as e:
+        logging.warning(str(e))
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers=_retry_after_headers(e.retry_after))
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error in generate_project_from_figma: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error generating project: {str(e)}") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error generating project: {str(e)}")
+    finally:
+        logging.info(f"Token usage: {usage.finish()}")
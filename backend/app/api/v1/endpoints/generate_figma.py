@@ -1,4 +1,6 @@
 from fastapi import APIRouter, HTTPException, Depends
+from app.core.admission import AdmissionRejected, stage_slot
+from app.core.usage import BudgetExceeded, RequestUsage, begin_request_usage
 from app.models.figma_input import FigmaInput
 from app.models.generated_code import GeneratedCode
 from app.services.figma_service import FigmaService
@@ -15,17 +17,28 @@ async def generate_code_from_figma(
     """
     Generate Angular component code from a Figma design URL.
     """
+    usage = RequestUsage("generate_figma")
     try:
+        begin_request_usage(usage)
+        
         # Fetch Figma design data
-        figma_data = await figma_service.fetch_figma_design(
-            figma_input.file_url,
-            figma_input.node_id,
-            figma_input.access_token
-        )
+        async with stage_slot("figma_fetch"):
+            figma_data = await figma_service.fetch_figma_design(
+                str(figma_input.file_url),
+                figma_input.node_id,
+                figma_input.access_token
+            )
         
         # Generate code from Figma data
-        component_code = await code_generator.generate_from_figma_data(figma_data)
+        async with stage_slot("generate"):
+            component_code = await code_generator.generate_from_figma_data(figma_data)
         
         return component_code
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except BudgetExceeded as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)} if e.retry_after else None)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error processing Figma design: {str(e)}") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error processing Figma design: {str(e)}")
+    finally:
+        usage.finish() 
\ No newline at end of file
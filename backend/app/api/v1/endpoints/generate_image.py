@@ -1,8 +1,13 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+from app.core.admission import AdmissionRejected, stage_slot
+from app.core.config import settings
+from app.core.usage import BudgetExceeded, RequestUsage, begin_request_usage
 from app.models.image_input import ImageInput
 from app.models.generated_code import GeneratedCode
 from app.services.ai_service import AIService
 from app.services.code_generator import CodeGenerator
+from app.utils.image_analysis import ImageAnalysis
+from app.utils.image_processing import read_image_upload
 
 router = APIRouter()
 
@@ -15,20 +20,33 @@ async def generate_code_from_image(
     """
     Generate Angular component code from an uploaded image file.
     """
-    # Validate file type
-    if not file.content_type.startswith("image/"):
-        raise HTTPException(status_code=400, detail="File must be an image")
+    # Stream the upload, rejecting non-images and oversized files before buffering them
+    upload, mime_type = await read_image_upload(file, settings.MAX_CONTENT_LENGTH, settings.UPLOAD_SPOOL_THRESHOLD_BYTES)
     
+    usage = RequestUsage("generate_image")
     try:
-        # Process the image
-        image_content = await file.read()
+        begin_request_usage(usage)
         
-        # Get AI description of the image
-        ai_description = await ai_service.process_image(image_content)
+        # Get AI description of the image; the spooled upload is only read into memory
+        # once a describe slot is held
+        async with stage_slot("describe"):
+            image = ImageAnalysis(upload.read(), mime_type)
+            upload.close()
+            ai_description = await ai_service.process_image(image)
         
         # Generate code from the description
-        component_code = await code_generator.generate_from_image_description(ai_description)
+        async with stage_slot("generate"):
+            component_code = await code_generator.generate_from_image_description(ai_description)
         
         return component_code
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except BudgetExceeded as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)} if e.retry_after else None)
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error processing image: {str(e)}") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error processing image: {str(e)}")
+    finally:
+        upload.close()
+        usage.finish() 
\ No newline at end of file
@@ -0,0 +1,149 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+from app.core.config import settings
+from app.core.metrics import metrics
+
+
+class AdmissionRejected(Exception):
+    """
+    Raised when a pipeline stage is saturated and its waiting queue is full.
+
+    Args:
+        stage: Name of the saturated stage
+        reason: "queue_full" or "queue_timeout"
+        retry_after: Seconds the client should wait before retrying
+    """
+
+    def __init__(self, stage: str, reason: str, retry_after: int):
+        super().__init__(f"Service is busy ({stage} {reason.replace('_', ' ')}), retry in {retry_after} seconds")
+        self.stage = stage
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class StageLimiter:
+    """
+    Bounded concurrency with a bounded waiting queue for one pipeline stage.
+
+    At most `max_concurrency` requests run the stage at once and at most `max_queue`
+    wait for a slot. A request arriving when the queue is full, or waiting longer than
+    `queue_timeout` seconds, is rejected with AdmissionRejected instead of piling up.
+
+    Args:
+        stage: Name of the stage, used as a metrics label
+        max_concurrency: Maximum number of requests running the stage
+        max_queue: Maximum number of requests waiting for a slot
+        queue_timeout: Maximum seconds a request waits for a slot
+    """
+
+    def __init__(self, stage: str, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.stage = stage
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.active = 0
+        self.waiting = 0
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """
+        Hold a slot of the stage for the duration of the block.
+
+        Raises:
+            AdmissionRejected: If the waiting queue is full or the wait timed out
+        """
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            self._reject("queue_full")
+
+        self.waiting += 1
+        self._update_gauges()
+        started = time.perf_counter()
+        try:
+            acquired = await self._acquire()
+        finally:
+            self.waiting -= 1
+            self._update_gauges()
+        if not acquired:
+            self._reject("queue_timeout")
+        metrics.observe("admission_wait_seconds", time.perf_counter() - started, stage=self.stage)
+
+        self.active += 1
+        self._update_gauges()
+        try:
+            yield
+        finally:
+            # Also runs when the request is cancelled, so the slot is always released
+            self.active -= 1
+            self._semaphore.release()
+            self._update_gauges()
+
+    async def _acquire(self) -> bool:
+        """
+        Wait up to queue_timeout seconds for a slot.
+
+        `asyncio.wait_for` is avoided on purpose: when the caller is cancelled right as the
+        semaphore is acquired, it can return the permit instead of raising, so a cancelled
+        request would keep running and hold the slot. Here a permit that was acquired by an
+        abandoned wait is always given back.
+
+        Returns:
+            True if a slot was acquired, False if the wait timed out
+        """
+        acquire = asyncio.ensure_future(self._semaphore.acquire())
+        try:
+            done, _pending = await asyncio.wait({acquire}, timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            self._abandon(acquire)
+            raise
+        if not done:
+            self._abandon(acquire)
+            return False
+        return True
+
+    def _abandon(self, acquire: "asyncio.Future") -> None:
+        """Give up a pending acquisition, releasing the permit if it was already granted."""
+        if acquire.done():
+            if not acquire.cancelled() and acquire.exception() is None:
+                self._semaphore.release()
+        else:
+            # Semaphore.acquire hands the permit on if it is cancelled after being woken
+            acquire.cancel()
+
+    def _reject(self, reason: str) -> None:
+        metrics.increment("admission_rejected", stage=self.stage, reason=reason)
+        raise AdmissionRejected(self.stage, reason, settings.ADMISSION_RETRY_AFTER_SECONDS)
+
+    def _update_gauges(self) -> None:
+        metrics.set_gauge("admission_queue_depth", self.waiting, stage=self.stage)
+        metrics.set_gauge("admission_active", self.active, stage=self.stage)
+
+
+# Process-wide limiters; services are created per request, so limits must live here
+stage_limiters: Dict[str, StageLimiter] = {
+    "describe": StageLimiter("describe", settings.ADMISSION_DESCRIBE_CONCURRENCY, settings.ADMISSION_QUEUE_SIZE, settings.ADMISSION_QUEUE_TIMEOUT_SECONDS),
+    "generate": StageLimiter("generate", settings.ADMISSION_GENERATE_CONCURRENCY, settings.ADMISSION_QUEUE_SIZE, settings.ADMISSION_QUEUE_TIMEOUT_SECONDS),
+    "figma_fetch": StageLimiter("figma_fetch", settings.ADMISSION_FIGMA_FETCH_CONCURRENCY, settings.ADMISSION_QUEUE_SIZE, settings.ADMISSION_QUEUE_TIMEOUT_SECONDS),
+    "package": StageLimiter("package", settings.ADMISSION_PACKAGE_CONCURRENCY, settings.ADMISSION_QUEUE_SIZE, settings.ADMISSION_QUEUE_TIMEOUT_SECONDS),
+}
+
+
+@asynccontextmanager
+async def stage_slot(stage: str) -> AsyncIterator[None]:
+    """
+    Hold a slot of a pipeline stage, unless admission control is disabled.
+
+    Args:
+        stage: "describe", "generate", "figma_fetch" or "package"
+
+    Raises:
+        AdmissionRejected: If the stage is saturated
+    """
+    limiter: Optional[StageLimiter] = stage_limiters.get(stage) if settings.ADMISSION_CONTROL_ENABLED else None
+    if limiter is None:
+        yield
+        return
+    async with limiter.slot():
+        yield
@@ -0,0 +1,73 @@
+import json
+from app.core.config import settings
+from app.core.metrics import metrics
+
+# Allowance for multipart boundaries, headers and form fields on top of the file itself
+FORM_OVERHEAD_BYTES = 64 * 1024
+
+
+class _BodyTooLarge(Exception):
+    """Raised from the wrapped receive channel once the body exceeds the limit."""
+
+
+class BodySizeLimitMiddleware:
+    """
+    Reject request bodies larger than MAX_CONTENT_LENGTH (plus form overhead) while streaming.
+
+    FastAPI parses multipart uploads before the endpoint runs, so a size check in the
+    endpoint only happens after the whole body was received and spooled. This ASGI
+    middleware answers 413 straight away when Content-Length is too large, and otherwise
+    counts the body bytes as they arrive and stops reading as soon as the limit is passed,
+    so oversized uploads are never buffered.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        limit = settings.MAX_CONTENT_LENGTH + FORM_OVERHEAD_BYTES
+        content_length = dict(scope.get("headers") or []).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            await self._reject(send, "content_length")
+            return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise _BodyTooLarge()
+            return message
+
+        async def tracking_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except _BodyTooLarge:
+            if response_started:
+                raise
+            await self._reject(send, "streamed")
+
+    async def _reject(self, send, reason: str) -> None:
+        metrics.increment("uploads_rejected", reason=f"too_large_{reason}")
+        body = json.dumps({
+            "detail": f"Request body exceeds the maximum allowed size ({settings.MAX_CONTENT_LENGTH // (1024 * 1024)} MB)"
+        }).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode("ascii"))]
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,93 @@
+import asyncio
+import time
+from typing import Any, Awaitable, List, Optional
+from starlette.requests import Request
+from app.core.config import settings
+from app.core.metrics import metrics
+
+
+class ClientDisconnected(Exception):
+    """Raised when the HTTP client went away before the response was ready."""
+
+
+class StageTracker:
+    """
+    Records which pipeline stage a request is in, to report the work a cancellation avoided.
+
+    The duration of each completed stage is observed as `stage_seconds`.
+
+    Args:
+        endpoint: Name of the endpoint, used as a metrics label
+        stages: Names of the pipeline stages, in order
+    """
+
+    def __init__(self, endpoint: str, stages: List[str]):
+        self.endpoint = endpoint
+        self.stages = stages
+        self.current: Optional[str] = None
+        self.started_at = time.monotonic()
+        self.stage_started_at = self.started_at
+
+    def enter(self, stage: str) -> None:
+        """Mark the start of a stage, completing the current one."""
+        self._complete_stage()
+        self.current = stage
+
+    def finish(self) -> None:
+        """Mark the end of the last stage."""
+        self._complete_stage()
+        self.current = None
+
+    def _complete_stage(self) -> None:
+        now = time.monotonic()
+        if self.current is not None:
+            metrics.observe("stage_seconds", now - self.stage_started_at, endpoint=self.endpoint, stage=self.current)
+        self.stage_started_at = now
+
+    def record_cancellation(self) -> None:
+        """Record the stage that was interrupted and how many stages were never started."""
+        current = self.current or self.stages[0]
+        remaining = len(self.stages) - self.stages.index(current) - 1 if current in self.stages else 0
+        metrics.increment("disconnect_cancellations", endpoint=self.endpoint, stage=current)
+        metrics.increment("disconnect_stages_avoided", remaining, endpoint=self.endpoint)
+        metrics.observe("disconnect_elapsed_seconds", time.monotonic() - self.started_at, endpoint=self.endpoint)
+
+
+async def cancel_on_disconnect(request: Request, work: Awaitable[Any], tracker: Optional[StageTracker] = None) -> Any:
+    """
+    Run a pipeline, cancelling it as soon as the HTTP client disconnects.
+
+    The client is polled every DISCONNECT_POLL_INTERVAL_SECONDS. Cancelling the pipeline
+    task aborts in-flight provider calls and skips the remaining stages; `async with`
+    blocks inside it release their concurrency slots as the cancellation unwinds.
+
+    Args:
+        request: The incoming request
+        work: Coroutine running the pipeline
+        tracker: Optional stage tracker, used to record the avoided work
+
+    Returns:
+        The result of the pipeline
+
+    Raises:
+        ClientDisconnected: If the client disconnected before the pipeline finished
+    """
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _pending = await asyncio.wait({task}, timeout=settings.DISCONNECT_POLL_INTERVAL_SECONDS)
+            if done:
+                result = task.result()
+                if tracker is not None:
+                    tracker.finish()
+                return result
+            if await request.is_disconnected():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                if tracker is not None:
+                    tracker.record_cancellation()
+                raise ClientDisconnected()
+    finally:
+        # The endpoint itself was cancelled (e.g. server shutdown): do not leave the pipeline running
+        if not task.done():
+            task.cancel()
@@ -20,13 +20,126 @@ class Settings(BaseSettings):
     ]
     
     # AI models
-    DEFAULT_VLM_PROVIDER: str = os.getenv("DEFAULT_VLM_PROVIDER", "openai")  # "openai", "anthropic", or "gemini"
+    DEFAULT_VLM_PROVIDER: str = os.getenv("DEFAULT_VLM_PROVIDER", "openai")  # "openai", "anthropic", "gemini", or "fake" (no API calls)
     OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-4-vision-preview")
     ANTHROPIC_MODEL: str = os.getenv("ANTHROPIC_MODEL", "claude-3-sonnet-20240229")
     GEMINI_MODEL: str = os.getenv("GEMINI_MODEL", "gemini-1.5-pro-vision")
+    # Smaller, faster models of the "fast" tier, used for simple designs (MODEL_TIERING_ENABLED)
+    # and for requests downgraded by a token budget
+    OPENAI_FAST_MODEL: str = os.getenv("OPENAI_FAST_MODEL", "gpt-4o-mini")
+    ANTHROPIC_FAST_MODEL: str = os.getenv("ANTHROPIC_FAST_MODEL", "claude-3-haiku-20240307")
+    GEMINI_FAST_MODEL: str = os.getenv("GEMINI_FAST_MODEL", "gemini-1.5-flash")
+    # Route designs within every TIERING_FAST_MAX_* limit (0 ignores a signal) to the fast
+    # tier: visible Figma nodes, regions of the screenshot's layout skeleton, and tokens of
+    # the description code is generated from
+    MODEL_TIERING_ENABLED: bool = os.getenv("MODEL_TIERING_ENABLED", "false").lower() == "true"
+    TIERING_FAST_MAX_FIGMA_NODES: int = int(os.getenv("TIERING_FAST_MAX_FIGMA_NODES", "150"))
+    TIERING_FAST_MAX_REGIONS: int = int(os.getenv("TIERING_FAST_MAX_REGIONS", "4"))
+    TIERING_FAST_MAX_DESCRIPTION_TOKENS: int = int(os.getenv("TIERING_FAST_MAX_DESCRIPTION_TOKENS", "800"))
+    # Output token limits of a vision call and of a single-request generation
+    VISION_MAX_TOKENS: int = int(os.getenv("VISION_MAX_TOKENS", "1000"))
+    GENERATION_MAX_TOKENS: int = int(os.getenv("GENERATION_MAX_TOKENS", "4000"))
+    # Fake provider: time to first token (plus up to the jitter), output tokens per second
+    # (0 returns at once), how many times faster its "fast" tier answers, and a JSON lines
+    # file of recorded responses to replay
+    FAKE_PROVIDER_LATENCY_SECONDS: float = float(os.getenv("FAKE_PROVIDER_LATENCY_SECONDS", "0"))
+    FAKE_PROVIDER_JITTER_SECONDS: float = float(os.getenv("FAKE_PROVIDER_JITTER_SECONDS", "0"))
+    FAKE_PROVIDER_TOKENS_PER_SECOND: float = float(os.getenv("FAKE_PROVIDER_TOKENS_PER_SECOND", "0"))
+    FAKE_PROVIDER_FAST_SPEEDUP: float = float(os.getenv("FAKE_PROVIDER_FAST_SPEEDUP", "3"))
+    FAKE_PROVIDER_FIXTURES_PATH: str = os.getenv("FAKE_PROVIDER_FIXTURES_PATH", "")
     
     # Application settings
     MAX_IMAGE_SIZE_MB: int = 5
     MAX_CONTENT_LENGTH: int = MAX_IMAGE_SIZE_MB * 1024 * 1024  # in bytes
+    # Number of dominant colors extracted from uploaded images for the prompt (0 disables)
+    COLOR_PALETTE_SIZE: int = int(os.getenv("COLOR_PALETTE_SIZE", "6"))
+    # Uploads larger than this are spooled to disk while they wait for processing
+    UPLOAD_SPOOL_THRESHOLD_BYTES: int = int(os.getenv("UPLOAD_SPOOL_THRESHOLD_BYTES", str(1024 * 1024)))
+    # Worker processes decoding and analyzing uploaded images (0 uses threads of the server
+    # process); images smaller than IMAGE_PROCESS_MIN_BYTES are processed in a thread anyway
+    IMAGE_PROCESS_WORKERS: int = int(os.getenv("IMAGE_PROCESS_WORKERS", "2"))
+    IMAGE_PROCESS_MIN_BYTES: int = int(os.getenv("IMAGE_PROCESS_MIN_BYTES", str(256 * 1024)))
+    # Screenshots taller than VISION_SEGMENT_MAX_HEIGHT pixels (and taller than wide) are cut
+    # at section boundaries into at most VISION_SEGMENT_MAX_SECTIONS parts described
+    # concurrently (0 disables)
+    VISION_SEGMENT_MAX_HEIGHT: int = int(os.getenv("VISION_SEGMENT_MAX_HEIGHT", "1600"))
+    VISION_SEGMENT_MAX_SECTIONS: int = int(os.getenv("VISION_SEGMENT_MAX_SECTIONS", "6"))
+    # Measure the block layout of screenshots locally and give it to the vision model
+    LAYOUT_SKELETON_ENABLED: bool = os.getenv("LAYOUT_SKELETON_ENABLED", "true").lower() == "true"
+    
+    # Figma API endpoint; FIGMA_FIXTURES_MODE "record" saves every response to
+    # FIGMA_FIXTURES_DIR and "replay" serves responses from there without network access
+    FIGMA_API_BASE_URL: str = os.getenv("FIGMA_API_BASE_URL", "https://api.figma.com/v1")
+    FIGMA_FIXTURES_MODE: str = os.getenv("FIGMA_FIXTURES_MODE", "")
+    FIGMA_FIXTURES_DIR: str = os.getenv("FIGMA_FIXTURES_DIR", "fixtures/figma")
+    
+    # Figma processing limits
+    FIGMA_MAX_TRAVERSAL_DEPTH: int = int(os.getenv("FIGMA_MAX_TRAVERSAL_DEPTH", "200"))
+    FIGMA_MAX_TRAVERSAL_NODES: int = int(os.getenv("FIGMA_MAX_TRAVERSAL_NODES", "200000"))
+    FIGMA_DESCRIPTION_TOKEN_BUDGET: int = int(os.getenv("FIGMA_DESCRIPTION_TOKEN_BUDGET", "3000"))
+    
+    # Prompt size limits
+    PROMPT_DESCRIPTION_TOKEN_BUDGET: int = int(os.getenv("PROMPT_DESCRIPTION_TOKEN_BUDGET", "4000"))
+    
+    # Provider-side caching of the static prompt prefix
+    PROMPT_CACHING_ENABLED: bool = os.getenv("PROMPT_CACHING_ENABLED", "true").lower() == "true"
+    GEMINI_PROMPT_CACHE_TTL_SECONDS: int = int(os.getenv("GEMINI_PROMPT_CACHE_TTL_SECONDS", "3600"))
+    
+    # Request schema-constrained JSON output (json_schema / tool use / response_schema)
+    STRUCTURED_OUTPUT_ENABLED: bool = os.getenv("STRUCTURED_OUTPUT_ENABLED", "true").lower() == "true"
+    
+    # Rounds of regenerating only the invalid components of a response (0 disables repair)
+    COMPONENT_REPAIR_MAX_ATTEMPTS: int = int(os.getenv("COMPONENT_REPAIR_MAX_ATTEMPTS", "1"))
+    
+    # "single": one request generates every component; "planned": a planning request,
+    # then one request per component with bounded concurrency
+    GENERATION_MODE: str = os.getenv("GENERATION_MODE", "single")
+    GENERATION_MAX_CONCURRENCY: int = int(os.getenv("GENERATION_MAX_CONCURRENCY", "4"))
+    PLANNING_MAX_TOKENS: int = int(os.getenv("PLANNING_MAX_TOKENS", "1000"))
+    COMPONENT_MAX_TOKENS: int = int(os.getenv("COMPONENT_MAX_TOKENS", "4000"))
+    
+    # Library of generated components reused by similarity in planned generation; reused
+    # components keep the text of the project they came from, so it is for single-tenant use
+    COMPONENT_CACHE_ENABLED: bool = os.getenv("COMPONENT_CACHE_ENABLED", "false").lower() == "true"
+    COMPONENT_CACHE_SIMILARITY: float = float(os.getenv("COMPONENT_CACHE_SIMILARITY", "0.8"))
+    COMPONENT_CACHE_MAX_ENTRIES: int = int(os.getenv("COMPONENT_CACHE_MAX_ENTRIES", "1000"))
+    COMPONENT_CACHE_PATH: str = os.getenv("COMPONENT_CACHE_PATH", "")  # JSON lines file; empty keeps it in memory
+    
+    # Similar past generations added to the prompt as few-shot examples; examples carry
+    # the text of the project they came from, so the index is for single-tenant use
+    FEW_SHOT_ENABLED: bool = os.getenv("FEW_SHOT_ENABLED", "false").lower() == "true"
+    FEW_SHOT_EXAMPLES: int = int(os.getenv("FEW_SHOT_EXAMPLES", "2"))
+    FEW_SHOT_MIN_SIMILARITY: float = float(os.getenv("FEW_SHOT_MIN_SIMILARITY", "0.3"))
+    FEW_SHOT_TOKEN_BUDGET: int = int(os.getenv("FEW_SHOT_TOKEN_BUDGET", "3000"))
+    FEW_SHOT_MAX_EXAMPLES: int = int(os.getenv("FEW_SHOT_MAX_EXAMPLES", "5000"))
+    FEW_SHOT_INDEX_PATH: str = os.getenv("FEW_SHOT_INDEX_PATH", "")  # JSON lines file; empty keeps it in memory
+    
+    # Token budgets (0 disables): tokens one request may use, and tokens the whole process
+    # may use per minute. BUDGET_ACTION "downgrade" switches a request over budget to the
+    # fast models without optional extra calls; "reject" refuses it (413 or 429)
+    REQUEST_TOKEN_BUDGET: int = int(os.getenv("REQUEST_TOKEN_BUDGET", "0"))
+    MINUTE_TOKEN_BUDGET: int = int(os.getenv("MINUTE_TOKEN_BUDGET", "0"))
+    BUDGET_ACTION: str = os.getenv("BUDGET_ACTION", "downgrade")
+    # Prices in USD per million tokens, used to report request costs (0 reports no cost)
+    TOKEN_PRICE_INPUT_PER_MILLION: float = float(os.getenv("TOKEN_PRICE_INPUT_PER_MILLION", "0"))
+    TOKEN_PRICE_CACHED_INPUT_PER_MILLION: float = float(os.getenv("TOKEN_PRICE_CACHED_INPUT_PER_MILLION", "0"))
+    TOKEN_PRICE_OUTPUT_PER_MILLION: float = float(os.getenv("TOKEN_PRICE_OUTPUT_PER_MILLION", "0"))
+    
+    # Share one in-flight call between identical concurrent requests (image, Figma fetch, generation)
+    SINGLE_FLIGHT_ENABLED: bool = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+    
+    # How often the generation endpoints check whether the client is still connected
+    DISCONNECT_POLL_INTERVAL_SECONDS: float = float(os.getenv("DISCONNECT_POLL_INTERVAL_SECONDS", "0.5"))
+    
+    # Admission control: concurrent requests per pipeline stage, and a bounded waiting queue
+    # per stage; requests beyond it are rejected with 503 and Retry-After
+    ADMISSION_CONTROL_ENABLED: bool = os.getenv("ADMISSION_CONTROL_ENABLED", "true").lower() == "true"
+    ADMISSION_DESCRIBE_CONCURRENCY: int = int(os.getenv("ADMISSION_DESCRIBE_CONCURRENCY", "8"))
+    ADMISSION_GENERATE_CONCURRENCY: int = int(os.getenv("ADMISSION_GENERATE_CONCURRENCY", "8"))
+    ADMISSION_FIGMA_FETCH_CONCURRENCY: int = int(os.getenv("ADMISSION_FIGMA_FETCH_CONCURRENCY", "8"))
+    ADMISSION_PACKAGE_CONCURRENCY: int = int(os.getenv("ADMISSION_PACKAGE_CONCURRENCY", "2"))
+    ADMISSION_QUEUE_SIZE: int = int(os.getenv("ADMISSION_QUEUE_SIZE", "16"))
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "30"))
+    ADMISSION_RETRY_AFTER_SECONDS: int = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "10"))
 
 settings = Settings() 
\ No newline at end of file
@@ -0,0 +1,142 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+from typing import Any, Dict, Optional, Tuple
+import httpx
+
+# Characters kept in fixture file names; everything else becomes "_"
+_UNSAFE_NAME_CHARACTERS = re.compile(r"[^A-Za-z0-9.-]+")
+
+
+def fixture_name(method: str, url: httpx.URL) -> str:
+    """
+    Return the file name stem of the fixture recording a request.
+
+    The name is built from the method and path, plus a digest of the sorted query
+    parameters, so it does not depend on the host (the same fixtures replay against any
+    base URL) or on the headers (access tokens are never part of a fixture).
+
+    Args:
+        method: HTTP method
+        url: Request URL
+
+    Returns:
+        The file name stem, e.g. "GET_v1_files_KEY" or "GET_v1_files_KEY_nodes-1a2b3c4d5e6f"
+    """
+    name = _UNSAFE_NAME_CHARACTERS.sub("_", f"{method.upper()}{url.path}").rstrip("_")
+    params = sorted(url.params.multi_items())
+    if params:
+        name += "-" + hashlib.sha256(json.dumps(params).encode("utf-8")).hexdigest()[:12]
+    return name
+
+
+def save_fixture(directory: str, method: str, url: httpx.URL, status_code: int, content_type: str, body: bytes) -> None:
+    """
+    Write a recorded response: its metadata to <name>.json and its body, unchanged, to <name>.body.
+
+    Args:
+        directory: Fixtures directory (created if missing)
+        method: HTTP method of the request
+        url: Request URL
+        status_code: Response status
+        content_type: Response Content-Type
+        body: Response body
+    """
+    os.makedirs(directory, exist_ok=True)
+    stem = os.path.join(directory, fixture_name(method, url))
+    with open(f"{stem}.body", "wb") as file:
+        file.write(body)
+    with open(f"{stem}.json", "w", encoding="utf-8") as file:
+        json.dump({"method": method.upper(), "url": str(url.copy_with(query=None)), "params": url.params.multi_items(),
+                   "status_code": status_code, "content_type": content_type}, file, indent=2)
+
+
+def save_json_fixture(directory: str, url: str, payload: Any) -> None:
+    """Write a successful JSON response to a GET request as a fixture (for generated fixtures)."""
+    save_fixture(directory, "GET", httpx.URL(url), 200, "application/json", json.dumps(payload).encode("utf-8"))
+
+
+def load_fixture(directory: str, method: str, url: httpx.URL) -> Optional[Tuple[Dict[str, Any], bytes]]:
+    """
+    Read the recorded response to a request.
+
+    Returns:
+        The metadata and body, or None if the request was not recorded
+    """
+    stem = os.path.join(directory, fixture_name(method, url))
+    try:
+        with open(f"{stem}.json", "r", encoding="utf-8") as file:
+            metadata = json.load(file)
+        with open(f"{stem}.body", "rb") as file:
+            return metadata, file.read()
+    except FileNotFoundError:
+        return None
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport answering requests from recorded fixtures, without network access.
+
+    Raises httpx.ConnectError for requests that were not recorded, so callers handle
+    them like an unreachable server.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        # Large documents are read off the event loop
+        fixture = await asyncio.to_thread(load_fixture, self.directory, request.method, request.url)
+        if fixture is None:
+            raise httpx.ConnectError(f"No recorded response for {request.method} {request.url} in {self.directory}", request=request)
+        metadata, body = fixture
+        return httpx.Response(metadata["status_code"], headers={"Content-Type": metadata["content_type"]}, content=body, request=request)
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """httpx transport sending requests over the network and recording each response as a fixture."""
+
+    def __init__(self, directory: str, transport: Optional[httpx.AsyncBaseTransport] = None):
+        """
+        Args:
+            directory: Fixtures directory
+            transport: Transport that performs the requests; a new network transport if not given
+        """
+        self.directory = directory
+        self.transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self.transport.handle_async_request(request)
+        body = await response.aread()
+        await response.aclose()
+        content_type = response.headers.get("Content-Type", "application/octet-stream")
+        await asyncio.to_thread(save_fixture, self.directory, request.method, request.url, response.status_code, content_type, body)
+        return httpx.Response(response.status_code, headers={"Content-Type": content_type}, content=body, request=request)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+def fixture_transport(mode: str, directory: str) -> Optional[httpx.AsyncBaseTransport]:
+    """
+    Return the transport for a fixtures mode.
+
+    Args:
+        mode: "record", "replay", or "" for plain network access
+        directory: Fixtures directory
+
+    Returns:
+        A RecordingTransport or ReplayTransport, or None for the default transport
+
+    Raises:
+        ValueError: If the mode is unknown
+    """
+    if not mode:
+        return None
+    if mode == "replay":
+        return ReplayTransport(directory)
+    if mode == "record":
+        return RecordingTransport(directory)
+    raise ValueError(f"Unknown HTTP fixtures mode: {mode}")
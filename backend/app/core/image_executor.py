@@ -0,0 +1,113 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Any, Callable, Optional
+from app.core.config import settings
+from app.core.metrics import metrics
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _warm_worker() -> None:
+    """Import the imaging libraries and register Pillow's decoders once per worker."""
+    from PIL import Image
+    import app.utils.color_palette  # noqa: F401 (imports numpy)
+    Image.init()
+
+
+def _noop() -> None:
+    pass
+
+
+def _call_with_shared_buffer(func: Callable[..., Any], name: str, size: int, args: tuple) -> Any:
+    """Worker side: attach to the shared-memory block and run `func` on a view of it."""
+    block = shared_memory.SharedMemory(name=name)
+    view = block.buf[:size]
+    try:
+        return func(view, *args)
+    finally:
+        view.release()
+        block.close()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn rather than fork: the server process runs threads (event loop, to_thread workers)
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.IMAGE_PROCESS_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm_worker
+            )
+        return _pool
+
+
+def start_image_pool() -> None:
+    """
+    Start the image worker processes ahead of the first request.
+
+    Workers are spawned and import Pillow and NumPy before any upload arrives, so the first
+    requests do not pay for process start-up. Does nothing when the pool is disabled.
+    """
+    if settings.IMAGE_PROCESS_WORKERS <= 0:
+        return
+    pool = _get_pool()
+    for _ in range(settings.IMAGE_PROCESS_WORKERS):
+        pool.submit(_noop)
+
+
+def shutdown_image_pool() -> None:
+    """Stop the image worker processes; a later task starts a new pool."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+async def run_image_task(func: Callable[..., Any], data: bytes, *args: Any) -> Any:
+    """
+    Run CPU-bound image work off the event loop.
+
+    Images of at least IMAGE_PROCESS_MIN_BYTES go to the process pool, so decoding and
+    analysis of large screenshots scale across cores instead of contending for the GIL.
+    The bytes are copied once into a shared-memory block that the worker reads in place,
+    rather than being pickled through the pool's pipe. Smaller images, or every image when
+    the pool is disabled (IMAGE_PROCESS_WORKERS=0), are processed in a worker thread.
+
+    Args:
+        func: Module-level function called as func(buffer, *args), where buffer is a
+            bytes-like object it must not keep a reference to; its result must be picklable
+        data: Raw image bytes
+        *args: Further picklable arguments
+
+    Returns:
+        The result of func
+    """
+    if settings.IMAGE_PROCESS_WORKERS <= 0 or len(data) < settings.IMAGE_PROCESS_MIN_BYTES:
+        metrics.increment("image_tasks", executor="thread")
+        return await asyncio.to_thread(func, data, *args)
+
+    metrics.increment("image_tasks", executor="process")
+    start = time.perf_counter()
+    block = shared_memory.SharedMemory(create=True, size=len(data))
+    try:
+        block.buf[:len(data)] = data
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(_get_pool(), _call_with_shared_buffer, func, block.name, len(data), args)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); replace the pool for the next tasks
+            print("Image worker pool is broken, restarting it")
+            shutdown_image_pool()
+            raise
+    finally:
+        block.close()
+        block.unlink()
+        metrics.observe("image_task_seconds", time.perf_counter() - start)
@@ -0,0 +1,99 @@
+import threading
+from typing import Dict, Any, Tuple
+
+# Number of most recent observations kept per histogram for percentile estimates
+HISTOGRAM_WINDOW = 1024
+
+
+class MetricsRegistry:
+    """
+    Minimal in-process metrics registry for counters, gauges and histograms.
+
+    Metrics are keyed by name plus optional labels and exposed as a JSON snapshot
+    through the /metrics endpoint.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple, float] = {}
+        self._gauges: Dict[Tuple, float] = {}
+        self._histograms: Dict[Tuple, Dict[str, Any]] = {}
+
+    @staticmethod
+    def _key(name: str, labels: Dict[str, Any]) -> Tuple:
+        return (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+
+    def increment(self, name: str, value: float = 1, **labels) -> None:
+        """Increase a counter."""
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels) -> None:
+        """Set a gauge to the given value."""
+        key = self._key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Record an observation in a histogram."""
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = {"count": 0, "sum": 0.0, "min": value, "max": value, "recent": []}
+                self._histograms[key] = histogram
+            histogram["count"] += 1
+            histogram["sum"] += value
+            histogram["min"] = min(histogram["min"], value)
+            histogram["max"] = max(histogram["max"], value)
+            recent = histogram["recent"]
+            recent.append(value)
+            if len(recent) > HISTOGRAM_WINDOW:
+                del recent[0]
+
+    def get_counter(self, name: str, **labels) -> float:
+        """Return the current value of a counter (0 if never incremented)."""
+        with self._lock:
+            return self._counters.get(self._key(name, labels), 0)
+
+    def get_gauge(self, name: str, **labels) -> float:
+        """Return the current value of a gauge (0 if never set)."""
+        with self._lock:
+            return self._gauges.get(self._key(name, labels), 0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return all metrics as a JSON-serialisable dictionary."""
+        def entry(key: Tuple, value: Any) -> Dict[str, Any]:
+            return {"name": key[0], "labels": dict(key[1]), "value": value}
+
+        with self._lock:
+            histograms = []
+            for key, histogram in self._histograms.items():
+                recent = sorted(histogram["recent"])
+                summary = {
+                    "count": histogram["count"],
+                    "sum": histogram["sum"],
+                    "min": histogram["min"],
+                    "max": histogram["max"],
+                    "p50": recent[int(0.50 * (len(recent) - 1))],
+                    "p95": recent[int(0.95 * (len(recent) - 1))],
+                    "p99": recent[int(0.99 * (len(recent) - 1))],
+                }
+                histograms.append(entry(key, summary))
+
+            return {
+                "counters": [entry(key, value) for key, value in self._counters.items()],
+                "gauges": [entry(key, value) for key, value in self._gauges.items()],
+                "histograms": histograms,
+            }
+
+    def reset(self) -> None:
+        """Clear all metrics (used by tests and benchmarks)."""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+
+metrics = MetricsRegistry()
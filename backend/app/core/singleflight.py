@@ -0,0 +1,82 @@
+import asyncio
+import copy
+from typing import Any, Awaitable, Callable, Dict, Hashable
+from app.core.config import settings
+from app.core.metrics import metrics
+
+
+class _Call:
+    """An in-flight call and the number of callers waiting for it."""
+
+    def __init__(self, task: "asyncio.Task"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key into one shared asyncio task.
+
+    The first caller for a key starts the task; callers arriving while it runs await the
+    same task instead of repeating the work. Each caller awaits the task through
+    `asyncio.shield`, so a caller that is cancelled (e.g. its client disconnected) does not
+    cancel the work for the others. The task is cancelled only when every caller has gone.
+    Each caller receives its own deep copy of the result, so callers can modify it freely.
+
+    Groups are meant to be created at module level: services are instantiated per request,
+    so per-instance groups would never see each other's calls.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run `func` once for all concurrent callers with the same key.
+
+        Args:
+            key: Identifies identical work, e.g. a hash of the input
+            func: Coroutine function doing the work; only called by the first caller
+
+        Returns:
+            A copy of the result of the shared call
+
+        Raises:
+            Exception: Whatever the shared call raised, for every caller
+        """
+        if not settings.SINGLE_FLIGHT_ENABLED:
+            return await func()
+
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(func()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _task, key=key, call=call: self._forget(key, call))
+            metrics.set_gauge("singleflight_in_flight", len(self._calls), group=self.name)
+            metrics.increment("singleflight_calls", group=self.name, shared=False)
+        else:
+            metrics.increment("singleflight_calls", group=self.name, shared=True)
+
+        call.waiters += 1
+        try:
+            result = await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if not call.task.done() and call.waiters == 1:
+                # Last caller gone: stop the work and let the next caller start afresh
+                self._forget(key, call)
+                call.task.cancel()
+                metrics.increment("singleflight_cancelled", group=self.name)
+            raise
+        finally:
+            call.waiters -= 1
+        return copy.deepcopy(result)
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        """Remove a finished or abandoned call, unless a newer call already replaced it."""
+        if self._calls.get(key) is call:
+            del self._calls[key]
+            metrics.set_gauge("singleflight_in_flight", len(self._calls), group=self.name)
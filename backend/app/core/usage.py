@@ -0,0 +1,247 @@
+import math
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Deque, Dict, NamedTuple, Optional, Tuple
+from app.core.config import settings
+from app.core.metrics import metrics
+
+# Length of the window of the per-minute token budget, in seconds
+WINDOW_SECONDS = 60
+
+
+class BudgetExceeded(Exception):
+    """
+    Raised when a model call would exceed a token budget and BUDGET_ACTION is "reject".
+
+    Args:
+        scope: "request" (REQUEST_TOKEN_BUDGET) or "minute" (MINUTE_TOKEN_BUDGET)
+        budget: The exceeded budget, in tokens
+        retry_after: Seconds until the per-minute budget has room again (0 for the request scope)
+    """
+
+    def __init__(self, scope: str, budget: int, retry_after: int = 0):
+        super().__init__(f"Token budget exceeded ({budget} tokens per {scope})")
+        self.scope = scope
+        self.budget = budget
+        self.retry_after = retry_after
+        # The request is too large to ever fit (413), or the process is out of tokens for now (429)
+        self.status_code = 429 if scope == "minute" else 413
+
+
+class TokenUsage(NamedTuple):
+    """Tokens used with one provider; `cached` and `image` are the parts of `input` read from the prompt cache or spent on images."""
+    input: int = 0
+    output: int = 0
+    cached: int = 0
+    image: int = 0
+
+
+class TokenRateWindow:
+    """
+    Tokens used by the whole process over the last WINDOW_SECONDS seconds.
+
+    Args:
+        seconds: Length of the window
+    """
+
+    def __init__(self, seconds: float = WINDOW_SECONDS):
+        self.seconds = seconds
+        self._entries: Deque[Tuple[float, int]] = deque()
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def add(self, tokens: int) -> None:
+        """Count tokens (negative to correct an earlier estimate)."""
+        if not tokens:
+            return
+        with self._lock:
+            self._expire(time.monotonic())
+            self._entries.append((time.monotonic(), tokens))
+            self._total += tokens
+        metrics.set_gauge("minute_tokens", self._total)
+
+    def total(self) -> int:
+        """Return the tokens counted within the window."""
+        with self._lock:
+            self._expire(time.monotonic())
+            return self._total
+
+    def retry_after(self) -> int:
+        """Return the seconds until the oldest tokens in the window expire."""
+        with self._lock:
+            if not self._entries:
+                return 1
+            return max(1, math.ceil(self._entries[0][0] + self.seconds - time.monotonic()))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._total = 0
+
+    def _expire(self, now: float) -> None:
+        while self._entries and self._entries[0][0] <= now - self.seconds:
+            self._total -= self._entries.popleft()[1]
+
+
+class RequestUsage:
+    """
+    Token usage and cost of one request, with enforcement of the token budgets.
+
+    Model calls `reserve` their estimated tokens before they are made and `record` what
+    the provider reported afterwards, or `release` the reservation if they fail. When a call would exceed REQUEST_TOKEN_BUDGET or
+    the process-wide MINUTE_TOKEN_BUDGET, BUDGET_ACTION decides: "reject" raises
+    BudgetExceeded, "downgrade" switches the rest of the request to the "fast" model tier
+    and marks it `downgraded`, so optional extra calls are skipped.
+
+    Args:
+        endpoint: Name of the endpoint, used as a metrics label
+    """
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.tier = "strong"
+        self.downgraded = False
+        self.by_provider: Dict[str, TokenUsage] = {}
+        self.cost_usd = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def total_tokens(self) -> int:
+        """Input plus output tokens used so far."""
+        return sum(usage.input + usage.output for usage in self.by_provider.values())
+
+    def check_minute_budget(self) -> None:
+        """
+        Apply the per-minute budget before the request makes any call.
+
+        Raises:
+            BudgetExceeded: If the budget is used up and BUDGET_ACTION is "reject"
+        """
+        if 0 < settings.MINUTE_TOKEN_BUDGET <= token_window.total():
+            self._over_budget("minute", settings.MINUTE_TOKEN_BUDGET)
+
+    def choose_tier(self, tier: str) -> None:
+        """Use a model tier for the next calls; a downgraded request stays on the "fast" tier."""
+        if not self.downgraded:
+            self.tier = tier
+
+    def reserve(self, estimated_tokens: int) -> str:
+        """
+        Count the estimated tokens of a call against the budgets before it is made.
+
+        Args:
+            estimated_tokens: Estimated input plus maximum output tokens of the call
+
+        Returns:
+            The model tier to call: "strong" or "fast"
+
+        Raises:
+            BudgetExceeded: If a budget would be exceeded and BUDGET_ACTION is "reject"
+        """
+        if 0 < settings.REQUEST_TOKEN_BUDGET < self.total_tokens + estimated_tokens:
+            self._over_budget("request", settings.REQUEST_TOKEN_BUDGET)
+        if 0 < settings.MINUTE_TOKEN_BUDGET < token_window.total() + estimated_tokens:
+            self._over_budget("minute", settings.MINUTE_TOKEN_BUDGET)
+        token_window.add(estimated_tokens)
+        return self.tier
+
+    def record(self, provider: str, usage: TokenUsage, reserved: int = 0) -> None:
+        """
+        Record the tokens a call used, replacing its reservation in the per-minute window.
+
+        Args:
+            provider: The provider name
+            usage: Tokens reported by (or estimated for) the call
+            reserved: Tokens reserved for the call with `reserve`
+        """
+        labels = {"endpoint": self.endpoint, "provider": provider}
+        for kind, tokens in usage._asdict().items():
+            if tokens:
+                metrics.increment("tokens_used", tokens, kind=kind, **labels)
+        cost = call_cost(usage)
+        if cost:
+            metrics.increment("token_cost_usd", cost, **labels)
+
+        with self._lock:
+            previous = self.by_provider.get(provider, TokenUsage())
+            self.by_provider[provider] = TokenUsage(*(a + b for a, b in zip(previous, usage)))
+            self.cost_usd += cost
+        token_window.add(usage.input + usage.output - reserved)
+
+    def release(self, reserved: int) -> None:
+        """
+        Remove the reservation of a call that failed or was cancelled from the per-minute window.
+
+        Args:
+            reserved: Tokens reserved for the call with `reserve`
+        """
+        token_window.add(-reserved)
+
+    def finish(self) -> Dict[str, object]:
+        """
+        Record the totals of the request.
+
+        Returns:
+            Summary with the tokens per provider, the total tokens, the cost in USD and the tier
+        """
+        metrics.observe("request_tokens", self.total_tokens, endpoint=self.endpoint)
+        if self.cost_usd:
+            metrics.observe("request_cost_usd", self.cost_usd, endpoint=self.endpoint)
+        return {
+            "providers": {provider: usage._asdict() for provider, usage in self.by_provider.items()},
+            "total_tokens": self.total_tokens,
+            "cost_usd": round(self.cost_usd, 6),
+            "tier": self.tier,
+            "downgraded": self.downgraded
+        }
+
+    def _over_budget(self, scope: str, budget: int) -> None:
+        if settings.BUDGET_ACTION == "reject":
+            metrics.increment("budget_rejections", endpoint=self.endpoint, scope=scope)
+            raise BudgetExceeded(scope, budget, token_window.retry_after() if scope == "minute" else 0)
+        if not self.downgraded:
+            metrics.increment("budget_downgrades", endpoint=self.endpoint, scope=scope)
+            print(f"Token budget of {budget} tokens per {scope} exceeded, downgrading the {self.endpoint} request")
+        self.tier = "fast"
+        self.downgraded = True
+
+
+def call_cost(usage: TokenUsage) -> float:
+    """Return the cost of a call in USD at the configured TOKEN_PRICE_* prices."""
+    uncached = max(usage.input - usage.cached, 0)
+    return (
+        uncached * settings.TOKEN_PRICE_INPUT_PER_MILLION
+        + usage.cached * settings.TOKEN_PRICE_CACHED_INPUT_PER_MILLION
+        + usage.output * settings.TOKEN_PRICE_OUTPUT_PER_MILLION
+    ) / 1_000_000
+
+
+# Tokens used by the whole process, for MINUTE_TOKEN_BUDGET
+token_window = TokenRateWindow()
+
+_current_usage: ContextVar[Optional[RequestUsage]] = ContextVar("request_usage", default=None)
+
+
+def begin_request_usage(usage: RequestUsage) -> None:
+    """
+    Make `usage` the usage of the running request and apply the per-minute budget.
+
+    Tasks copy the context when they are created, so this is called inside the
+    request's pipeline task, before its first model call.
+
+    Args:
+        usage: The usage of the request
+
+    Raises:
+        BudgetExceeded: If the per-minute budget is used up and BUDGET_ACTION is "reject"
+    """
+    _current_usage.set(usage)
+    usage.check_minute_budget()
+
+
+def current_usage() -> RequestUsage:
+    """Return the usage of the running request; calls outside a request are counted under endpoint "none"."""
+    usage = _current_usage.get()
+    return usage if usage is not None else RequestUsage("none")
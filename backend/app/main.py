@@ -1,12 +1,24 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1.router import api_router
+from app.core.body_limit import BodySizeLimitMiddleware
 from app.core.config import settings
+from app.core.image_executor import shutdown_image_pool, start_image_pool
+from app.core.metrics import metrics
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Spawn the image worker processes before the first upload arrives
+    start_image_pool()
+    yield
+    shutdown_image_pool()
 
 app = FastAPI(
     title="Screenshot to Angular Code API",
     description="API for converting screenshots/mockups to Angular components",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # Set up CORS
@@ -18,6 +30,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Reject oversized request bodies while they stream in, before they are parsed
+app.add_middleware(BodySizeLimitMiddleware)
+
 # Include API router
 app.include_router(api_router, prefix="/api/v1")
 
@@ -29,4 +44,9 @@ async def root():
 @app.get("/health", tags=["Health Check"])
 async def health_check():
     """Check if the application is running."""
-    return {"status": "ok"} 
\ No newline at end of file
+    return {"status": "ok"}
+
+@app.get("/metrics", tags=["Health Check"])
+async def get_metrics():
+    """Return in-process performance metrics (prompt sizes, retries, queue depths, ...)."""
+    return metrics.snapshot()
@@ -36,4 +36,92 @@ class GeneratedCode(BaseModel):
                     }
                 ]
             }
-        } 
\ No newline at end of file
+        }
+
+
+# JSON schema of the components/routing payload the generation prompt asks for. Used to
+# request schema-constrained output from providers, so responses parse without retries.
+# Every property is required and additional properties are disallowed, as OpenAI's strict
+# json_schema mode requires; routing may be an empty list.
+GENERATED_CODE_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "components": {
+            "type": "array",
+            "description": "Generated components; the first one is the main component",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "componentName": {"type": "string", "description": "kebab-case component name"},
+                    "typescript": {"type": "string", "description": "Complete TypeScript code including imports"},
+                    "html": {"type": "string", "description": "Complete HTML template"},
+                    "scss": {"type": "string", "description": "Complete SCSS styles"}
+                },
+                "required": ["componentName", "typescript", "html", "scss"],
+                "additionalProperties": False
+            }
+        },
+        "routing": {
+            "type": "array",
+            "description": "Routing suggestions",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "path": {"type": "string"},
+                    "componentName": {"type": "string"}
+                },
+                "required": ["path", "componentName"],
+                "additionalProperties": False
+            }
+        }
+    },
+    "required": ["components", "routing"],
+    "additionalProperties": False
+}
+
+
+# JSON schema of the component plan returned by the planning call of planned generation:
+# the component tree (names, responsibilities, children) and routing, without any code.
+COMPONENT_PLAN_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "components": {
+            "type": "array",
+            "description": "Planned components; the first one is the main component",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "componentName": {"type": "string", "description": "kebab-case component name"},
+                    "purpose": {"type": "string", "description": "What the component renders and does"},
+                    "children": {
+                        "type": "array",
+                        "description": "componentNames of the planned components this one hosts",
+                        "items": {"type": "string"}
+                    }
+                },
+                "required": ["componentName", "purpose", "children"],
+                "additionalProperties": False
+            }
+        },
+        "routing": GENERATED_CODE_RESPONSE_SCHEMA["properties"]["routing"]
+    },
+    "required": ["components", "routing"],
+    "additionalProperties": False
+}
+
+
+def schema_without_additional_properties(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Return a copy of a JSON schema without `additionalProperties` keys.
+    
+    Gemini's `response_schema` accepts an OpenAPI subset that rejects that keyword.
+    """
+    if isinstance(schema, dict):
+        return {
+            key: schema_without_additional_properties(value)
+            for key, value in schema.items()
+            if key != "additionalProperties"
+        }
+    if isinstance(schema, list):
+        return [schema_without_additional_properties(item) for item in schema]
+    return schema
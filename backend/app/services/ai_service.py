@@ -1,173 +1,221 @@
-import base64
-from typing import Dict, Any, List
-import openai
-import anthropic
-import google.generativeai as genai
+import asyncio
+from typing import Dict, Any, List, Optional, Union
 from app.core.config import settings
+from app.core.image_executor import run_image_task
+from app.core.metrics import metrics
+from app.core.singleflight import SingleFlight
+from app.core.usage import BudgetExceeded, TokenUsage, current_usage
+from app.services.prompt_templates import format_layout_skeleton
+from app.services.providers import provider_registry
+from app.utils.complexity import count_regions, route_by_complexity
+from app.utils.image_analysis import ImageAnalysis
 from app.utils.image_processing import validate_image_size
+from app.utils.segmentation import split_screenshot
+from app.utils.token_budget import estimate_image_tokens, estimate_tokens
+
+# Concurrent requests for the same image share one vision call
+_image_descriptions = SingleFlight("describe_image")
+
+VISION_PROMPT = "Analyze this UI screenshot. Provide a detailed description of the layout, components, styling, colors, typography, and spacing."
+
+# Prompt for one section of a tall screenshot split by `split_screenshot`
+SECTION_PROMPT = (
+    "This is section {index} of {count} of a tall page screenshot, cut horizontally from top to bottom. "
+    "Analyze this part of the UI. Provide a detailed description of its layout, components, styling, "
+    "colors, typography, and spacing. Do not describe parts of the page that are not visible."
+)
+
+# Added to the vision prompt, followed by the measured layout skeleton
+LAYOUT_PROMPT = (
+    "The block geometry below was measured from the pixels. Rely on it for positions, sizes, alignment "
+    "and spacing instead of estimating them, and do not repeat the measurements: describe what each block "
+    "contains (components, text, styling, colors, typography)."
+)
 
 class AIService:
     """
-    Service for interacting with OpenAI, Anthropic, and Google Gemini APIs for image processing.
+    Service describing images with the configured vision provider (see `app.services.providers`).
     """
     def __init__(self):
-        self.openai_client = openai.OpenAI(api_key=settings.OPENAI_API_KEY) if settings.OPENAI_API_KEY else None
-        self.anthropic_client = anthropic.Anthropic(api_key=settings.ANTHROPIC_API_KEY) if settings.ANTHROPIC_API_KEY else None
-        
-        # Initialize Gemini API if key is available
-        if settings.GEMINI_API_KEY:
-            genai.configure(api_key=settings.GEMINI_API_KEY)
-            self.gemini_model = settings.GEMINI_MODEL
-        else:
-            self.gemini_model = None
+        # Shared provider adapters (endpoints inject this service, so it takes no arguments)
+        self.providers = provider_registry
     
-    async def process_image(self, image_data: bytes) -> Dict[str, Any]:
+    async def process_image(self, image: Union[ImageAnalysis, bytes]) -> Dict[str, Any]:
         """
         Process an image using the configured VLM (Vision Language Model).
         
+        Identical images processed concurrently (keyed by provider, model and SHA-256 of the
+        bytes) share a single provider call, whose tokens count towards the request that made it.
+        
         Args:
-            image_data: Raw image bytes
+            image: The image analysis of the upload, or raw image bytes
             
         Returns:
             Dictionary containing the AI's description and analysis
         """
+        if not isinstance(image, ImageAnalysis):
+            image = ImageAnalysis(image)
+        
         # Validate image size
-        validate_image_size(image_data, settings.MAX_IMAGE_SIZE_MB)
-        
-        # Process with the configured provider
-        if settings.DEFAULT_VLM_PROVIDER == "openai" and settings.OPENAI_API_KEY:
-            return await self._process_with_openai(image_data)
-        elif settings.DEFAULT_VLM_PROVIDER == "anthropic" and settings.ANTHROPIC_API_KEY:
-            return await self._process_with_anthropic(image_data)
-        elif settings.DEFAULT_VLM_PROVIDER == "gemini" and settings.GEMINI_API_KEY:
-            return await self._process_with_gemini(image_data)
-        else:
-            raise ValueError(f"Unsupported or unconfigured VLM provider: {settings.DEFAULT_VLM_PROVIDER}")
+        validate_image_size(image.data, settings.MAX_IMAGE_SIZE_MB)
+        
+        # Hash large uploads in a worker thread (hashlib releases the GIL)
+        digest = image.sha256 if image.size_bytes < settings.IMAGE_PROCESS_MIN_BYTES else await asyncio.to_thread(lambda: image.sha256)
+        key = (settings.DEFAULT_VLM_PROVIDER, self._model_name(current_usage().tier), digest)
+        return await _image_descriptions.do(key, lambda: self._process_image(image))
+    
+    def _model_name(self, tier: str = "strong") -> str:
+        """Return the model of the configured provider for a model tier."""
+        return self.providers.model_name(settings.DEFAULT_VLM_PROVIDER, tier)
     
-    async def _process_with_openai(self, image_data: bytes) -> Dict[str, Any]:
+    async def _process_image(self, image: ImageAnalysis) -> Dict[str, Any]:
         """
-        Process an image using OpenAI's Vision API.
+        Describe an image with the configured provider.
+        
+        Tall screenshots are split into sections that are described concurrently (see
+        `_process_sections`), unless the request was downgraded by a token budget. With
+        MODEL_TIERING_ENABLED, screenshots with few layout regions are described by the
+        fast model tier, and the region count is returned under `regions` for the
+        generation's tier decision. The dominant colors are extracted locally at the same time and
+        returned under `colors` as {"hex", "coverage"} entries.
         
         Args:
-            image_data: Raw image bytes
+            image: The image analysis of the upload
             
         Returns:
-            Dictionary containing the OpenAI analysis
+            Dictionary containing the AI's description and analysis
         """
-        # Convert image bytes to base64 string
-        base64_image = base64.b64encode(image_data).decode('utf-8')
-        
-        # Call OpenAI API
-        response = self.openai_client.chat.completions.create(
-            model=settings.OPENAI_MODEL,
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert UI developer skilled at analyzing UI screenshots to convert them to Angular components."
-                },
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": "Analyze this UI screenshot. Provide a detailed description of the layout, components, styling, colors, typography, and spacing."
-                        },
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{base64_image}"
-                            }
-                        }
-                    ]
-                }
-            ],
-            max_tokens=1000
-        )
-        
-        # Extract the assistant's message content
-        description = response.choices[0].message.content
-        
-        return {
-            "description": description,
-            "source": "openai"
-        }
+        # Decode the image and extract its color palette in the image executor while the
+        # provider describes the image
+        palette = asyncio.ensure_future(image.analyze(settings.COLOR_PALETTE_SIZE)) if settings.COLOR_PALETTE_SIZE > 0 else None
+        try:
+            regions = None
+            if settings.MODEL_TIERING_ENABLED and settings.LAYOUT_SKELETON_ENABLED:
+                regions = count_regions(await image.layout())
+                route_by_complexity("describe", regions=regions, provider=settings.DEFAULT_VLM_PROVIDER)
+            
+            width, height = image.dimensions
+            result = None
+            if 0 < settings.VISION_SEGMENT_MAX_HEIGHT < height and height > width and not current_usage().downgraded:
+                result = await self._process_sections(image)
+            if result is None:
+                result = await self._describe(image, VISION_PROMPT)
+        except BaseException:
+            if palette is not None:
+                palette.cancel()
+            raise
+        
+        if regions is not None:
+            result["regions"] = regions
+        if palette is not None:
+            result["colors"] = await palette
+        return result
     
-    async def _process_with_anthropic(self, image_data: bytes) -> Dict[str, Any]:
+    async def _describe(self, image: ImageAnalysis, prompt: str) -> Dict[str, Any]:
         """
-        Process an image using Anthropic's Claude API.
+        Describe an image with the configured provider.
+        
+        The layout skeleton (blocks, columns, spacing) is measured locally first and given
+        to the model, so it describes what the blocks contain rather than estimating their
+        geometry; the skeleton is appended to the description for the generation prompt.
         
         Args:
-            image_data: Raw image bytes
+            image: The image to describe
+            prompt: Instruction sent with the image
             
         Returns:
-            Dictionary containing the Anthropic analysis
+            Dictionary containing the AI's description and analysis
         """
-        # Convert image bytes to base64
-        base64_image = base64.b64encode(image_data).decode('utf-8')
-        
-        # Create the message with Anthropic
-        response = self.anthropic_client.messages.create(
-            model=settings.ANTHROPIC_MODEL,
-            max_tokens=1000,
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": "Analyze this UI screenshot. Provide a detailed description of the layout, components, styling, colors, typography, and spacing."
-                        },
-                        {
-                            "type": "image",
-                            "source": {
-                                "type": "base64",
-                                "media_type": "image/jpeg",
-                                "data": base64_image
-                            }
-                        }
-                    ]
-                }
-            ]
-        )
+        skeleton = await image.layout() if settings.LAYOUT_SKELETON_ENABLED else None
+        if not skeleton or not skeleton["blocks"]:
+            return await self._call_provider(image, prompt)
+        
+        layout_text = format_layout_skeleton(skeleton)
+        result = await self._call_provider(image, f"{prompt}\n\n{LAYOUT_PROMPT}\n\n{layout_text}")
+        result["description"] = f"{result['description'].strip()}\n\n{layout_text}"
+        result["layout"] = skeleton
+        return result
+    
+    async def _call_provider(self, image: ImageAnalysis, prompt: str) -> Dict[str, Any]:
+        """
+        Send an image and prompt to the configured provider.
         
-        # Extract content from the response
-        description = response.content[0].text
+        The call is counted against the request's token budgets first (see
+        `app.core.usage`), which picks the model tier, and its token usage is recorded.
         
+        Raises:
+            BudgetExceeded: If a token budget is exceeded and BUDGET_ACTION is "reject"
+        """
+        provider = self.providers.get(settings.DEFAULT_VLM_PROVIDER)
+        usage = current_usage()
+        width, height = image.dimensions
+        reserved = (
+            estimate_tokens(prompt, provider.name)
+            + estimate_image_tokens(width, height, provider.name)
+            + settings.VISION_MAX_TOKENS
+        )
+        tier = usage.reserve(reserved)
+        try:
+            response = await provider.describe_image(image, prompt, settings.VISION_MAX_TOKENS, tier=tier)
+        except BaseException:
+            # A failed or cancelled call must not keep its tokens reserved
+            usage.release(reserved)
+            raise
+        usage.record(
+            provider.name,
+            TokenUsage(response.input_tokens, response.output_tokens, response.cached_tokens, response.image_tokens),
+            reserved
+        )
         return {
-            "description": description,
-            "source": "anthropic"
+            "description": response.output,
+            "source": provider.name
         }
-        
-    async def _process_with_gemini(self, image_data: bytes) -> Dict[str, Any]:
+    
+    async def _process_sections(self, image: ImageAnalysis) -> Optional[Dict[str, Any]]:
         """
-        Process an image using Google's Gemini API.
+        Describe a tall screenshot section by section.
+        
+        Providers shrink tall pages to fit their input resolution, which blurs the details
+        and yields vague descriptions. The page is cut at the gaps between its sections
+        into parts of about VISION_SEGMENT_MAX_HEIGHT pixels, which are described
+        concurrently and merged, top to bottom, into one description with a heading per
+        section.
         
         Args:
-            image_data: Raw image bytes
+            image: The image analysis of the upload
             
         Returns:
-            Dictionary containing the Gemini analysis
+            Dictionary containing the merged description, or None if the page could not be
+            split or a section could not be described
         """
-        # Get the Gemini model with optimized settings for 2.0
-        model = genai.GenerativeModel(
-            self.gemini_model,
-            # Removing safety settings for now as they might not be supported
-            # in the same format for the vision API
+        sections = await run_image_task(
+            split_screenshot, image.data, settings.VISION_SEGMENT_MAX_HEIGHT, settings.VISION_SEGMENT_MAX_SECTIONS
+        )
+        if len(sections) < 2:
+            return None
+        
+        metrics.observe("vision_sections", len(sections), provider=settings.DEFAULT_VLM_PROVIDER)
+        prompts = [SECTION_PROMPT.format(index=index, count=len(sections)) for index in range(1, len(sections) + 1)]
+        outcomes = await asyncio.gather(
+            *(self._describe(ImageAnalysis(data, mime_type), prompt) for (_, _, data, mime_type), prompt in zip(sections, prompts)),
+            return_exceptions=True
         )
         
-        # Create prompt with image
-        prompt = "Analyze this UI screenshot. Provide a detailed description of the layout, components, styling, colors, typography, and spacing."
-        
-        # Process with Gemini
-        response = model.generate_content([
-            prompt,
-            {"mime_type": "image/jpeg", "data": image_data}
-        ])
-        
-        # Extract the description
-        description = response.text
-        
+        failures = [outcome for outcome in outcomes if isinstance(outcome, BaseException)]
+        for failure in failures:
+            if isinstance(failure, BudgetExceeded):
+                raise failure
+        if failures:
+            # Fall back to describing the whole page in one call
+            print(f"Describing {len(failures)} of {len(sections)} screenshot sections failed: {str(failures[0])}")
+            metrics.increment("vision_section_fallbacks", provider=settings.DEFAULT_VLM_PROVIDER)
+            return None
+        
+        parts = [f"The screenshot is a tall page, described in {len(sections)} sections from top to bottom."]
+        for index, ((top, bottom, _, _), outcome) in enumerate(zip(sections, outcomes), 1):
+            parts.append(f"## Section {index} of {len(sections)} (pixels {top}-{bottom} from the top)\n\n{outcome['description'].strip()}")
         return {
-            "description": description,
-            "source": "gemini"
-        } 
\ No newline at end of file
+            "description": "\n\n".join(parts),
+            "source": outcomes[0]["source"],
+            "sections": len(sections)
+        }
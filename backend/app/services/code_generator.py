@@ -1,24 +1,42 @@
-from typing import Dict, Any, List
-import openai
-import anthropic
-import google.generativeai as genai
+import asyncio
+import hashlib
+import json
+import re
+import time
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from app.core.config import settings
 from app.models.generated_code import GeneratedCode
+from app.core.metrics import metrics
+from app.core.singleflight import SingleFlight
+from app.core.usage import BudgetExceeded, TokenUsage, current_usage
+from app.services.component_cache_service import component_cache, component_signature_text
+from app.services.example_index_service import example_index, select_examples
+from app.services.figma_layout_extractor import FigmaLayoutExtractor
+from app.services.prompt_templates import (
+    STATIC_PROMPT_PREFIX, PLANNING_PROMPT_PREFIX,
+    build_component_suffix, build_dynamic_suffix, build_planning_suffix, build_repair_suffix
+)
+from app.services.providers import provider_registry, record_prompt_cache_usage
+from app.utils.complexity import count_regions, route_by_complexity
+from app.utils.component_validation import REQUIRED_COMPONENT_KEYS, validate_component, validate_components
+from app.utils.response_parser import ScanResult, scan_response
+from app.utils.token_budget import compact_text, estimate_tokens
+
+# Concurrent requests with the same description share one generation
+_generations = SingleFlight("generate_code")
+
+# Patterns used to derive a component name from fallback TypeScript code
+_CLASS_NAME_PATTERN = re.compile(r"export\s+class\s+(\w+)")
+_PASCAL_BOUNDARY_PATTERN = re.compile(r'(?<!^)(?=[A-Z])')
 
 class CodeGenerator:
     """
     Service for generating Angular component code based on AI descriptions or Figma data.
     """
     def __init__(self):
-        self.openai_client = openai.OpenAI(api_key=settings.OPENAI_API_KEY) if settings.OPENAI_API_KEY else None
-        self.anthropic_client = anthropic.Anthropic(api_key=settings.ANTHROPIC_API_KEY) if settings.ANTHROPIC_API_KEY else None
-        
-        # Initialize Gemini API if key is available
-        if settings.GEMINI_API_KEY:
-            genai.configure(api_key=settings.GEMINI_API_KEY)
-            self.gemini_model = settings.GEMINI_MODEL
-        else:
-            self.gemini_model = None
+        self.layout_extractor = FigmaLayoutExtractor()
+        # Shared provider adapters (endpoints inject this service, so it takes no arguments)
+        self.providers = provider_registry
     
     async def generate_from_image_description(self, ai_description: Dict[str, Any]) -> GeneratedCode:
         """
@@ -35,15 +53,11 @@ class CodeGenerator:
         # Extract color hints if available
         color_hints = ai_description.get("colors", [])
         
-        # Choose the appropriate service based on the configured VLM provider
-        if settings.DEFAULT_VLM_PROVIDER == "openai" and settings.OPENAI_API_KEY:
-            result = await self._generate_with_openai(description_text)
-        elif settings.DEFAULT_VLM_PROVIDER == "anthropic" and settings.ANTHROPIC_API_KEY:
-            result = await self._generate_with_anthropic(description_text)
-        elif settings.DEFAULT_VLM_PROVIDER == "gemini" and settings.GEMINI_API_KEY:
-            result = await self._generate_with_gemini(description_text, color_hints)
-        else:
-            raise ValueError(f"Unsupported or unconfigured VLM provider: {settings.DEFAULT_VLM_PROVIDER}")
+        # Generate with the configured VLM provider, on the model tier the design's complexity calls for
+        provider = self._select_provider()
+        regions = ai_description.get("regions", count_regions(ai_description.get("layout")))
+        route_by_complexity("generate", regions=regions, description=description_text, provider=provider)
+        result = await self._generate_shared(provider, description_text, color_hints)
         
         # Create the GeneratedCode object from the main component
         generated_code = GeneratedCode(
@@ -80,20 +94,19 @@ class CodeGenerator:
         
         # Parse figma nodes to extract component structure
         warnings = []
+        stats = {}
         
         # This would involve complex logic to map Figma nodes to Angular components
-        # For now, we'll extract a description that includes component recognition
-        figma_description = self._extract_figma_description(figma_data, component_definitions, warnings)
-        
-        # Choose the appropriate service
-        if settings.DEFAULT_VLM_PROVIDER == "openai" and settings.OPENAI_API_KEY:
-            result = await self._generate_with_openai(figma_description)
-        elif settings.DEFAULT_VLM_PROVIDER == "anthropic" and settings.ANTHROPIC_API_KEY:
-            result = await self._generate_with_anthropic(figma_description)
-        elif settings.DEFAULT_VLM_PROVIDER == "gemini" and settings.GEMINI_API_KEY:
-            result = await self._generate_with_gemini(figma_description)
-        else:
-            raise ValueError(f"Unsupported or unconfigured VLM provider: {settings.DEFAULT_VLM_PROVIDER}")
+        # For now, we'll extract a description that includes component recognition.
+        # Walking a large node tree is CPU-bound, so it runs off the event loop.
+        figma_description = await asyncio.to_thread(
+            self._extract_figma_description, figma_data, component_definitions, warnings, stats
+        )
+        
+        # Generate with the configured VLM provider, on the model tier the design's complexity calls for
+        provider = self._select_provider()
+        route_by_complexity("generate", figma_nodes=stats.get("nodes", 0), description=figma_description, provider=provider)
+        result = await self._generate_shared(provider, figma_description)
         
         # If we have warnings from the node parsing, inject them into the HTML as comments
         component_html = result.get("component_html", "")
@@ -127,7 +140,246 @@ class CodeGenerator:
         
         return generated_code
     
-    def _extract_figma_description(self, figma_data: Dict[str, Any], component_definitions: Dict[str, Any] = None, warnings: List[str] = None) -> str:
+    def _select_provider(self) -> str:
+        """
+        Return the configured generation provider.
+        
+        Returns:
+            The provider name, e.g. "openai"
+            
+        Raises:
+            ValueError: If the configured provider is unknown or has no API key
+        """
+        return self.providers.get(settings.DEFAULT_VLM_PROVIDER).name
+    
+    async def _generate_shared(self, provider: str, description: str, color_hints: list = None) -> Dict[str, Any]:
+        """
+        Generate components, sharing one in-flight generation between identical concurrent requests.
+        
+        Args:
+            provider: The provider name
+            description: The UI description to generate code for
+            color_hints: Optional list of colors extracted from the uploaded image
+            
+        Returns:
+            Dictionary containing the generated code components (a private copy)
+        """
+        key = hashlib.sha256(
+            json.dumps([provider, current_usage().tier, settings.GENERATION_MODE, description, color_hints or []], default=str).encode("utf-8")
+        ).hexdigest()
+        return await _generations.do(key, lambda: self._generate(provider, description, color_hints))
+    
+    async def _generate(self, provider: str, description: str, color_hints: list = None) -> Dict[str, Any]:
+        """
+        Generate components with a provider, in the configured GENERATION_MODE.
+        
+        In "planned" mode a planning call decides the component tree and each component is
+        generated by its own request; if planning does not produce a usable multi-component
+        result, or the request was downgraded by a token budget, the single-request
+        generation is used instead.
+        
+        Args:
+            provider: The provider name
+            description: The UI description to generate code for
+            color_hints: Optional list of colors extracted from the uploaded image
+            
+        Returns:
+            Dictionary containing the generated code components
+        """
+        result = None
+        if settings.GENERATION_MODE == "planned" and not current_usage().downgraded:
+            result = await self._generate_planned(provider, description, color_hints)
+        
+        if result is None:
+            result = await self._generate_single(provider, description, color_hints)
+        
+        # Valid generations become few-shot examples for similar future requests; adding one
+        # writes to the index file, so it runs off the event loop
+        if settings.FEW_SHOT_ENABLED and self._is_accepted_generation(result):
+            await asyncio.to_thread(example_index.add, description, result)
+        return result
+    
+    def _is_accepted_generation(self, result: Dict[str, Any]) -> bool:
+        """Return whether a result is a real generation whose components all pass validation."""
+        components = result.get("components") or []
+        return (
+            bool(components)
+            and result.get("component_name") != "error-component"
+            and not validate_components(components)
+        )
+    
+    async def _generate_planned(self, provider: str, description: str, color_hints: list = None) -> Optional[Dict[str, Any]]:
+        """
+        Generate components with a planning call followed by concurrent per-component calls.
+        
+        Each component gets its own COMPONENT_MAX_TOKENS output budget, so large UIs are not
+        truncated, and up to GENERATION_MAX_CONCURRENCY components are generated at once, so
+        wall-clock time follows the largest component instead of the sum. Every
+        per-component call shares STATIC_PROMPT_PREFIX and hits the prompt cache. Leaf
+        components similar to one in the component library are reused instead of generated.
+        
+        Args:
+            provider: The provider name
+            description: The UI description to generate code for
+            color_hints: Optional list of colors extracted from the uploaded image
+            
+        Returns:
+            Dictionary containing the generated code components, or None if the single-request
+            generation should be used instead
+        """
+        description = compact_text(description, settings.PROMPT_DESCRIPTION_TOKEN_BUDGET, provider)
+        metrics.increment("planned_generation_requests", provider=provider)
+        
+        try:
+            plan_output = await self._call_provider(
+                provider, PLANNING_PROMPT_PREFIX, build_planning_suffix(description),
+                settings.PLANNING_MAX_TOKENS, "plan"
+            )
+            plan, routing = self._parse_component_plan(plan_output)
+        except BudgetExceeded:
+            raise
+        except Exception as e:
+            print(f"Component planning with {provider} failed: {str(e)}")
+            metrics.increment("planned_generation_fallbacks", provider=provider, reason="plan_failed")
+            return None
+        
+        metrics.observe("planned_components", len(plan), provider=provider)
+        if len(plan) < 2:
+            # Nothing to parallelize; a single request is cheaper
+            metrics.increment("planned_generation_fallbacks", provider=provider, reason="single_component")
+            return None
+        
+        semaphore = asyncio.Semaphore(max(1, settings.GENERATION_MAX_CONCURRENCY))
+        # Signature texts of freshly generated leaf components, stored in the library once valid
+        cacheable = {}
+        
+        async def generate_bounded(component_plan: Dict[str, Any]) -> Dict[str, Any]:
+            # Leaf components are self-contained, so a similar one from an earlier project can be reused
+            signature_text = None
+            if settings.COMPONENT_CACHE_ENABLED and not component_plan["children"]:
+                signature_text = component_signature_text(description, component_plan, color_hints)
+            if signature_text is not None:
+                # The library may read its JSONL file on first use, so it is queried off the event loop
+                cached = await asyncio.to_thread(component_cache.lookup, signature_text, component_plan["componentName"])
+                if cached is not None:
+                    return cached[0]
+                cacheable[component_plan["componentName"]] = signature_text
+            async with semaphore:
+                return await self._generate_planned_component(provider, description, color_hints, plan, component_plan)
+        
+        outcomes = await asyncio.gather(*(generate_bounded(entry) for entry in plan), return_exceptions=True)
+        for outcome in outcomes:
+            if isinstance(outcome, BudgetExceeded):
+                raise outcome
+        
+        components = []
+        for component_plan, outcome in zip(plan, outcomes):
+            if isinstance(outcome, BaseException):
+                print(f"Generating component '{component_plan['componentName']}' with {provider} failed: {str(outcome)}")
+                metrics.increment("component_generation_failures", provider=provider)
+            else:
+                components.append(outcome)
+        
+        if isinstance(outcomes[0], BaseException):
+            # Without the main component the project has no entry point
+            metrics.increment("planned_generation_fallbacks", provider=provider, reason="main_component_failed")
+            return None
+        
+        generated_names = {component["componentName"] for component in components}
+        result = {
+            "components": components,
+            "routing": [route for route in routing if route["componentName"] in generated_names]
+        }
+        try:
+            result = await self._repair_invalid_components(result, provider)
+        except ValueError as e:
+            print(f"Planned generation with {provider} produced no valid components: {str(e)}")
+            metrics.increment("planned_generation_fallbacks", provider=provider, reason="invalid")
+            return None
+        
+        for component in result["components"]:
+            if component["componentName"] in cacheable:
+                await asyncio.to_thread(component_cache.store, cacheable[component["componentName"]], component)
+        return result
+    
+    async def _generate_planned_component(self, provider: str, description: str, color_hints: Optional[list],
+                                          plan: List[Dict[str, Any]], component_plan: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Generate one planned component.
+        
+        Args:
+            provider: The provider name
+            description: The (already compacted) UI description
+            color_hints: Optional list of colors extracted from the uploaded image
+            plan: The full component plan
+            component_plan: The plan entry of the component to generate
+            
+        Returns:
+            The generated component, named as planned
+            
+        Raises:
+            ValueError: If the response contains no component
+        """
+        dynamic_suffix = build_component_suffix(description, color_hints, plan, component_plan)
+        metrics.observe("prompt_tokens", estimate_tokens(STATIC_PROMPT_PREFIX + dynamic_suffix, provider), provider=provider)
+        
+        start = time.perf_counter()
+        output = await self._call_provider(provider, STATIC_PROMPT_PREFIX, dynamic_suffix, settings.COMPONENT_MAX_TOKENS)
+        metrics.observe("component_generation_seconds", time.perf_counter() - start, provider=provider)
+        
+        name = component_plan["componentName"]
+        generated = [component for component in self._parse_provider_output(output)["components"] if isinstance(component, dict)]
+        if not generated:
+            raise ValueError(f"No component returned for '{name}'")
+        
+        # Prefer the component with the planned name; keep the planned name so selectors line up
+        component = next((candidate for candidate in generated if candidate.get("componentName") == name), generated[0])
+        return {**component, "componentName": name}
+    
+    def _parse_component_plan(self, output: Any) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Parse the output of the planning call.
+        
+        Args:
+            output: Response text, or an already decoded payload (structured output)
+            
+        Returns:
+            Tuple of (planned components, routing). Component names are unique and children
+            only reference other planned components.
+            
+        Raises:
+            ValueError: If the output contains no usable plan
+        """
+        payloads = [output] if isinstance(output, dict) else self._decode_json_candidates(output, scan_response(output))
+        for payload in payloads:
+            if not isinstance(payload, dict) or not isinstance(payload.get("components"), list):
+                continue
+            
+            plan = []
+            names = set()
+            for entry in payload["components"]:
+                if isinstance(entry, dict) and isinstance(entry.get("componentName"), str) and entry["componentName"] not in names:
+                    names.add(entry["componentName"])
+                    plan.append({
+                        "componentName": entry["componentName"],
+                        "purpose": str(entry.get("purpose", "")),
+                        "children": entry.get("children") if isinstance(entry.get("children"), list) else []
+                    })
+            if not plan:
+                continue
+            
+            for entry in plan:
+                entry["children"] = [child for child in entry["children"] if child in names and child != entry["componentName"]]
+            routing = [
+                route for route in payload.get("routing", []) or []
+                if isinstance(route, dict) and isinstance(route.get("path"), str) and route.get("componentName") in names
+            ]
+            return plan, routing
+        
+        raise ValueError("Response contains no component plan")
+    
+    def _extract_figma_description(self, figma_data: Dict[str, Any], component_definitions: Dict[str, Any] = None, warnings: List[str] = None,
+                                   stats: Dict[str, int] = None) -> str:
         """
         Extract a textual description from Figma data for use in prompts.
         
@@ -135,9 +387,10 @@ class CodeGenerator:
             figma_data: The Figma API response data
             component_definitions: Dictionary of component definitions from Figma
             warnings: List to collect warnings during processing
+            stats: Dictionary receiving "nodes", the number of visible nodes in the design
             
         Returns:
-            A detailed description of the Figma design
+            A structured layout spec of the Figma design, sized to FIGMA_DESCRIPTION_TOKEN_BUDGET
         """
         if warnings is None:
             warnings = []
@@ -145,372 +398,302 @@ class CodeGenerator:
         # Basic structure info
         basic_info = f"Figma design with {len(figma_data.get('file_data', {}).get('document', {}).get('children', []))} pages."
         
-        # Extract component instances information if available
-        component_info = []
-        
-        # If we have node data (when a specific node was requested)
+        # Collect the traversal roots: the requested node, or every top-level frame of the document
+        roots = []
         if 'node_data' in figma_data and figma_data['node_data']:
             node_data = figma_data['node_data']
-            component_info.extend(self._extract_component_instances(node_data, component_definitions, warnings))
-        # Otherwise, try to process the entire document
+            # The nodes endpoint wraps the requested node in a 'document' key with its own component map
+            roots.append(node_data.get('document', node_data))
+            if isinstance(node_data.get('components'), dict):
+                component_definitions = {**node_data['components'], **(component_definitions or {})}
         elif 'file_data' in figma_data and 'document' in figma_data['file_data']:
             document = figma_data['file_data']['document']
             for page in document.get('children', []):
-                for frame in page.get('children', []):
-                    component_info.extend(self._extract_component_instances(frame, component_definitions, warnings))
+                roots.extend(page.get('children', []))
         
-        # Create a detailed description including component information
-        component_description = ""
-        if component_info:
-            component_description = "\n\nComponent Instances Found:\n" + "\n".join(component_info)
+        # Build the structured layout spec (with instance summary and warnings) in a single pass over the tree
+        layout_spec = self.layout_extractor.extract(roots, component_definitions, warnings, stats=stats)
         
-        return f"{basic_info}{component_description}"
+        return f"{basic_info}\n\n{layout_spec}"
     
-    def _extract_component_instances(self, node: Dict[str, Any], component_definitions: Dict[str, Any], warnings: List[str]) -> List[str]:
-        """
-        Recursively extract component instances from a Figma node tree.
-        
-        Args:
-            node: The current Figma node to process
-            component_definitions: Dictionary of component definitions from Figma
-            warnings: List to collect warnings during processing
-            
-        Returns:
-            List of component instance descriptions
-        """
-        component_info = []
-        
-        # Check if this node is a component instance
-        if node.get('type') == 'INSTANCE':
-            component_id = node.get('componentId')
-            if component_id and component_definitions and component_id in component_definitions:
-                # Get information about the component this instance is based on
-                component_def = component_definitions[component_id]
-                component_name = component_def.get('name', 'Unknown Component')
-                component_info.append(f"- {node.get('name', 'Unnamed')} is an instance of component '{component_name}'")
-            else:
-                # Instance without defined component or component not found
-                warnings.append(f"Component instance '{node.get('name', 'Unnamed')}' references undefined component")
-                component_info.append(f"- {node.get('name', 'Unnamed')} is an instance of an unknown component")
-        
-        # Recursively process children
-        for child in node.get('children', []):
-            component_info.extend(self._extract_component_instances(child, component_definitions, warnings))
-        
-        return component_info
-    
-    def _create_prompt(self, description: str, color_hints: list = None) -> str:
+    def _create_prompt(self, description: str, color_hints: list = None, provider: str = None) -> str:
         """
         Create a detailed prompt for code generation based on the description.
         
         Args:
             description: The UI description to generate code for
             color_hints: Optional list of colors extracted from the uploaded image
+            provider: The provider the prompt is built for, used for token estimation
         
         Returns:
             A detailed prompt with examples and requirements
         """
-        # Format color hints if provided
-        color_section = ""
-        if color_hints and len(color_hints) > 0:
-            color_list = ", ".join([f'"{color}"' for color in color_hints])
-            color_section = f"""
-Contextual Hints - Color Palette:
-Use these colors extracted from the image as a starting point for your design: [{color_list}]
-Apply these colors to appropriate elements using Angular Material's theming system and Tailwind CSS color utilities.
-For Material components, use these as custom theme colors when appropriate.
-For non-Material elements, use Tailwind's color utilities with these values.
-"""
+        static_prefix, dynamic_suffix = self._create_prompt_parts(description, color_hints, provider)
+        return static_prefix + dynamic_suffix
+    
+    def _create_prompt_parts(self, description: str, color_hints: list = None, provider: str = None,
+                             examples: Optional[List[Dict[str, Any]]] = None) -> Tuple[str, str]:
+        """
+        Create the generation prompt as a static prefix and a request-specific suffix.
         
-        # Analyze description for UI structure
-        ui_structure_hints = ""
-        if any(term in description.lower() for term in ["form", "input", "field", "submit", "validation"]):
-            ui_structure_hints += """
-UI Structure Hint - Form Detected:
-Implement proper Angular reactive forms with FormControl/FormGroup.
-Add appropriate validation with meaningful error messages.
-Include submit/cancel buttons with proper loading states.
-"""
-            
-        if any(term in description.lower() for term in ["list", "table", "grid", "items", "collection"]):
-            ui_structure_hints += """
-UI Structure Hint - Data Collection Detected:
-Implement optimal rendering strategy for collection data.
-Use *ngFor with trackBy function for performance.
-Consider virtualization for large datasets using @angular/cdk/scrolling.
-"""
-            
-        if any(term in description.lower() for term in ["card", "panel", "container", "section"]):
-            ui_structure_hints += """
-UI Structure Hint - Card/Panel Layout Detected:
-Use mat-card for semantic card layouts with appropriate sections.
-Implement responsive card grid using Tailwind's grid utilities.
-Add appropriate motion with Angular animations if applicable.
-"""
-            
-        if any(term in description.lower() for term in ["navigation", "menu", "sidebar", "drawer", "tabs"]):
-            ui_structure_hints += """
-UI Structure Hint - Navigation Pattern Detected:
-Use appropriate Material navigation components (mat-toolbar, mat-drawer, mat-tabs).
-Implement responsive behavior using Tailwind breakpoint utilities.
-Ensure keyboard navigability and proper ARIA roles.
-"""
+        The prefix (instructions and few-shot examples) is identical for every request so
+        providers can cache it. Similar past generations retrieved from the example index
+        go into the suffix. The description is compacted to PROMPT_DESCRIPTION_TOKEN_BUDGET
+        for the target provider, and the estimated prompt size is recorded in the
+        `prompt_tokens` metric.
         
-        # Primary prompt
-        return f"""
+        Args:
+            description: The UI description to generate code for
+            color_hints: Optional list of colors extracted from the uploaded image
+            provider: The provider the prompt is built for, used for token estimation
+            examples: Few-shot examples already selected for the description (looked up
+                in the example index if None)
         
-You are an expert Angular developer specializing in creating modern, accessible UIs with Angular Material and Tailwind CSS. Today your task is to convert a UI description into a complete, fully functional Angular component structure ready for integration into a downloadable project.
-
-GOAL: Generate a complete set of Angular components that will render the UI described below. Your output will be used to populate a full, downloadable Angular project that users can run locally.
-
-TECH STACK CONSTRAINTS:
-- Angular v19+ with standalone component APIs only
-- Angular Material v17+ (with Material Design Components MDC)
-- Tailwind CSS v3
-- TypeScript with strict typing
-
-EXTERNAL CONFIGURATION ASSUMPTIONS:
-- A standard Angular project with Angular Material and Tailwind CSS is already configured properly
-- You do NOT need to generate Angular Material theme setup code
-- You do NOT need to generate Tailwind configuration
-- You do NOT need to generate package.json, angular.json, or any other configuration files
-- The application entry point, routing setup, and overall structure exist, and you only need to provide component code
-
-COMPONENT COMPOSITION:
-- Analyze the UI description and determine if it should be split into multiple components
-- Create a main parent component that hosts any child components
-- Create child components when parts of the UI are logically separate, reusable, or complex enough to warrant their own component
-- For each component, generate TypeScript, HTML, and SCSS files
-
-OUTPUT FORMAT:
-Your response MUST be valid JSON in the following format:
-{{
-  "components": [
-    {{
-      "componentName": "string", // kebab-case name (e.g., "user-profile")
-      "typescript": "string",    // Complete TypeScript code including imports
-      "html": "string",          // Complete HTML template
-      "scss": "string"           // Complete SCSS styles
-    }},
-    // Additional components if needed
-  ],
-  "routing": [
-    // Optional: Basic routing suggestions
-    // {{ "path": "string", "componentName": "string" }}
-  ]
-}}
-
-ANGULAR CODE REQUIREMENTS:
-1. Components:
-   - Use standalone components with explicit imports
-   - Add proper typings for all properties and methods
-   - Apply meaningful component/method names reflecting functionality
-   - Use Angular signals for state management where appropriate
-   - Include reactive behaviors with proper subscriptions and memory management
-   - Use Angular's latest DI pattern with the inject() function
-
-2. Templates:
-   - Use Angular Material components with proper MDC API
-   - Follow Angular template syntax best practices
-   - Create responsive layouts using Tailwind CSS utilities
-   - Include accessibility attributes (aria-*)
-   - Apply conditional rendering as appropriate (ngIf, ngClass)
-   - Use async pipe with observables to prevent memory leaks
-
-3. Styles:
-   - Focus on using Tailwind utility classes in HTML
-   - Only use SCSS for styles not possible with Tailwind
-   - Include responsive styling for various screen sizes
-   - Apply consistent whitespace/padding/margins
-
-REASONING STEPS:
-1. Analyze the UI description to fully understand the requirements
-2. Identify main sections/features that may benefit from separate components
-3. Determine component hierarchy and state management needs
-4. Draft component structure with component names and relationships
-5. Implement each component with its TypeScript, HTML, and SCSS
-6. Ensure proper integration between components through inputs/outputs
-
-FEW-SHOT EXAMPLES (SIMPLIFIED):
-
-Example 1 - Single Component:
-{{
-  "components": [
-    {{
-      "componentName": "product-card",
-      "typescript": "import {{ Component, Input, signal }} from '@angular/core';\\nimport {{ MatButtonModule }} from '@angular/material/button';\\nimport {{ CommonModule }} from '@angular/common';\\n\\ninterface Product {{\\n  id: number;\\n  name: string;\\n  price: number;\\n  imageUrl: string;\\n}}\\n\\n@Component({{\\n  selector: 'app-product-card',\\n  standalone: true,\\n  imports: [CommonModule, MatButtonModule],\\n  templateUrl: './product-card.component.html',\\n  styleUrls: ['./product-card.component.scss']\\n}})\\nexport class ProductCardComponent {{\\n  @Input() product!: Product;\\n  quantity = signal(1);\\n\\n  increment() {{\\n    this.quantity.update(val => val + 1);\\n  }}\\n\\n  decrement() {{\\n    if (this.quantity() > 1) {{\\n      this.quantity.update(val => val - 1);\\n    }}\\n  }}\\n}}",
-      "html": "<div class=\\"bg-white rounded-lg shadow-md p-4 max-w-sm\\">\\n  <img [src]=\\"product.imageUrl\\" [alt]=\\"product.name\\" class=\\"w-full h-48 object-cover rounded\\"/>\\n  <h2 class=\\"text-xl font-bold mt-2\\">{{product.name}}</h2>\\n  <p class=\\"text-gray-700 mt-1\\">{{product.price | currency}}</p>\\n  <div class=\\"flex items-center justify-between mt-4\\">\\n    <div class=\\"flex items-center\\">\\n      <button mat-icon-button (click)=\\"decrement()\\">\\n        <span class=\\"material-icons\\">remove</span>\\n      </button>\\n      <span class=\\"mx-2\\">{{quantity()}}</span>\\n      <button mat-icon-button (click)=\\"increment()\\">\\n        <span class=\\"material-icons\\">add</span>\\n      </button>\\n    </div>\\n    <button mat-raised-button color=\\"primary\\">Add to Cart</button>\\n  </div>\\n</div>",
-      "scss": "/* Additional custom styles beyond Tailwind utilities */\\n:host {{\\n  display: block;\\n}}\\n"
-    }}
-  ]
-}}
-
-Example 2 - Multiple Components:
-{{
-  "components": [
-    {{
-      "componentName": "task-dashboard",
-      "typescript": "import {{ Component, inject }} from '@angular/core';\\nimport {{ CommonModule }} from '@angular/common';\\nimport {{ MatCardModule }} from '@angular/material/card';\\nimport {{ MatButtonModule }} from '@angular/material/button';\\nimport {{ Task }} from './task.model';\\nimport {{ TaskListComponent }} from './task-list/task-list.component';\\nimport {{ TaskFormComponent }} from './task-form/task-form.component';\\n\\n@Component({{\\n  selector: 'app-task-dashboard',\\n  standalone: true,\\n  imports: [CommonModule, MatCardModule, MatButtonModule, TaskListComponent, TaskFormComponent],\\n  templateUrl: './task-dashboard.component.html',\\n  styleUrls: ['./task-dashboard.component.scss']\\n}})\\nexport class TaskDashboardComponent {{\\n  tasks: Task[] = [\\n    {{ id: 1, title: 'Learn Angular', completed: true }},\\n    {{ id: 2, title: 'Build task app', completed: false }},\\n    {{ id: 3, title: 'Deploy to production', completed: false }}\\n  ];\\n\\n  addTask(title: string) {{\\n    if (title.trim()) {{\\n      const newTask: Task = {{\\n        id: Date.now(),\\n        title: title.trim(),\\n        completed: false\\n      }};\\n      this.tasks = [...this.tasks, newTask];\\n    }}\\n  }}\\n\\n  toggleComplete(taskId: number) {{\\n    this.tasks = this.tasks.map(task => \\n      task.id === taskId ? {{ ...task, completed: !task.completed }} : task\\n    );\\n  }}\\n\\n  deleteTask(taskId: number) {{\\n    this.tasks = this.tasks.filter(task => task.id !== taskId);\\n  }}\\n}}",
-      "html": "<div class=\\"container mx-auto p-4\\">\\n  <mat-card class=\\"mb-4\\">\\n    <mat-card-header>\\n      <mat-card-title>Task Management Dashboard</mat-card-title>\\n    </mat-card-header>\\n    <mat-card-content>\\n      <app-task-form (taskAdded)=\\"addTask($event)\\"></app-task-form>\\n    </mat-card-content>\\n  </mat-card>\\n  \\n  <app-task-list\\n    [tasks]=\\"tasks\\"\\n    (taskToggled)=\\"toggleComplete($event)\\"\\n    (taskDeleted)=\\"deleteTask($event)\\">\\n  </app-task-list>\\n</div>",
-      "scss": "/* Custom styles if needed */\\n"
-    }},
-    {{
-      "componentName": "task-list",
-      "typescript": "import {{ Component, Input, Output, EventEmitter }} from '@angular/core';\\nimport {{ CommonModule }} from '@angular/common';\\nimport {{ MatListModule }} from '@angular/material/list';\\nimport {{ MatCheckboxModule }} from '@angular/material/checkbox';\\nimport {{ MatButtonModule }} from '@angular/material/button';\\nimport {{ MatIconModule }} from '@angular/material/icon';\\nimport {{ Task }} from '../task.model';\\n\\n@Component({{\\n  selector: 'app-task-list',\\n  standalone: true,\\n  imports: [CommonModule, MatListModule, MatCheckboxModule, MatButtonModule, MatIconModule],\\n  templateUrl: './task-list.component.html',\\n  styleUrls: ['./task-list.component.scss']\\n}})\\nexport class TaskListComponent {{\\n  @Input() tasks: Task[] = [];\\n  @Output() taskToggled = new EventEmitter<number>();\\n  @Output() taskDeleted = new EventEmitter<number>();\\n\\n  toggleTask(id: number) {{\\n    this.taskToggled.emit(id);\\n  }}\\n\\n  deleteTask(id: number) {{\\n    this.taskDeleted.emit(id);\\n  }}\\n\\n  trackByTaskId(index: number, task: Task): number {{\\n    return task.id;\\n  }}\\n}}",
-      "html": "<mat-list role=\\"list\\" class=\\"bg-white rounded-lg shadow\\">\\n  <div class=\\"p-4 border-b border-gray-200\\">\\n    <h2 class=\\"text-xl font-medium\\">Tasks ({{tasks.length}})</h2>\\n  </div>\\n  \\n  <mat-list-item *ngFor=\\"let task of tasks; trackBy: trackByTaskId\\" role=\\"listitem\\" class=\\"border-b border-gray-100 hover:bg-gray-50\\">\\n    <div class=\\"flex items-center justify-between w-full p-2\\">\\n      <div class=\\"flex items-center\\">\\n        <mat-checkbox\\n          [checked]=\\"task.completed\\"\\n          (change)=\\"toggleTask(task.id)\\"\\n          color=\\"primary\\">\\n        </mat-checkbox>\\n        <span class=\\"ml-2\\" [class.line-through]=\\"task.completed\\" [class.text-gray-500]=\\"task.completed\\">\\n          {{task.title}}\\n        </span>\\n      </div>\\n      <button mat-icon-button (click)=\\"deleteTask(task.id)\\" aria-label=\\"Delete task\\">\\n        <mat-icon>delete</mat-icon>\\n      </button>\\n    </div>\\n  </mat-list-item>\\n  \\n  <div *ngIf=\\"tasks.length === 0\\" class=\\"p-4 text-center text-gray-500\\">\\n    No tasks available. Add one above!\\n  </div>\\n</mat-list>",
-      "scss": "/* Additional styles if needed */\\n"
-    }},
-    {{
-      "componentName": "task-form",
-      "typescript": "import {{ Component, Output, EventEmitter }} from '@angular/core';\\nimport {{ CommonModule }} from '@angular/common';\\nimport {{ FormsModule }} from '@angular/forms';\\nimport {{ MatInputModule }} from '@angular/material/input';\\nimport {{ MatButtonModule }} from '@angular/material/button';\\nimport {{ MatFormFieldModule }} from '@angular/material/form-field';\\n\\n@Component({{\\n  selector: 'app-task-form',\\n  standalone: true,\\n  imports: [CommonModule, FormsModule, MatInputModule, MatButtonModule, MatFormFieldModule],\\n  templateUrl: './task-form.component.html',\\n  styleUrls: ['./task-form.component.scss']\\n}})\\nexport class TaskFormComponent {{\\n  @Output() taskAdded = new EventEmitter<string>();\\n  newTaskTitle = '';\\n\\n  addTask() {{\\n    this.taskAdded.emit(this.newTaskTitle);\\n    this.newTaskTitle = '';\\n  }}\\n}}",
-      "html": "<form (ngSubmit)=\\"addTask()\\" class=\\"flex gap-2\\">\\n  <mat-form-field class=\\"flex-grow\\">\\n    <mat-label>New Task</mat-label>\\n    <input matInput [(ngModel)]=\\"newTaskTitle\\" name=\\"title\\" placeholder=\\"Enter task title\\" required>\\n  </mat-form-field>\\n  <button mat-raised-button color=\\"primary\\" type=\\"submit\\" [disabled]=\\"!newTaskTitle.trim()\\">\\n    Add Task\\n  </button>\\n</form>",
-      "scss": "/* Additional styles if needed */\\n"
-    }}
-  ],
-  "routing": [
-    {{ "path": "", "componentName": "task-dashboard" }}
-  ]
-}}
-
-UI Description:
-{description}
-
-{color_section}
-{ui_structure_hints}
-"""
+        Returns:
+            Tuple of (static_prefix, dynamic_suffix)
+        """
+        # Retrieve examples with the full description, before it is compacted
+        if examples is None:
+            examples = select_examples(description, provider)
+        
+        # Keep large Figma specs and verbose vision descriptions within budget
+        description = compact_text(description, settings.PROMPT_DESCRIPTION_TOKEN_BUDGET, provider)
+        
+        # The static prefix is built once; only the suffix depends on the request
+        dynamic_suffix = build_dynamic_suffix(description, color_hints, examples)
+        metrics.observe(
+            "prompt_tokens",
+            estimate_tokens(STATIC_PROMPT_PREFIX + dynamic_suffix, provider),
+            provider=provider or "unknown"
+        )
+        return STATIC_PROMPT_PREFIX, dynamic_suffix
     
-    async def _generate_with_openai(self, description: str) -> Dict[str, Any]:
+    async def _generate_single(self, provider: str, description: str, color_hints: list = None) -> Dict[str, Any]:
         """
-        Generate Angular component code using OpenAI.
+        Generate every component of a description with one provider request.
+        
+        Invalid components are repaired (see `_repair_invalid_components`). If no
+        component can be parsed from the response, providers that `retries_invalid_output`
+        get one retry with a simplified prompt (unless the request was downgraded by a token
+        budget); otherwise a fallback component describing the error is returned.
         
         Args:
+            provider: The provider name
             description: The UI description to generate code for
+            color_hints: Optional list of colors extracted from the uploaded image
             
         Returns:
             Dictionary containing the generated code components
         """
+        adapter = self.providers.get(provider)
         try:
-            # Create an appropriate prompt for OpenAI
-            prompt = self._create_prompt(description)
-            
-            # Call OpenAI API
-            response = self.openai_client.chat.completions.create(
-                model=settings.OPENAI_MODEL,
-                messages=[
-                    {"role": "system", "content": "You are an expert Angular developer who specializes in creating components from UI descriptions."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=4000
-            )
+            # The example index may load its JSONL file and waits on its lock, so it is queried off the event loop
+            examples = await asyncio.to_thread(select_examples, description, provider)
+            static_prefix, dynamic_suffix = self._create_prompt_parts(description, color_hints, provider=provider, examples=examples)
+            output = await self._call_provider(provider, static_prefix, dynamic_suffix)
             
-            # Extract content from the response
-            content = response.choices[0].message.content
-            
-            # Parse and validate the response
+            # Parse and validate the response, then repair any invalid components
             try:
-                return self._parse_ai_response(content)
+                return await self._repair_invalid_components(self._parse_provider_output(output), provider)
             except ValueError as e:
-                print(f"Validation error with OpenAI response: {str(e)}")
+                print(f"Validation error with {adapter.display_name} response: {str(e)}")
+                metrics.increment("generation_parse_failures", provider=provider)
+                if adapter.retries_invalid_output and not current_usage().downgraded:
+                    return await self._retry_simplified_generation(provider, description, str(e))
                 # If the parser detected invalid JSON format, try a simpler fallback structure
                 return self._generate_fallback_component(str(e))
                 
+        except BudgetExceeded:
+            raise
         except Exception as e:
-            print(f"Error generating code with OpenAI: {str(e)}")
-            return self._generate_fallback_component(f"OpenAI API error: {str(e)}")
+            print(f"Error generating code with {adapter.display_name}: {str(e)}")
+            return self._generate_fallback_component(f"{adapter.display_name} API error: {str(e)}")
     
-    async def _generate_with_anthropic(self, description: str) -> Dict[str, Any]:
+    async def _call_provider(self, provider: str, static_prefix: str, dynamic_suffix: str, max_tokens: Optional[int] = None, output_format: str = "components") -> Any:
         """
-        Generate Angular component code using Anthropic's Claude.
+        Send a prompt to the named provider.
+        
+        Structured output (STRUCTURED_OUTPUT_ENABLED) and prefix caching
+        (PROMPT_CACHING_ENABLED) are requested from providers whose capabilities support
+        them. The call is counted against the request's token budgets first (see
+        `app.core.usage`), which picks the model tier, and its token and prompt cache
+        usage is recorded.
         
         Args:
-            description: The UI description to generate code for
+            provider: The provider name
+            static_prefix: The cacheable prompt prefix
+            dynamic_suffix: The request-specific prompt suffix
+            max_tokens: Maximum number of tokens to generate; None for GENERATION_MAX_TOKENS
+            output_format: Key of OUTPUT_FORMATS the response is constrained to
             
         Returns:
-            Dictionary containing the generated code components
+            The provider output (response text, or a decoded payload)
+            
+        Raises:
+            BudgetExceeded: If a token budget is exceeded and BUDGET_ACTION is "reject"
         """
+        adapter = self.providers.get(provider)
+        capabilities = adapter.capabilities
+        structured = settings.STRUCTURED_OUTPUT_ENABLED and capabilities.json_mode
+        cache_prefix = settings.PROMPT_CACHING_ENABLED and capabilities.prompt_caching != "none"
+        max_tokens = max_tokens or settings.GENERATION_MAX_TOKENS
+        metrics.increment("generation_requests", provider=provider, structured=structured)
+        
+        usage = current_usage()
+        reserved = estimate_tokens(static_prefix + dynamic_suffix, provider) + max_tokens
+        tier = usage.reserve(reserved)
         try:
-            # Create an appropriate prompt for Anthropic
-            prompt = self._create_prompt(description)
-            
-            # Call Anthropic API
-            response = self.anthropic_client.messages.create(
-                model=settings.ANTHROPIC_MODEL,
-                max_tokens=4000,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
+            response = await adapter.generate(static_prefix, dynamic_suffix, max_tokens, output_format, structured, cache_prefix, tier=tier)
+        except BaseException:
+            # A failed or cancelled call must not keep its tokens reserved
+            usage.release(reserved)
+            raise
+        record_prompt_cache_usage(provider, response.cached_tokens, response.cache_write_tokens)
+        usage.record(provider, TokenUsage(response.input_tokens, response.output_tokens, response.cached_tokens), reserved)
+        return response.output
+    
+    def _parse_provider_output(self, output: Any) -> Dict[str, Any]:
+        """
+        Convert a provider output into the result dictionary.
+        
+        Args:
+            output: Response text, or an already decoded payload (structured output)
             
-            # Extract content from the response
-            content = response.content[0].text
+        Returns:
+            Dictionary with the generated components
             
-            # Parse and validate the response
-            try:
-                return self._parse_ai_response(content)
-            except ValueError as e:
-                print(f"Validation error with Anthropic response: {str(e)}")
-                # If the parser detected invalid JSON format, try a simpler fallback structure
-                return self._generate_fallback_component(str(e))
-                
-        except Exception as e:
-            print(f"Error generating code with Anthropic: {str(e)}")
-            return self._generate_fallback_component(f"Anthropic API error: {str(e)}")
+        Raises:
+            ValueError: If no components can be extracted
+        """
+        if isinstance(output, dict):
+            return self._build_result_from_payload(output)
+        return self._parse_ai_response(output)
     
-    async def _generate_with_gemini(self, description: str, color_hints: list = None) -> Dict[str, Any]:
+    async def _repair_invalid_components(self, result: Dict[str, Any], provider: str) -> Dict[str, Any]:
         """
-        Generate Angular component code using Google's Gemini.
+        Validate each generated component and regenerate only the invalid ones.
+        
+        Invalid components are sent back to the provider together with their problems,
+        with the valid components summarized as context, for up to
+        COMPONENT_REPAIR_MAX_ATTEMPTS rounds (none once the request was downgraded by a
+        token budget). Valid components are never regenerated.
+        Components that are still unusable afterwards (not an object, or missing a
+        required key) are dropped; other remaining problems are kept as they are.
         
         Args:
-            description: The UI description to generate code for
-            color_hints: Optional list of colors extracted from the uploaded image
+            result: The parsed result dictionary
+            provider: The provider that generated the result
             
         Returns:
-            Dictionary containing the generated code components
-        """
-        try:
-            # Get the Gemini model with optimized settings
-            model = genai.GenerativeModel(
-                self.gemini_model,
-                # Safety settings could be configured here if needed
-            )
+            The result dictionary with repaired components
             
-            # Create detailed prompt with color hints
-            prompt = self._create_prompt(description, color_hints)
+        Raises:
+            ValueError: If no usable component remains
+        """
+        components = list(result["components"])
+        problems = validate_components(components)
+        if problems:
+            metrics.increment("component_validation_failures", len(problems), provider=provider)
+        
+        for _attempt in range(settings.COMPONENT_REPAIR_MAX_ATTEMPTS):
+            if not problems or current_usage().downgraded:
+                break
+            valid = [component for index, component in enumerate(components) if index not in problems]
+            broken_indexes = list(problems)
+            repair_suffix = build_repair_suffix(valid, [(components[index], problems[index]) for index in broken_indexes])
+            metrics.observe("repair_prompt_tokens", estimate_tokens(STATIC_PROMPT_PREFIX + repair_suffix, provider), provider=provider)
+            metrics.increment("component_repair_requests", provider=provider)
             
-            # Process with Gemini
-            response = model.generate_content(prompt)
+            try:
+                repaired = self._parse_provider_output(await self._call_provider(provider, STATIC_PROMPT_PREFIX, repair_suffix))["components"]
+            except BudgetExceeded:
+                raise
+            except Exception as e:
+                print(f"Component repair with {provider} failed: {str(e)}")
+                break
             
-            # Extract the text response
-            response_text = response.text
+            for index, component in self._match_repaired_components(components, broken_indexes, repaired).items():
+                remaining = validate_component(component)
+                if not remaining:
+                    components[index] = component
+                    del problems[index]
+                    metrics.increment("component_repairs", provider=provider, outcome="repaired")
+                elif len(remaining) < len(problems[index]):
+                    # Partially fixed: keep the better version and try again next round
+                    components[index] = component
+                    problems[index] = remaining
+        
+        if problems:
+            metrics.increment("component_repairs", len(problems), provider=provider, outcome="failed")
+            print(f"{len(problems)} generated component(s) still invalid after repair: {problems}")
+        
+        usable = [
+            component for component in components
+            if isinstance(component, dict) and all(isinstance(component.get(key), str) for key in REQUIRED_COMPONENT_KEYS)
+        ]
+        if not usable:
+            raise ValueError("No valid components in the response")
+        
+        repaired_result = dict(result)
+        repaired_result.update({
+            "components": usable,
+            "component_name": usable[0]["componentName"],
+            "component_ts": usable[0]["typescript"],
+            "component_html": usable[0]["html"],
+            "component_scss": usable[0]["scss"]
+        })
+        return repaired_result
+    
+    def _match_repaired_components(self, components: List[Any], broken_indexes: List[int], repaired: List[Any]) -> Dict[int, Any]:
+        """
+        Match components returned by a repair request to the indexes they replace.
+        
+        Components are matched by componentName first; the rest are assigned to the
+        remaining broken indexes in order.
+        
+        Args:
+            components: The current components
+            broken_indexes: Indexes of the components that were sent for repair
+            repaired: Components returned by the repair request
             
-            # Parse and validate the response
-            try:
-                return self._parse_ai_response(response_text)
-            except ValueError as e:
-                print(f"Validation error with Gemini response: {str(e)}")
-                # Retry with a simpler prompt if validation fails
-                return await self._retry_gemini_generation(description, str(e))
-                
-        except Exception as e:
-            print(f"Error generating code with Gemini: {str(e)}")
-            return self._generate_fallback_component(f"Gemini API error: {str(e)}")
+        Returns:
+            Mapping of component index to its repaired version
+        """
+        by_name = {}
+        for index in broken_indexes:
+            if isinstance(components[index], dict) and isinstance(components[index].get("componentName"), str):
+                by_name.setdefault(components[index]["componentName"], index)
+        
+        matched = {}
+        unmatched = []
+        for component in repaired:
+            name = component.get("componentName") if isinstance(component, dict) else None
+            index = by_name.get(name) if isinstance(name, str) else None
+            if index is not None and index not in matched:
+                matched[index] = component
+            else:
+                unmatched.append(component)
+        
+        free_indexes = [index for index in broken_indexes if index not in matched]
+        matched.update(zip(free_indexes, unmatched))
+        return matched
             
-    async def _retry_gemini_generation(self, description: str, error_message: str) -> Dict[str, Any]:
+    async def _retry_simplified_generation(self, provider: str, description: str, error_message: str) -> Dict[str, Any]:
         """
-        Retry code generation with Gemini using a simplified prompt.
+        Retry code generation using a simplified prompt.
         
         Args:
+            provider: The provider name
             description: The UI description to generate code for
             error_message: The error message from the previous attempt
             
         Returns:
             Dictionary containing the generated code components
         """
+        metrics.increment("generation_retries", provider=provider)
         try:
-            # Get the Gemini model
-            model = genai.GenerativeModel(self.gemini_model)
-            
             # Create a simplified prompt focused on a single component
+            description = compact_text(description, settings.PROMPT_DESCRIPTION_TOKEN_BUDGET, provider)
             simplified_prompt = f"""
 Previous attempt failed with error: {error_message}
 
@@ -533,16 +716,18 @@ The response should be in this format:
 Ensure all fields are properly formatted strings and the structure is valid JSON.
 """
             
-            # Process with Gemini
-            response = model.generate_content(simplified_prompt)
+            # The prompt has no static prefix, so it is sent whole and uncached
+            output = await self._call_provider(provider, "", simplified_prompt)
             
             # Extract and parse the response
             try:
-                return self._parse_ai_response(response.text)
+                return await self._repair_invalid_components(self._parse_provider_output(output), provider)
             except ValueError as e:
                 print(f"Validation still failed after retry: {str(e)}")
                 return self._generate_fallback_component("Failed to generate valid component after retry")
-                
+
+        except BudgetExceeded:
+            raise
         except Exception as e:
             print(f"Error in retry generation: {str(e)}")
             return self._generate_fallback_component(f"Retry generation error: {str(e)}")
@@ -557,6 +742,7 @@ Ensure all fields are properly formatted strings and the structure is valid JSON
         Returns:
             Dictionary containing a basic fallback component
         """
+        metrics.increment("generation_fallbacks")
         sanitized_error = error_message.replace('"', "'").replace('\n', ' ')
         
         component = {
@@ -601,6 +787,11 @@ export class ErrorComponent {{
         Parse the AI response to extract TypeScript, HTML, and SCSS code blocks.
         This method has been updated to handle the new JSON format for the full Angular project generation.
         
+        The response is scanned once (see app.utils.response_parser.scan_response). Candidate
+        JSON payloads are tried in order: ```json fenced blocks, then balanced objects that
+        mention "components", then the whole text. If none is a valid components payload,
+        code blocks from the same scan are used instead.
+        
         Args:
             response_text: The raw text response from the AI
             
@@ -608,102 +799,117 @@ export class ErrorComponent {{
             Dictionary with component_ts, component_html, component_scss, component_name, 
             components array, and routing information
         """
-        try:
-            # First try to parse the entire response as JSON
-            import json
-            import re
-            
-            # Clean up the response text in case there's markdown or explanatory text
-            # Look for JSON blocks in the response
-            json_match = re.search(r'```json\s*(.+?)\s*```', response_text, re.DOTALL)
-            if json_match:
-                json_content = json_match.group(1)
-            else:
-                # Try to find just a raw JSON object
-                json_match = re.search(r'(\{\s*"components"\s*:.+\})', response_text, re.DOTALL)
-                if json_match:
-                    json_content = json_match.group(1)
-                else:
-                    json_content = response_text  # Assume the entire response might be JSON
-            
-            # Try to parse the JSON
+        scan = scan_response(response_text)
+        
+        for parsed_data in self._decode_json_candidates(response_text, scan):
             try:
-                parsed_data = json.loads(json_content)
-                
-                # Validate the expected structure: must have 'components' array
-                if 'components' not in parsed_data or not isinstance(parsed_data['components'], list) or len(parsed_data['components']) == 0:
-                    raise ValueError("Invalid JSON structure: missing or empty 'components' array")
-                
-                # Extract the components
-                components = parsed_data['components']
-                primary_component = components[0]  # First component is primary
-                
-                # Validate required properties in the primary component
-                required_props = ['componentName', 'typescript', 'html', 'scss']
-                for prop in required_props:
-                    if prop not in primary_component:
-                        raise ValueError(f"Primary component missing required property: {prop}")
-                
-                # Set up the result dictionary with primary component data
-                result = {
-                    'component_name': primary_component['componentName'],
-                    'component_ts': primary_component['typescript'],
-                    'component_html': primary_component['html'],
-                    'component_scss': primary_component['scss'],
-                    'components': components
-                }
-                
-                # Add routing information if available
-                if 'routing' in parsed_data and isinstance(parsed_data['routing'], list):
-                    result['routing'] = parsed_data['routing']
-                
-                return result
-                
-            except json.JSONDecodeError:
-                # If JSON parsing failed, fall back to the regular parsing method
-                return self._extract_code_blocks_fallback(response_text)
-                
-        except Exception as e:
-            # Fall back to the original parsing method if any exception occurs
-            print(f"Error parsing JSON response: {str(e)}")
-            return self._extract_code_blocks_fallback(response_text)
+                return self._build_result_from_payload(parsed_data)
+            except ValueError as e:
+                print(f"Error parsing JSON response: {str(e)}")
+        
+        # Fall back to extracting individual code blocks from the same scan
+        return self._extract_code_blocks_fallback(response_text, scan)
+    
+    def _decode_json_candidates(self, response_text: str, scan: ScanResult) -> Iterator[Any]:
+        """
+        Decode the candidate JSON payloads of a response, in order of preference.
+        
+        Candidates are ```json fenced blocks, then balanced objects that mention
+        "components", then (if there are no other candidates) the whole text.
+        
+        Args:
+            response_text: The raw text response from the AI
+            scan: Result of scanning the response
+            
+        Returns:
+            Iterator over the candidates that are valid JSON
+        """
+        candidates = [block.content for block in scan.fenced_blocks if block.language in ("json", "")]
+        candidates.extend(obj for obj in scan.json_objects if '"components"' in obj)
+        if not candidates:
+            candidates.append(response_text)  # Assume the entire response might be JSON
+        
+        for json_content in candidates:
+            try:
+                yield json.loads(json_content)
+            except (json.JSONDecodeError, RecursionError):
+                # RecursionError: pathologically nested (usually truncated) input
+                continue
+    
+    def _build_result_from_payload(self, parsed_data: Any) -> Dict[str, Any]:
+        """
+        Validate a decoded components payload and convert it to the result dictionary.
+        
+        Args:
+            parsed_data: The decoded JSON payload
+            
+        Returns:
+            Dictionary with component_ts, component_html, component_scss, component_name,
+            components array, and routing information
+            
+        Raises:
+            ValueError: If the payload does not have the expected structure
+        """
+        # Validate the expected structure: must have 'components' array
+        if not isinstance(parsed_data, dict) or not isinstance(parsed_data.get('components'), list) or len(parsed_data['components']) == 0:
+            raise ValueError("Invalid JSON structure: missing or empty 'components' array")
+        
+        # Extract the components; per-component problems are left to _repair_invalid_components
+        components = parsed_data['components']
+        primary_component = components[0] if isinstance(components[0], dict) else {}  # First component is primary
+        
+        # Set up the result dictionary with primary component data
+        result = {
+            'component_name': primary_component.get('componentName', ''),
+            'component_ts': primary_component.get('typescript', ''),
+            'component_html': primary_component.get('html', ''),
+            'component_scss': primary_component.get('scss', ''),
+            'components': components
+        }
+        
+        # Add routing information if available
+        if 'routing' in parsed_data and isinstance(parsed_data['routing'], list):
+            result['routing'] = parsed_data['routing']
+        
+        return result
 
-    def _extract_code_blocks_fallback(self, response_text: str) -> Dict[str, Any]:
+    def _extract_code_blocks_fallback(self, response_text: str, scan: Optional[ScanResult] = None) -> Dict[str, Any]:
         """
         Extract code blocks from the response text using traditional methods.
         
         Args:
             response_text: The raw response from the AI service
+            scan: Result of scanning the response, if already available
             
         Returns:
             Dictionary containing the extracted component code
+            
+        Raises:
+            ValueError: If the response contains neither a components payload nor any code block
         """
-        import re
-        
-        # Extract code blocks using regex patterns
-        component_ts_pattern = r"```(?:typescript|ts)\s*([\s\S]*?)```"
-        component_html_pattern = r"```(?:html)\s*([\s\S]*?)```"
-        component_scss_pattern = r"```(?:scss|css)\s*([\s\S]*?)```"
+        if scan is None:
+            scan = scan_response(response_text)
         
-        # Find matches
-        ts_matches = re.findall(component_ts_pattern, response_text)
-        html_matches = re.findall(component_html_pattern, response_text)
-        scss_matches = re.findall(component_scss_pattern, response_text)
+        # Take the first block of each language
+        blocks_by_language = {}
+        for block in scan.fenced_blocks:
+            blocks_by_language.setdefault(block.language, block.content)
         
         # Set default values
-        component_ts = ts_matches[0] if ts_matches else ""
-        component_html = html_matches[0] if html_matches else ""
-        component_scss = scss_matches[0] if scss_matches else ""
+        component_ts = blocks_by_language.get("typescript", blocks_by_language.get("ts", ""))
+        component_html = blocks_by_language.get("html", "")
+        component_scss = blocks_by_language.get("scss", blocks_by_language.get("css", ""))
+        if not (component_ts or component_html or component_scss):
+            raise ValueError("Response contains no components JSON and no code blocks")
         
         # Extract component name from the TypeScript content
         component_name = "generated-component"
         if component_ts:
             # Try to extract component name from the class declaration
-            class_pattern = r"export\s+class\s+(\w+)"
-            class_matches = re.findall(class_pattern, component_ts)
-            if class_matches:
+            class_match = _CLASS_NAME_PATTERN.search(component_ts)
+            if class_match:
                 # Convert from PascalCase to kebab-case
-                component_name = re.sub(r'(?<!^)(?=[A-Z])', '-', class_matches[0]).lower()
+                component_name = _PASCAL_BOUNDARY_PATTERN.sub('-', class_match.group(1)).lower()
                 if component_name.endswith("-component"):
                     component_name = component_name[:-10]  # Remove "-component" suffix
         
@@ -722,4 +928,4 @@ export class ErrorComponent {{
             "component_scss": component_scss,
             "component_name": component_name,
             "components": [component]  # Include the components array
-        } 
\ No newline at end of file
+        } 
@@ -0,0 +1,155 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.utils.component_validation import rename_component, validate_component
+from app.utils.jsonl_store import append_jsonl, read_jsonl
+from app.utils.minhash import MinHashLSH, minhash_signature, shingles
+from app.utils.structural_signature import find_description_section, structural_signature
+
+# Signatures with fewer word shingles match unrelated components too easily
+MIN_SIGNATURE_SHINGLES = 12
+
+
+class ComponentCacheService:
+    """
+    Library of previously generated components, looked up by structural similarity.
+
+    Components are keyed by a signature text (the structure of the description section
+    they implement plus the color palette) and indexed with MinHash LSH over its word shingles, so a header, nav
+    bar or login form that was generated for one project is reused for the next one
+    instead of being regenerated. The library is shared by the whole process, bounded to
+    COMPONENT_CACHE_MAX_ENTRIES (least recently used entries are evicted) and, when
+    COMPONENT_CACHE_PATH is set, persisted as JSON lines.
+
+    Reused components keep the text and branding of the project they were generated for,
+    so the library is disabled by default and meant for single-tenant deployments.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: Optional[int] = None, similarity_threshold: Optional[float] = None):
+        self.path = settings.COMPONENT_CACHE_PATH if path is None else path
+        self.max_entries = settings.COMPONENT_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.similarity_threshold = settings.COMPONENT_CACHE_SIMILARITY if similarity_threshold is None else similarity_threshold
+        self._lock = threading.Lock()
+        self._index = MinHashLSH()
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._next_id = 0
+        self._loaded = False
+
+    def lookup(self, signature_text: str, component_name: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        """
+        Find a cached component similar to the requested one.
+
+        Args:
+            signature_text: Structural signature of the component to generate
+            component_name: componentName the reused component should get
+
+        Returns:
+            Tuple of (component renamed to component_name, estimated similarity), or None
+        """
+        signature = minhash_signature(shingles(signature_text))
+        with self._lock:
+            self._load()
+            matches = self._index.query(signature, self.similarity_threshold)
+            if not matches:
+                metrics.increment("component_cache_lookups", hit=False)
+                return None
+            entry_id, similarity = matches[0]
+            self._entries.move_to_end(entry_id)
+            component = self._entries[entry_id]["component"]
+
+        metrics.increment("component_cache_lookups", hit=True)
+        return rename_component(component, component_name), similarity
+
+    def store(self, signature_text: str, component: Dict[str, Any]) -> bool:
+        """
+        Add a generated component to the library.
+
+        Only valid components are stored; a component whose signature duplicates an
+        existing entry replaces it.
+
+        Args:
+            signature_text: Structural signature of the component
+            component: The generated component
+
+        Returns:
+            True if the component was stored
+        """
+        if validate_component(component):
+            return False
+        signature = minhash_signature(shingles(signature_text))
+        with self._lock:
+            self._load()
+            self._add(signature_text, signature, component)
+            if self.path:
+                append_jsonl(self.path, {"signature_text": signature_text, "component": component})
+            metrics.set_gauge("component_cache_entries", len(self._entries))
+        return True
+
+    def clear(self) -> None:
+        """Remove every entry from memory (the file at COMPONENT_CACHE_PATH is left untouched)."""
+        with self._lock:
+            self._index = MinHashLSH()
+            self._entries.clear()
+            self._loaded = True
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _add(self, signature_text: str, signature: Tuple[int, ...], component: Dict[str, Any]) -> None:
+        """Index an entry, replacing an identical signature and evicting the least recently used."""
+        for entry_id, _similarity in self._index.query(signature, 1.0):
+            self._index.remove(entry_id)
+            del self._entries[entry_id]
+
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = {"signature_text": signature_text, "component": component}
+        self._index.insert(entry_id, signature)
+
+        while len(self._entries) > self.max_entries:
+            evicted_id, _entry = self._entries.popitem(last=False)
+            self._index.remove(evicted_id)
+
+    def _load(self) -> None:
+        """Load the persisted library on first use."""
+        if self._loaded:
+            return
+        self._loaded = True
+        for record in read_jsonl(self.path):
+            signature_text, component = record.get("signature_text"), record.get("component")
+            if isinstance(signature_text, str) and not validate_component(component):
+                self._add(signature_text, minhash_signature(shingles(signature_text)), component)
+        metrics.set_gauge("component_cache_entries", len(self._entries))
+
+
+# Process-wide component library shared by every CodeGenerator
+component_cache = ComponentCacheService()
+
+
+def component_signature_text(description: str, component_plan: Dict[str, Any], color_hints: Optional[list] = None) -> Optional[str]:
+    """
+    Build the signature text a planned component is cached under.
+
+    The signature is the structure of the description section the component implements
+    (the Figma subtree or vision description section), without its text content, plus
+    the color palette. Components whose section cannot be found, or whose signature is
+    too short to be told apart from unrelated components, are not cached.
+
+    Args:
+        description: The UI description the plan was made from
+        component_plan: The plan entry with `componentName` and `purpose`
+        color_hints: Optional colors extracted from the uploaded image
+
+    Returns:
+        Text whose shingles identify the component, or None if it should not be cached
+    """
+    section = find_description_section(description, component_plan["componentName"], component_plan.get("purpose", ""))
+    if section is None:
+        return None
+    signature_text = structural_signature(section)
+    if len(shingles(signature_text)) < MIN_SIGNATURE_SHINGLES:
+        return None
+    palette = " ".join(sorted(str(color.get("hex") if isinstance(color, dict) else color).lower() for color in color_hints or []))
+    return f"{signature_text}\npalette {palette}" if palette else signature_text
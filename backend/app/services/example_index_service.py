@@ -0,0 +1,178 @@
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.utils.jsonl_store import append_jsonl, read_jsonl, write_jsonl
+from app.utils.minhash import NUM_PERMUTATIONS, MinHashLSH, minhash_signature, shingles
+from app.utils.token_budget import estimate_tokens
+
+# Characters of the UI description kept with each example, for display in prompts
+DESCRIPTION_EXCERPT_CHARS = 1200
+
+# Similarity above which a new example replaces an existing one instead of being added
+DUPLICATE_SIMILARITY = 0.95
+
+# The persisted file is rewritten once it holds this many times more records than the
+# index (replaced and evicted examples are only dropped from memory when added)
+COMPACTION_FACTOR = 2
+
+
+class ExampleIndexService:
+    """
+    Index of previously accepted generations, used to pick few-shot examples per request.
+
+    Each example is a UI description excerpt with the components/routing JSON that was
+    accepted for it. Examples are indexed by the MinHash signature of the full description,
+    so the most similar past generations are found with an LSH lookup instead of a scan.
+    The index is bounded to FEW_SHOT_MAX_EXAMPLES (least recently used examples are
+    evicted) and, when FEW_SHOT_INDEX_PATH is set, persisted as JSON lines with the
+    signatures so it loads without re-hashing. New examples are appended to the file,
+    which is rewritten with only the live examples once replaced and evicted ones make up
+    most of it. `add` does file I/O, so async callers run it in a worker thread.
+
+    Examples keep the text and branding of the project they were generated for, so
+    few-shot prompting is disabled by default and meant for single-tenant deployments.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_examples: Optional[int] = None, min_similarity: Optional[float] = None):
+        self.path = settings.FEW_SHOT_INDEX_PATH if path is None else path
+        self.max_examples = settings.FEW_SHOT_MAX_EXAMPLES if max_examples is None else max_examples
+        self.min_similarity = settings.FEW_SHOT_MIN_SIMILARITY if min_similarity is None else min_similarity
+        self._lock = threading.Lock()
+        self._index = MinHashLSH()
+        self._examples: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._signatures: Dict[int, Tuple[int, ...]] = {}
+        self._file_records = 0
+        self._next_id = 0
+        self._loaded = False
+
+    def add(self, description: str, result: Dict[str, Any]) -> None:
+        """
+        Add an accepted generation to the index.
+
+        Args:
+            description: The full UI description the generation was made for
+            result: The accepted result with `components` and optional `routing`
+        """
+        signature = minhash_signature(shingles(description))
+        example = {
+            "description": description[:DESCRIPTION_EXCERPT_CHARS],
+            "output": {"components": result["components"], "routing": result.get("routing", [])}
+        }
+        with self._lock:
+            self._load()
+            self._add(signature, example)
+            if self.path:
+                append_jsonl(self.path, {"signature": list(signature), **example})
+                self._file_records += 1
+                self._compact_if_needed()
+            metrics.set_gauge("few_shot_examples", len(self._examples))
+
+    def find_similar(self, description: str, limit: int = 2) -> List[Tuple[Dict[str, Any], float]]:
+        """
+        Find the past generations most similar to a UI description.
+
+        Args:
+            description: The UI description of the current request
+            limit: Maximum number of examples to return
+
+        Returns:
+            (example, similarity) pairs, most similar first; each example has
+            `description` (an excerpt) and `output` keys
+        """
+        signature = minhash_signature(shingles(description))
+        with self._lock:
+            self._load()
+            matches = self._index.query(signature, self.min_similarity)[:limit]
+            for example_id, _similarity in matches:
+                self._examples.move_to_end(example_id)
+            examples = [(self._examples[example_id], similarity) for example_id, similarity in matches]
+
+        metrics.increment("few_shot_lookups", hit=bool(examples))
+        return examples
+
+    def clear(self) -> None:
+        """Remove every example from memory (the file at FEW_SHOT_INDEX_PATH is left untouched)."""
+        with self._lock:
+            self._index = MinHashLSH()
+            self._examples.clear()
+            self._signatures.clear()
+            self._loaded = True
+
+    def __len__(self) -> int:
+        return len(self._examples)
+
+    def _add(self, signature: Tuple[int, ...], example: Dict[str, Any]) -> None:
+        """Index an example, replacing near-duplicates and evicting the least recently used."""
+        for example_id, _similarity in self._index.query(signature, DUPLICATE_SIMILARITY):
+            self._index.remove(example_id)
+            del self._examples[example_id]
+            del self._signatures[example_id]
+
+        example_id = self._next_id
+        self._next_id += 1
+        self._examples[example_id] = example
+        self._signatures[example_id] = signature
+        self._index.insert(example_id, signature)
+
+        while len(self._examples) > self.max_examples:
+            evicted_id, _example = self._examples.popitem(last=False)
+            del self._signatures[evicted_id]
+            self._index.remove(evicted_id)
+
+    def _compact_if_needed(self) -> None:
+        """Rewrite the persisted file with only the live examples once it is mostly stale."""
+        if self._file_records <= COMPACTION_FACTOR * max(len(self._examples), 1):
+            return
+        write_jsonl(self.path, (
+            {"signature": list(self._signatures[example_id]), **example}
+            for example_id, example in self._examples.items()
+        ))
+        self._file_records = len(self._examples)
+        metrics.increment("few_shot_index_compactions")
+
+    def _load(self) -> None:
+        """Build the index from the persisted examples on first use."""
+        if self._loaded:
+            return
+        self._loaded = True
+        for record in read_jsonl(self.path):
+            self._file_records += 1
+            signature = record.get("signature")
+            if not isinstance(signature, list) or len(signature) != NUM_PERMUTATIONS or not isinstance(record.get("output"), dict):
+                continue
+            self._add(tuple(signature), {"description": str(record.get("description", "")), "output": record["output"]})
+        if self.path:
+            self._compact_if_needed()
+        metrics.set_gauge("few_shot_examples", len(self._examples))
+
+
+# Process-wide example index shared by every CodeGenerator
+example_index = ExampleIndexService()
+
+
+def select_examples(description: str, provider: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Pick the few-shot examples for a request within FEW_SHOT_TOKEN_BUDGET.
+
+    Args:
+        description: The UI description of the current request
+        provider: The provider the prompt is built for, used for token estimation
+
+    Returns:
+        Up to FEW_SHOT_EXAMPLES examples, most similar first
+    """
+    if not settings.FEW_SHOT_ENABLED or settings.FEW_SHOT_EXAMPLES <= 0:
+        return []
+
+    selected = []
+    remaining = settings.FEW_SHOT_TOKEN_BUDGET
+    for example, _similarity in example_index.find_similar(description, settings.FEW_SHOT_EXAMPLES):
+        # Skip examples that would not fit rather than truncating their JSON
+        size = estimate_tokens(example["description"] + json.dumps(example["output"]), provider)
+        if size <= remaining:
+            selected.append(example)
+            remaining -= size
+    return selected
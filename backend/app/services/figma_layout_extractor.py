@@ -0,0 +1,269 @@
+from typing import Dict, Any, List, Optional, Tuple
+from app.core.config import settings
+from app.utils.figma_traversal import walk_figma_nodes, LIMIT_REACHED
+from app.utils.token_budget import collapse_repeated_blocks
+
+# Node types whose children are drawing primitives rather than UI structure
+OPAQUE_NODE_TYPES = {"VECTOR", "BOOLEAN_OPERATION", "STAR", "LINE", "ELLIPSE", "REGULAR_POLYGON"}
+
+# Rough characters-per-token ratio used to keep the spec within its budget
+CHARS_PER_TOKEN = 4
+
+# How much more than the budget is rendered before repeated subtrees are collapsed
+COLLECT_FACTOR = 4
+
+
+class FigmaLayoutExtractor:
+    """
+    Builds a compact, structured layout spec from a Figma node tree.
+
+    The spec lists one line per visible node (indented by nesting) with its auto-layout
+    direction, spacing, padding, alignment, sizing, fills, text style and constraints.
+    Colors and text styles are deduplicated into `$c`/`$t` tokens defined once at the end,
+    repeated sibling subtrees (list items, card grids) are collapsed, and the output is
+    cut off at a token budget so prompts stay small on large files.
+    """
+
+    def extract(
+        self,
+        roots: List[Dict[str, Any]],
+        component_definitions: Optional[Dict[str, Any]] = None,
+        warnings: Optional[List[str]] = None,
+        token_budget: Optional[int] = None,
+        stats: Optional[Dict[str, int]] = None
+    ) -> str:
+        """
+        Walk the given Figma nodes once and return the layout spec.
+
+        Args:
+            roots: The Figma nodes to describe, in order
+            component_definitions: Dictionary of component definitions from Figma
+            warnings: List to collect warnings during processing
+            token_budget: Approximate token budget for the spec (defaults to FIGMA_DESCRIPTION_TOKEN_BUDGET)
+            stats: Dictionary receiving "nodes", the number of visible nodes walked (including
+                those omitted from the spec)
+
+        Returns:
+            The layout spec text, including style token definitions and a component instance summary
+        """
+        if warnings is None:
+            warnings = []
+        component_definitions = component_definitions or {}
+        budget_chars = (token_budget or settings.FIGMA_DESCRIPTION_TOKEN_BUDGET) * CHARS_PER_TOKEN
+        collect_chars = budget_chars * COLLECT_FACTOR
+
+        colors: Dict[str, str] = {}
+        text_styles: Dict[Tuple, str] = {}
+        instance_counts: Dict[str, int] = {}
+        lines: List[str] = []
+        used_chars = 0
+        skipped_nodes = 0
+        node_count = 0
+        skip_below: Optional[int] = None
+
+        # All frames are walked together so the node budget is shared across them
+        for kind, node, depth in walk_figma_nodes(roots, settings.FIGMA_MAX_TRAVERSAL_DEPTH, settings.FIGMA_MAX_TRAVERSAL_NODES):
+            if kind == LIMIT_REACHED:
+                warnings.append(node)
+                continue
+
+            # Skip the subtrees of hidden nodes and drawing primitives
+            if skip_below is not None:
+                if depth > skip_below:
+                    continue
+                skip_below = None
+            if node.get('visible') is False:
+                skip_below = depth
+                continue
+            if node.get('type') in OPAQUE_NODE_TYPES:
+                skip_below = depth
+            node_count += 1
+
+            instance_of = None
+            if node.get('type') == 'INSTANCE':
+                instance_of = self._resolve_instance(node, component_definitions, warnings)
+                instance_counts[instance_of] = instance_counts.get(instance_of, 0) + 1
+
+            if used_chars > collect_chars:
+                skipped_nodes += 1
+                continue
+
+            line = "  " * depth + self._describe_node(node, instance_of, colors, text_styles)
+            lines.append(line)
+            used_chars += len(line) + 1
+
+        # Collapse repeated subtrees before trimming so the budget is spent on distinct structure
+        lines = collapse_repeated_blocks(lines)
+        used_chars = 0
+        trimmed_lines = 0
+        for index, line in enumerate(lines):
+            used_chars += len(line) + 1
+            if used_chars > budget_chars:
+                trimmed_lines = len(lines) - index
+                lines = lines[:index]
+                break
+
+        # Trimmed lines may stand for several collapsed nodes, so the two are reported separately
+        omitted = []
+        if trimmed_lines:
+            omitted.append(f"{trimmed_lines} more spec lines")
+        if skipped_nodes:
+            omitted.append(f"{skipped_nodes} more nodes")
+        if omitted:
+            lines.append(f"... {' and '.join(omitted)} omitted to stay within the token budget")
+        if stats is not None:
+            stats["nodes"] = node_count
+
+        sections = ["Layout Spec (indentation = nesting, sizes in px, $tokens defined below):", *lines]
+
+        if colors or text_styles:
+            sections.append("\nStyle Tokens:")
+            sections.extend(f"{token} = {value}" for value, token in colors.items())
+            for style, token in text_styles.items():
+                family, size, line_height, weight = style
+                sections.append(f"{token} = {family} {size}/{line_height} weight {weight}")
+
+        if instance_counts:
+            sections.append("\nComponent Instances Found:")
+            sections.extend(
+                f"- {name} x{count}" if count > 1 else f"- {name}"
+                for name, count in instance_counts.items()
+            )
+
+        return "\n".join(sections)
+
+    def _resolve_instance(self, node: Dict[str, Any], component_definitions: Dict[str, Any], warnings: List[str]) -> str:
+        """Return the component name an instance is based on, recording a warning if it is undefined."""
+        component_id = node.get('componentId')
+        if component_id and component_id in component_definitions:
+            return component_definitions[component_id].get('name', 'Unknown Component')
+        warnings.append(f"Component instance '{node.get('name', 'Unnamed')}' references undefined component")
+        return "unknown component"
+
+    def _describe_node(
+        self,
+        node: Dict[str, Any],
+        instance_of: Optional[str],
+        colors: Dict[str, str],
+        text_styles: Dict[Tuple, str]
+    ) -> str:
+        """Render a single node as a compact spec line."""
+        parts = [node.get('type', 'NODE'), f'"{node.get("name", "Unnamed")}"']
+        if instance_of:
+            parts.append(f'of "{instance_of}"')
+
+        box = node.get('absoluteBoundingBox') or {}
+        if box.get('width') is not None and box.get('height') is not None:
+            parts.append(f"{round(box['width'])}x{round(box['height'])}")
+
+        parts.extend(self._describe_auto_layout(node))
+        parts.extend(self._describe_sizing(node))
+
+        fill = self._first_solid_color(node.get('fills'))
+        stroke = self._first_solid_color(node.get('strokes'))
+        if node.get('type') == 'TEXT':
+            style = node.get('style') or {}
+            parts.append(self._token_for_text_style(style, text_styles))
+            if fill:
+                parts.append(f"color={self._token_for_color(fill, colors)}")
+            characters = (node.get('characters') or "").strip().replace("\n", " ")
+            if characters:
+                if len(characters) > 60:
+                    characters = characters[:57] + "..."
+                parts.append(f'"{characters}"')
+        elif fill:
+            parts.append(f"fill={self._token_for_color(fill, colors)}")
+
+        if stroke and node.get('strokeWeight'):
+            parts.append(f"border={self._format_number(node['strokeWeight'])} {self._token_for_color(stroke, colors)}")
+        if node.get('cornerRadius'):
+            parts.append(f"radius={self._format_number(node['cornerRadius'])}")
+        if any(effect.get('type') == 'DROP_SHADOW' and effect.get('visible', True) for effect in node.get('effects') or []):
+            parts.append("shadow")
+
+        constraints = node.get('constraints') or {}
+        horizontal, vertical = constraints.get('horizontal'), constraints.get('vertical')
+        if (horizontal and horizontal not in ('LEFT', 'MIN')) or (vertical and vertical not in ('TOP', 'MIN')):
+            parts.append(f"pin={(horizontal or 'LEFT').lower()},{(vertical or 'TOP').lower()}")
+
+        return " ".join(parts)
+
+    def _describe_auto_layout(self, node: Dict[str, Any]) -> List[str]:
+        """Describe auto-layout direction, gap, padding and alignment."""
+        layout_mode = node.get('layoutMode')
+        if layout_mode not in ('HORIZONTAL', 'VERTICAL'):
+            return []
+
+        parts = ["row" if layout_mode == 'HORIZONTAL' else "column"]
+        if node.get('layoutWrap') == 'WRAP':
+            parts.append("wrap")
+        if node.get('itemSpacing'):
+            parts.append(f"gap={self._format_number(node['itemSpacing'])}")
+
+        padding = [node.get(key, 0) or 0 for key in ('paddingTop', 'paddingRight', 'paddingBottom', 'paddingLeft')]
+        if any(padding):
+            top, right, bottom, left = padding
+            if top == right == bottom == left:
+                parts.append(f"pad={self._format_number(top)}")
+            elif top == bottom and right == left:
+                parts.append(f"pad={self._format_number(top)}/{self._format_number(right)}")
+            else:
+                parts.append("pad=" + "/".join(self._format_number(value) for value in padding))
+
+        primary = node.get('primaryAxisAlignItems')
+        counter = node.get('counterAxisAlignItems')
+        if (primary and primary != 'MIN') or (counter and counter != 'MIN'):
+            parts.append(f"align={(primary or 'MIN').lower()},{(counter or 'MIN').lower()}")
+        return parts
+
+    def _describe_sizing(self, node: Dict[str, Any]) -> List[str]:
+        """Describe how a node sizes itself inside an auto-layout parent."""
+        parts = []
+        horizontal = node.get('layoutSizingHorizontal')
+        vertical = node.get('layoutSizingVertical')
+        if horizontal in ('FILL', 'HUG') or vertical in ('FILL', 'HUG'):
+            parts.append(f"size={(horizontal or 'FIXED').lower()},{(vertical or 'FIXED').lower()}")
+        elif node.get('layoutGrow') == 1 or node.get('layoutAlign') == 'STRETCH':
+            parts.append("stretch")
+        return parts
+
+    def _first_solid_color(self, paints: Optional[List[Dict[str, Any]]]) -> Optional[str]:
+        """Return the first visible solid paint as a hex color."""
+        for paint in paints or []:
+            if paint.get('type') != 'SOLID' or paint.get('visible') is False:
+                continue
+            color = paint.get('color') or {}
+            alpha = color.get('a', 1) * paint.get('opacity', 1)
+            hex_color = "#{:02X}{:02X}{:02X}".format(
+                round(color.get('r', 0) * 255), round(color.get('g', 0) * 255), round(color.get('b', 0) * 255)
+            )
+            if alpha < 1:
+                hex_color += "{:02X}".format(round(alpha * 255))
+            return hex_color
+        return None
+
+    def _token_for_color(self, hex_color: str, colors: Dict[str, str]) -> str:
+        """Return the deduplicated token for a color, defining it on first use."""
+        if hex_color not in colors:
+            colors[hex_color] = f"$c{len(colors) + 1}"
+        return colors[hex_color]
+
+    def _token_for_text_style(self, style: Dict[str, Any], text_styles: Dict[Tuple, str]) -> str:
+        """Return the deduplicated token for a text style, defining it on first use."""
+        key = (
+            style.get('fontFamily', 'default'),
+            self._format_number(style.get('fontSize', 16)),
+            self._format_number(style.get('lineHeightPx', 0)) if style.get('lineHeightPx') else "auto",
+            style.get('fontWeight', 400)
+        )
+        if key not in text_styles:
+            text_styles[key] = f"$t{len(text_styles) + 1}"
+        return text_styles[key]
+
+    @staticmethod
+    def _format_number(value: Any) -> str:
+        """Format a Figma number without trailing decimals."""
+        try:
+            return f"{float(value):g}"
+        except (TypeError, ValueError):
+            return str(value)
@@ -1,15 +1,34 @@
 from typing import Dict, Any, List, Optional, Tuple
+import hashlib
 import re
 import httpx
 from urllib.parse import urlparse, parse_qs
 from app.core.config import settings
+from app.core.http_fixtures import fixture_transport
+from app.core.singleflight import SingleFlight
+
+# Concurrent fetches of the same file/node/version with the same token share one set of API calls
+_design_fetches = SingleFlight("figma_fetch")
 
 class FigmaService:
     """
     Service for interacting with the Figma API to fetch design data.
+    
+    Requests go to FIGMA_API_BASE_URL. With FIGMA_FIXTURES_MODE "record" every response
+    is also saved to FIGMA_FIXTURES_DIR; with "replay" responses are served from there
+    without network access (see `app.core.http_fixtures`).
     """
     def __init__(self):
-        self.base_url = "https://api.figma.com/v1"
+        self.base_url = settings.FIGMA_API_BASE_URL.rstrip("/")
+    
+    def _client(self, token: str) -> httpx.AsyncClient:
+        """Create an HTTP client authenticated with the access token."""
+        headers = {
+            "X-Figma-Token": token,
+            "Content-Type": "application/json"
+        }
+        transport = fixture_transport(settings.FIGMA_FIXTURES_MODE, settings.FIGMA_FIXTURES_DIR)
+        return httpx.AsyncClient(headers=headers, timeout=30.0, transport=transport)
         
     async def fetch_figma_design(
         self, 
@@ -20,6 +39,10 @@ class FigmaService:
         """
         Fetch design data from Figma API.
         
+        Concurrent fetches of the same file, node and version share one set of API calls.
+        The key includes a hash of the access token, so a caller never receives data
+        fetched with someone else's permissions.
+        
         Args:
             file_url: URL of the Figma file
             node_id: Optional node ID to target specific frame
@@ -36,14 +59,25 @@ class FigmaService:
         if not token:
             raise ValueError("Figma access token is required")
         
-        # Create HTTP client with authentication headers
-        headers = {
-            "X-Figma-Token": token,
-            "Content-Type": "application/json"
-        }
+        version = parse_qs(urlparse(file_url).query).get("version-id", [None])[0]
+        key = (file_key, node_id, version, hashlib.sha256(token.encode("utf-8")).hexdigest())
+        return await _design_fetches.do(key, lambda: self._fetch_design(file_key, node_id, token))
+    
+    async def _fetch_design(self, file_key: str, node_id: Optional[str], token: str) -> Dict[str, Any]:
+        """
+        Fetch the file (and optionally node) data of a design.
         
+        Args:
+            file_key: Figma file key
+            node_id: Optional node ID to target specific frame
+            token: Access token for Figma API
+            
+        Returns:
+            Dictionary containing the Figma design data
+        """
         try:
-            async with httpx.AsyncClient(headers=headers, timeout=30.0) as client:            
+            # Create HTTP client with authentication headers
+            async with self._client(token) as client:
                 # Fetch file data
                 file_data = await self._fetch_file_data(client, file_key)
                 
@@ -98,13 +132,8 @@ class FigmaService:
         if not token:
             raise ValueError("Figma access token is required")
         
-        headers = {
-            "X-Figma-Token": token,
-            "Content-Type": "application/json"
-        }
-        
         try:
-            async with httpx.AsyncClient(headers=headers, timeout=30.0) as client:
+            async with self._client(token) as client:
                 # Fetch file data
                 file_data = await self._fetch_file_data(client, file_key)
                 
@@ -0,0 +1,391 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.utils.component_validation import describe_component_interface
+
+# System message sent with every generation request
+GENERATION_SYSTEM_MESSAGE = "You are an expert Angular developer who specializes in creating components from UI descriptions."
+
+# Instructions and few-shot examples shared by every generation request. This block is
+# built once at import time and always sent first, so providers can cache it as a prefix.
+STATIC_PROMPT_PREFIX = """
+        
+You are an expert Angular developer specializing in creating modern, accessible UIs with Angular Material and Tailwind CSS. Today your task is to convert a UI description into a complete, fully functional Angular component structure ready for integration into a downloadable project.
+
+GOAL: Generate a complete set of Angular components that will render the UI described below. Your output will be used to populate a full, downloadable Angular project that users can run locally.
+
+TECH STACK CONSTRAINTS:
+- Angular v19+ with standalone component APIs only
+- Angular Material v17+ (with Material Design Components MDC)
+- Tailwind CSS v3
+- TypeScript with strict typing
+
+EXTERNAL CONFIGURATION ASSUMPTIONS:
+- A standard Angular project with Angular Material and Tailwind CSS is already configured properly
+- You do NOT need to generate Angular Material theme setup code
+- You do NOT need to generate Tailwind configuration
+- You do NOT need to generate package.json, angular.json, or any other configuration files
+- The application entry point, routing setup, and overall structure exist, and you only need to provide component code
+
+COMPONENT COMPOSITION:
+- Analyze the UI description and determine if it should be split into multiple components
+- Create a main parent component that hosts any child components
+- Create child components when parts of the UI are logically separate, reusable, or complex enough to warrant their own component
+- For each component, generate TypeScript, HTML, and SCSS files
+
+OUTPUT FORMAT:
+Your response MUST be valid JSON in the following format:
+{
+  "components": [
+    {
+      "componentName": "string", // kebab-case name (e.g., "user-profile")
+      "typescript": "string",    // Complete TypeScript code including imports
+      "html": "string",          // Complete HTML template
+      "scss": "string"           // Complete SCSS styles
+    },
+    // Additional components if needed
+  ],
+  "routing": [
+    // Optional: Basic routing suggestions
+    // { "path": "string", "componentName": "string" }
+  ]
+}
+
+ANGULAR CODE REQUIREMENTS:
+1. Components:
+   - Use standalone components with explicit imports
+   - Add proper typings for all properties and methods
+   - Apply meaningful component/method names reflecting functionality
+   - Use Angular signals for state management where appropriate
+   - Include reactive behaviors with proper subscriptions and memory management
+   - Use Angular's latest DI pattern with the inject() function
+
+2. Templates:
+   - Use Angular Material components with proper MDC API
+   - Follow Angular template syntax best practices
+   - Create responsive layouts using Tailwind CSS utilities
+   - Include accessibility attributes (aria-*)
+   - Apply conditional rendering as appropriate (ngIf, ngClass)
+   - Use async pipe with observables to prevent memory leaks
+
+3. Styles:
+   - Focus on using Tailwind utility classes in HTML
+   - Only use SCSS for styles not possible with Tailwind
+   - Include responsive styling for various screen sizes
+   - Apply consistent whitespace/padding/margins
+
+REASONING STEPS:
+1. Analyze the UI description to fully understand the requirements
+2. Identify main sections/features that may benefit from separate components
+3. Determine component hierarchy and state management needs
+4. Draft component structure with component names and relationships
+5. Implement each component with its TypeScript, HTML, and SCSS
+6. Ensure proper integration between components through inputs/outputs
+
+FEW-SHOT EXAMPLES (SIMPLIFIED):
+
+Example 1 - Single Component:
+{
+  "components": [
+    {
+      "componentName": "product-card",
+      "typescript": "import { Component, Input, signal } from '@angular/core';\\nimport { MatButtonModule } from '@angular/material/button';\\nimport { CommonModule } from '@angular/common';\\n\\ninterface Product {\\n  id: number;\\n  name: string;\\n  price: number;\\n  imageUrl: string;\\n}\\n\\n@Component({\\n  selector: 'app-product-card',\\n  standalone: true,\\n  imports: [CommonModule, MatButtonModule],\\n  templateUrl: './product-card.component.html',\\n  styleUrls: ['./product-card.component.scss']\\n})\\nexport class ProductCardComponent {\\n  @Input() product!: Product;\\n  quantity = signal(1);\\n\\n  increment() {\\n    this.quantity.update(val => val + 1);\\n  }\\n\\n  decrement() {\\n    if (this.quantity() > 1) {\\n      this.quantity.update(val => val - 1);\\n    }\\n  }\\n}",
+      "html": "<div class=\\"bg-white rounded-lg shadow-md p-4 max-w-sm\\">\\n  <img [src]=\\"product.imageUrl\\" [alt]=\\"product.name\\" class=\\"w-full h-48 object-cover rounded\\"/>\\n  <h2 class=\\"text-xl font-bold mt-2\\">{product.name}</h2>\\n  <p class=\\"text-gray-700 mt-1\\">{product.price | currency}</p>\\n  <div class=\\"flex items-center justify-between mt-4\\">\\n    <div class=\\"flex items-center\\">\\n      <button mat-icon-button (click)=\\"decrement()\\">\\n        <span class=\\"material-icons\\">remove</span>\\n      </button>\\n      <span class=\\"mx-2\\">{quantity()}</span>\\n      <button mat-icon-button (click)=\\"increment()\\">\\n        <span class=\\"material-icons\\">add</span>\\n      </button>\\n    </div>\\n    <button mat-raised-button color=\\"primary\\">Add to Cart</button>\\n  </div>\\n</div>",
+      "scss": "/* Additional custom styles beyond Tailwind utilities */\\n:host {\\n  display: block;\\n}\\n"
+    }
+  ]
+}
+
+Example 2 - Multiple Components:
+{
+  "components": [
+    {
+      "componentName": "task-dashboard",
+      "typescript": "import { Component, inject } from '@angular/core';\\nimport { CommonModule } from '@angular/common';\\nimport { MatCardModule } from '@angular/material/card';\\nimport { MatButtonModule } from '@angular/material/button';\\nimport { Task } from './task.model';\\nimport { TaskListComponent } from './task-list/task-list.component';\\nimport { TaskFormComponent } from './task-form/task-form.component';\\n\\n@Component({\\n  selector: 'app-task-dashboard',\\n  standalone: true,\\n  imports: [CommonModule, MatCardModule, MatButtonModule, TaskListComponent, TaskFormComponent],\\n  templateUrl: './task-dashboard.component.html',\\n  styleUrls: ['./task-dashboard.component.scss']\\n})\\nexport class TaskDashboardComponent {\\n  tasks: Task[] = [\\n    { id: 1, title: 'Learn Angular', completed: true },\\n    { id: 2, title: 'Build task app', completed: false },\\n    { id: 3, title: 'Deploy to production', completed: false }\\n  ];\\n\\n  addTask(title: string) {\\n    if (title.trim()) {\\n      const newTask: Task = {\\n        id: Date.now(),\\n        title: title.trim(),\\n        completed: false\\n      };\\n      this.tasks = [...this.tasks, newTask];\\n    }\\n  }\\n\\n  toggleComplete(taskId: number) {\\n    this.tasks = this.tasks.map(task => \\n      task.id === taskId ? { ...task, completed: !task.completed } : task\\n    );\\n  }\\n\\n  deleteTask(taskId: number) {\\n    this.tasks = this.tasks.filter(task => task.id !== taskId);\\n  }\\n}",
+      "html": "<div class=\\"container mx-auto p-4\\">\\n  <mat-card class=\\"mb-4\\">\\n    <mat-card-header>\\n      <mat-card-title>Task Management Dashboard</mat-card-title>\\n    </mat-card-header>\\n    <mat-card-content>\\n      <app-task-form (taskAdded)=\\"addTask($event)\\"></app-task-form>\\n    </mat-card-content>\\n  </mat-card>\\n  \\n  <app-task-list\\n    [tasks]=\\"tasks\\"\\n    (taskToggled)=\\"toggleComplete($event)\\"\\n    (taskDeleted)=\\"deleteTask($event)\\">\\n  </app-task-list>\\n</div>",
+      "scss": "/* Custom styles if needed */\\n"
+    },
+    {
+      "componentName": "task-list",
+      "typescript": "import { Component, Input, Output, EventEmitter } from '@angular/core';\\nimport { CommonModule } from '@angular/common';\\nimport { MatListModule } from '@angular/material/list';\\nimport { MatCheckboxModule } from '@angular/material/checkbox';\\nimport { MatButtonModule } from '@angular/material/button';\\nimport { MatIconModule } from '@angular/material/icon';\\nimport { Task } from '../task.model';\\n\\n@Component({\\n  selector: 'app-task-list',\\n  standalone: true,\\n  imports: [CommonModule, MatListModule, MatCheckboxModule, MatButtonModule, MatIconModule],\\n  templateUrl: './task-list.component.html',\\n  styleUrls: ['./task-list.component.scss']\\n})\\nexport class TaskListComponent {\\n  @Input() tasks: Task[] = [];\\n  @Output() taskToggled = new EventEmitter<number>();\\n  @Output() taskDeleted = new EventEmitter<number>();\\n\\n  toggleTask(id: number) {\\n    this.taskToggled.emit(id);\\n  }\\n\\n  deleteTask(id: number) {\\n    this.taskDeleted.emit(id);\\n  }\\n\\n  trackByTaskId(index: number, task: Task): number {\\n    return task.id;\\n  }\\n}",
+      "html": "<mat-list role=\\"list\\" class=\\"bg-white rounded-lg shadow\\">\\n  <div class=\\"p-4 border-b border-gray-200\\">\\n    <h2 class=\\"text-xl font-medium\\">Tasks ({tasks.length})</h2>\\n  </div>\\n  \\n  <mat-list-item *ngFor=\\"let task of tasks; trackBy: trackByTaskId\\" role=\\"listitem\\" class=\\"border-b border-gray-100 hover:bg-gray-50\\">\\n    <div class=\\"flex items-center justify-between w-full p-2\\">\\n      <div class=\\"flex items-center\\">\\n        <mat-checkbox\\n          [checked]=\\"task.completed\\"\\n          (change)=\\"toggleTask(task.id)\\"\\n          color=\\"primary\\">\\n        </mat-checkbox>\\n        <span class=\\"ml-2\\" [class.line-through]=\\"task.completed\\" [class.text-gray-500]=\\"task.completed\\">\\n          {task.title}\\n        </span>\\n      </div>\\n      <button mat-icon-button (click)=\\"deleteTask(task.id)\\" aria-label=\\"Delete task\\">\\n        <mat-icon>delete</mat-icon>\\n      </button>\\n    </div>\\n  </mat-list-item>\\n  \\n  <div *ngIf=\\"tasks.length === 0\\" class=\\"p-4 text-center text-gray-500\\">\\n    No tasks available. Add one above!\\n  </div>\\n</mat-list>",
+      "scss": "/* Additional styles if needed */\\n"
+    },
+    {
+      "componentName": "task-form",
+      "typescript": "import { Component, Output, EventEmitter } from '@angular/core';\\nimport { CommonModule } from '@angular/common';\\nimport { FormsModule } from '@angular/forms';\\nimport { MatInputModule } from '@angular/material/input';\\nimport { MatButtonModule } from '@angular/material/button';\\nimport { MatFormFieldModule } from '@angular/material/form-field';\\n\\n@Component({\\n  selector: 'app-task-form',\\n  standalone: true,\\n  imports: [CommonModule, FormsModule, MatInputModule, MatButtonModule, MatFormFieldModule],\\n  templateUrl: './task-form.component.html',\\n  styleUrls: ['./task-form.component.scss']\\n})\\nexport class TaskFormComponent {\\n  @Output() taskAdded = new EventEmitter<string>();\\n  newTaskTitle = '';\\n\\n  addTask() {\\n    this.taskAdded.emit(this.newTaskTitle);\\n    this.newTaskTitle = '';\\n  }\\n}",
+      "html": "<form (ngSubmit)=\\"addTask()\\" class=\\"flex gap-2\\">\\n  <mat-form-field class=\\"flex-grow\\">\\n    <mat-label>New Task</mat-label>\\n    <input matInput [(ngModel)]=\\"newTaskTitle\\" name=\\"title\\" placeholder=\\"Enter task title\\" required>\\n  </mat-form-field>\\n  <button mat-raised-button color=\\"primary\\" type=\\"submit\\" [disabled]=\\"!newTaskTitle.trim()\\">\\n    Add Task\\n  </button>\\n</form>",
+      "scss": "/* Additional styles if needed */\\n"
+    }
+  ],
+  "routing": [
+    { "path": "", "componentName": "task-dashboard" }
+  ]
+}
+
+"""
+
+COLOR_SECTION_TEMPLATE = """
+Contextual Hints - Color Palette:
+Use these colors extracted from the image as a starting point for your design (most common first): [{color_list}]
+Apply these colors to appropriate elements using Angular Material's theming system and Tailwind CSS color utilities.
+For Material components, use these as custom theme colors when appropriate.
+For non-Material elements, use Tailwind's color utilities with these values.
+"""
+
+# Structure hints keyed by category, in the order they are added to the prompt
+STRUCTURE_HINTS = {
+    "form": (
+        ["form", "input", "field", "submit", "validation"],
+        """
+UI Structure Hint - Form Detected:
+Implement proper Angular reactive forms with FormControl/FormGroup.
+Add appropriate validation with meaningful error messages.
+Include submit/cancel buttons with proper loading states.
+"""
+    ),
+    "collection": (
+        ["list", "table", "grid", "items", "collection"],
+        """
+UI Structure Hint - Data Collection Detected:
+Implement optimal rendering strategy for collection data.
+Use *ngFor with trackBy function for performance.
+Consider virtualization for large datasets using @angular/cdk/scrolling.
+"""
+    ),
+    "card": (
+        ["card", "panel", "container", "section"],
+        """
+UI Structure Hint - Card/Panel Layout Detected:
+Use mat-card for semantic card layouts with appropriate sections.
+Implement responsive card grid using Tailwind's grid utilities.
+Add appropriate motion with Angular animations if applicable.
+"""
+    ),
+    "navigation": (
+        ["navigation", "menu", "sidebar", "drawer", "tabs"],
+        """
+UI Structure Hint - Navigation Pattern Detected:
+Use appropriate Material navigation components (mat-toolbar, mat-drawer, mat-tabs).
+Implement responsive behavior using Tailwind breakpoint utilities.
+Ensure keyboard navigability and proper ARIA roles.
+"""
+    ),
+}
+
+# Instructions for the planning call of planned generation. It only decides the
+# component tree and routing; code is generated per component afterwards.
+PLANNING_PROMPT_PREFIX = """
+You are an expert Angular developer planning the component structure for a UI description. Do NOT write any code.
+
+Split the UI into standalone Angular components:
+- The first component is the main parent component that hosts the others
+- Create child components for parts of the UI that are logically separate, reusable, or complex
+- Keep the plan small: only split out a component when it has meaningful template or logic of its own
+- Use kebab-case componentNames (e.g., "user-profile")
+
+For each component give its componentName, a purpose that says precisely which part of the UI it renders and which inputs/outputs it needs, and the componentNames of the planned components it hosts directly.
+
+Respond with JSON in this format:
+{
+  "components": [
+    { "componentName": "task-dashboard", "purpose": "Page layout with header and task area; holds the task list state", "children": ["task-list"] },
+    { "componentName": "task-list", "purpose": "List of tasks; input tasks, output taskToggled(id)", "children": [] }
+  ],
+  "routing": [
+    { "path": "", "componentName": "task-dashboard" }
+  ]
+}
+
+"""
+
+# Keyword lists precomputed once. Substring search on a single lowercased copy is the
+# fastest single-pass matcher available in CPython: a compiled regex alternation of the
+# same keywords benchmarked ~10x slower (see benchmarks/bench_prompt_construction.py).
+_HINT_TERMS = tuple((category, tuple(terms)) for category, (terms, _hint) in STRUCTURE_HINTS.items())
+
+
+def detect_structure_hints(description: str) -> List[str]:
+    """
+    Detect which UI structure hint categories apply to a description.
+
+    The description is lowercased once and each category stops at its first matching term.
+
+    Args:
+        description: The UI description
+
+    Returns:
+        Matched category names, in STRUCTURE_HINTS order
+    """
+    lowered = description.lower()
+    return [category for category, terms in _HINT_TERMS if any(term in lowered for term in terms)]
+
+
+def format_color_hint(color: Any) -> str:
+    """
+    Format one color hint for the prompt.
+
+    Args:
+        color: A color string, or a {"hex", "coverage"} palette entry
+
+    Returns:
+        The quoted color, followed by its share of the image when known
+    """
+    if isinstance(color, dict):
+        coverage = color.get("coverage")
+        suffix = f" ({coverage:.0%} of the image)" if isinstance(coverage, (int, float)) else ""
+        return f'"{color.get("hex", "")}"{suffix}'
+    return f'"{color}"'
+
+
+def format_layout_skeleton(skeleton: Dict[str, Any]) -> str:
+    """
+    Format a measured layout skeleton (see `layout_skeleton.analyze_layout`) as prompt text.
+
+    Args:
+        skeleton: The layout skeleton
+
+    Returns:
+        One line per block with its box and columns, preceded by the content area and
+        followed by the common spacing; boxes are "x, y, width, height" in pixels
+    """
+    def box(values: List[int]) -> str:
+        return ", ".join(str(value) for value in values)
+
+    lines = [f"Measured layout of the {skeleton['width']}x{skeleton['height']} px screenshot (boxes are x, y, width, height in px):"]
+    if skeleton.get("content"):
+        left, right = skeleton["content"]
+        lines.append(f"- Content area: x {left} to {right} ({right - left} px wide)")
+    for block in skeleton["blocks"]:
+        line = f"- {'Full-width band' if block.get('band') else 'Block'} {box(block['box'])}"
+        if block["columns"]:
+            line += f": {len(block['columns'])} columns at " + "; ".join(box(column) for column in block["columns"])
+        lines.append(line)
+    if skeleton.get("spacing"):
+        lines.append("- Most common vertical spacing between blocks: " + ", ".join(f"{value} px" for value in skeleton["spacing"]))
+    return "\n".join(lines)
+
+
+def build_dynamic_suffix(description: str, color_hints: Optional[list] = None, examples: Optional[List[Dict[str, Any]]] = None) -> str:
+    """
+    Build the request-specific part of the generation prompt.
+
+    Retrieved examples go here rather than into the static prefix, so the prefix stays
+    identical across requests and cacheable.
+
+    Args:
+        description: The (already compacted) UI description
+        color_hints: Optional list of colors extracted from the uploaded image
+        examples: Optional similar past generations, each with `description` and `output`
+
+    Returns:
+        The prompt suffix with the description, color palette, structure hints and examples
+    """
+    color_section = ""
+    if color_hints:
+        color_list = ", ".join(format_color_hint(color) for color in color_hints)
+        color_section = COLOR_SECTION_TEMPLATE.format(color_list=color_list)
+
+    ui_structure_hints = "".join(STRUCTURE_HINTS[category][1] for category in detect_structure_hints(description))
+
+    examples_section = ""
+    if examples:
+        examples_section = "\nSIMILAR PAST GENERATIONS (accepted output for similar UIs; reuse their structure and conventions where they fit this UI):\n" + "".join(
+            f"\nPast example {number} - UI description excerpt:\n{example['description']}\nAccepted output:\n{json.dumps(example['output'])}\n"
+            for number, example in enumerate(examples, start=1)
+        )
+
+    return f"""UI Description:
+{description}
+
+{color_section}
+{ui_structure_hints}
+{examples_section}"""
+
+
+def build_repair_suffix(valid_components: List[Dict[str, Any]], broken_components: List[Tuple[Any, List[str]]]) -> str:
+    """
+    Build the request-specific part of a prompt that regenerates only invalid components.
+
+    It is sent after the same STATIC_PROMPT_PREFIX as the original request, so the prefix
+    is still served from the provider's prompt cache. Valid components are described by
+    their public interface only, not resent in full.
+
+    Args:
+        valid_components: Components that passed validation, given as context
+        broken_components: (component, problems) pairs to regenerate, in order
+
+    Returns:
+        The repair prompt suffix
+    """
+    valid_section = "\n".join(f"- {describe_component_interface(component)}" for component in valid_components) or "- (none)"
+
+    broken_sections = []
+    for number, (component, problems) in enumerate(broken_components, start=1):
+        name = component.get("componentName", "") if isinstance(component, dict) else ""
+        problem_list = "\n".join(f"- {problem}" for problem in problems)
+        broken_sections.append(
+            f"### {number}. {name or '(unnamed component)'}\nProblems:\n{problem_list}\n"
+            f"Current code:\n```json\n{json.dumps(component, indent=2)}\n```"
+        )
+    broken_section = "\n\n".join(broken_sections)
+
+    return f"""REPAIR REQUEST:
+Some components of a previous response failed validation. Regenerate ONLY the components listed under "Components to Repair", fixing every listed problem and keeping each componentName. The valid components already exist; keep the repaired components consistent with their selectors, classes, inputs and outputs, and do not repeat them.
+
+Valid Components (do not regenerate):
+{valid_section}
+
+Components to Repair:
+{broken_section}
+
+Respond with JSON in the OUTPUT FORMAT above containing exactly {len(broken_components)} component(s), in the order listed, and an empty "routing" array.
+"""
+
+
+def build_planning_suffix(description: str) -> str:
+    """
+    Build the request-specific part of the planning prompt.
+
+    Args:
+        description: The (already compacted) UI description
+
+    Returns:
+        The planning prompt suffix
+    """
+    return f"""UI Description:
+{description}
+"""
+
+
+def build_component_suffix(description: str, color_hints: Optional[list], plan: List[Dict[str, Any]], component_plan: Dict[str, Any]) -> str:
+    """
+    Build the request-specific part of a prompt that generates one planned component.
+
+    It is sent after STATIC_PROMPT_PREFIX so every per-component call shares the cached prefix.
+
+    Args:
+        description: The (already compacted) UI description
+        color_hints: Optional list of colors extracted from the uploaded image
+        plan: The full component plan, for selectors and names of the other components
+        component_plan: The plan entry of the component to generate
+
+    Returns:
+        The prompt suffix
+    """
+    plan_lines = "\n".join(
+        f"- {entry['componentName']} (selector app-{entry['componentName']}): {entry['purpose']}"
+        for entry in plan
+    )
+    children = ", ".join(f"<app-{child}>" for child in component_plan["children"]) or "none"
+    name = component_plan["componentName"]
+
+    return f"""{build_dynamic_suffix(description, color_hints)}
+COMPONENT PLAN (every component below is generated separately):
+{plan_lines}
+
+Generate ONLY the "{name}" component: {component_plan['purpose']}
+- Use componentName "{name}", selector "app-{name}"
+- Child components it hosts: {children}. Import them from '../<child-name>/<child-name>.component' (all components are sibling folders) and use their selectors; do not implement them here
+Respond with JSON in the OUTPUT FORMAT above containing exactly this one component and an empty "routing" array.
+"""
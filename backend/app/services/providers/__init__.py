@@ -0,0 +1,9 @@
+# Model provider adapters and their registry
+from app.services.providers.base import (
+    CodeProvider, Provider, ProviderCapabilities, ProviderResponse, VisionProvider, record_prompt_cache_usage
+)
+from app.services.providers.anthropic_provider import AnthropicProvider
+from app.services.providers.fake_provider import FakeProvider
+from app.services.providers.gemini_provider import GeminiProvider
+from app.services.providers.openai_provider import OpenAIProvider
+from app.services.providers.registry import PROVIDER_CLASSES, ProviderRegistry, provider_registry
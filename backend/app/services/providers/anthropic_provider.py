@@ -0,0 +1,121 @@
+from typing import Any, Optional
+import anthropic
+from app.core.config import settings
+from app.services.providers.base import OUTPUT_FORMATS, CodeProvider, ProviderCapabilities, ProviderResponse, VisionProvider, usage_count
+from app.utils.image_analysis import ImageAnalysis
+from app.utils.token_budget import estimate_image_tokens
+
+# Usage fields that together make up the input tokens of a response
+_INPUT_TOKEN_FIELDS = ("input_tokens", "cache_read_input_tokens", "cache_creation_input_tokens")
+
+
+class AnthropicProvider(VisionProvider, CodeProvider):
+    """
+    Anthropic messages.
+
+    The static prefix is sent as a system block, marked with `cache_control` when prefix
+    caching is requested. Structured output forces the model to answer through a tool
+    whose input schema is the output format's, so the payload arrives already decoded.
+    """
+    name = "anthropic"
+    display_name = "Anthropic"
+    capabilities = ProviderCapabilities(
+        streaming=True,
+        json_mode=True,
+        prompt_caching="explicit"
+    )
+
+    def __init__(self, client: Optional[Any] = None):
+        """
+        Args:
+            client: AsyncAnthropic client; created from ANTHROPIC_API_KEY if not given
+        """
+        if client is None and settings.ANTHROPIC_API_KEY:
+            client = anthropic.AsyncAnthropic(api_key=settings.ANTHROPIC_API_KEY)
+        self.client = client
+
+    @staticmethod
+    def model_name(tier: str = "strong") -> str:
+        return settings.ANTHROPIC_MODEL if tier == "strong" else settings.ANTHROPIC_FAST_MODEL
+
+    def is_configured(self) -> bool:
+        return self.client is not None
+
+    async def describe_image(self, image: ImageAnalysis, prompt: str, max_tokens: int, tier: str = "strong") -> ProviderResponse:
+        response = await self.client.messages.create(
+            model=self.model_name(tier),
+            max_tokens=max_tokens,
+            messages=[
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "text",
+                            "text": prompt
+                        },
+                        {
+                            "type": "image",
+                            "source": {
+                                "type": "base64",
+                                "media_type": image.mime_type,
+                                "data": image.base64_payload
+                            }
+                        }
+                    ]
+                }
+            ]
+        )
+        usage = getattr(response, "usage", None)
+        return self._with_estimated_usage(
+            ProviderResponse(
+                response.content[0].text,
+                input_tokens=usage_count(usage, *_INPUT_TOKEN_FIELDS),
+                output_tokens=usage_count(usage, "output_tokens")
+            ),
+            prompt, estimate_image_tokens(*image.dimensions, self.name)
+        )
+
+    async def generate(self, static_prefix: str, dynamic_suffix: str, max_tokens: Optional[int], output_format: str,
+                       structured: bool, cache_prefix: bool, tier: str = "strong") -> ProviderResponse:
+        system_block = {"type": "text", "text": static_prefix}
+        if cache_prefix:
+            system_block["cache_control"] = {"type": "ephemeral"}
+
+        request = {
+            "model": self.model_name(tier),
+            "max_tokens": max_tokens or settings.GENERATION_MAX_TOKENS,
+            "system": [system_block],
+            "messages": [
+                {"role": "user", "content": dynamic_suffix}
+            ]
+        }
+        if structured:
+            _schema_name, tool_name, tool_description, schema = OUTPUT_FORMATS[output_format]
+            request["tools"] = [{
+                "name": tool_name,
+                "description": tool_description,
+                "input_schema": schema
+            }]
+            request["tool_choice"] = {"type": "tool", "name": tool_name}
+
+        response = await self.client.messages.create(**request)
+
+        usage = getattr(response, "usage", None)
+
+        # Prefer the decoded tool input, else the text
+        output = next(
+            (block.input for block in response.content if getattr(block, "type", None) == "tool_use"),
+            None
+        )
+        if output is None:
+            output = "".join(getattr(block, "text", "") for block in response.content)
+        return self._with_estimated_usage(
+            ProviderResponse(
+                output,
+                usage_count(usage, "cache_read_input_tokens"),
+                usage_count(usage, "cache_creation_input_tokens"),
+                input_tokens=usage_count(usage, *_INPUT_TOKEN_FIELDS),
+                output_tokens=usage_count(usage, "output_tokens")
+            ),
+            static_prefix + dynamic_suffix
+        )
@@ -0,0 +1,141 @@
+from abc import ABC, abstractmethod
+import json
+from typing import Any, NamedTuple, Optional
+from app.core.metrics import metrics
+from app.models.generated_code import COMPONENT_PLAN_SCHEMA, GENERATED_CODE_RESPONSE_SCHEMA
+from app.utils.image_analysis import ImageAnalysis
+from app.utils.token_budget import estimate_tokens
+
+# Tool through which Anthropic returns schema-constrained output
+STRUCTURED_OUTPUT_TOOL_NAME = "submit_components"
+PLAN_TOOL_NAME = "submit_component_plan"
+
+# Structured output formats: name, Anthropic tool name/description and JSON schema
+OUTPUT_FORMATS = {
+    "components": ("angular_components", STRUCTURED_OUTPUT_TOOL_NAME, "Submit the generated Angular components and routing.", GENERATED_CODE_RESPONSE_SCHEMA),
+    "plan": ("component_plan", PLAN_TOOL_NAME, "Submit the planned component tree and routing.", COMPONENT_PLAN_SCHEMA),
+}
+
+
+class ProviderCapabilities(NamedTuple):
+    """What a provider supports, so features are switched on per provider in one place."""
+    # Token streaming of responses
+    streaming: bool
+    # Output constrained to a JSON schema (JSON mode / tool use / response_schema)
+    json_mode: bool
+    # Reuse of the static prompt prefix across requests: "automatic", "explicit" or "none"
+    prompt_caching: str
+
+
+class ProviderResponse(NamedTuple):
+    """Output of one provider call with the token usage it reported."""
+    # Response text, or the decoded payload of a structured (tool use) response
+    output: Any
+    cached_tokens: int = 0
+    cache_write_tokens: int = 0
+    # All input tokens (including cached and image tokens) and output tokens; estimated
+    # when the provider does not report them
+    input_tokens: int = 0
+    output_tokens: int = 0
+    # Input tokens spent on the image of a vision call (estimated, providers do not report them)
+    image_tokens: int = 0
+
+
+def usage_count(usage: Any, *names: str) -> int:
+    """Return the sum of the numeric usage fields `names` of a provider usage object (0 when absent)."""
+    total = 0
+    for name in names:
+        value = getattr(usage, name, 0)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            total += int(value)
+    return total
+
+
+def record_prompt_cache_usage(provider: str, cached_tokens: int, cache_write_tokens: int = 0) -> None:
+    """
+    Record how many input tokens were served from (or written to) the provider's prompt cache.
+
+    Args:
+        provider: The provider name
+        cached_tokens: Input tokens read from the prompt cache
+        cache_write_tokens: Input tokens written to the prompt cache
+    """
+    metrics.increment("prompt_cache_read_tokens", cached_tokens or 0, provider=provider)
+    if cache_write_tokens:
+        metrics.increment("prompt_cache_write_tokens", cache_write_tokens, provider=provider)
+    metrics.increment("prompt_cache_requests", provider=provider, hit=bool(cached_tokens))
+
+
+class Provider(ABC):
+    """
+    Adapter for one model provider.
+
+    Subclasses set `name`, `display_name` and `capabilities`, and implement
+    `VisionProvider` and/or `CodeProvider`.
+    """
+    name: str
+    display_name: str
+    capabilities: ProviderCapabilities
+    # Retry an unparseable generation once with a simplified prompt instead of returning
+    # the fallback component
+    retries_invalid_output: bool = False
+
+    @staticmethod
+    @abstractmethod
+    def model_name(tier: str = "strong") -> str:
+        """Return the configured model of the provider for a model tier ("strong" or "fast")."""
+
+    @abstractmethod
+    def is_configured(self) -> bool:
+        """Return whether the provider has credentials and can be called."""
+
+    def _with_estimated_usage(self, response: ProviderResponse, prompt: str, image_tokens: int = 0) -> ProviderResponse:
+        """Fill in the input and output token counts the provider did not report with estimates."""
+        output = response.output if isinstance(response.output, str) else json.dumps(response.output)
+        return response._replace(
+            input_tokens=response.input_tokens or estimate_tokens(prompt, self.name) + image_tokens,
+            output_tokens=response.output_tokens or estimate_tokens(output, self.name),
+            image_tokens=image_tokens
+        )
+
+
+class VisionProvider(Provider):
+    """Provider that can describe images."""
+
+    @abstractmethod
+    async def describe_image(self, image: ImageAnalysis, prompt: str, max_tokens: int, tier: str = "strong") -> ProviderResponse:
+        """
+        Describe an image.
+
+        Args:
+            image: The image to describe
+            prompt: Instruction sent with the image
+            max_tokens: Maximum number of tokens to generate
+            tier: Model tier to use, "strong" or "fast"
+
+        Returns:
+            The response, whose output is the description text
+        """
+
+
+class CodeProvider(Provider):
+    """Provider that can generate code from a prompt."""
+
+    @abstractmethod
+    async def generate(self, static_prefix: str, dynamic_suffix: str, max_tokens: Optional[int], output_format: str,
+                       structured: bool, cache_prefix: bool, tier: str = "strong") -> ProviderResponse:
+        """
+        Send a generation prompt.
+
+        Args:
+            static_prefix: The cacheable prompt prefix
+            dynamic_suffix: The request-specific prompt suffix
+            max_tokens: Maximum number of tokens to generate; None for GENERATION_MAX_TOKENS
+            output_format: Key of OUTPUT_FORMATS the response is constrained to
+            structured: Whether to constrain the response to the output format's schema
+            cache_prefix: Whether to ask the provider to cache the static prefix
+            tier: Model tier to use, "strong" or "fast"
+
+        Returns:
+            The response, whose output is the text or the decoded structured payload
+        """
@@ -0,0 +1,148 @@
+import asyncio
+import hashlib
+import json
+import random
+import threading
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+from app.services.providers.base import CodeProvider, ProviderCapabilities, ProviderResponse, VisionProvider
+from app.utils.image_analysis import ImageAnalysis
+from app.utils.token_budget import estimate_image_tokens, estimate_tokens
+
+# Fixture kind of vision responses; generation responses use their output format ("components", "plan")
+DESCRIBE_KIND = "describe"
+
+
+def load_fixtures(path: str) -> Dict[str, List[Any]]:
+    """
+    Load recorded provider responses from a JSON lines file.
+
+    Each line is {"kind": "describe" | "components" | "plan", "output": text or payload}.
+
+    Args:
+        path: Path of the fixtures file
+
+    Returns:
+        The outputs of each kind, in file order; empty if the file cannot be read
+    """
+    fixtures: Dict[str, List[Any]] = {}
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            for line in file:
+                if line.strip():
+                    record = json.loads(line)
+                    fixtures.setdefault(record["kind"], []).append(record["output"])
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error loading fake provider fixtures from {path}: {str(e)}")
+    return fixtures
+
+
+class FakeProvider(VisionProvider, CodeProvider):
+    """
+    Local stand-in for a model provider, for development, tests and benchmarks without API keys.
+
+    Responses are replayed round-robin from FAKE_PROVIDER_FIXTURES_PATH when it has
+    responses of the requested kind; otherwise descriptions and generated components are
+    deterministic functions of the input, and the generated component is valid, so the
+    whole pipeline runs end to end. Each call waits like a real provider would:
+    FAKE_PROVIDER_LATENCY_SECONDS plus up to FAKE_PROVIDER_JITTER_SECONDS before the first
+    token, then the response's tokens at FAKE_PROVIDER_TOKENS_PER_SECOND; calls on the
+    "fast" tier wait FAKE_PROVIDER_FAST_SPEEDUP times less. The jitter is drawn from a
+    seeded generator, so benchmark runs are repeatable.
+    """
+    name = "fake"
+    display_name = "Fake"
+    capabilities = ProviderCapabilities(
+        streaming=False,
+        json_mode=True,
+        prompt_caching="none"
+    )
+
+    def __init__(self, fixtures: Optional[Dict[str, List[Any]]] = None):
+        """
+        Args:
+            fixtures: Recorded outputs by kind; loaded from FAKE_PROVIDER_FIXTURES_PATH if not given
+        """
+        if fixtures is None and settings.FAKE_PROVIDER_FIXTURES_PATH:
+            fixtures = load_fixtures(settings.FAKE_PROVIDER_FIXTURES_PATH)
+        self.fixtures = fixtures or {}
+        self._next_fixture: Dict[str, int] = {}
+        self._random = random.Random(0)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def model_name(tier: str = "strong") -> str:
+        return "fake" if tier == "strong" else "fake-fast"
+
+    def is_configured(self) -> bool:
+        return True
+
+    async def describe_image(self, image: ImageAnalysis, prompt: str, max_tokens: int, tier: str = "strong") -> ProviderResponse:
+        width, height = image.dimensions
+        output = self._replay(DESCRIBE_KIND)
+        if output is None:
+            output = (
+                f"A {width}x{height} page with a header, a main content area and a footer "
+                f"(image {image.sha256[:12]})."
+            )
+        await self._simulate_latency(output, tier)
+        return self._with_estimated_usage(ProviderResponse(output), prompt, estimate_image_tokens(width, height, self.name))
+
+    async def generate(self, static_prefix: str, dynamic_suffix: str, max_tokens: Optional[int], output_format: str,
+                       structured: bool, cache_prefix: bool, tier: str = "strong") -> ProviderResponse:
+        payload = self._replay(output_format)
+        if payload is None:
+            payload = self._generated_payload(dynamic_suffix, output_format)
+        elif isinstance(payload, str) and structured:
+            payload = json.loads(payload)
+        await self._simulate_latency(payload, tier)
+        output = payload if structured or isinstance(payload, str) else json.dumps(payload)
+        return self._with_estimated_usage(ProviderResponse(output), static_prefix + dynamic_suffix)
+
+    def _replay(self, kind: str) -> Optional[Any]:
+        """Return the next recorded output of a kind, or None if there is none."""
+        outputs = self.fixtures.get(kind)
+        if not outputs:
+            return None
+        with self._lock:
+            index = self._next_fixture.get(kind, 0)
+            self._next_fixture[kind] = index + 1
+        return outputs[index % len(outputs)]
+
+    async def _simulate_latency(self, output: Any, tier: str = "strong") -> None:
+        """Wait for the configured time to first token plus the time to produce the output."""
+        delay = settings.FAKE_PROVIDER_LATENCY_SECONDS
+        if settings.FAKE_PROVIDER_JITTER_SECONDS > 0:
+            with self._lock:
+                delay += self._random.uniform(0, settings.FAKE_PROVIDER_JITTER_SECONDS)
+        if settings.FAKE_PROVIDER_TOKENS_PER_SECOND > 0:
+            text = output if isinstance(output, str) else json.dumps(output)
+            delay += estimate_tokens(text) / settings.FAKE_PROVIDER_TOKENS_PER_SECOND
+        if tier != "strong" and settings.FAKE_PROVIDER_FAST_SPEEDUP > 0:
+            delay /= settings.FAKE_PROVIDER_FAST_SPEEDUP
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _generated_payload(dynamic_suffix: str, output_format: str) -> Dict[str, Any]:
+        """Build a valid payload of an output format that depends on the prompt."""
+        digest = hashlib.sha256(dynamic_suffix.encode("utf-8")).hexdigest()[:12]
+        if output_format == "plan":
+            return {
+                "components": [{"componentName": "fake-page", "purpose": "Renders the whole page", "children": []}],
+                "routing": []
+            }
+        return {
+            "components": [{
+                "componentName": "fake-page",
+                "typescript": (
+                    "import { Component } from '@angular/core';\n\n"
+                    "@Component({\n  selector: 'app-fake-page',\n  standalone: true,\n"
+                    "  templateUrl: './fake-page.component.html',\n  styleUrls: ['./fake-page.component.scss']\n})\n"
+                    f"export class FakePageComponent {{\n  readonly promptDigest = '{digest}';\n}}\n"
+                ),
+                "html": "<header class=\"p-4\">Header</header>\n<main class=\"p-4\">Content</main>\n<footer class=\"p-4\">Footer</footer>",
+                "scss": ":host {\n  display: block;\n}\n"
+            }],
+            "routing": []
+        }
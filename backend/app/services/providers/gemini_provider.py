@@ -0,0 +1,179 @@
+import asyncio
+import datetime
+import time
+from typing import Any, Dict, Optional
+import google.generativeai as genai
+from google.generativeai import caching
+from google.api_core import exceptions as google_exceptions
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.models.generated_code import schema_without_additional_properties
+from app.services.prompt_templates import STATIC_PROMPT_PREFIX
+from app.services.providers.base import OUTPUT_FORMATS, CodeProvider, ProviderCapabilities, ProviderResponse, VisionProvider, usage_count
+from app.utils.image_analysis import ImageAnalysis
+from app.utils.token_budget import estimate_image_tokens
+
+# Process-wide Gemini CachedContent for the static prompt prefix; `retry_at` delays the
+# next creation attempt after a transient failure
+_prompt_cache: Dict[str, Any] = {"content": None, "expires_at": 0.0, "disabled": False, "retry_at": 0.0, "failures": 0}
+_prompt_cache_lock = asyncio.Lock()
+
+# Backoff after a transient cache creation failure, doubled per consecutive failure
+CACHE_RETRY_SECONDS = 30
+CACHE_MAX_RETRY_SECONDS = 900
+
+_RESPONSE_SCHEMAS = {
+    output_format: schema_without_additional_properties(schema)
+    for output_format, (_name, _tool, _description, schema) in OUTPUT_FORMATS.items()
+}
+
+
+class GeminiProvider(VisionProvider, CodeProvider):
+    """
+    Google Gemini.
+
+    When prefix caching is requested and available, the static prefix is served from a
+    process-wide CachedContent and only the request-specific suffix is sent. Structured
+    output uses `response_schema` with JSON output.
+    """
+    name = "gemini"
+    display_name = "Gemini"
+    capabilities = ProviderCapabilities(
+        streaming=True,
+        json_mode=True,
+        prompt_caching="explicit"
+    )
+    # Gemini occasionally answers with malformed JSON that a simpler prompt avoids
+    retries_invalid_output = True
+
+    def __init__(self, model: Optional[str] = None):
+        """
+        Args:
+            model: Model name; GEMINI_MODEL if not given (None when no GEMINI_API_KEY is set)
+        """
+        if model is None and settings.GEMINI_API_KEY:
+            genai.configure(api_key=settings.GEMINI_API_KEY)
+            model = settings.GEMINI_MODEL
+        self.model = model
+
+    @staticmethod
+    def model_name(tier: str = "strong") -> str:
+        return settings.GEMINI_MODEL if tier == "strong" else settings.GEMINI_FAST_MODEL
+
+    def is_configured(self) -> bool:
+        return self.model is not None
+
+    async def describe_image(self, image: ImageAnalysis, prompt: str, max_tokens: int, tier: str = "strong") -> ProviderResponse:
+        model = genai.GenerativeModel(self._model_for(tier))
+        response = await model.generate_content_async(
+            [prompt, {"mime_type": image.mime_type, "data": image.data}],
+            generation_config=genai.GenerationConfig(max_output_tokens=max_tokens)
+        )
+        return self._response(response, prompt, estimate_image_tokens(*image.dimensions, self.name))
+
+    async def generate(self, static_prefix: str, dynamic_suffix: str, max_tokens: Optional[int], output_format: str,
+                       structured: bool, cache_prefix: bool, tier: str = "strong") -> ProviderResponse:
+        # The prefix is served from the shared CachedContent only when it is the static
+        # prefix, and only to the strong model the cache was created for
+        use_cache = cache_prefix and tier == "strong" and static_prefix == STATIC_PROMPT_PREFIX
+        cached_prefix = await self._cached_prefix() if use_cache else None
+        if cached_prefix is not None:
+            model = genai.GenerativeModel.from_cached_content(cached_content=cached_prefix)
+            prompt = dynamic_suffix
+        else:
+            model = genai.GenerativeModel(self._model_for(tier))
+            prompt = static_prefix + dynamic_suffix
+
+        max_tokens = max_tokens or settings.GENERATION_MAX_TOKENS
+        response = await model.generate_content_async(prompt, generation_config=self._generation_config(output_format, max_tokens, structured))
+        return self._response(response, static_prefix + dynamic_suffix)
+
+    def _model_for(self, tier: str) -> str:
+        return self.model if tier == "strong" else settings.GEMINI_FAST_MODEL
+
+    def _response(self, response: Any, prompt: str, image_tokens: int = 0) -> ProviderResponse:
+        """Wrap a Gemini response with the token usage it reported."""
+        usage = getattr(response, "usage_metadata", None)
+        return self._with_estimated_usage(
+            ProviderResponse(
+                response.text,
+                usage_count(usage, "cached_content_token_count"),
+                input_tokens=usage_count(usage, "prompt_token_count"),
+                output_tokens=usage_count(usage, "candidates_token_count")
+            ),
+            prompt, image_tokens
+        )
+
+    def _generation_config(self, output_format: str, max_tokens: int, structured: bool) -> Any:
+        """Return the generation config: the output token limit and, if requested, schema-constrained JSON."""
+        if not structured:
+            return genai.GenerationConfig(max_output_tokens=max_tokens)
+        return genai.GenerationConfig(
+            response_mime_type="application/json",
+            response_schema=_RESPONSE_SCHEMAS[output_format],
+            max_output_tokens=max_tokens
+        )
+
+    async def _cached_prefix(self) -> Optional[Any]:
+        """
+        Return a CachedContent holding the static prompt prefix, creating it if needed.
+
+        The cache is shared by the whole process and recreated shortly before it expires.
+        Creation is a blocking API call, so it runs in a worker thread under a lock:
+        concurrent requests wait for one creation instead of each making their own. If the
+        prefix can never be cached (below the model's minimum cacheable size, or a model
+        without caching support), caching is disabled for the process; other failures are
+        retried after a growing backoff. None is returned meanwhile.
+
+        Returns:
+            The CachedContent, or None if prompt caching is unavailable
+        """
+        state = _prompt_cache
+        if state["disabled"]:
+            return None
+        if state["content"] is not None and time.monotonic() < state["expires_at"]:
+            return state["content"]
+
+        async with _prompt_cache_lock:
+            # Another request may have created the cache (or failed) while this one waited
+            now = time.monotonic()
+            if state["disabled"] or now < state["retry_at"]:
+                return None
+            if state["content"] is not None and now < state["expires_at"]:
+                return state["content"]
+
+            ttl_seconds = settings.GEMINI_PROMPT_CACHE_TTL_SECONDS
+            try:
+                content = await asyncio.to_thread(
+                    caching.CachedContent.create,
+                    model=self.model,
+                    display_name="angular-generation-prefix",
+                    contents=[STATIC_PROMPT_PREFIX],
+                    ttl=datetime.timedelta(seconds=ttl_seconds)
+                )
+            except Exception as e:
+                state["content"] = None
+                if self._is_permanent_cache_error(e):
+                    print(f"Gemini prompt caching unavailable, sending the full prompt instead: {str(e)}")
+                    state["disabled"] = True
+                else:
+                    delay = min(CACHE_RETRY_SECONDS * 2 ** state["failures"], CACHE_MAX_RETRY_SECONDS)
+                    state["failures"] += 1
+                    state["retry_at"] = time.monotonic() + delay
+                    print(f"Error creating Gemini prompt cache, retrying in {delay}s: {str(e)}")
+                metrics.increment("prompt_cache_create_failures", provider="gemini", permanent=state["disabled"])
+                return None
+
+            state["content"] = content
+            state["failures"] = 0
+            # Refresh a minute early so requests never reference an expired cache
+            state["expires_at"] = now + max(ttl_seconds - 60, 0)
+            return content
+
+    @staticmethod
+    def _is_permanent_cache_error(error: Exception) -> bool:
+        """Whether a cache creation error will recur on every attempt (too small or unsupported)."""
+        if isinstance(error, (google_exceptions.InvalidArgument, google_exceptions.NotFound, google_exceptions.FailedPrecondition)):
+            return True
+        message = str(error).lower()
+        return "too small" in message or "not supported" in message
@@ -0,0 +1,115 @@
+from typing import Any, Optional
+import openai
+from app.core.config import settings
+from app.services.prompt_templates import GENERATION_SYSTEM_MESSAGE
+from app.services.providers.base import OUTPUT_FORMATS, CodeProvider, ProviderCapabilities, ProviderResponse, VisionProvider, usage_count
+from app.utils.image_analysis import ImageAnalysis
+from app.utils.token_budget import estimate_image_tokens
+
+
+class OpenAIProvider(VisionProvider, CodeProvider):
+    """
+    OpenAI chat completions.
+
+    The static prefix is always sent first and unchanged, so OpenAI's automatic prefix
+    caching applies to it. Structured output uses `response_format` with a strict JSON schema.
+    """
+    name = "openai"
+    display_name = "OpenAI"
+    capabilities = ProviderCapabilities(
+        streaming=True,
+        json_mode=True,
+        prompt_caching="automatic"
+    )
+
+    def __init__(self, client: Optional[Any] = None):
+        """
+        Args:
+            client: AsyncOpenAI client; created from OPENAI_API_KEY if not given
+        """
+        if client is None and settings.OPENAI_API_KEY:
+            client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        self.client = client
+
+    @staticmethod
+    def model_name(tier: str = "strong") -> str:
+        return settings.OPENAI_MODEL if tier == "strong" else settings.OPENAI_FAST_MODEL
+
+    def is_configured(self) -> bool:
+        return self.client is not None
+
+    async def describe_image(self, image: ImageAnalysis, prompt: str, max_tokens: int, tier: str = "strong") -> ProviderResponse:
+        response = await self.client.chat.completions.create(
+            model=self.model_name(tier),
+            messages=[
+                {
+                    "role": "system",
+                    "content": "You are an expert UI developer skilled at analyzing UI screenshots to convert them to Angular components."
+                },
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "text",
+                            "text": prompt
+                        },
+                        {
+                            "type": "image_url",
+                            "image_url": {
+                                "url": f"data:{image.mime_type};base64,{image.base64_payload}"
+                            }
+                        }
+                    ]
+                }
+            ],
+            max_tokens=max_tokens
+        )
+        usage = getattr(response, "usage", None)
+        return self._with_estimated_usage(
+            ProviderResponse(
+                response.choices[0].message.content,
+                input_tokens=usage_count(usage, "prompt_tokens"),
+                output_tokens=usage_count(usage, "completion_tokens")
+            ),
+            prompt, estimate_image_tokens(*image.dimensions, self.name)
+        )
+
+    async def generate(self, static_prefix: str, dynamic_suffix: str, max_tokens: Optional[int], output_format: str,
+                       structured: bool, cache_prefix: bool, tier: str = "strong") -> ProviderResponse:
+        schema_name, _tool_name, _tool_description, schema = OUTPUT_FORMATS[output_format]
+        request = {
+            "model": self.model_name(tier),
+            "messages": [
+                {"role": "system", "content": GENERATION_SYSTEM_MESSAGE},
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": static_prefix},
+                        {"type": "text", "text": dynamic_suffix}
+                    ]
+                }
+            ],
+            "max_tokens": max_tokens or settings.GENERATION_MAX_TOKENS
+        }
+        if structured:
+            request["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": schema_name,
+                    "strict": True,
+                    "schema": schema
+                }
+            }
+
+        response = await self.client.chat.completions.create(**request)
+
+        usage = getattr(response, "usage", None)
+        return self._with_estimated_usage(
+            ProviderResponse(
+                response.choices[0].message.content,
+                usage_count(getattr(usage, "prompt_tokens_details", None), "cached_tokens"),
+                input_tokens=usage_count(usage, "prompt_tokens"),
+                output_tokens=usage_count(usage, "completion_tokens")
+            ),
+            GENERATION_SYSTEM_MESSAGE + static_prefix + dynamic_suffix
+        )
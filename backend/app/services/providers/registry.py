@@ -0,0 +1,66 @@
+from typing import Dict, Optional, Type
+from app.services.providers.anthropic_provider import AnthropicProvider
+from app.services.providers.base import Provider, ProviderCapabilities
+from app.services.providers.fake_provider import FakeProvider
+from app.services.providers.gemini_provider import GeminiProvider
+from app.services.providers.openai_provider import OpenAIProvider
+
+# Adapter class of each provider name accepted by DEFAULT_VLM_PROVIDER
+PROVIDER_CLASSES: Dict[str, Type[Provider]] = {
+    "openai": OpenAIProvider,
+    "anthropic": AnthropicProvider,
+    "gemini": GeminiProvider,
+    "fake": FakeProvider,
+}
+
+
+class ProviderRegistry:
+    """
+    Provider adapters by name, created on first use and shared by every request.
+
+    Sharing one adapter per provider also shares its HTTP client and connection pool.
+    """
+
+    def __init__(self, providers: Optional[Dict[str, Provider]] = None):
+        """
+        Args:
+            providers: Adapters to use instead of creating them from the settings (tests)
+        """
+        self._providers: Dict[str, Provider] = dict(providers or {})
+
+    def get(self, name: str) -> Provider:
+        """
+        Return the adapter of a configured provider.
+
+        Args:
+            name: The provider name, e.g. "openai"
+
+        Returns:
+            The adapter
+
+        Raises:
+            ValueError: If the provider is unknown or has no credentials
+        """
+        provider = self._providers.get(name)
+        if provider is None and name in PROVIDER_CLASSES:
+            provider = PROVIDER_CLASSES[name]()
+            # Unconfigured adapters are not kept, so credentials set later are picked up
+            if provider.is_configured():
+                self._providers[name] = provider
+        if provider is None or not provider.is_configured():
+            raise ValueError(f"Unsupported or unconfigured VLM provider: {name}")
+        return provider
+
+    @staticmethod
+    def model_name(name: str, tier: str = "strong") -> str:
+        """Return the configured model of a provider for a model tier, or "" for an unknown provider."""
+        provider_class = PROVIDER_CLASSES.get(name)
+        return provider_class.model_name(tier) if provider_class else ""
+
+    @staticmethod
+    def capabilities() -> Dict[str, ProviderCapabilities]:
+        """Return the capabilities of every known provider."""
+        return {name: provider_class.capabilities for name, provider_class in PROVIDER_CLASSES.items()}
+
+
+provider_registry = ProviderRegistry()
@@ -0,0 +1,166 @@
+from io import BytesIO
+from typing import Any, Dict, List
+import numpy as np
+from PIL import Image
+
+# Longest side, in pixels, of the downsampled image the palette is computed from
+SAMPLE_SIDE = 128
+
+# k-means iterations; the palette is stable well before this on UI screenshots
+KMEANS_ITERATIONS = 12
+
+# Clusters closer than this CIE76 distance are merged (compression noise, subtle shading)
+MERGE_DISTANCE = 10.0
+
+# Clusters covering less of the image than this are dropped as noise (anti-aliasing, icons)
+MIN_COVERAGE = 0.01
+
+# sRGB (D65) to XYZ conversion matrix
+_RGB_TO_XYZ = np.array([
+    [0.4124564, 0.3575761, 0.1804375],
+    [0.2126729, 0.7151522, 0.0721750],
+    [0.0193339, 0.1191920, 0.9503041],
+])
+_D65_WHITE = np.array([0.95047, 1.0, 1.08883])
+
+
+def rgb_to_lab(rgb: np.ndarray) -> np.ndarray:
+    """
+    Convert sRGB colors to CIELAB, where Euclidean distance approximates perceived difference.
+
+    Args:
+        rgb: Array of shape (n, 3) with 0-255 sRGB values
+
+    Returns:
+        Array of shape (n, 3) with L*, a*, b* values
+    """
+    srgb = rgb / 255.0
+    linear = np.where(srgb > 0.04045, ((srgb + 0.055) / 1.055) ** 2.4, srgb / 12.92)
+    xyz = linear @ _RGB_TO_XYZ.T / _D65_WHITE
+    f = np.where(xyz > 216 / 24389, np.cbrt(xyz), (24389 / 27 * xyz + 16) / 116)
+    return np.stack([116 * f[:, 1] - 16, 500 * (f[:, 0] - f[:, 1]), 200 * (f[:, 1] - f[:, 2])], axis=1)
+
+
+def load_sample(image: Image.Image) -> Image.Image:
+    """
+    Decode a downsampled RGBA copy of an opened, not yet loaded image.
+
+    Args:
+        image: Image returned by `Image.open`; its pixels must not have been loaded
+
+    Returns:
+        An RGBA image whose longest side is at most SAMPLE_SIDE
+    """
+    # For JPEG, let the decoder downscale by a power of two instead of decoding full size
+    image.draft("RGB", (SAMPLE_SIDE * 2, SAMPLE_SIDE * 2))
+    # Nearest-neighbour sampling: filtering would invent blended colors along edges
+    image.thumbnail((SAMPLE_SIDE, SAMPLE_SIDE), Image.Resampling.NEAREST)
+    return image.convert("RGBA")
+
+
+def _opaque_pixels(sample: Image.Image) -> np.ndarray:
+    """Return the opaque pixels of an RGBA sample as (n, 3) sRGB."""
+    rgba = np.asarray(sample, dtype=np.float64).reshape(-1, 4)
+    return rgba[rgba[:, 3] >= 128, :3]
+
+
+def _kmeans(points: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    """Cluster points with k-means++ seeding and return the cluster label of each point."""
+    centers = [points[rng.integers(len(points))]]
+    closest = ((points - centers[0]) ** 2).sum(axis=1)
+    for _ in range(1, k):
+        total = closest.sum()
+        if total <= 0:
+            break
+        centers.append(points[rng.choice(len(points), p=closest / total)])
+        closest = np.minimum(closest, ((points - centers[-1]) ** 2).sum(axis=1))
+    centers = np.array(centers)
+
+    labels = np.zeros(len(points), dtype=np.int64)
+    for iteration in range(KMEANS_ITERATIONS):
+        distances = ((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        new_labels = distances.argmin(axis=1)
+        if iteration > 0 and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        counts = np.bincount(labels, minlength=len(centers))
+        for axis in range(points.shape[1]):
+            sums = np.bincount(labels, weights=points[:, axis], minlength=len(centers))
+            centers[:, axis] = np.where(counts > 0, sums / np.maximum(counts, 1), centers[:, axis])
+    return labels
+
+
+def extract_palette(image_data: bytes, num_colors: int = 6) -> List[Dict[str, Any]]:
+    """
+    Extract the dominant colors of an image with their coverage.
+
+    Args:
+        image_data: Raw image bytes
+        num_colors: Maximum number of colors to return
+
+    Returns:
+        Colors as {"hex": "#rrggbb", "coverage": fraction of the image}, most common first;
+        an empty list if the image cannot be decoded
+    """
+    try:
+        with Image.open(BytesIO(image_data)) as image:
+            sample = load_sample(image)
+    except Exception as e:
+        print(f"Error extracting colors: {str(e)}")
+        return []
+    return palette_from_sample(sample, num_colors)
+
+
+def palette_from_sample(sample: Image.Image, num_colors: int = 6) -> List[Dict[str, Any]]:
+    """
+    Extract the dominant colors of a downsampled image (see `load_sample`).
+
+    Pixels are clustered with k-means in CIELAB space, so colors that look alike are
+    grouped together; clusters that remain perceptually close are merged and tiny ones
+    dropped. The computation is CPU-bound: async callers should run it in a worker thread.
+
+    Args:
+        sample: RGBA sample of the image
+        num_colors: Maximum number of colors to return
+
+    Returns:
+        Colors as {"hex": "#rrggbb", "coverage": fraction of the image}, most common first
+    """
+    rgb = _opaque_pixels(sample)
+    if len(rgb) == 0 or num_colors <= 0:
+        return []
+
+    lab = rgb_to_lab(rgb)
+    rng = np.random.default_rng(0)
+    labels = _kmeans(lab, min(num_colors * 2, len(lab)), rng)
+
+    # Summarize each cluster by its coverage and mean color
+    clusters = []
+    for label, count in enumerate(np.bincount(labels)):
+        if count:
+            members = labels == label
+            clusters.append([int(count), lab[members].mean(axis=0), rgb[members].mean(axis=0)])
+    clusters.sort(key=lambda cluster: -cluster[0])
+
+    # Merge perceptually indistinguishable clusters into the more common one
+    merged = []
+    for count, lab_mean, rgb_mean in clusters:
+        for target in merged:
+            if np.linalg.norm(target[1] - lab_mean) < MERGE_DISTANCE:
+                total = target[0] + count
+                target[1] = (target[1] * target[0] + lab_mean * count) / total
+                target[2] = (target[2] * target[0] + rgb_mean * count) / total
+                target[0] = total
+                break
+        else:
+            merged.append([count, lab_mean, rgb_mean])
+    merged.sort(key=lambda cluster: -cluster[0])
+
+    palette = []
+    for count, _lab_mean, rgb_mean in merged[:num_colors]:
+        coverage = count / len(rgb)
+        if coverage < MIN_COVERAGE:
+            continue
+        red, green, blue = (int(round(channel)) for channel in rgb_mean)
+        palette.append({"hex": f"#{red:02x}{green:02x}{blue:02x}", "coverage": round(coverage, 3)})
+    return palette
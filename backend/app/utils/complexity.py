@@ -0,0 +1,96 @@
+import logging
+from typing import Any, Dict, NamedTuple, Optional
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.usage import current_usage
+from app.utils.token_budget import estimate_tokens
+
+
+class DesignComplexity(NamedTuple):
+    """Size signals of a design and the model tier they call for."""
+    figma_nodes: int
+    regions: int
+    description_tokens: int
+    # Largest ratio of a signal to its TIERING_FAST_MAX_* limit; at most 1 is a simple design
+    score: float
+    tier: str
+
+
+def count_regions(skeleton: Optional[Dict[str, Any]]) -> int:
+    """
+    Count the regions of a layout skeleton: each block, or each column of a multi-column block.
+
+    Args:
+        skeleton: The skeleton (see `layout_skeleton.analyze_layout`), or None
+
+    Returns:
+        The region count (0 without a skeleton)
+    """
+    if not skeleton:
+        return 0
+    return sum(max(1, len(block.get("columns") or [])) for block in skeleton.get("blocks", []))
+
+
+def estimate_complexity(figma_nodes: int = 0, regions: int = 0, description: str = "",
+                        provider: Optional[str] = None) -> DesignComplexity:
+    """
+    Estimate how complex a design is from its Figma node count, image regions and description.
+
+    Each signal is compared with its TIERING_FAST_MAX_* limit (a limit of 0 ignores the
+    signal). A design within every limit is simple enough for the "fast" model tier;
+    one beyond any limit needs the "strong" tier.
+
+    Args:
+        figma_nodes: Visible nodes of the Figma design (0 for screenshots)
+        regions: Regions of the screenshot's layout skeleton (0 for Figma designs)
+        description: Description the code is generated from ("" before it exists)
+        provider: Provider name used for token estimation
+
+    Returns:
+        The signals, the complexity score and the model tier
+    """
+    description_tokens = estimate_tokens(description, provider)
+    ratios = [
+        value / limit for value, limit in (
+            (figma_nodes, settings.TIERING_FAST_MAX_FIGMA_NODES),
+            (regions, settings.TIERING_FAST_MAX_REGIONS),
+            (description_tokens, settings.TIERING_FAST_MAX_DESCRIPTION_TOKENS)
+        ) if limit > 0
+    ]
+    score = max(ratios, default=0.0)
+    return DesignComplexity(figma_nodes, regions, description_tokens, score, "fast" if score <= 1 else "strong")
+
+
+def route_by_complexity(stage: str, figma_nodes: int = 0, regions: int = 0, description: str = "",
+                        provider: Optional[str] = None) -> Optional[DesignComplexity]:
+    """
+    Pick the model tier of the running request's next calls from the design's complexity.
+
+    Does nothing unless MODEL_TIERING_ENABLED. The decision is logged and counted in the
+    `model_tier_decisions` metric; a request downgraded by a token budget stays on the
+    fast tier whatever the complexity.
+
+    Args:
+        stage: Pipeline stage the tier is chosen for ("describe" or "generate")
+        figma_nodes: Visible nodes of the Figma design
+        regions: Regions of the screenshot's layout skeleton
+        description: Description the code is generated from
+        provider: Provider name used for token estimation
+
+    Returns:
+        The complexity estimate, or None if tiering is disabled
+    """
+    if not settings.MODEL_TIERING_ENABLED:
+        return None
+    complexity = estimate_complexity(figma_nodes, regions, description, provider)
+    usage = current_usage()
+    usage.choose_tier(complexity.tier)
+
+    metrics.increment("model_tier_decisions", endpoint=usage.endpoint, stage=stage, tier=usage.tier)
+    metrics.observe("design_complexity", complexity.score, endpoint=usage.endpoint, stage=stage)
+    logging.info(
+        f"Model tier for {stage} of the {usage.endpoint} request: {complexity.tier} (complexity {complexity.score:.2f}: "
+        f"{figma_nodes} Figma nodes, {regions} regions, {complexity.description_tokens} description tokens)"
+        + (", kept on the fast tier by the token budget" if usage.downgraded else "")
+    )
+    return complexity
@@ -0,0 +1,263 @@
+import re
+from typing import Any, Dict, List
+
+REQUIRED_COMPONENT_KEYS = ("componentName", "typescript", "html", "scss")
+
+# HTML elements that never have a closing tag
+VOID_ELEMENTS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr",
+})
+
+# Maximum number of problems reported per file, so a badly broken template stays readable
+MAX_PROBLEMS_PER_FILE = 5
+
+_SELECTOR_PATTERN = re.compile(r"""selector\s*:\s*['"]([^'"]+)['"]""")
+_CLASS_PATTERN = re.compile(r"export\s+class\s+(\w+)")
+_IO_PATTERN = re.compile(r"@(Input|Output)\([^)]*\)\s*(\w+)")
+# Comments, strings and braces in TypeScript/SCSS; unterminated strings fall through to the quote alone
+_CODE_TOKEN = re.compile(
+    r"""//[^\n]*|/\*.*?\*/|"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'|`(?:\\.|[^`\\])*`|[{}]""",
+    re.DOTALL
+)
+# Tags, skipping '>' inside quoted attribute values such as (click)="a > b"
+_TAG_PATTERN = re.compile(r"""<(/?)([A-Za-z][\w:.-]*)((?:[^>"']|"[^"]*"|'[^']*')*)>""")
+_PASCAL_BOUNDARY_PATTERN = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+
+def to_kebab_case(name: str) -> str:
+    """
+    Convert a component name to kebab-case ("ProductCard" or "product_card" -> "product-card").
+
+    Args:
+        name: The component name
+
+    Returns:
+        The kebab-case name
+    """
+    name = _PASCAL_BOUNDARY_PATTERN.sub("-", name.strip())
+    return re.sub(r"[\s_-]+", "-", name).strip("-").lower()
+
+
+def validate_component(component: Any) -> List[str]:
+    """
+    Check one generated component for problems that would break the assembled project.
+
+    Checks that the required keys are present, that the TypeScript has an @Component
+    decorator whose selector and exported class match componentName, and that the
+    TypeScript, template and styles are balanced.
+
+    Args:
+        component: An entry of the generated `components` array
+
+    Returns:
+        List of human-readable problems; empty if the component is valid
+    """
+    if not isinstance(component, dict):
+        return ["component is not a JSON object"]
+
+    problems = [
+        f"missing or non-string '{key}'" for key in REQUIRED_COMPONENT_KEYS
+        if not isinstance(component.get(key), str)
+    ]
+    if problems:
+        return problems
+
+    name = to_kebab_case(component["componentName"])
+    typescript = component["typescript"]
+    if not name:
+        problems.append("empty componentName")
+    if not typescript.strip():
+        return problems + ["empty typescript"]
+
+    if "@Component(" not in typescript:
+        problems.append("typescript has no @Component decorator")
+    else:
+        selector_match = _SELECTOR_PATTERN.search(typescript)
+        expected_selector = f"app-{name}"
+        if not selector_match:
+            problems.append("@Component has no selector")
+        elif selector_match.group(1) != expected_selector:
+            problems.append(f"selector '{selector_match.group(1)}' does not match expected '{expected_selector}'")
+
+    class_match = _CLASS_PATTERN.search(typescript)
+    class_name = "".join(part.capitalize() for part in name.split("-"))
+    if not class_match:
+        problems.append("typescript has no exported class")
+    elif class_match.group(1) not in (class_name, f"{class_name}Component"):
+        problems.append(f"class '{class_match.group(1)}' does not match expected '{class_name}Component'")
+
+    problems.extend(f"typescript: {problem}" for problem in check_braces(typescript))
+    problems.extend(f"html: {problem}" for problem in check_template(component["html"]))
+    problems.extend(f"scss: {problem}" for problem in check_braces(component["scss"]))
+    return problems
+
+
+def validate_components(components: List[Any]) -> Dict[int, List[str]]:
+    """
+    Validate every entry of a generated `components` array.
+
+    Args:
+        components: The generated components
+
+    Returns:
+        Mapping of component index to its problems, for invalid components only
+    """
+    results = {}
+    for index, component in enumerate(components):
+        problems = validate_component(component)
+        if problems:
+            results[index] = problems
+    return results
+
+
+def check_braces(code: str) -> List[str]:
+    """
+    Check that `{` and `}` are balanced in TypeScript or SCSS, ignoring strings and comments.
+
+    Args:
+        code: The source code
+
+    Returns:
+        List of problems; empty if balanced
+    """
+    depth = 0
+    for match in _CODE_TOKEN.finditer(code):
+        token = match.group()
+        if token == "{":
+            depth += 1
+        elif token == "}":
+            depth -= 1
+            if depth < 0:
+                return ["unexpected '}'"]
+    return [f"{depth} unclosed '{{'"] if depth else []
+
+
+def check_template(html: str) -> List[str]:
+    """
+    Check that an Angular template has balanced elements, interpolations and control-flow blocks.
+
+    Args:
+        html: The template
+
+    Returns:
+        List of problems (at most MAX_PROBLEMS_PER_FILE); empty if balanced
+    """
+    html = _strip_html_comments(html)
+    problems = []
+    open_tags: List[str] = []
+
+    for match in _TAG_PATTERN.finditer(html):
+        closing, tag, attributes = match.group(1), match.group(2).lower(), match.group(3)
+        if tag in VOID_ELEMENTS or attributes.rstrip().endswith("/"):
+            continue
+        if not closing:
+            open_tags.append(tag)
+        elif open_tags and open_tags[-1] == tag:
+            open_tags.pop()
+        elif tag in open_tags:
+            # Close the elements that were left open inside this one
+            while open_tags[-1] != tag:
+                problems.append(f"unclosed <{open_tags.pop()}>")
+            open_tags.pop()
+        else:
+            problems.append(f"unexpected </{tag}>")
+
+    problems.extend(f"unclosed <{tag}>" for tag in reversed(open_tags))
+
+    # Interpolations and @if/@for blocks must balance; Angular rejects stray braces in templates
+    depth = 0
+    for char in html:
+        if char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth < 0:
+                problems.append("unexpected '}'")
+                depth = 0
+    if depth:
+        problems.append(f"{depth} unclosed '{{'")
+
+    return problems[:MAX_PROBLEMS_PER_FILE]
+
+
+def describe_component_interface(component: Dict[str, Any]) -> str:
+    """
+    Summarize a component's public surface (selector, class, inputs and outputs) in one line.
+
+    Used to give the model context about valid components without resending their code.
+
+    Args:
+        component: A valid generated component
+
+    Returns:
+        One-line summary such as "product-card: selector app-product-card, class ProductCardComponent, inputs product"
+    """
+    typescript = component.get("typescript", "")
+    parts = [f"{component.get('componentName', '')}:"]
+    selector_match = _SELECTOR_PATTERN.search(typescript)
+    class_match = _CLASS_PATTERN.search(typescript)
+    details = []
+    if selector_match:
+        details.append(f"selector {selector_match.group(1)}")
+    if class_match:
+        details.append(f"class {class_match.group(1)}")
+    for kind in ("Input", "Output"):
+        names = [name for decorator, name in _IO_PATTERN.findall(typescript) if decorator == kind]
+        if names:
+            details.append(f"{kind.lower()}s {', '.join(names)}")
+    parts.append(", ".join(details) or "no public interface found")
+    return " ".join(parts)
+
+
+def rename_component(component: Dict[str, Any], new_name: str) -> Dict[str, Any]:
+    """
+    Return a copy of a component renamed to another componentName.
+
+    Updates the selector (`app-<name>`), the class name and the `<name>.component` file
+    references in the TypeScript, template and styles.
+
+    Args:
+        component: A valid generated component
+        new_name: The new componentName
+
+    Returns:
+        The renamed component
+    """
+    old_name = to_kebab_case(component["componentName"])
+    new_kebab = to_kebab_case(new_name)
+    if old_name == new_kebab:
+        return {**component, "componentName": new_name}
+
+    old_class = "".join(part.capitalize() for part in old_name.split("-"))
+    new_class = "".join(part.capitalize() for part in new_kebab.split("-"))
+    replacements = [
+        (re.compile(rf"\bapp-{re.escape(old_name)}\b"), f"app-{new_kebab}"),
+        (re.compile(rf"\b{re.escape(old_class)}(?=Component\b|\b)"), new_class),
+        (re.compile(rf"(?<![\w-]){re.escape(old_name)}\.component\b"), f"{new_kebab}.component"),
+    ]
+
+    renamed = {**component, "componentName": new_name}
+    for key in ("typescript", "html", "scss"):
+        code = component[key]
+        for pattern, replacement in replacements:
+            code = pattern.sub(replacement, code)
+        renamed[key] = code
+    return renamed
+
+
+def _strip_html_comments(html: str) -> str:
+    """Remove <!-- --> comments in linear time; an unterminated comment runs to the end."""
+    pieces = []
+    pos = 0
+    while True:
+        start = html.find("<!--", pos)
+        if start == -1:
+            pieces.append(html[pos:])
+            break
+        pieces.append(html[pos:start])
+        end = html.find("-->", start + 4)
+        if end == -1:
+            break
+        pos = end + 3
+    return "".join(pieces)
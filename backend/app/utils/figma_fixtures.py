@@ -0,0 +1,130 @@
+import random
+from typing import Any, Dict, Optional
+from app.core.config import settings
+from app.core.http_fixtures import save_json_fixture
+
+# Component definitions referenced by the instances of synthetic documents
+SYNTHETIC_COMPONENTS = {
+    "c:button": {"key": "button", "name": "Button", "description": "Primary button"},
+    "c:card": {"key": "card", "name": "Card", "description": "Content card"},
+    "c:avatar": {"key": "avatar", "name": "Avatar", "description": "User avatar"},
+}
+
+_WORDS = ["Dashboard", "Settings", "Profile", "Revenue", "Orders", "Invite", "Search", "Team", "Reports", "Billing"]
+
+
+def _solid(red: float, green: float, blue: float) -> list:
+    return [{"type": "SOLID", "color": {"r": red, "g": green, "b": blue, "a": 1}}]
+
+
+def build_figma_file(node_count: int, name: str = "Synthetic design", seed: int = 0) -> Dict[str, Any]:
+    """
+    Build a Figma file document (as returned by GET /v1/files/:key) of about `node_count` nodes.
+
+    The page holds screens (the first one is node 1:1) of nested auto-layout frames
+    with text, rectangles and component instances, with bounding boxes, fills and text
+    styles, so the layout extractor does realistic work on it.
+
+    Args:
+        node_count: Approximate number of nodes
+        name: File name; also prefixed to the screen names, so files get distinct descriptions
+        seed: Seed of the generator; the same arguments give the same document
+
+    Returns:
+        The file data, with "document" and "components"
+    """
+    rng = random.Random(seed)
+    counter = [0]
+
+    def next_id() -> str:
+        # Page-style ids from 1:1 on, clear of the document (0:0) and page (0:1)
+        counter[0] += 1
+        return f"{counter[0] // 1000 + 1}:{counter[0] % 1000}"
+
+    def node(node_type: str, label: str, node_id: Optional[str] = None, **fields: Any) -> Dict[str, Any]:
+        return {"id": node_id or next_id(), "type": node_type, "name": label, **fields}
+
+    def box(width: int, height: int) -> Dict[str, Any]:
+        return {"x": 0, "y": 0, "width": width, "height": height}
+
+    def leaf() -> Dict[str, Any]:
+        kind = rng.random()
+        word = rng.choice(_WORDS)
+        if kind < 0.5:
+            return node("TEXT", word, characters=f"{word} {counter[0]}", absoluteBoundingBox=box(120, 20),
+                        style={"fontFamily": "Inter", "fontSize": rng.choice([12, 14, 16, 24]), "fontWeight": rng.choice([400, 600])},
+                        fills=_solid(0.1, 0.1, 0.1))
+        if kind < 0.8:
+            return node("INSTANCE", word, componentId=rng.choice(list(SYNTHETIC_COMPONENTS)), absoluteBoundingBox=box(120, 40))
+        return node("RECTANGLE", "Divider", absoluteBoundingBox=box(320, 1), fills=_solid(0.9, 0.9, 0.9))
+
+    def frame(label: str, budget: int, depth: int) -> Dict[str, Any]:
+        frame_id = next_id()
+        vertical = depth % 2 == 0
+        children = []
+        remaining = budget - 1
+        while remaining > 0:
+            if depth < 6 and remaining > 4 and rng.random() < 0.4:
+                size = rng.randint(3, max(3, min(remaining, budget // 2)))
+                children.append(frame(f"{rng.choice(_WORDS)} section", size, depth + 1))
+            else:
+                size = 1
+                children.append(leaf())
+            remaining -= size
+        return node(
+            "FRAME", label, frame_id, children=children,
+            layoutMode="VERTICAL" if vertical else "HORIZONTAL",
+            itemSpacing=rng.choice([8, 12, 16, 24]),
+            paddingTop=16, paddingRight=16, paddingBottom=16, paddingLeft=16,
+            absoluteBoundingBox=box(1440 if depth == 0 else 480, 900 if depth == 0 else 200),
+            fills=_solid(1, 1, 1)
+        )
+
+    screen_budget = max(1, min(node_count, 5000))
+    screens = []
+    while counter[0] < node_count:
+        screens.append(frame(f"{name} screen {len(screens) + 1}", min(screen_budget, node_count - counter[0]), 0))
+
+    return {
+        "name": name,
+        "document": {"id": "0:0", "type": "DOCUMENT", "name": "Document", "children": [
+            {"id": "0:1", "type": "CANVAS", "name": "Page 1", "children": screens}
+        ]},
+        "components": SYNTHETIC_COMPONENTS
+    }
+
+
+def write_figma_fixtures(directory: str, file_key: str, file_data: Dict[str, Any], node_id: Optional[str] = None,
+                         base_url: Optional[str] = None) -> None:
+    """
+    Write the responses FigmaService requests for a file as replayable fixtures.
+
+    Args:
+        directory: Fixtures directory
+        file_key: Figma file key
+        file_data: The file document (e.g. from `build_figma_file`)
+        node_id: Also write the node and image responses of this node, found in the document
+        base_url: Figma API base URL; FIGMA_API_BASE_URL if not given
+    """
+    base_url = (base_url or settings.FIGMA_API_BASE_URL).rstrip("/")
+    save_json_fixture(directory, f"{base_url}/files/{file_key}", file_data)
+    if node_id is None:
+        return
+
+    stack = [file_data["document"]]
+    while stack:
+        current = stack.pop()
+        if current.get("id") == node_id:
+            break
+        stack.extend(current.get("children", []))
+    else:
+        raise ValueError(f"Node ID {node_id} not found in the document")
+
+    save_json_fixture(directory, f"{base_url}/files/{file_key}/nodes?ids={node_id}", {
+        "name": file_data.get("name"),
+        "nodes": {node_id: {"document": current, "components": file_data.get("components", {})}}
+    })
+    save_json_fixture(directory, f"{base_url}/images/{file_key}?ids={node_id}&format=png&scale=2", {
+        "err": None,
+        "images": {node_id: f"https://figma-alpha-api.s3.us-west-2.amazonaws.com/images/{file_key}"}
+    })
@@ -0,0 +1,56 @@
+from typing import Dict, Any, Iterator, List, Tuple, Optional, Union
+
+# Sentinel yielded in place of a node when a traversal limit is hit
+LIMIT_REACHED = "limit_reached"
+
+
+def walk_figma_nodes(
+    root: Union[Dict[str, Any], List[Dict[str, Any]]],
+    max_depth: Optional[int] = None,
+    max_nodes: Optional[int] = None
+) -> Iterator[Tuple[str, Any, int]]:
+    """
+    Walk a Figma node tree in document (pre-)order using an explicit stack.
+
+    Unlike a recursive walk this never hits Python's recursion limit on deeply nested
+    auto-layout frames, and it visits every node exactly once without allocating
+    intermediate result lists.
+
+    Args:
+        root: The Figma node to start from, or a list of top-level nodes walked in order
+            and sharing the node budget
+        max_depth: Optional maximum depth to descend to (top-level nodes are depth 0)
+        max_nodes: Optional maximum number of nodes to visit
+
+    Yields:
+        ("node", node, depth) for each visited node, or
+        (LIMIT_REACHED, message, depth) once when a limit stops part of the traversal
+    """
+    roots = root if isinstance(root, list) else [root]
+    stack = [(node, 0) for node in reversed(roots) if isinstance(node, dict)]
+    visited = 0
+    depth_limit_reported = False
+
+    while stack:
+        node, depth = stack.pop()
+
+        if max_nodes is not None and visited >= max_nodes:
+            yield LIMIT_REACHED, f"Figma traversal stopped after {max_nodes} nodes; remaining nodes were skipped", depth
+            return
+
+        visited += 1
+        yield "node", node, depth
+
+        children = node.get('children')
+        if not children:
+            continue
+
+        if max_depth is not None and depth >= max_depth:
+            if not depth_limit_reported:
+                depth_limit_reported = True
+                yield LIMIT_REACHED, f"Figma traversal depth limit ({max_depth}) reached; deeper nodes were skipped", depth
+            continue
+
+        # Push children in reverse so they are popped in document order
+        child_depth = depth + 1
+        stack.extend([(child, child_depth) for child in reversed(children) if isinstance(child, dict)])
@@ -0,0 +1,169 @@
+import asyncio
+import base64
+import hashlib
+import threading
+from functools import cached_property
+from io import BytesIO
+from typing import Any, Dict, List, Optional, Tuple
+from PIL import Image
+from app.core.image_executor import run_image_task
+from app.utils.color_palette import load_sample, palette_from_sample
+from app.utils.layout_skeleton import extract_layout_skeleton
+from app.utils.image_processing import sniff_image_type
+
+# MIME type assumed for images whose format cannot be detected
+DEFAULT_MIME_TYPE = "image/jpeg"
+
+
+def _decode_sample(data: bytes) -> Optional[Image.Image]:
+    """Decode the downsampled RGBA copy of an image, or None if it cannot be decoded."""
+    try:
+        with Image.open(BytesIO(data)) as image:
+            return load_sample(image)
+    except Exception as e:
+        print(f"Error decoding image: {str(e)}")
+        return None
+
+
+def _analyze(data: bytes, num_colors: int) -> Tuple[Optional[Image.Image], List[Dict[str, Any]]]:
+    """Decode the sample of an image and compute its palette; runs in the image executor."""
+    sample = _decode_sample(data)
+    palette = palette_from_sample(sample, num_colors) if sample is not None and num_colors > 0 else []
+    return sample, palette
+
+
+class ImageAnalysis:
+    """
+    Decode-once view of an uploaded image, shared by every stage that looks at it.
+
+    Each property is computed on first use and cached: the header is parsed once for the
+    dimensions and format, the pixels are decoded once (downscaled by the JPEG decoder
+    where possible) into a small thumbnail, and the SHA-256 digest and base64 payload
+    sent to the vision providers are computed once. Pass the object through the pipeline
+    instead of the raw bytes, so no stage re-opens or re-encodes the image.
+
+    The thumbnail and palettes are safe to compute from worker threads; async callers use
+    `analyze`, which decodes in the image executor.
+    """
+
+    def __init__(self, data: bytes, mime_type: Optional[str] = None):
+        """
+        Args:
+            data: Raw image bytes
+            mime_type: MIME type if already known (e.g. sniffed from the upload); detected
+                from the bytes otherwise
+        """
+        self.data = data
+        self._mime_type = mime_type
+        self._palettes: Dict[int, List[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def size_bytes(self) -> int:
+        """Size of the image in bytes."""
+        return len(self.data)
+
+    @cached_property
+    def sha256(self) -> str:
+        """Hex SHA-256 digest of the bytes."""
+        return hashlib.sha256(self.data).hexdigest()
+
+    @cached_property
+    def mime_type(self) -> str:
+        """MIME type of the image, from the upload, its signature or its decoded format."""
+        return self._mime_type or sniff_image_type(self.data[:12]) or Image.MIME.get(self.format or "", DEFAULT_MIME_TYPE)
+
+    @cached_property
+    def base64_payload(self) -> str:
+        """The bytes base64-encoded, as the vision providers expect them."""
+        return base64.b64encode(self.data).decode("utf-8")
+
+    @cached_property
+    def _header(self) -> Tuple[Optional[str], Tuple[int, int]]:
+        # Image.open only parses the header; no pixels are decoded here
+        try:
+            with Image.open(BytesIO(self.data)) as image:
+                return image.format, image.size
+        except Exception as e:
+            print(f"Error reading image header: {str(e)}")
+            return None, (0, 0)
+
+    @property
+    def format(self) -> Optional[str]:
+        """Pillow format name (e.g. "PNG"), or None if the image cannot be read."""
+        return self._header[0]
+
+    @property
+    def dimensions(self) -> Tuple[int, int]:
+        """(width, height) in pixels, or (0, 0) if the image cannot be read."""
+        return self._header[1]
+
+    @property
+    def thumbnail(self) -> Optional[Image.Image]:
+        """
+        Downsampled RGBA copy of the image, decoded on first use.
+
+        Returns:
+            The thumbnail (see `color_palette.load_sample`), or None if the image cannot be decoded
+        """
+        with self._lock:
+            if "_thumbnail" not in self.__dict__:
+                self._thumbnail = _decode_sample(self.data)
+            return self._thumbnail
+
+    def palette(self, num_colors: int = 6) -> List[Dict[str, Any]]:
+        """
+        Dominant colors of the image with their coverage, computed from the thumbnail.
+
+        Args:
+            num_colors: Maximum number of colors to return
+
+        Returns:
+            Colors as {"hex": "#rrggbb", "coverage": fraction of the image}, most common
+            first; an empty list if the image cannot be decoded
+        """
+        thumbnail = self.thumbnail
+        if thumbnail is None:
+            return []
+        with self._lock:
+            cached = self._palettes.get(num_colors)
+        if cached is None:
+            cached = palette_from_sample(thumbnail, num_colors)
+            with self._lock:
+                self._palettes[num_colors] = cached
+        return cached
+
+    async def analyze(self, num_colors: int = 6) -> List[Dict[str, Any]]:
+        """
+        Decode the image and compute its palette off the event loop.
+
+        The first call decodes in the image executor (a worker process for large images)
+        and caches the thumbnail and palette; later calls and property accesses reuse them.
+
+        Args:
+            num_colors: Maximum number of colors to return
+
+        Returns:
+            The palette, as returned by `palette`
+        """
+        if "_thumbnail" in self.__dict__:
+            return await asyncio.to_thread(self.palette, num_colors)
+
+        thumbnail, palette = await run_image_task(_analyze, self.data, num_colors)
+        with self._lock:
+            self.__dict__.setdefault("_thumbnail", thumbnail)
+            if thumbnail is not None:
+                self._palettes.setdefault(num_colors, palette)
+        return palette
+
+    async def layout(self) -> Optional[Dict[str, Any]]:
+        """
+        Measure the layout skeleton of the image off the event loop, on first use.
+
+        Returns:
+            The skeleton (see `layout_skeleton.analyze_layout`), or None if the image
+            cannot be decoded
+        """
+        if "_layout" not in self.__dict__:
+            self._layout = await run_image_task(extract_layout_skeleton, self.data)
+        return self._layout
@@ -1,8 +1,85 @@
 import base64
 from io import BytesIO
-from typing import Tuple
+from tempfile import SpooledTemporaryFile
+from typing import Optional, Tuple
 from PIL import Image
-from fastapi import HTTPException
+from fastapi import HTTPException, UploadFile
+from app.core.metrics import metrics
+
+# Leading bytes of the accepted image formats and their MIME types
+IMAGE_SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+]
+
+# Bytes read per chunk when streaming an upload
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+def sniff_image_type(header: bytes) -> Optional[str]:
+    """
+    Detect the image format from the first bytes of a file.
+    
+    Args:
+        header: At least the first 12 bytes of the file
+        
+    Returns:
+        The MIME type (image/png, image/jpeg, image/gif or image/webp), or None if the
+        bytes are not a supported image
+    """
+    for signature, mime_type in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return mime_type
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+async def read_image_upload(file: UploadFile, max_bytes: int, spool_bytes: int) -> Tuple[SpooledTemporaryFile, str]:
+    """
+    Read an uploaded image in chunks, rejecting bogus or oversized files early.
+    
+    The format is sniffed from the first chunk, so non-images are rejected before the rest
+    is read, and the size limit is enforced while reading. The content is kept in memory
+    up to `spool_bytes` and spooled to disk beyond that.
+    
+    Args:
+        file: The uploaded file
+        max_bytes: Maximum allowed size in bytes
+        spool_bytes: Size above which the content is spooled to disk
+        
+    Returns:
+        Tuple of (spooled file positioned at the start, sniffed MIME type); the caller closes it
+        
+    Raises:
+        HTTPException: 415 if the file is not a supported image, 413 if it is too large
+    """
+    spool = SpooledTemporaryFile(max_size=spool_bytes)
+    try:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        mime_type = sniff_image_type(chunk)
+        if mime_type is None:
+            metrics.increment("uploads_rejected", reason="not_an_image")
+            raise HTTPException(status_code=415, detail="File must be a PNG, JPEG, GIF or WebP image")
+        
+        size = 0
+        while chunk:
+            size += len(chunk)
+            if size > max_bytes:
+                metrics.increment("uploads_rejected", reason="too_large")
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Image size exceeds the maximum allowed size ({max_bytes / (1024 * 1024):.0f} MB)"
+                )
+            spool.write(chunk)
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+    except BaseException:
+        spool.close()
+        raise
+    
+    metrics.observe("upload_bytes", size)
+    spool.seek(0)
+    return spool, mime_type
 
 def validate_image_size(image_data: bytes, max_size_mb: int) -> None:
     """
@@ -0,0 +1,75 @@
+import json
+import os
+import tempfile
+from typing import Any, Dict, Iterable, Iterator
+
+
+def read_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Read the JSON object records of a JSON lines file, skipping malformed lines.
+
+    Args:
+        path: Path of the file; a missing file yields nothing
+
+    Returns:
+        Iterator over the records
+    """
+    if not path or not os.path.exists(path):
+        return
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict):
+                    yield record
+    except OSError as e:
+        print(f"Error reading {path}: {str(e)}")
+
+
+def append_jsonl(path: str, record: Dict[str, Any]) -> None:
+    """
+    Append a record to a JSON lines file, creating its directory if needed.
+
+    Args:
+        path: Path of the file
+        record: JSON-serializable record
+    """
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(record) + "\n")
+    except OSError as e:
+        print(f"Error writing {path}: {str(e)}")
+
+
+def write_jsonl(path: str, records: Iterable[Dict[str, Any]]) -> None:
+    """
+    Replace a JSON lines file with the given records.
+
+    The records are written to a temporary file that then replaces the original, so
+    readers never see a partially written file.
+
+    Args:
+        path: Path of the file
+        records: JSON-serializable records
+    """
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        descriptor, temporary_path = tempfile.mkstemp(dir=directory or None, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "w", encoding="utf-8") as file:
+                for record in records:
+                    file.write(json.dumps(record) + "\n")
+            os.replace(temporary_path, path)
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+    except OSError as e:
+        print(f"Error writing {path}: {str(e)}")
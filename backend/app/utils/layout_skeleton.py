@@ -0,0 +1,153 @@
+from collections import Counter
+from io import BytesIO
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from PIL import Image
+
+# Width, in pixels, the screenshot is downscaled to before analysis
+ANALYSIS_WIDTH = 720
+
+# Gray-level difference from the background, or between neighbouring pixels, that marks content
+CONTENT_THRESHOLD = 10
+
+# Rows of a block with at least this share of content pixels are band edges, not columns
+FULL_ROW_FILL = 0.9
+
+# Smallest empty space, in screenshot pixels, separating two blocks and two columns
+MIN_ROW_GAP = 16
+MIN_COLUMN_GAP = 24
+
+# Most blocks reported; closer blocks are grouped until the page fits
+MAX_BLOCKS = 24
+
+# Spacing values are rounded to this many pixels
+SPACING_UNIT = 4
+
+
+def _dominant_level(values: np.ndarray) -> float:
+    """Return the most common gray level (to within 4 levels) of some pixels."""
+    return float(np.bincount((values // 4).astype(np.int64).ravel(), minlength=64).argmax() * 4 + 2)
+
+
+def _content_mask(gray: np.ndarray, background: float) -> np.ndarray:
+    """Mark pixels that differ from the background, or that sit on an edge."""
+    mask = np.abs(gray - background) > CONTENT_THRESHOLD
+    dx = np.abs(np.diff(gray, axis=1)) > CONTENT_THRESHOLD
+    dy = np.abs(np.diff(gray, axis=0)) > CONTENT_THRESHOLD
+    mask[:, 1:] |= dx
+    mask[1:, :] |= dy
+    return mask
+
+
+def _runs(active: np.ndarray, min_gap: int) -> List[Tuple[int, int]]:
+    """Return the (start, end) runs of True values, joining runs separated by fewer than min_gap values."""
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], active.astype(np.int8), [0]))))
+    runs = []
+    for start, end in zip(edges[0::2].tolist(), edges[1::2].tolist()):
+        if runs and start - runs[-1][1] < min_gap:
+            runs[-1] = (runs[-1][0], end)
+        else:
+            runs.append((start, end))
+    return runs
+
+
+def _columns(gray: np.ndarray, top: int, bottom: int, min_gap: int, page_background: float) -> Tuple[List[Tuple[int, int, int, int]], bool]:
+    """
+    Split the rows of a block into columns, measured against the block's own background.
+
+    Returns the (left, top, right, bottom) columns and whether the block is a full-width
+    band with a background of its own.
+    """
+    region = gray[top:bottom]
+    # A full-width band has its own background, seen at the left and right edges of the page
+    background = _dominant_level(np.concatenate((region[:, 0], region[:, -1])))
+    mask = _content_mask(region, background)
+    mask[mask.mean(axis=1) >= FULL_ROW_FILL] = False
+    columns = []
+    for left, right in _runs(mask.sum(axis=0) > 0, min_gap):
+        rows = np.flatnonzero(mask[:, left:right].any(axis=1))
+        columns.append((left, top + int(rows[0]), right, top + int(rows[-1]) + 1))
+    return columns, abs(background - page_background) > CONTENT_THRESHOLD
+
+
+def analyze_layout(gray: np.ndarray, scale: float = 1.0) -> Dict[str, Any]:
+    """
+    Measure the block structure of a grayscale screenshot.
+
+    The page is cut into blocks at runs of empty rows (recursive XY-cut on a content mask),
+    and each block into columns at runs of empty columns.
+
+    Args:
+        gray: Grayscale screenshot as a (height, width) float array
+        scale: Screenshot pixels per pixel of `gray`; measurements are reported in screenshot pixels
+
+    Returns:
+        Dictionary with "width", "height", "blocks" (each with "box" and "columns" as
+        [x, y, width, height] lists, and "band" for full-width bands), "content" ([left, right] of the content area, or
+        None for an empty page) and "spacing" (most common gaps between blocks, largest
+        share first)
+    """
+    height, width = gray.shape
+    page_background = _dominant_level(gray)
+    mask = _content_mask(gray, page_background)
+    rows_active = mask.sum(axis=1) > 0
+
+    row_gap = max(1, round(MIN_ROW_GAP / scale))
+    blocks = _runs(rows_active, row_gap)
+    while len(blocks) > MAX_BLOCKS:
+        row_gap += max(1, row_gap // 2)
+        blocks = _runs(rows_active, row_gap)
+
+    def box(left: int, top: int, right: int, bottom: int) -> List[int]:
+        return [round(left * scale), round(top * scale), round((right - left) * scale), round((bottom - top) * scale)]
+
+    column_gap = max(1, round(MIN_COLUMN_GAP / scale))
+    result_blocks = []
+    lefts, rights = [], []
+    for top, bottom in blocks:
+        columns, band = _columns(gray, top, bottom, column_gap, page_background)
+        columns = columns or [(0, top, width, bottom)]
+        lefts.append(columns[0][0])
+        rights.append(columns[-1][2])
+        result_blocks.append({
+            "box": box(0, top, width, bottom) if band else box(columns[0][0], top, max(column[2] for column in columns), bottom),
+            "columns": [box(*column) for column in columns] if len(columns) > 1 else [],
+            "band": band
+        })
+
+    gaps = [next_top - bottom for (_, bottom), (next_top, _) in zip(blocks, blocks[1:])]
+    spacing = Counter(SPACING_UNIT * round(gap * scale / SPACING_UNIT) for gap in gaps)
+    return {
+        "width": round(width * scale),
+        "height": round(height * scale),
+        "blocks": result_blocks,
+        "content": [round(min(lefts) * scale), round(max(rights) * scale)] if blocks else None,
+        "spacing": [value for value, _ in spacing.most_common(3)]
+    }
+
+
+def extract_layout_skeleton(image_data: bytes) -> Optional[Dict[str, Any]]:
+    """
+    Measure the layout skeleton of a screenshot: blocks, columns and spacing.
+
+    The screenshot is decoded downscaled to ANALYSIS_WIDTH, so this is cheap, but still
+    CPU-bound: async callers should run it in the image executor.
+
+    Args:
+        image_data: Raw image bytes
+
+    Returns:
+        The skeleton as returned by `analyze_layout`, or None if the image cannot be decoded
+    """
+    try:
+        with Image.open(BytesIO(image_data)) as image:
+            width, height = image.size
+            image.draft("L", (ANALYSIS_WIDTH, max(1, height * ANALYSIS_WIDTH // max(1, width))))
+            gray = image.convert("L")
+    except Exception as e:
+        print(f"Error decoding image for layout analysis: {str(e)}")
+        return None
+
+    if gray.width > ANALYSIS_WIDTH:
+        gray = gray.resize((ANALYSIS_WIDTH, max(1, round(gray.height * ANALYSIS_WIDTH / gray.width))), Image.Resampling.BOX)
+    return analyze_layout(np.asarray(gray, dtype=np.float32), width / gray.width)
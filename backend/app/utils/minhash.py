@@ -0,0 +1,157 @@
+import hashlib
+import random
+import re
+from functools import lru_cache
+from typing import Dict, Hashable, Iterable, List, Set, Tuple
+
+# Number of hash permutations per signature and its split into LSH bands. With 16 bands
+# of 4 rows, pairs with a Jaccard similarity of about 0.5 or more are likely to collide.
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+_NON_WORD = re.compile(r"[^a-z0-9#]+")
+_DIGITS = re.compile(r"\d+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text for structural comparison.
+
+    Lowercases, replaces every number with 0 (so sizes and counts do not matter) and
+    collapses punctuation and whitespace.
+
+    Args:
+        text: Text to normalize
+
+    Returns:
+        Normalized text
+    """
+    return _NON_WORD.sub(" ", _DIGITS.sub("0", text.lower())).strip()
+
+
+def shingles(text: str, size: int = 3) -> Set[str]:
+    """
+    Return the set of word n-grams of a text after normalization.
+
+    Args:
+        text: Text to shingle
+        size: Number of words per shingle
+
+    Returns:
+        Set of shingles; texts shorter than `size` words give a single shingle
+    """
+    words = normalize_text(text).split()
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+@lru_cache(maxsize=None)
+def _permutations(num_permutations: int) -> Tuple[Tuple[int, int], ...]:
+    """Fixed (a, b) coefficients of the universal hash functions, identical in every process."""
+    rng = random.Random(num_permutations)
+    return tuple(
+        (rng.randint(1, _MERSENNE_PRIME - 1), rng.randint(0, _MERSENNE_PRIME - 1))
+        for _ in range(num_permutations)
+    )
+
+
+def minhash_signature(items: Iterable[str], num_permutations: int = NUM_PERMUTATIONS) -> Tuple[int, ...]:
+    """
+    Compute the MinHash signature of a set of shingles.
+
+    Hashes are derived from blake2b, so signatures are stable across processes and can
+    be persisted.
+
+    Args:
+        items: The shingles
+        num_permutations: Signature length
+
+    Returns:
+        Tuple of `num_permutations` minimum hash values
+    """
+    hashes = [int.from_bytes(hashlib.blake2b(item.encode("utf-8"), digest_size=8).digest(), "little") for item in items]
+    if not hashes:
+        return (_MAX_HASH,) * num_permutations
+    return tuple(
+        min(((a * value + b) % _MERSENNE_PRIME) & _MAX_HASH for value in hashes)
+        for a, b in _permutations(num_permutations)
+    )
+
+
+def estimate_similarity(signature_a: Tuple[int, ...], signature_b: Tuple[int, ...]) -> float:
+    """
+    Estimate the Jaccard similarity of two shingle sets from their MinHash signatures.
+
+    Args:
+        signature_a: First signature
+        signature_b: Second signature of the same length
+
+    Returns:
+        Fraction of matching signature positions, between 0.0 and 1.0
+    """
+    if not signature_a or len(signature_a) != len(signature_b):
+        return 0.0
+    return sum(1 for a, b in zip(signature_a, signature_b) if a == b) / len(signature_a)
+
+
+class MinHashLSH:
+    """
+    Locality-sensitive hashing index over MinHash signatures.
+
+    Signatures are split into bands; two signatures are candidates when any band matches
+    exactly, so lookups only compare against a handful of entries instead of all of them.
+    """
+
+    def __init__(self, bands: int = LSH_BANDS, num_permutations: int = NUM_PERMUTATIONS):
+        if num_permutations % bands:
+            raise ValueError("num_permutations must be a multiple of bands")
+        self.bands = bands
+        self.rows = num_permutations // bands
+        self._buckets: List[Dict[Tuple[int, ...], Set[Hashable]]] = [{} for _ in range(bands)]
+        self._signatures: Dict[Hashable, Tuple[int, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def _band_keys(self, signature: Tuple[int, ...]) -> List[Tuple[int, ...]]:
+        return [signature[band * self.rows:(band + 1) * self.rows] for band in range(self.bands)]
+
+    def insert(self, key: Hashable, signature: Tuple[int, ...]) -> None:
+        """Add (or replace) an entry."""
+        self.remove(key)
+        self._signatures[key] = signature
+        for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+            buckets.setdefault(band_key, set()).add(key)
+
+    def remove(self, key: Hashable) -> None:
+        """Remove an entry if present."""
+        signature = self._signatures.pop(key, None)
+        if signature is None:
+            return
+        for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+            bucket = buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del buckets[band_key]
+
+    def query(self, signature: Tuple[int, ...], threshold: float = 0.0) -> List[Tuple[Hashable, float]]:
+        """
+        Find indexed entries similar to a signature.
+
+        Args:
+            signature: The signature to look up
+            threshold: Minimum estimated similarity of returned entries
+
+        Returns:
+            (key, similarity) pairs, most similar first
+        """
+        candidates = set()
+        for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(buckets.get(band_key, ()))
+        matches = [(key, estimate_similarity(signature, self._signatures[key])) for key in candidates]
+        return sorted((match for match in matches if match[1] >= threshold), key=lambda match: match[1], reverse=True)
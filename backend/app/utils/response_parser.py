@@ -0,0 +1,115 @@
+import re
+from typing import List, NamedTuple
+
+# Next character of interest in each scanner state
+_OUTSIDE_TOKEN = re.compile(r'\{|^[ \t]*```', re.MULTILINE)
+_OBJECT_TOKEN = re.compile(r'[{}"]|^[ \t]*```', re.MULTILINE)
+_STRING_TOKEN = re.compile(r'["\\]')
+_FENCE_CLOSE = re.compile(r'^[ \t]*```[ \t]*$', re.MULTILINE)
+
+
+class FencedBlock(NamedTuple):
+    """A Markdown fenced code block found in a response."""
+    language: str
+    content: str
+    closed: bool
+
+
+class ScanResult(NamedTuple):
+    """Everything the scanner located in a response, in document order."""
+    fenced_blocks: List[FencedBlock]
+    json_objects: List[str]
+
+
+def scan_response(text: str) -> ScanResult:
+    """
+    Locate fenced code blocks and balanced JSON objects in an AI response in one pass.
+
+    The scanner runs in O(n): it jumps between characters of interest with precompiled
+    patterns and never re-scans text it has already consumed. Outside of code fences it
+    tracks `{`/`}` nesting, ignoring braces inside JSON strings (with backslash escapes).
+    Objects whose outer brace is never closed (e.g. a truncated response) do not hide the
+    balanced objects nested inside them. A fence at the start of a line ends any unclosed
+    objects, so a stray `{` in prose does not hide the code blocks after it. Braces inside
+    fenced blocks are not counted; a ```json block is reported as a fenced block instead.
+
+    Args:
+        text: The raw response text
+
+    Returns:
+        ScanResult with the fenced blocks and the outermost balanced `{...}` spans
+    """
+    fenced_blocks: List[FencedBlock] = []
+    top_level_spans: List[tuple] = []
+    # Each frame is (start index, closed child spans)
+    stack: List[tuple] = []
+    pos = 0
+    length = len(text)
+
+    while pos < length:
+        if not stack:
+            match = _OUTSIDE_TOKEN.search(text, pos)
+            if not match:
+                break
+            if match.group() == "{":
+                stack.append((match.start(), []))
+                pos = match.end()
+                continue
+
+            # Opening fence: the language tag runs to the end of the line
+            line_end = text.find("\n", match.end())
+            if line_end == -1:
+                line_end = length
+            language = text[match.end():line_end].strip().lower()
+            content_start = min(line_end + 1, length)
+            close = _FENCE_CLOSE.search(text, content_start)
+            if close:
+                fenced_blocks.append(FencedBlock(language, text[content_start:close.start()].rstrip("\n"), True))
+                pos = close.end()
+            else:
+                fenced_blocks.append(FencedBlock(language, text[content_start:].rstrip("\n"), False))
+                pos = length
+            continue
+
+        match = _OBJECT_TOKEN.search(text, pos)
+        if not match:
+            break
+        char = match.group()
+        if char.endswith("```"):
+            # A fence cannot occur inside a JSON object: drop the unclosed frames and rescan
+            # the fence outside of them
+            for _start, children in stack:
+                top_level_spans.extend(children)
+            stack = []
+            pos = match.start()
+            continue
+        pos = match.end()
+
+        if char == "{":
+            stack.append((match.start(), []))
+        elif char == "}":
+            start, _children = stack.pop()
+            span = (start, pos)
+            if stack:
+                stack[-1][1].append(span)
+            else:
+                top_level_spans.append(span)
+        else:
+            # Skip a JSON string, honouring backslash escapes
+            while True:
+                string_match = _STRING_TOKEN.search(text, pos)
+                if not string_match:
+                    pos = length
+                    break
+                pos = string_match.end()
+                if string_match.group() == "\\":
+                    pos += 1
+                else:
+                    break
+
+    # Unclosed frames (truncated output): keep the balanced objects nested inside them
+    for _start, children in stack:
+        top_level_spans.extend(children)
+    top_level_spans.sort()
+
+    return ScanResult(fenced_blocks, [text[start:end] for start, end in top_level_spans])
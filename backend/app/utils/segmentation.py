@@ -0,0 +1,125 @@
+from io import BytesIO
+from typing import List, Tuple
+import numpy as np
+from PIL import Image
+
+# Rows whose sampled pixels have a standard deviation below this are uniform (whitespace, solid bands)
+UNIFORM_ROW_STD = 4.0
+
+# Columns sampled per row when measuring uniformity
+SAMPLE_COLUMNS = 256
+
+# Shortest run of uniform rows, in pixels, that separates two sections
+MIN_GAP_ROWS = 8
+
+# Mean brightness change between neighbouring uniform rows that marks a background change
+BACKGROUND_CHANGE = 12.0
+
+# JPEG quality of the crops of JPEG screenshots (other formats are cropped to PNG)
+CROP_JPEG_QUALITY = 90
+
+
+def find_section_gaps(gray: np.ndarray) -> List[Tuple[int, int]]:
+    """
+    Find the horizontal gaps between the sections of a screenshot.
+
+    A gap is a run of at least MIN_GAP_ROWS uniform rows: whitespace between sections or
+    the padding of a full-width band. Where the background color changes inside a run,
+    the cut goes on the change, otherwise in the middle of the run.
+
+    Args:
+        gray: Grayscale image as a (height, width) array
+
+    Returns:
+        (cut row, score) pairs, top to bottom; the score is the length of the gap, doubled
+        where the background changes
+    """
+    step = max(1, gray.shape[1] // SAMPLE_COLUMNS)
+    sample = gray[:, ::step].astype(np.float32)
+    uniform = sample.std(axis=1) < UNIFORM_ROW_STD
+    means = sample.mean(axis=1)
+
+    # Start and end rows of the runs of uniform rows
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], uniform.astype(np.int8), [0]))))
+    gaps = []
+    for start, end in zip(edges[0::2], edges[1::2]):
+        length = int(end - start)
+        if length < MIN_GAP_ROWS:
+            continue
+        changes = np.flatnonzero(np.abs(np.diff(means[start:end])) > BACKGROUND_CHANGE)
+        if len(changes):
+            gaps.append((int(start + changes[0] + 1), 2 * length))
+        else:
+            gaps.append((int(start + length // 2), length))
+    return gaps
+
+
+def plan_sections(height: int, gaps: List[Tuple[int, int]], max_height: int, max_sections: int) -> List[Tuple[int, int]]:
+    """
+    Choose where to cut a tall screenshot.
+
+    Cuts are placed greedily from the top: each section ends at the best-scoring gap in
+    the second half of the allowed height, or at the allowed height if there is no gap.
+    The allowed height grows until the page fits in `max_sections` sections.
+
+    Args:
+        height: Height of the screenshot in pixels
+        gaps: Gaps as returned by `find_section_gaps`
+        max_height: Preferred maximum section height in pixels
+        max_sections: Maximum number of sections
+
+    Returns:
+        (top, bottom) row ranges covering the screenshot, top to bottom
+    """
+    limit = max(max_height, -(-height // max(1, max_sections)))
+    while True:
+        sections = []
+        top = 0
+        while height - top > limit:
+            candidates = [(score, cut) for cut, score in gaps if top + limit // 2 < cut <= top + limit]
+            bottom = max(candidates)[1] if candidates else top + limit
+            sections.append((top, bottom))
+            top = bottom
+        sections.append((top, height))
+        if len(sections) <= max_sections:
+            return sections
+        limit += limit // 4
+
+
+def split_screenshot(image_data: bytes, max_height: int, max_sections: int) -> List[Tuple[int, int, bytes, str]]:
+    """
+    Split a tall screenshot into sections at the gaps between them.
+
+    Decodes the full image, so it is CPU-bound: async callers should run it in the image
+    executor.
+
+    Args:
+        image_data: Raw image bytes
+        max_height: Preferred maximum section height in pixels
+        max_sections: Maximum number of sections
+
+    Returns:
+        (top, bottom, image bytes, MIME type) of each section, top to bottom; a single
+        section for images no taller than `max_height`, and an empty list if the image
+        cannot be decoded
+    """
+    try:
+        with Image.open(BytesIO(image_data)) as image:
+            image_format = image.format
+            image.load()
+            rgb = image.convert("RGB")
+    except Exception as e:
+        print(f"Error decoding image for segmentation: {str(e)}")
+        return []
+
+    if rgb.height <= max_height:
+        return [(0, rgb.height, bytes(image_data), Image.MIME.get(image_format or "", "image/png"))]
+
+    gaps = find_section_gaps(np.asarray(rgb.convert("L")))
+    save_format, mime_type, options = ("JPEG", "image/jpeg", {"quality": CROP_JPEG_QUALITY}) if image_format == "JPEG" else ("PNG", "image/png", {})
+    sections = []
+    for top, bottom in plan_sections(rgb.height, gaps, max_height, max_sections):
+        buffer = BytesIO()
+        rgb.crop((0, top, rgb.width, bottom)).save(buffer, format=save_format, **options)
+        sections.append((top, bottom, buffer.getvalue(), mime_type))
+    return sections
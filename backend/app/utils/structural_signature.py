@@ -0,0 +1,110 @@
+import re
+from typing import List, Optional, Set, Tuple
+
+_WORD = re.compile(r"[a-z0-9]+")
+_QUOTED = re.compile(r'"[^"\n]*"|\'[^\'\n]*\'')
+_STYLE_TOKEN = re.compile(r"\$([ct])\d+")
+_HEADING = re.compile(r"^\s*(#+)\s")
+
+# Words that say nothing about which section a component comes from
+_STOP_WORDS = {
+    "a", "an", "and", "the", "of", "with", "for", "to", "in", "on", "at", "or", "by",
+    "component", "components", "section", "area", "element", "containing", "contains", "that", "this"
+}
+
+
+def _words(text: str) -> Set[str]:
+    return {word for word in _WORD.findall(text.lower().replace("-", " ")) if word not in _STOP_WORDS}
+
+
+def _indent_of(line: str) -> int:
+    return len(line) - len(line.lstrip(" "))
+
+
+def description_sections(description: str) -> List[Tuple[str, str]]:
+    """
+    Split a UI description into candidate sections.
+
+    A section is an indented line with the more-indented lines below it (a subtree of a
+    Figma layout spec, or a nested bullet list of a vision description), a markdown
+    heading with the lines up to the next heading of the same or a higher level, or a
+    paragraph.
+
+    Args:
+        description: The UI description
+
+    Returns:
+        (heading line, section text) pairs
+    """
+    lines = description.splitlines()
+    sections = []
+    for i, line in enumerate(lines):
+        if not line.strip():
+            continue
+        heading = _HEADING.match(line)
+        end = i + 1
+        if heading:
+            level = len(heading.group(1))
+            while end < len(lines):
+                other = _HEADING.match(lines[end])
+                if other and len(other.group(1)) <= level:
+                    break
+                end += 1
+        else:
+            indent = _indent_of(line)
+            while end < len(lines) and lines[end].strip() and _indent_of(lines[end]) > indent:
+                end += 1
+        sections.append((line, "\n".join(lines[i:end])))
+
+    # Paragraphs of prose (vision descriptions without structure) are sections too
+    for paragraph in re.split(r"\n\s*\n", description):
+        if paragraph.strip() and "\n" not in paragraph.strip():
+            sections.append((paragraph.strip(), paragraph.strip()))
+    return sections
+
+
+def find_description_section(description: str, component_name: str, purpose: str = "") -> Optional[str]:
+    """
+    Find the section of a UI description a planned component implements.
+
+    Sections are scored by the words their heading line shares with the component name
+    (weighted double) and purpose; the smallest best-scoring section wins.
+
+    Args:
+        description: The UI description the plan was made from
+        component_name: The planned componentName, e.g. "nav-bar"
+        purpose: The planned component's purpose
+
+    Returns:
+        The section text, or None if no section mentions the component
+    """
+    name_words = _words(component_name)
+    purpose_words = _words(purpose) - name_words
+    best, best_score = None, 0.0
+    for heading, text in description_sections(description):
+        heading_words = _words(heading)
+        score = 2 * len(name_words & heading_words) + len(purpose_words & heading_words)
+        if not score:
+            continue
+        score /= len(heading_words) ** 0.5
+        if score > best_score or (score == best_score and best is not None and len(text) < len(best)):
+            best, best_score = text, score
+    return best
+
+
+def structural_signature(section: str) -> str:
+    """
+    Reduce a description section to its structure.
+
+    Quoted text (labels, copy, brand names) is removed and per-file style tokens
+    (`$c3`, `$t1`) lose their numbers, so two sections with the same layout and different
+    content get the same signature. Numbers are normalized later by the shingling.
+
+    Args:
+        section: A section of a UI description
+
+    Returns:
+        The structural signature text
+    """
+    text = _QUOTED.sub('""', section)
+    return _STYLE_TOKEN.sub(r"$\1", text)
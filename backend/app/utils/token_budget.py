@@ -0,0 +1,226 @@
+import math
+import re
+from typing import List, Optional
+
+# Average characters per token for each provider's tokenizer on English/markup-heavy text
+CHARS_PER_TOKEN = {
+    "openai": 4.0,
+    "anthropic": 3.5,
+    "gemini": 4.0,
+}
+DEFAULT_CHARS_PER_TOKEN = 3.5
+
+# Quoted strings and numbers are ignored when deciding whether sibling blocks repeat
+_VARIABLE_PARTS = re.compile(r'"[^"\n]*"|\d+(?:\.\d+)?')
+
+_QUOTED = re.compile(r'"[^"\n]*"')
+
+# Maximum number of differing labels listed when a run of blocks is collapsed
+MAX_LISTED_VARIANTS = 10
+
+# Nesting depth beyond which blocks are kept as-is instead of being collapsed further
+MAX_COLLAPSE_DEPTH = 64
+
+# Smallest leftover budget (in characters) worth filling with part of a long line
+MIN_CUT_CHARS = 80
+
+
+def estimate_tokens(text: str, provider: Optional[str] = None) -> int:
+    """
+    Estimate the number of tokens a text will use with a provider's tokenizer.
+
+    Args:
+        text: The text to measure
+        provider: Provider name ("openai", "anthropic" or "gemini"); uses a conservative ratio if unknown
+
+    Returns:
+        Estimated token count
+    """
+    if not text:
+        return 0
+    ratio = CHARS_PER_TOKEN.get(provider, DEFAULT_CHARS_PER_TOKEN)
+    return math.ceil(len(text) / ratio)
+
+
+def estimate_image_tokens(width: int, height: int, provider: Optional[str] = None) -> int:
+    """
+    Estimate the input tokens an image costs with a provider's vision model.
+
+    Follows the providers' published rules: OpenAI fits the image in 2048x2048, scales
+    its short side to at most 768 and charges 170 tokens per 512px tile plus 85; Anthropic
+    fits the long side in 1568 and charges width * height / 750; Gemini charges 258 tokens
+    per 768px tile (one tile for small images).
+
+    Args:
+        width: Image width in pixels
+        height: Image height in pixels
+        provider: Provider name; uses the Anthropic rule, the most expensive for screenshots, if unknown
+
+    Returns:
+        Estimated token count (0 for an image whose size is unknown)
+    """
+    if width <= 0 or height <= 0:
+        return 0
+    if provider == "openai":
+        scale = min(1.0, 2048 / max(width, height))
+        if min(width, height) * scale > 768:
+            scale = 768 / min(width, height)
+        return 85 + 170 * math.ceil(width * scale / 512) * math.ceil(height * scale / 512)
+    if provider == "gemini":
+        if width <= 384 and height <= 384:
+            return 258
+        return 258 * math.ceil(width / 768) * math.ceil(height / 768)
+    scale = min(1.0, 1568 / max(width, height))
+    return math.ceil(width * scale * height * scale / 750)
+
+
+def _indent_of(line: str) -> int:
+    return len(line) - len(line.lstrip(" "))
+
+
+def collapse_repeated_blocks(lines: List[str], _depth: int = 0) -> List[str]:
+    """
+    Collapse consecutive sibling blocks that share the same structure.
+
+    A block is a line plus the more-indented lines that follow it (a subtree in a layout
+    spec, or a nested bullet list in a vision description). Runs of sibling blocks that
+    differ only in quoted text or numbers are replaced by the first block, annotated with
+    the repeat count and the labels of the collapsed siblings (so nav links or list items
+    keep their text).
+
+    Args:
+        lines: Lines of an indented description
+
+    Returns:
+        The lines with repeated sibling blocks collapsed
+    """
+    if _depth > MAX_COLLAPSE_DEPTH:
+        return lines
+
+    # Split into top-level blocks at this level, recursing into each block's children
+    blocks = []
+    i = 0
+    while i < len(lines):
+        indent = _indent_of(lines[i])
+        end = i + 1
+        while end < len(lines) and lines[end].strip() and _indent_of(lines[end]) > indent:
+            end += 1
+        head, children = lines[i], lines[i + 1:end]
+        blocks.append([head] + (collapse_repeated_blocks(children, _depth + 1) if children else []))
+        i = end
+
+    result = []
+    i = 0
+    while i < len(blocks):
+        block = blocks[i]
+        signature = _VARIABLE_PARTS.sub("#", "\n".join(block)) if block[0].strip() else None
+        run = 1
+        while (
+            signature is not None
+            and i + run < len(blocks)
+            and _VARIABLE_PARTS.sub("#", "\n".join(blocks[i + run])) == signature
+        ):
+            run += 1
+        if run > 1:
+            variants = []
+            for other in blocks[i + 1:i + run]:
+                quoted = _QUOTED.findall(other[0])
+                if quoted:
+                    variants.append(quoted[-1])
+            annotation = f"repeated x{run} with similar structure"
+            if variants:
+                listed = ", ".join(variants[:MAX_LISTED_VARIANTS])
+                more = ", ..." if len(variants) > MAX_LISTED_VARIANTS else ""
+                annotation += f"; others: {listed}{more}"
+            result.append(f"{block[0]} ({annotation})")
+            result.extend(block[1:])
+        else:
+            result.extend(block)
+        i += run
+    return result
+
+
+def compact_text(text: str, max_tokens: int, provider: Optional[str] = None) -> str:
+    """
+    Fit a description into a token budget.
+
+    Repeated sibling blocks are collapsed first. If the text is still over budget, the
+    beginning and end are kept and the middle is replaced by a summary listing the
+    section headings that were dropped.
+
+    Args:
+        text: The description to compact
+        max_tokens: Token budget for the result
+        provider: Provider name used for token estimation
+
+    Returns:
+        The compacted description
+    """
+    if estimate_tokens(text, provider) <= max_tokens:
+        return text
+
+    lines = collapse_repeated_blocks(text.splitlines())
+    compacted = "\n".join(lines)
+    if estimate_tokens(compacted, provider) <= max_tokens:
+        return compacted
+
+    # Keep roughly three quarters of the budget from the start and the rest from the end
+    ratio = CHARS_PER_TOKEN.get(provider, DEFAULT_CHARS_PER_TOKEN)
+    budget_chars = int(max_tokens * ratio) - 200
+    head_chars = int(budget_chars * 0.75)
+    tail_chars = budget_chars - head_chars
+
+    head, used = [], 0
+    for line in lines:
+        if used + len(line) + 1 > head_chars:
+            break
+        head.append(line)
+        used += len(line) + 1
+    start = len(head)
+
+    # A line longer than the whole head or tail budget (e.g. a vision paragraph without
+    # newlines) is cut inside, so the description never disappears behind the marker
+    head_cut = None
+    if start < len(lines) and len(lines[start]) > head_chars and head_chars - used >= MIN_CUT_CHARS:
+        head_cut = _cut_at_word(lines[start][:head_chars - used], keep_start=True)
+
+    tail, used = [], 0
+    for line in reversed(lines[start + (1 if head_cut is not None else 0):]):
+        if used + len(line) + 1 > tail_chars:
+            break
+        tail.append(line)
+        used += len(line) + 1
+    tail.reverse()
+    end = len(lines) - len(tail)
+
+    tail_cut = None
+    if end > start and len(lines[end - 1]) > tail_chars and tail_chars - used >= MIN_CUT_CHARS:
+        tail_cut = _cut_at_word(lines[end - 1][-(tail_chars - used):], keep_start=False)
+
+    omitted = lines[start:end]
+    headings = [
+        line.strip().lstrip("#").strip() for line in omitted
+        if line.strip() and (line.lstrip().startswith("#") or line.rstrip().endswith(":") or _indent_of(line) == 0)
+    ]
+    if head_cut is not None or tail_cut is not None:
+        kept = len(head_cut or "") + len(tail_cut or "")
+        summary = f"[... {sum(len(line) + 1 for line in omitted) - kept} characters omitted to fit the prompt budget"
+    else:
+        summary = f"[... {len(omitted)} lines omitted to fit the prompt budget"
+    if headings and (len(omitted) > 1 or head_cut is None):
+        listed = ", ".join(heading[:40] for heading in headings[:8])
+        more = f" and {len(headings) - 8} more" if len(headings) > 8 else ""
+        summary += f"; omitted sections: {listed}{more}"
+    summary += " ...]"
+
+    middle = ([head_cut] if head_cut is not None else []) + [summary] + ([tail_cut] if tail_cut is not None else [])
+    return "\n".join(head + middle + tail)
+
+
+def _cut_at_word(text: str, keep_start: bool) -> str:
+    """Trim a cut-off piece of a line back to a word boundary."""
+    if keep_start:
+        boundary = text.rfind(" ")
+        return text[:boundary] if boundary > len(text) // 2 else text
+    boundary = text.find(" ")
+    return text[boundary + 1:] if 0 <= boundary < len(text) // 2 else text
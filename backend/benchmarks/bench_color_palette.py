@@ -0,0 +1,70 @@
+"""
+Benchmark dominant color extraction on large screenshots.
+
+Compares the Pillow `quantize` approach of `extract_dominant_colors` with the NumPy
+k-means extractor `extract_palette`, on synthetic UI screenshots saved as PNG and JPEG,
+and shows the colors each one finds.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_color_palette [--width 1440] [--height 8000] [--iterations 5]
+"""
+import argparse
+import io
+import random
+import time
+
+from PIL import Image, ImageDraw
+
+from app.utils.color_palette import extract_palette
+from app.utils.image_processing import extract_dominant_colors
+
+PAGE_COLORS = [(255, 255, 255), (245, 247, 250), (20, 33, 61), (252, 163, 17), (229, 229, 229), (33, 37, 41)]
+
+
+def make_screenshot(width: int, height: int, image_format: str) -> bytes:
+    """A tall mock page of bands, cards, buttons and text-like lines."""
+    rng = random.Random(7)
+    image = Image.new("RGB", (width, height), PAGE_COLORS[0])
+    draw = ImageDraw.Draw(image)
+    y = 0
+    while y < height:
+        band = rng.randint(200, 700)
+        draw.rectangle([0, y, width, y + band], fill=rng.choice(PAGE_COLORS[:3]))
+        for _ in range(rng.randint(2, 6)):
+            x = rng.randint(0, width - 300)
+            top = y + rng.randint(0, max(band - 120, 1))
+            draw.rectangle([x, top, x + rng.randint(120, 300), top + rng.randint(40, 120)], fill=rng.choice(PAGE_COLORS))
+        for line in range(rng.randint(3, 12)):
+            top = y + 20 + line * 24
+            draw.line([(40, top), (40 + rng.randint(200, width // 2), top)], fill=PAGE_COLORS[5], width=3)
+        y += band
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, **({"quality": 85} if image_format == "JPEG" else {}))
+    return buffer.getvalue()
+
+
+def time_call(func, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        result = func()
+    return (time.perf_counter() - start) / iterations, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=1440)
+    parser.add_argument("--height", type=int, default=8000)
+    parser.add_argument("--iterations", type=int, default=5)
+    args = parser.parse_args()
+
+    for image_format in ("PNG", "JPEG"):
+        data = make_screenshot(args.width, args.height, image_format)
+        print(f"{image_format} {args.width}x{args.height}, {len(data) / 1024:.0f} KB:")
+        quantize_seconds, quantized = time_call(lambda: extract_dominant_colors(data, 6), args.iterations)
+        kmeans_seconds, palette = time_call(lambda: extract_palette(data, 6), args.iterations)
+        print(f"  quantize (Pillow):   {quantize_seconds * 1000:8.1f} ms  {['#%02x%02x%02x' % color for color in quantized]}")
+        print(f"  k-means (NumPy Lab): {kmeans_seconds * 1000:8.1f} ms  {[(c['hex'], c['coverage']) for c in palette]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark building and querying the few-shot example index.
+
+Builds an index of synthetic UI descriptions, in memory and from a JSON lines file, and
+compares LSH lookups with a brute-force scan that estimates the similarity to every
+stored signature.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_example_index [--examples 5000] [--queries 200]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from app.services.example_index_service import ExampleIndexService
+from app.utils.minhash import estimate_similarity, minhash_signature, shingles
+
+PARTS = [
+    "header with logo and navigation links", "hero section with headline and call to action button",
+    "grid of product cards with image title and price", "login form with email and password inputs",
+    "sidebar with icons and section labels", "table of recent orders with status badges",
+    "footer with copyright and social links", "pricing plans in three columns", "line chart of revenue",
+    "user profile card with avatar and bio", "search bar with filters", "testimonial carousel",
+]
+RESULT = {"components": [{"componentName": "page", "typescript": "", "html": "", "scss": ""}], "routing": []}
+
+
+def make_descriptions(count: int, seed: int) -> list:
+    rng = random.Random(seed)
+    return [
+        f"Screen {i}: " + ", ".join(rng.sample(PARTS, rng.randint(3, 6))) + f" using {rng.choice(['dark', 'light'])} theme"
+        for i in range(count)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--examples", type=int, default=5_000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    descriptions = make_descriptions(args.examples, seed=1)
+    queries = make_descriptions(args.queries, seed=2)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "examples.jsonl")
+
+        start = time.perf_counter()
+        index = ExampleIndexService(path=path, max_examples=args.examples)
+        for description in descriptions:
+            index.add(description, RESULT)
+        print(f"build ({len(index)} examples, persisted): {time.perf_counter() - start:8.2f} s")
+
+        start = time.perf_counter()
+        reloaded = ExampleIndexService(path=path, max_examples=args.examples)
+        reloaded.find_similar("warm up")
+        print(f"load from disk:                {time.perf_counter() - start:8.2f} s")
+
+    signatures = [minhash_signature(shingles(description)) for description in descriptions]
+
+    start = time.perf_counter()
+    for query in queries:
+        reloaded.find_similar(query)
+    lsh_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+    start = time.perf_counter()
+    for query in queries:
+        query_signature = minhash_signature(shingles(query))
+        sorted((estimate_similarity(query_signature, signature) for signature in signatures), reverse=True)[:2]
+    scan_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+    print(f"query, LSH index:              {lsh_ms:8.3f} ms")
+    print(f"query, brute-force scan:       {scan_ms:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark Figma node-tree extraction on large synthetic node trees.
+
+Compares the previous recursive list-concatenating walk with the explicit-stack,
+single-pass FigmaLayoutExtractor used by CodeGenerator.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_figma_traversal [--nodes 100000]
+"""
+import argparse
+import sys
+import time
+from typing import Dict, Any, List
+
+from app.core.config import settings
+from app.services.figma_layout_extractor import FigmaLayoutExtractor
+
+
+def build_wide_tree(node_count: int, fanout: int = 8) -> Dict[str, Any]:
+    """Build a balanced tree where every 5th node is a component instance."""
+    root = {"id": "0", "type": "FRAME", "name": "Root", "children": []}
+    queue = [root]
+    created = 1
+    while created < node_count:
+        parent = queue.pop(0)
+        for _ in range(fanout):
+            if created >= node_count:
+                break
+            is_instance = created % 5 == 0
+            child = {
+                "id": str(created),
+                "type": "INSTANCE" if is_instance else "FRAME",
+                "name": f"Node {created}",
+                "children": []
+            }
+            if is_instance:
+                child["componentId"] = "c1" if created % 2 else "missing"
+            parent["children"].append(child)
+            queue.append(child)
+            created += 1
+    return root
+
+
+def build_deep_tree(depth: int) -> Dict[str, Any]:
+    """Build a single chain of nested auto-layout frames."""
+    root = {"id": "0", "type": "FRAME", "name": "Root", "children": []}
+    current = root
+    for i in range(1, depth):
+        child = {"id": str(i), "type": "INSTANCE" if i % 10 == 0 else "FRAME", "name": f"Level {i}", "componentId": "c1", "children": []}
+        current["children"].append(child)
+        current = child
+    return root
+
+
+def recursive_extract(node: Dict[str, Any], definitions: Dict[str, Any], warnings: List[str]) -> List[str]:
+    """The previous recursive implementation, kept here as the baseline."""
+    info = []
+    if node.get('type') == 'INSTANCE':
+        component_id = node.get('componentId')
+        if component_id and definitions and component_id in definitions:
+            info.append(f"- {node.get('name', 'Unnamed')} is an instance of component '{definitions[component_id].get('name')}'")
+        else:
+            warnings.append(f"Component instance '{node.get('name', 'Unnamed')}' references undefined component")
+            info.append(f"- {node.get('name', 'Unnamed')} is an instance of an unknown component")
+    for child in node.get('children', []):
+        info.extend(recursive_extract(child, definitions, warnings))
+    return info
+
+
+def time_call(label: str, func) -> None:
+    start = time.perf_counter()
+    try:
+        result = func()
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"  {label:<12} {elapsed:9.1f} ms  ({len(result)} chars of output)")
+    except RecursionError:
+        print(f"  {label:<12}   RecursionError")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=100_000, help="Node count of the wide tree")
+    parser.add_argument("--depth", type=int, default=20_000, help="Depth of the nested tree")
+    args = parser.parse_args()
+
+    # Lift the limits so both implementations see the full tree
+    settings.FIGMA_MAX_TRAVERSAL_NODES = max(args.nodes, args.depth)
+    settings.FIGMA_MAX_TRAVERSAL_DEPTH = args.depth
+
+    extractor = FigmaLayoutExtractor()
+    definitions = {"c1": {"name": "Button"}}
+
+    def recursive(tree):
+        return "\n".join(recursive_extract(tree, definitions, []))
+
+    def iterative(tree):
+        return extractor.extract([tree], definitions, [])
+
+    print(f"Wide tree, {args.nodes} nodes:")
+    wide = build_wide_tree(args.nodes)
+    time_call("recursive", lambda: recursive(wide))
+    time_call("extractor", lambda: iterative(wide))
+
+    print(f"Deep tree, depth {args.depth} (recursion limit {sys.getrecursionlimit()}):")
+    deep = build_deep_tree(args.depth)
+    time_call("recursive", lambda: recursive(deep))
+    time_call("extractor", lambda: iterative(deep))
+
+
+if __name__ == "__main__":
+    main()
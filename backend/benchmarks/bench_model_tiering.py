@@ -0,0 +1,180 @@
+"""
+Benchmark complexity-based model tiering on a mixed workload, offline.
+
+Sends the same mix of simple designs (a single button screenshot, a small Figma frame)
+and complex ones (a tall page screenshot, a large Figma file) through POST
+/api/v1/generate-code/image and /figma twice: with MODEL_TIERING_ENABLED off, where every
+call goes to the strong model, and on, where simple designs go to the fast tier. Model
+calls go to the fake provider, whose fast tier answers FAKE_PROVIDER_FAST_SPEEDUP times
+sooner, and Figma files are replayed from fixtures, as in bench_pipeline.
+
+Reports, per endpoint and run, the p10/p50/p90/p99 latency of all requests and of each
+design class, and the tier decisions made (the `model_tier_decisions` metric), so the
+shift of the latency distribution is visible class by class.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_model_tiering [--endpoints image figma] [--requests 40]
+        [--simple-share 0.7] [--concurrency 4] [--latency 0.5] [--jitter 0.2]
+        [--tokens-per-second 80] [--speedup 3] [--json results.json]
+"""
+import argparse
+import asyncio
+import io
+import json
+import random
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import httpx
+from PIL import Image, ImageDraw
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.usage import token_window
+from app.main import app
+from app.services.example_index_service import example_index
+from app.utils.figma_fixtures import build_figma_file, write_figma_fixtures
+from benchmarks.bench_pipeline import figma_file_key, make_screenshots, percentile, send
+
+PERCENTILES = [("p10", 0.10), ("p50", 0.50), ("p90", 0.90), ("p99", 0.99)]
+
+
+def make_button_screenshot(index: int) -> bytes:
+    """A small screenshot of a single button, with a color that differs per index."""
+    image = Image.new("RGB", (480, 160), (255, 255, 255))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle([160, 50, 320, 110], fill=(37, 99, 235 - index % 64))
+    draw.line([(190, 80), (290, 80)], fill=(255, 255, 255), width=3)
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def make_workload(requests: int, simple_share: float) -> List[str]:
+    """The design class ("simple" or "complex") of each request, in a fixed shuffled order."""
+    simple = round(requests * simple_share)
+    classes = ["simple"] * simple + ["complex"] * (requests - simple)
+    random.Random(0).shuffle(classes)
+    return classes
+
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    return {name: percentile(latencies, fraction) for name, fraction in PERCENTILES}
+
+
+async def run_workload(client: httpx.AsyncClient, endpoint: str, classes: List[str], screenshots: List[bytes],
+                       concurrency: int, tiering: bool) -> Dict[str, Any]:
+    """Send every request of the workload with at most `concurrency` in flight and summarize them."""
+    settings.MODEL_TIERING_ENABLED = tiering
+    metrics.reset()
+    token_window.reset()
+    # Generations become few-shot examples; start both runs from the same index
+    example_index.clear()
+    pending = iter(range(len(classes)))
+    latencies: Dict[str, List[float]] = {"simple": [], "complex": []}
+    statuses: Dict[int, int] = {}
+
+    async def worker() -> None:
+        for index in pending:
+            start = time.perf_counter()
+            status = await send(client, endpoint, index, screenshots)
+            latencies[classes[index]].append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    decisions: Dict[str, float] = {}
+    for counter in metrics.snapshot()["counters"]:
+        if counter["name"] == "model_tier_decisions" and counter["labels"].get("endpoint") == endpoint:
+            key = f"{counter['labels']['stage']}:{counter['labels']['tier']}"
+            decisions[key] = decisions.get(key, 0) + counter["value"]
+
+    return {
+        "endpoint": endpoint,
+        "tiering": tiering,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "throughput": len(classes) / elapsed if elapsed > 0 else 0.0,
+        "all": summarize(latencies["simple"] + latencies["complex"]),
+        "simple": summarize(latencies["simple"]),
+        "complex": summarize(latencies["complex"]),
+        "decisions": decisions
+    }
+
+
+def print_result(result: Dict[str, Any]) -> None:
+    label = "on" if result["tiering"] else "off"
+    statuses = ", ".join(f"{status}: {count}" for status, count in result["statuses"].items())
+    decisions = ", ".join(f"{key} x{int(count)}" for key, count in sorted(result["decisions"].items())) or "none"
+    print(f"{result['endpoint']:<6} tiering {label:<3}  {result['throughput']:6.2f} req/s  ({statuses})  decisions: {decisions}")
+    for design_class in ("all", "simple", "complex"):
+        summary = result[design_class]
+        row = "  ".join(f"{name} {summary[name] * 1000:8.1f} ms" for name, _ in PERCENTILES)
+        print(f"    {design_class:<8} {row}")
+
+
+async def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    classes = make_workload(args.requests, args.simple_share)
+    screenshots = []
+    if "image" in args.endpoints:
+        pages = make_screenshots(min(args.requests, 64), args.width, args.height)
+        screenshots = [
+            make_button_screenshot(index) if design_class == "simple" else pages[index % len(pages)]
+            for index, design_class in enumerate(classes)
+        ]
+    if "figma" in args.endpoints:
+        for index, design_class in enumerate(classes):
+            key = figma_file_key(index)
+            node_count = args.simple_nodes if design_class == "simple" else args.complex_nodes
+            write_figma_fixtures(settings.FIGMA_FIXTURES_DIR, key, build_figma_file(node_count, name=f"Benchmark {key}", seed=index))
+
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            for endpoint in args.endpoints:
+                # Warm up (worker processes, imports, lazily built state) outside the measurements
+                await send(client, endpoint, 0, screenshots)
+                for tiering in (False, True):
+                    result = await run_workload(client, endpoint, classes, screenshots, args.concurrency, tiering)
+                    print_result(result)
+                    results.append(result)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoints", nargs="+", choices=["image", "figma"], default=["image", "figma"])
+    parser.add_argument("--requests", type=int, default=40, help="Requests per endpoint and run")
+    parser.add_argument("--simple-share", type=float, default=0.7, help="Share of simple designs in the workload")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake provider time to first token, in seconds")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Fake provider extra random latency, up to this many seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=80, help="Fake provider output rate (0 for instant)")
+    parser.add_argument("--speedup", type=float, default=3, help="How many times faster the fake provider's fast tier answers")
+    parser.add_argument("--width", type=int, default=1280, help="Width of the complex page screenshots")
+    parser.add_argument("--height", type=int, default=2400, help="Height of the complex page screenshots")
+    parser.add_argument("--simple-nodes", type=int, default=40, help="Nodes of each simple Figma document")
+    parser.add_argument("--complex-nodes", type=int, default=2000, help="Nodes of each complex Figma document")
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    settings.DEFAULT_VLM_PROVIDER = "fake"
+    settings.FAKE_PROVIDER_LATENCY_SECONDS = args.latency
+    settings.FAKE_PROVIDER_JITTER_SECONDS = args.jitter
+    settings.FAKE_PROVIDER_TOKENS_PER_SECOND = args.tokens_per_second
+    settings.FAKE_PROVIDER_FAST_SPEEDUP = args.speedup
+
+    with tempfile.TemporaryDirectory() as figma_fixtures:
+        settings.FIGMA_FIXTURES_MODE = "replay"
+        settings.FIGMA_FIXTURES_DIR = figma_fixtures
+        results = asyncio.run(run(args))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump({"settings": vars(args), "results": results}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Benchmark the generation endpoints end to end, offline.
+
+Drives POST /api/v1/generate-code/image and /figma in process, through httpx's ASGI
+transport, at several concurrencies. Model calls go to the fake provider, which waits
+like a real one (time to first token, jitter, output tokens per second) and can replay
+recorded responses; Figma requests are replayed from fixtures of synthetic documents,
+through the real FigmaService. Each request uses a different screenshot or file, so
+single-flight sharing does not flatter the numbers.
+
+Reports, per endpoint and concurrency: p50/p95/p99 latency, throughput, response status
+counts, p50/p95/p99 of each pipeline stage (the `stage_seconds` metric) and the peak RSS
+of the server process. With --json the results are also written to a file, to compare
+runs in CI.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_pipeline [--endpoints image figma] [--concurrency 1 4 16]
+        [--requests 32] [--latency 0.5] [--jitter 0.2] [--tokens-per-second 80]
+        [--fixtures responses.jsonl] [--json results.json]
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import resource
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List
+
+import httpx
+from PIL import Image, ImageDraw
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.main import app
+from app.utils.figma_fixtures import build_figma_file, write_figma_fixtures
+from benchmarks.bench_color_palette import make_screenshot
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes (the peak so far where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm", "r") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class RssSampler:
+    """Samples the RSS in a background thread and keeps the peak."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.peak = max(self.peak, current_rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> "RssSampler":
+        self.peak = current_rss()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def make_screenshots(count: int, width: int, height: int) -> List[bytes]:
+    """Distinct PNG screenshots: the same mock page with a marker in a different color."""
+    base = Image.open(io.BytesIO(make_screenshot(width, height, "PNG"))).convert("RGB")
+    screenshots = []
+    for index in range(count):
+        page = base.copy()
+        ImageDraw.Draw(page).rectangle([8, 8, 40, 40], fill=(index % 256, index // 256 % 256, 128))
+        buffer = io.BytesIO()
+        page.save(buffer, format="PNG")
+        screenshots.append(buffer.getvalue())
+    return screenshots
+
+
+def figma_file_key(index: int) -> str:
+    return f"BENCH{index:06d}"
+
+
+def write_figma_files(directory: str, count: int, node_count: int) -> None:
+    """Write fixtures of `count` distinct synthetic Figma files."""
+    for index in range(count):
+        key = figma_file_key(index)
+        write_figma_fixtures(directory, key, build_figma_file(node_count, name=f"Benchmark {key}", seed=index))
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[int(fraction * (len(ordered) - 1))] if ordered else 0.0
+
+
+async def send(client: httpx.AsyncClient, endpoint: str, index: int, screenshots: List[bytes]) -> int:
+    if endpoint == "image":
+        data = screenshots[index % len(screenshots)]
+        response = await client.post("/api/v1/generate-code/image", files={"file": (f"page-{index}.png", data, "image/png")})
+    else:
+        response = await client.post(
+            "/api/v1/generate-code/figma",
+            json={"file_url": f"https://www.figma.com/file/{figma_file_key(index)}/benchmark", "access_token": "benchmark"}
+        )
+    return response.status_code
+
+
+async def run_scenario(client: httpx.AsyncClient, endpoint: str, concurrency: int, requests: int,
+                       screenshots: List[bytes], first_index: int) -> Dict[str, Any]:
+    """Send `requests` requests with at most `concurrency` in flight and summarize them."""
+    metrics.reset()
+    pending = iter(range(first_index, first_index + requests))
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+
+    async def worker() -> None:
+        for index in pending:
+            start = time.perf_counter()
+            statuses[await send(client, endpoint, index, screenshots)] += 1
+            latencies.append(time.perf_counter() - start)
+
+    with RssSampler() as rss:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    stages = {}
+    for histogram in metrics.snapshot()["histograms"]:
+        if histogram["name"] == "stage_seconds" and histogram["labels"].get("endpoint") == endpoint:
+            value = histogram["value"]
+            stages[histogram["labels"]["stage"]] = {key: value[key] for key in ("count", "p50", "p95", "p99")}
+
+    return {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": requests,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "throughput": requests / elapsed if elapsed > 0 else 0.0,
+        "peak_rss_mb": rss.peak / (1024 * 1024),
+        "stages": stages
+    }
+
+
+def print_result(result: Dict[str, Any]) -> None:
+    statuses = ", ".join(f"{status}: {count}" for status, count in result["statuses"].items())
+    print(
+        f"{result['endpoint']:<6} concurrency {result['concurrency']:>3}  "
+        f"p50 {result['p50'] * 1000:8.1f} ms  p95 {result['p95'] * 1000:8.1f} ms  p99 {result['p99'] * 1000:8.1f} ms  "
+        f"{result['throughput']:7.2f} req/s  peak RSS {result['peak_rss_mb']:7.1f} MB  ({statuses})"
+    )
+    for stage, summary in result["stages"].items():
+        print(f"    {stage:<12} p50 {summary['p50'] * 1000:8.1f} ms  p95 {summary['p95'] * 1000:8.1f} ms  p99 {summary['p99'] * 1000:8.1f} ms")
+
+
+async def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    screenshots = make_screenshots(min(args.requests, 64), args.width, args.height) if "image" in args.endpoints else []
+    if "figma" in args.endpoints:
+        write_figma_files(settings.FIGMA_FIXTURES_DIR, 1 + args.requests * len(args.concurrency), args.figma_nodes)
+
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            for endpoint in args.endpoints:
+                next_index = 0
+                # Warm up (worker processes, imports, lazily built state) outside the measurements
+                await send(client, endpoint, next_index, screenshots)
+                next_index += 1
+                for concurrency in args.concurrency:
+                    result = await run_scenario(client, endpoint, concurrency, args.requests, screenshots, next_index)
+                    next_index += args.requests
+                    print_result(result)
+                    results.append(result)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoints", nargs="+", choices=["image", "figma"], default=["image", "figma"])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=32, help="Requests per endpoint and concurrency")
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake provider time to first token, in seconds")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Fake provider extra random latency, up to this many seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=80, help="Fake provider output rate (0 for instant)")
+    parser.add_argument("--fixtures", default="", help="JSON lines file of recorded responses for the fake provider")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=2400)
+    parser.add_argument("--figma-nodes", type=int, default=2000, help="Nodes of each synthetic Figma document")
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    settings.DEFAULT_VLM_PROVIDER = "fake"
+    settings.FAKE_PROVIDER_LATENCY_SECONDS = args.latency
+    settings.FAKE_PROVIDER_JITTER_SECONDS = args.jitter
+    settings.FAKE_PROVIDER_TOKENS_PER_SECOND = args.tokens_per_second
+    settings.FAKE_PROVIDER_FIXTURES_PATH = args.fixtures
+
+    with tempfile.TemporaryDirectory() as figma_fixtures:
+        settings.FIGMA_FIXTURES_MODE = "replay"
+        settings.FIGMA_FIXTURES_DIR = figma_fixtures
+        results = asyncio.run(run(args))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump({"settings": vars(args), "results": results}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Microbenchmark of generation prompt construction.
+
+Compares the previous keyword hint detection (lowercasing the description again for
+every term tested) with the precomputed single-lowercase matcher and with a compiled
+regex alternation, and times full prompt assembly from the prebuilt static prefix.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_prompt_construction [--size 20000] [--iterations 2000]
+"""
+import argparse
+import random
+import re
+import timeit
+
+from app.services.prompt_templates import STATIC_PROMPT_PREFIX, STRUCTURE_HINTS, build_dynamic_suffix, detect_structure_hints
+
+WORDS = ["header", "button", "image", "hero", "footer", "text", "layout", "padding", "primary", "shadow", "icon", "avatar"]
+
+
+def legacy_detect(description: str) -> list:
+    """The previous approach: one lowercase copy and one `in` scan per term, per category."""
+    return [
+        category for category, (terms, _hint) in STRUCTURE_HINTS.items()
+        if any(term in description.lower() for term in terms)
+    ]
+
+
+_REGEX_MATCHERS = [
+    (category, re.compile("|".join(re.escape(term) for term in terms), re.IGNORECASE))
+    for category, (terms, _hint) in STRUCTURE_HINTS.items()
+]
+
+
+def regex_detect(description: str) -> list:
+    """Alternative considered: one compiled case-insensitive regex per category."""
+    return [category for category, matcher in _REGEX_MATCHERS if matcher.search(description)]
+
+
+def legacy_prompt(description: str) -> str:
+    """Approximates the previous f-string assembly, which re-joined the whole template every call."""
+    hints = "".join(STRUCTURE_HINTS[category][1] for category in legacy_detect(description))
+    return f"{STATIC_PROMPT_PREFIX}UI Description:\n{description}\n\n\n{hints}\n"
+
+
+def make_description(size: int, with_keywords: bool) -> str:
+    rng = random.Random(42)
+    words = []
+    while sum(len(word) + 1 for word in words) < size:
+        words.append(rng.choice(WORDS))
+    if with_keywords:
+        words.append("navigation menu")
+    return " ".join(words)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=20_000, help="Description size in characters")
+    parser.add_argument("--iterations", type=int, default=2_000)
+    args = parser.parse_args()
+
+    for label, with_keywords in (("no keywords (worst case)", False), ("keyword at end", True)):
+        description = make_description(args.size, with_keywords)
+        assert legacy_detect(description) == detect_structure_hints(description)
+        print(f"{label}, {len(description)} chars:")
+        for name, func in (
+            ("legacy hints", lambda: legacy_detect(description)),
+            ("regex hints", lambda: regex_detect(description)),
+            ("matcher hints", lambda: detect_structure_hints(description)),
+            ("legacy prompt", lambda: legacy_prompt(description)),
+            ("cached prompt", lambda: STATIC_PROMPT_PREFIX + build_dynamic_suffix(description)),
+        ):
+            seconds = timeit.timeit(func, number=args.iterations)
+            print(f"  {name:<14} {seconds / args.iterations * 1e6:9.1f} us/call")
+
+
+if __name__ == "__main__":
+    main()
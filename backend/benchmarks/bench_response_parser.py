@@ -0,0 +1,78 @@
+"""
+Benchmark AI response parsing on well-formed and malformed responses.
+
+Compares the previous regex-based extraction (```json lazy match, greedy DOTALL
+`{"components": ... }` match, then three code-block regex scans) with the single-pass
+scanner used by CodeGenerator._parse_ai_response.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_response_parser [--scale 2000]
+"""
+import argparse
+import json
+import re
+import time
+
+from app.services.code_generator import CodeGenerator
+
+
+def legacy_parse(response_text: str) -> bool:
+    """The previous extraction strategy; returns whether the components JSON was recovered."""
+    json_match = re.search(r'```json\s*(.+?)\s*```', response_text, re.DOTALL)
+    if json_match:
+        json_content = json_match.group(1)
+    else:
+        json_match = re.search(r'(\{\s*"components"\s*:.+\})', response_text, re.DOTALL)
+        json_content = json_match.group(1) if json_match else response_text
+    try:
+        return "components" in json.loads(json_content)
+    except (json.JSONDecodeError, RecursionError, TypeError):
+        pass
+    re.findall(r"```(?:typescript|ts)\s*([\s\S]*?)```", response_text)
+    re.findall(r"```(?:html)\s*([\s\S]*?)```", response_text)
+    re.findall(r"```(?:scss|css)\s*([\s\S]*?)```", response_text)
+    return False
+
+
+def single_pass_parse(generator: CodeGenerator, response_text: str) -> bool:
+    """The current parser; returns whether the components JSON was recovered."""
+    try:
+        return generator._parse_ai_response(response_text)["component_name"] == "item-list"
+    except ValueError:
+        return False
+
+
+def build_cases(scale: int) -> dict:
+    component = {
+        "componentName": "item-list",
+        "typescript": "export class ItemListComponent { items = [" + ", ".join(f"{{ id: {i} }}" for i in range(50)) + "]; }",
+        "html": "<ul>" + "<li>{{ item }}</li>" * 50 + "</ul>",
+        "scss": ":host { display: block; }",
+    }
+    payload = json.dumps({"components": [component] * 10})
+    return {
+        "well-formed fence": f"Here you go:\n```json\n{payload}\n```\n",
+        "raw object + prose": "Sure! " + payload + " Hope this helps {with anything}." * scale,
+        "truncated raw object": payload[: len(payload) // 2] + " } {" * scale,
+        "repeated openers": '{"components": ' * scale + "tail",
+        "unterminated fences": "```json\n" + "{ } ```ts\n" * scale,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=2_000, help="Repetition factor for malformed inputs")
+    args = parser.parse_args()
+
+    generator = CodeGenerator()
+    for label, text in build_cases(args.scale).items():
+        print(f"{label} ({len(text)} chars):")
+        for name, func in (("legacy regex", legacy_parse), ("single-pass", lambda t: single_pass_parse(generator, t))):
+            start = time.perf_counter()
+            recovered = func(text)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"  {name:<13} {elapsed:9.2f} ms  components recovered: {'yes' if recovered else 'no'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Write Figma API fixtures of a synthetic design, to replay large documents offline.
+
+The fixtures answer the requests FigmaService makes for the file (and, with --node-id,
+for one of its nodes). Serve them by starting the backend with
+FIGMA_FIXTURES_MODE=replay and FIGMA_FIXTURES_DIR set to the output directory, then
+request https://www.figma.com/file/<file key>/... with any access token.
+
+Usage (from the backend directory):
+    python -m benchmarks.make_figma_fixtures [--out fixtures/figma] [--file-key SYNTHETIC100K]
+        [--nodes 100000] [--node-id 1:1]
+"""
+import argparse
+import json
+import time
+
+from app.core.config import settings
+from app.utils.figma_fixtures import build_figma_file, write_figma_fixtures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default=settings.FIGMA_FIXTURES_DIR, help="Fixtures directory")
+    parser.add_argument("--file-key", default="SYNTHETIC100K")
+    parser.add_argument("--nodes", type=int, default=100_000, help="Approximate node count of the document")
+    parser.add_argument("--node-id", help="Also write the node endpoints of this node (e.g. the first screen, 1:1)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    file_data = build_figma_file(args.nodes, name=f"Synthetic {args.file_key}", seed=args.seed)
+    write_figma_fixtures(args.out, args.file_key, file_data, node_id=args.node_id)
+    size = len(json.dumps(file_data)) / (1024 * 1024)
+    print(f"Wrote {args.file_key} ({args.nodes} nodes, {size:.1f} MB) to {args.out} in {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -59,7 +59,7 @@ def mock_dependencies():
 def test_generate_project_from_image(mock_dependencies):
     """Test generating a project from image."""
     # Create a mock image file
-    mock_image = io.BytesIO(b"mock image content")
+    mock_image = io.BytesIO(b"\x89PNG\r\n\x1a\nmock image content")
     mock_image.name = "test.png"
     
     response = client.post(
@@ -86,4 +86,23 @@ def test_generate_project_from_figma(mock_dependencies):
     assert response.status_code == 200
     assert response.headers["Content-Type"] == "application/zip"
     assert "attachment; filename=generated_angular_project.zip" in response.headers["Content-Disposition"]
-    assert response.content == b"mock zip content" 
\ No newline at end of file
+    assert response.content == b"mock zip content" 
+
+def test_generate_project_rejects_non_image_upload(mock_dependencies):
+    """A file whose bytes are not an image should be rejected regardless of its content type."""
+    response = client.post(
+        "/api/v1/generate-code/image",
+        files={"file": ("test.png", io.BytesIO(b"<html>not an image</html>"), "image/png")}
+    )
+    
+    assert response.status_code == 415
+
+def test_generate_project_rejects_oversized_upload(mock_dependencies):
+    """A body larger than MAX_CONTENT_LENGTH should be rejected before it is parsed."""
+    with patch("app.core.body_limit.settings.MAX_CONTENT_LENGTH", 1024):
+        response = client.post(
+            "/api/v1/generate-code/image",
+            files={"file": ("big.png", io.BytesIO(b"\x89PNG\r\n\x1a\n" + b"0" * 200 * 1024), "image/png")}
+        )
+    
+    assert response.status_code == 413
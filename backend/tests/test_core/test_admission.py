@@ -0,0 +1,118 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+from app.core import admission
+from app.core.admission import AdmissionRejected, StageLimiter, stage_slot
+from app.core.config import settings
+from app.core.metrics import metrics
+
+
+class TestStageLimiter(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        metrics.reset()
+        self.release = asyncio.Event()
+        self.running = 0
+        self.peak = 0
+
+    async def hold(self, limiter):
+        async with limiter.slot():
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+            await self.release.wait()
+            self.running -= 1
+
+    async def test_concurrency_is_bounded(self):
+        """No more than max_concurrency requests should run the stage at once."""
+        limiter = StageLimiter("generate", max_concurrency=2, max_queue=10, queue_timeout=5)
+        tasks = [asyncio.ensure_future(self.hold(limiter)) for _ in range(5)]
+        await asyncio.sleep(0.01)
+
+        self.assertEqual(self.running, 2)
+        self.assertEqual(metrics.get_gauge("admission_queue_depth", stage="generate"), 3)
+        self.assertEqual(metrics.get_gauge("admission_active", stage="generate"), 2)
+
+        self.release.set()
+        await asyncio.gather(*tasks)
+        self.assertEqual(self.peak, 2)
+        self.assertEqual(metrics.get_gauge("admission_queue_depth", stage="generate"), 0)
+        self.assertEqual(metrics.get_gauge("admission_active", stage="generate"), 0)
+
+    async def test_full_queue_rejects_immediately(self):
+        """A request arriving when every slot and queue position is taken should be rejected."""
+        limiter = StageLimiter("describe", max_concurrency=1, max_queue=1, queue_timeout=5)
+        tasks = [asyncio.ensure_future(self.hold(limiter)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+
+        with patch.object(settings, "ADMISSION_RETRY_AFTER_SECONDS", 7):
+            with self.assertRaises(AdmissionRejected) as context:
+                async with limiter.slot():
+                    pass
+
+        self.assertEqual(context.exception.reason, "queue_full")
+        self.assertEqual(context.exception.retry_after, 7)
+        self.assertEqual(metrics.get_counter("admission_rejected", stage="describe", reason="queue_full"), 1)
+        self.release.set()
+        await asyncio.gather(*tasks)
+
+    async def test_queue_timeout_rejects(self):
+        """A request waiting longer than the queue timeout should be rejected."""
+        limiter = StageLimiter("package", max_concurrency=1, max_queue=5, queue_timeout=0.01)
+        holder = asyncio.ensure_future(self.hold(limiter))
+        await asyncio.sleep(0)
+
+        with self.assertRaises(AdmissionRejected) as context:
+            async with limiter.slot():
+                pass
+
+        self.assertEqual(context.exception.reason, "queue_timeout")
+        self.assertEqual(limiter.waiting, 0)
+        self.release.set()
+        await holder
+
+    async def test_cancelled_request_releases_slot(self):
+        """Cancelling a request holding a slot should let the next request in."""
+        limiter = StageLimiter("generate", max_concurrency=1, max_queue=1, queue_timeout=5)
+        holder = asyncio.ensure_future(self.hold(limiter))
+        await asyncio.sleep(0.01)
+        self.assertEqual(limiter.active, 1)
+        holder.cancel()
+        await asyncio.wait_for(asyncio.gather(holder, return_exceptions=True), 1)
+
+        async with limiter.slot():
+            self.assertEqual(limiter.active, 1)
+        self.assertEqual(limiter.active, 0)
+
+    async def test_cancel_while_slot_is_granted_does_not_enter_body(self):
+        """A request cancelled as its slot is granted should give the slot back, not run."""
+        limiter = StageLimiter("describe", max_concurrency=1, max_queue=1, queue_timeout=5)
+        entered = []
+
+        async def wait_for_slot():
+            async with limiter.slot():
+                entered.append(True)
+
+        async with limiter.slot():
+            waiter = asyncio.ensure_future(wait_for_slot())
+            await asyncio.sleep(0.01)
+        # Leaving the block granted the slot to the waiter; cancel it in the same tick
+        waiter.cancel()
+        await asyncio.wait_for(asyncio.gather(waiter, return_exceptions=True), 1)
+
+        self.assertTrue(waiter.cancelled())
+        self.assertEqual(entered, [])
+        self.assertEqual(limiter.active, 0)
+        self.assertFalse(limiter._semaphore.locked())
+
+    async def test_disabled_admission_control_bypasses_limits(self):
+        """With admission control disabled, stage_slot should never block or reject."""
+        limiter = StageLimiter("generate", max_concurrency=1, max_queue=0, queue_timeout=5)
+        with patch.dict(admission.stage_limiters, {"generate": limiter}), \
+             patch.object(settings, "ADMISSION_CONTROL_ENABLED", False):
+            async with stage_slot("generate"):
+                async with stage_slot("generate"):
+                    pass
+        self.assertEqual(limiter.active, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
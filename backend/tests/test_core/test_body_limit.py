@@ -0,0 +1,58 @@
+import unittest
+from unittest.mock import patch
+from app.core.body_limit import FORM_OVERHEAD_BYTES, BodySizeLimitMiddleware
+from app.core.config import settings
+
+
+class TestBodySizeLimitMiddleware(unittest.IsolatedAsyncioTestCase):
+    async def run_request(self, chunks, headers=()):
+        received = []
+        sent = []
+        messages = [{"type": "http.request", "body": chunk, "more_body": i < len(chunks) - 1} for i, chunk in enumerate(chunks)]
+
+        async def app(scope, receive, send):
+            while True:
+                message = await receive()
+                received.append(message)
+                if not message.get("more_body"):
+                    break
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"ok"})
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "headers": list(headers)}
+        with patch.object(settings, "MAX_CONTENT_LENGTH", 1024):
+            await BodySizeLimitMiddleware(app)(scope, receive, send)
+        return received, sent
+
+    async def test_small_body_passes_through(self):
+        """Bodies within the limit should reach the application untouched."""
+        received, sent = await self.run_request([b"a" * 100, b"b" * 100])
+
+        self.assertEqual(len(received), 2)
+        self.assertEqual(sent[0]["status"], 200)
+
+    async def test_declared_oversized_body_is_rejected_without_reading(self):
+        """A Content-Length above the limit should be answered with 413 straight away."""
+        size = str(1024 + FORM_OVERHEAD_BYTES + 1).encode("ascii")
+        received, sent = await self.run_request([b"x"], headers=[(b"content-length", size)])
+
+        self.assertEqual(received, [])
+        self.assertEqual(sent[0]["status"], 413)
+
+    async def test_streamed_body_is_cut_off_at_the_limit(self):
+        """Without Content-Length, reading should stop at the chunk that passes the limit."""
+        chunk = b"x" * (16 * 1024)
+        received, sent = await self.run_request([chunk] * 20)
+
+        self.assertLess(len(received), 20)
+        self.assertEqual(sent[0]["status"], 413)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+from app.core.cancellation import ClientDisconnected, StageTracker, cancel_on_disconnect
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.ai_service import AIService
+from app.services.providers import OpenAIProvider, ProviderRegistry
+
+
+class FakeRequest:
+    """Request whose client disconnects after a number of disconnect checks."""
+
+    def __init__(self, disconnect_after=None):
+        self.disconnect_after = disconnect_after
+        self.checks = 0
+
+    async def is_disconnected(self):
+        self.checks += 1
+        return self.disconnect_after is not None and self.checks >= self.disconnect_after
+
+
+class TestCancelOnDisconnect(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        metrics.reset()
+        patcher = patch.object(settings, "DISCONNECT_POLL_INTERVAL_SECONDS", 0.01)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_returns_result_when_client_stays_connected(self):
+        """A connected client should get the pipeline result."""
+        async def work():
+            await asyncio.sleep(0.03)
+            return b"zip"
+
+        result = await cancel_on_disconnect(FakeRequest(), work())
+
+        self.assertEqual(result, b"zip")
+
+    async def test_completed_stages_are_timed(self):
+        """Each stage of a finished pipeline should be observed once in stage_seconds."""
+        tracker = StageTracker("image", ["describe", "generate"])
+
+        async def work():
+            tracker.enter("describe")
+            await asyncio.sleep(0.02)
+            tracker.enter("generate")
+            return b"zip"
+
+        await cancel_on_disconnect(FakeRequest(), work(), tracker)
+
+        histograms = {h["labels"]["stage"]: h["value"] for h in metrics.snapshot()["histograms"] if h["name"] == "stage_seconds"}
+        self.assertEqual(set(histograms), {"describe", "generate"})
+        self.assertEqual(histograms["describe"]["count"], 1)
+        self.assertGreaterEqual(histograms["describe"]["max"], 0.015)
+        self.assertIsNone(tracker.current)
+
+    async def test_pipeline_errors_are_propagated(self):
+        """Errors raised by the pipeline should reach the endpoint unchanged."""
+        async def work():
+            raise ValueError("generation failed")
+
+        with self.assertRaises(ValueError):
+            await cancel_on_disconnect(FakeRequest(), work())
+
+    async def test_disconnect_cancels_pipeline_and_skips_later_stages(self):
+        """A disconnect should cancel the in-flight stage and never start the following ones."""
+        tracker = StageTracker("image", ["describe", "generate", "assemble", "package"])
+        started = []
+        cancelled = asyncio.Event()
+        semaphore = asyncio.Semaphore(1)
+
+        async def work():
+            tracker.enter("describe")
+            started.append("describe")
+            await asyncio.sleep(0)
+            tracker.enter("generate")
+            started.append("generate")
+            async with semaphore:
+                try:
+                    await asyncio.sleep(10)
+                except asyncio.CancelledError:
+                    cancelled.set()
+                    raise
+            started.append("assemble")
+
+        with self.assertRaises(ClientDisconnected):
+            await cancel_on_disconnect(FakeRequest(disconnect_after=2), work(), tracker)
+
+        self.assertTrue(cancelled.is_set())
+        self.assertEqual(started, ["describe", "generate"])
+        # The concurrency slot held by the cancelled stage was released
+        self.assertFalse(semaphore.locked())
+        self.assertEqual(metrics.get_counter("disconnect_cancellations", endpoint="image", stage="generate"), 1)
+        self.assertEqual(metrics.get_counter("disconnect_stages_avoided", endpoint="image"), 2)
+
+    async def test_disconnect_during_describe_cancels_the_vision_call(self):
+        """A disconnect while the image is being described should abort the provider call."""
+        tracker = StageTracker("image", ["describe", "generate", "assemble", "package"])
+        provider_cancelled = asyncio.Event()
+        generated = []
+
+        async def create(**kwargs):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                provider_cancelled.set()
+                raise
+
+        service = AIService()
+        service.providers = ProviderRegistry({"openai": OpenAIProvider(client=SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))))})
+
+        async def work():
+            tracker.enter("describe")
+            description = await service.process_image(b"screenshot")
+            tracker.enter("generate")
+            generated.append(description)
+
+        with patch.object(settings, "DEFAULT_VLM_PROVIDER", "openai"):
+            with self.assertRaises(ClientDisconnected):
+                await asyncio.wait_for(cancel_on_disconnect(FakeRequest(disconnect_after=2), work(), tracker), 5)
+            await asyncio.sleep(0)
+
+        self.assertTrue(provider_cancelled.is_set())
+        self.assertEqual(generated, [])
+        self.assertEqual(metrics.get_counter("disconnect_cancellations", endpoint="image", stage="describe"), 1)
+        self.assertEqual(metrics.get_counter("disconnect_stages_avoided", endpoint="image"), 3)
+
+    async def test_cancelling_endpoint_cancels_pipeline(self):
+        """If the endpoint itself is cancelled, the pipeline should not keep running."""
+        pipeline_cancelled = asyncio.Event()
+
+        async def work():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                pipeline_cancelled.set()
+                raise
+
+        endpoint = asyncio.ensure_future(cancel_on_disconnect(FakeRequest(), work()))
+        await asyncio.sleep(0.02)
+        endpoint.cancel()
+        await asyncio.gather(endpoint, return_exceptions=True)
+        await asyncio.sleep(0)
+
+        self.assertTrue(pipeline_cancelled.is_set())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+import httpx
+from app.core.http_fixtures import RecordingTransport, ReplayTransport, fixture_name, fixture_transport
+
+
+class TestHttpFixtures(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.requests = []
+
+    def upstream(self, request):
+        self.requests.append(request)
+        if request.url.path.endswith("/missing"):
+            return httpx.Response(404, json={"status": 404, "err": "Not found"})
+        return httpx.Response(200, json={"path": request.url.path, "ids": request.url.params.get("ids")})
+
+    async def test_recorded_responses_are_replayed_without_the_network(self):
+        """Responses recorded once should be served again, with the same status and body."""
+        recorder = RecordingTransport(self.directory.name, httpx.MockTransport(self.upstream))
+        async with httpx.AsyncClient(transport=recorder, headers={"X-Figma-Token": "secret"}) as client:
+            recorded = await client.get("https://api.figma.com/v1/files/KEY/nodes?ids=1:2")
+            missing = await client.get("https://api.figma.com/v1/files/missing")
+
+        async with httpx.AsyncClient(transport=ReplayTransport(self.directory.name)) as client:
+            replayed = await client.get("https://api.figma.com/v1/files/KEY/nodes?ids=1:2")
+            replayed_missing = await client.get("https://api.figma.com/v1/files/missing")
+
+        self.assertEqual(len(self.requests), 2)
+        self.assertEqual(replayed.json(), recorded.json())
+        self.assertEqual(replayed.json(), {"path": "/v1/files/KEY/nodes", "ids": "1:2"})
+        self.assertEqual(replayed_missing.status_code, 404)
+        self.assertEqual(missing.status_code, 404)
+        # The access token is never written to disk
+        for name in os.listdir(self.directory.name):
+            with open(os.path.join(self.directory.name, name), "rb") as file:
+                self.assertNotIn(b"secret", file.read())
+
+    async def test_unrecorded_request_fails_like_an_unreachable_server(self):
+        """A request without a fixture should raise a connection error, not reach the network."""
+        async with httpx.AsyncClient(transport=ReplayTransport(self.directory.name)) as client:
+            with self.assertRaises(httpx.ConnectError):
+                await client.get("https://api.figma.com/v1/files/KEY")
+
+    def test_fixture_name_ignores_host_and_parameter_order(self):
+        """Fixtures should replay against any base URL and any query parameter order."""
+        first = fixture_name("GET", httpx.URL("https://api.figma.com/v1/images/KEY?ids=1:2&format=png"))
+        second = fixture_name("get", httpx.URL("http://localhost:9000/v1/images/KEY?format=png&ids=1:2"))
+        other = fixture_name("GET", httpx.URL("https://api.figma.com/v1/images/KEY?ids=1:3&format=png"))
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertTrue(first.startswith("GET_v1_images_KEY-"))
+
+    def test_transport_is_chosen_by_mode(self):
+        """No mode keeps the default transport; an unknown mode is a configuration error."""
+        self.assertIsNone(fixture_transport("", self.directory.name))
+        self.assertIsInstance(fixture_transport("replay", self.directory.name), ReplayTransport)
+        with self.assertRaises(ValueError):
+            fixture_transport("playback", self.directory.name)
+
+
+if __name__ == "__main__":
+    unittest.main()
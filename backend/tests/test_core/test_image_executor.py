@@ -0,0 +1,67 @@
+import asyncio
+import io
+import os
+import unittest
+from unittest.mock import patch
+from PIL import Image, ImageDraw
+from app.core import image_executor
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.utils.image_analysis import ImageAnalysis
+
+
+def screenshot_bytes(image_format="PNG"):
+    image = Image.new("RGB", (800, 1200), (255, 255, 255))
+    ImageDraw.Draw(image).rectangle([0, 0, 799, 299], fill=(20, 33, 61))
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+def shared_memory_blocks():
+    return {name for name in os.listdir("/dev/shm") if name.startswith("psm_")} if os.path.isdir("/dev/shm") else set()
+
+
+class TestRunImageTask(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        metrics.reset()
+        self.addCleanup(image_executor.shutdown_image_pool)
+
+    async def test_small_images_are_processed_in_a_thread(self):
+        """Below the size threshold, no worker process is involved."""
+        with patch.object(settings, "IMAGE_PROCESS_WORKERS", 1), patch.object(settings, "IMAGE_PROCESS_MIN_BYTES", 10 ** 9):
+            palette = await ImageAnalysis(screenshot_bytes()).analyze(6)
+
+        self.assertEqual([color["hex"] for color in palette], ["#ffffff", "#14213d"])
+        self.assertEqual(metrics.get_counter("image_tasks", executor="thread"), 1)
+        self.assertIsNone(image_executor._pool)
+
+    async def test_large_images_are_decoded_in_a_worker_process(self):
+        """Large images are analyzed in the pool through shared memory, with the same result."""
+        data = screenshot_bytes("JPEG")
+        blocks_before = shared_memory_blocks()
+        with patch.object(settings, "IMAGE_PROCESS_WORKERS", 1), patch.object(settings, "IMAGE_PROCESS_MIN_BYTES", 0):
+            analysis = ImageAnalysis(data)
+            results = await asyncio.gather(analysis.analyze(6), ImageAnalysis(data).analyze(6))
+
+        self.assertEqual(metrics.get_counter("image_tasks", executor="process"), 2)
+        self.assertEqual(results[0], results[1])
+        self.assertEqual([color["hex"] for color in results[0]], ["#ffffff", "#13213c"])
+        # The worker's thumbnail is cached, so later accesses do not decode again
+        self.assertEqual(analysis.thumbnail.size, (85, 128))
+        self.assertEqual(analysis.palette(6), results[0])
+        # Shared-memory blocks are released once the task finishes
+        self.assertEqual(shared_memory_blocks(), blocks_before)
+
+    async def test_disabled_pool_uses_threads(self):
+        """IMAGE_PROCESS_WORKERS=0 keeps all image work in threads."""
+        with patch.object(settings, "IMAGE_PROCESS_WORKERS", 0), patch.object(settings, "IMAGE_PROCESS_MIN_BYTES", 0):
+            image_executor.start_image_pool()
+            await ImageAnalysis(screenshot_bytes()).analyze(6)
+
+        self.assertEqual(metrics.get_counter("image_tasks", executor="thread"), 1)
+        self.assertIsNone(image_executor._pool)
+
+
+if __name__ == "__main__":
+    unittest.main()
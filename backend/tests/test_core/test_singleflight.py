@@ -0,0 +1,89 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.singleflight import SingleFlight
+
+
+class TestSingleFlight(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        metrics.reset()
+        self.group = SingleFlight("test")
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def work(self):
+        self.calls += 1
+        await self.release.wait()
+        return {"components": [self.calls]}
+
+    async def test_concurrent_calls_share_one_execution(self):
+        """Identical concurrent calls should run the work once and get independent copies."""
+        first = asyncio.ensure_future(self.group.do("image-hash", self.work))
+        second = asyncio.ensure_future(self.group.do("image-hash", self.work))
+        other = asyncio.ensure_future(self.group.do("other-hash", self.work))
+        await asyncio.sleep(0)
+        self.release.set()
+
+        results = await asyncio.gather(first, second, other)
+
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(results[0], results[1])
+        self.assertIsNot(results[0], results[1])
+        self.assertEqual(metrics.get_counter("singleflight_calls", group="test", shared=True), 1)
+        self.assertEqual(len(self.group), 0)
+
+    async def test_errors_are_shared_and_not_cached(self):
+        """Every waiter should see the error, and the next call should run the work again."""
+        async def fail():
+            self.calls += 1
+            await asyncio.sleep(0)
+            raise ValueError("provider down")
+
+        outcomes = await asyncio.gather(self.group.do("k", fail), self.group.do("k", fail), return_exceptions=True)
+        with self.assertRaises(ValueError):
+            await self.group.do("k", fail)
+
+        self.assertTrue(all(isinstance(outcome, ValueError) for outcome in outcomes))
+        self.assertEqual(self.calls, 2)
+
+    async def test_cancelled_initiator_does_not_cancel_other_waiters(self):
+        """When the first caller goes away, the shared work should continue for the rest."""
+        initiator = asyncio.ensure_future(self.group.do("k", self.work))
+        follower = asyncio.ensure_future(self.group.do("k", self.work))
+        await asyncio.sleep(0)
+
+        initiator.cancel()
+        await asyncio.sleep(0)
+        self.release.set()
+
+        self.assertEqual(await follower, {"components": [1]})
+        self.assertTrue(initiator.cancelled())
+        self.assertEqual(metrics.get_counter("singleflight_cancelled", group="test"), 0)
+
+    async def test_work_is_cancelled_when_every_waiter_is_gone(self):
+        """The shared task should be cancelled once no caller is waiting, and a new call starts afresh."""
+        waiter = asyncio.ensure_future(self.group.do("k", self.work))
+        await asyncio.sleep(0)
+        shared_task = self.group._calls["k"].task
+
+        waiter.cancel()
+        await asyncio.gather(waiter, shared_task, return_exceptions=True)
+
+        self.assertTrue(shared_task.cancelled())
+        self.assertEqual(metrics.get_counter("singleflight_cancelled", group="test"), 1)
+        self.release.set()
+        self.assertEqual(await self.group.do("k", self.work), {"components": [2]})
+
+    async def test_disabled_runs_every_call(self):
+        """With SINGLE_FLIGHT_ENABLED off every caller should do its own work."""
+        self.release.set()
+        with patch.object(settings, "SINGLE_FLIGHT_ENABLED", False):
+            await asyncio.gather(self.group.do("k", self.work), self.group.do("k", self.work))
+
+        self.assertEqual(self.calls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+import asyncio
+import io
+import unittest
+from unittest.mock import patch
+from PIL import Image
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.usage import BudgetExceeded, RequestUsage, TokenRateWindow, TokenUsage, begin_request_usage, token_window
+from app.services.ai_service import AIService
+from app.services.code_generator import CodeGenerator
+from app.services.component_cache_service import component_cache
+from app.services.example_index_service import example_index
+from app.services.providers import FakeProvider, ProviderRegistry
+from app.utils.image_analysis import ImageAnalysis
+from app.utils.token_budget import estimate_image_tokens
+
+
+def png(width, height, shade=240):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (shade, shade, shade)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class TierRecordingProvider(FakeProvider):
+    """Fake provider that remembers the model tier and output format of each call."""
+
+    def __init__(self):
+        super().__init__(fixtures={})
+        self.calls = []
+
+    async def describe_image(self, image, prompt, max_tokens, tier="strong"):
+        self.calls.append(("describe", tier))
+        return await super().describe_image(image, prompt, max_tokens, tier=tier)
+
+    async def generate(self, static_prefix, dynamic_suffix, max_tokens, output_format, structured, cache_prefix, tier="strong"):
+        self.calls.append((output_format, tier))
+        return await super().generate(static_prefix, dynamic_suffix, max_tokens, output_format, structured, cache_prefix, tier=tier)
+
+
+class TestRequestUsage(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        metrics.reset()
+        token_window.reset()
+        component_cache.clear()
+        example_index.clear()
+        for name, value in [("DEFAULT_VLM_PROVIDER", "fake"), ("GENERATION_MODE", "single"), ("COLOR_PALETTE_SIZE", 0),
+                            ("IMAGE_PROCESS_WORKERS", 0), ("LAYOUT_SKELETON_ENABLED", False),
+                            ("FAKE_PROVIDER_LATENCY_SECONDS", 0), ("FAKE_PROVIDER_JITTER_SECONDS", 0),
+                            ("FAKE_PROVIDER_TOKENS_PER_SECOND", 0), ("REQUEST_TOKEN_BUDGET", 0),
+                            ("MINUTE_TOKEN_BUDGET", 0), ("BUDGET_ACTION", "downgrade")]:
+            patcher = patch.object(settings, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.provider = TierRecordingProvider()
+        self.ai_service = AIService()
+        self.code_generator = CodeGenerator()
+        self.ai_service.providers = self.code_generator.providers = ProviderRegistry({"fake": self.provider})
+
+    async def run_request(self, usage, image):
+        """Describe an image and generate code from it as one request, like the endpoints do."""
+        async def pipeline():
+            begin_request_usage(usage)
+            description = await self.ai_service.process_image(image)
+            return await self.code_generator.generate_from_image_description(description)
+        return await asyncio.ensure_future(pipeline())
+
+    async def test_tokens_and_cost_are_accounted_per_endpoint_and_provider(self):
+        """Every call of a request should add its input, output and image tokens and their cost."""
+        usage = RequestUsage("image")
+        with patch.object(settings, "TOKEN_PRICE_INPUT_PER_MILLION", 2.5), \
+             patch.object(settings, "TOKEN_PRICE_OUTPUT_PER_MILLION", 10.0):
+            await self.run_request(usage, png(320, 200))
+
+        tokens = usage.by_provider["fake"]
+        self.assertEqual(tokens.image, estimate_image_tokens(320, 200, "fake"))
+        self.assertGreater(tokens.input, tokens.image)
+        self.assertGreater(tokens.output, 0)
+        self.assertEqual(usage.cost_usd, (tokens.input * 2.5 + tokens.output * 10.0) / 1_000_000)
+        self.assertEqual(metrics.get_counter("tokens_used", endpoint="image", provider="fake", kind="image"), tokens.image)
+        self.assertEqual(metrics.get_counter("tokens_used", endpoint="image", provider="fake", kind="output"), tokens.output)
+
+        summary = usage.finish()
+        self.assertEqual(summary["total_tokens"], tokens.input + tokens.output)
+        self.assertFalse(summary["downgraded"])
+        # Reservations are replaced by the tokens actually used
+        self.assertEqual(token_window.total(), tokens.input + tokens.output)
+
+    async def test_request_over_budget_is_rejected(self):
+        """With BUDGET_ACTION "reject", a call over the request budget should fail the request with 413."""
+        usage = RequestUsage("image")
+        with patch.object(settings, "BUDGET_ACTION", "reject"), patch.object(settings, "REQUEST_TOKEN_BUDGET", 100):
+            with self.assertRaises(BudgetExceeded) as raised:
+                await self.run_request(usage, png(320, 200, 230))
+
+        self.assertEqual(raised.exception.status_code, 413)
+        self.assertEqual(self.provider.calls, [])
+        self.assertEqual(metrics.get_counter("budget_rejections", endpoint="image", scope="request"), 1)
+
+    async def test_request_over_budget_is_downgraded_without_optional_calls(self):
+        """With BUDGET_ACTION "downgrade", the request should continue on the fast tier without planning."""
+        usage = RequestUsage("image")
+        with patch.object(settings, "REQUEST_TOKEN_BUDGET", 500), patch.object(settings, "GENERATION_MODE", "planned"):
+            generated = await self.run_request(usage, png(320, 200, 220))
+
+        self.assertEqual(generated.component_name, "fake-page")
+        self.assertTrue(usage.downgraded)
+        self.assertEqual(self.provider.calls, [("describe", "fast"), ("components", "fast")])
+        self.assertEqual(metrics.get_counter("budget_downgrades", endpoint="image", scope="request"), 1)
+
+    async def test_minute_budget_rejects_with_retry_after(self):
+        """A process out of tokens for the minute should refuse new requests with 429 and Retry-After."""
+        token_window.add(1000)
+        with patch.object(settings, "BUDGET_ACTION", "reject"), patch.object(settings, "MINUTE_TOKEN_BUDGET", 1000):
+            with self.assertRaises(BudgetExceeded) as raised:
+                begin_request_usage(RequestUsage("figma"))
+
+        self.assertEqual(raised.exception.status_code, 429)
+        self.assertTrue(1 <= raised.exception.retry_after <= 60)
+
+    async def test_window_forgets_old_tokens(self):
+        """Tokens should leave the per-minute window once they are older than the window."""
+        window = TokenRateWindow(seconds=0.05)
+        window.add(300)
+        window.add(-100)
+        self.assertEqual(window.total(), 200)
+
+        await asyncio.sleep(0.06)
+        self.assertEqual(window.total(), 0)
+
+    async def test_failed_calls_release_their_reservation(self):
+        """A provider call that raises should leave nothing reserved in the per-minute window."""
+        class FailingProvider(FakeProvider):
+            async def describe_image(self, image, prompt, max_tokens, tier="strong"):
+                raise RuntimeError("provider unavailable")
+
+            async def generate(self, static_prefix, dynamic_suffix, max_tokens, output_format, structured, cache_prefix, tier="strong"):
+                raise RuntimeError("provider unavailable")
+
+        self.ai_service.providers = self.code_generator.providers = ProviderRegistry({"fake": FailingProvider(fixtures={})})
+        usage = RequestUsage("image")
+
+        async def pipeline():
+            begin_request_usage(usage)
+            with self.assertRaises(RuntimeError):
+                await self.ai_service._call_provider(ImageAnalysis(png(320, 200)), "")
+            with self.assertRaises(RuntimeError):
+                await self.code_generator._call_provider("fake", "", "A page")
+        await asyncio.ensure_future(pipeline())
+
+        self.assertEqual(token_window.total(), 0)
+        self.assertEqual(usage.total_tokens, 0)
+
+    def test_record_replaces_the_reservation(self):
+        """Recording a call should count its real tokens instead of the reserved estimate."""
+        usage = RequestUsage("image")
+        self.assertEqual(usage.reserve(500), "strong")
+        self.assertEqual(token_window.total(), 500)
+
+        usage.record("openai", TokenUsage(input=100, output=50, cached=40), reserved=500)
+
+        self.assertEqual(token_window.total(), 150)
+        self.assertEqual(usage.total_tokens, 150)
+
+
+if __name__ == "__main__":
+    unittest.main()
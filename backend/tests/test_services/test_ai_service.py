@@ -0,0 +1,173 @@
+import asyncio
+import io
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+import numpy as np
+from PIL import Image
+from app.core.config import settings
+from app.services.ai_service import AIService, LAYOUT_PROMPT, VISION_PROMPT
+from app.services.providers import OpenAIProvider, ProviderRegistry
+from app.utils.image_analysis import ImageAnalysis
+
+
+class TestAIServiceSingleFlight(unittest.IsolatedAsyncioTestCase):
+    async def test_identical_concurrent_images_share_one_provider_call(self):
+        """Uploading the same screenshot concurrently should describe it only once."""
+        calls = []
+
+        async def describe(image):
+            calls.append(image.data)
+            await asyncio.sleep(0.01)
+            return {"description": "A login form", "source": "openai"}
+
+        service = AIService()
+        with patch.object(service, "_process_image", side_effect=describe):
+            results = await asyncio.gather(
+                service.process_image(b"same-image"),
+                service.process_image(b"same-image"),
+                service.process_image(b"other-image")
+            )
+
+        self.assertEqual(sorted(calls), [b"other-image", b"same-image"])
+        self.assertEqual(results[0], results[1])
+
+
+    async def test_vision_call_does_not_block_the_event_loop(self):
+        """While a provider call is in flight, an identical upload should join it."""
+        calls = []
+        loop_ticks = []
+
+        async def create(**kwargs):
+            calls.append(kwargs["model"])
+            await asyncio.sleep(0.05)
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="A login form"))])
+
+        async def tick():
+            while len(loop_ticks) < 3:
+                loop_ticks.append(True)
+                await asyncio.sleep(0.01)
+
+        service = AIService()
+        service.providers = ProviderRegistry({"openai": OpenAIProvider(client=SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))))})
+        with patch.object(settings, "DEFAULT_VLM_PROVIDER", "openai"):
+            first = asyncio.ensure_future(service.process_image(b"same-image"))
+            ticker = asyncio.ensure_future(tick())
+            await asyncio.sleep(0.02)
+            second = asyncio.ensure_future(service.process_image(b"same-image"))
+            results = await asyncio.gather(first, second, ticker)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(len(loop_ticks), 3)
+
+    async def test_image_is_sent_with_its_detected_mime_type(self):
+        """A PNG upload should not be labelled as JPEG in the provider request."""
+        requests = []
+
+        async def create(**kwargs):
+            requests.append(kwargs)
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="A login form"))])
+
+        service = AIService()
+        service.providers = ProviderRegistry({"openai": OpenAIProvider(client=SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))))})
+        image = ImageAnalysis(b"\x89PNG\r\n\x1a\n" + b"pixels")
+        with patch.object(settings, "DEFAULT_VLM_PROVIDER", "openai"):
+            await service.process_image(image)
+
+        url = requests[0]["messages"][1]["content"][1]["image_url"]["url"]
+        self.assertEqual(url, f"data:image/png;base64,{image.base64_payload}")
+
+
+def tall_page():
+    """A 600x3000 PNG page: blocks of noisy content separated by white gaps."""
+    rng = np.random.default_rng(1)
+    page = np.full((3000, 600, 3), 255, dtype=np.uint8)
+    for top in (100, 800, 1500, 2100):
+        page[top:top + 500, 50:550] = rng.integers(0, 255, (500, 500, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(page).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class TestAIServiceSections(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        for name, value in [("DEFAULT_VLM_PROVIDER", "openai"), ("COLOR_PALETTE_SIZE", 0),
+                            ("IMAGE_PROCESS_WORKERS", 0), ("VISION_SEGMENT_MAX_HEIGHT", 1000), ("VISION_SEGMENT_MAX_SECTIONS", 6),
+                            ("LAYOUT_SKELETON_ENABLED", False)]:
+            patcher = patch.object(settings, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def service(self, fail_section=None):
+        """AIService whose OpenAI client describes each image by its prompt and height."""
+        self.prompts = []
+        in_flight = [0]
+        self.max_in_flight = 0
+
+        async def create(**kwargs):
+            prompt, image = kwargs["messages"][1]["content"]
+            self.prompts.append(prompt["text"])
+            in_flight[0] += 1
+            self.max_in_flight = max(self.max_in_flight, in_flight[0])
+            await asyncio.sleep(0.01)
+            in_flight[0] -= 1
+            if fail_section and f"section {fail_section} of" in prompt["text"]:
+                raise RuntimeError("rate limited")
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=f"Part: {prompt['text'][:20]}"))])
+
+        service = AIService()
+        service.providers = ProviderRegistry({"openai": OpenAIProvider(client=SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))))})
+        return service
+
+    async def test_tall_screenshot_is_described_section_by_section(self):
+        """Sections are described concurrently and merged top to bottom."""
+        service = self.service()
+
+        result = await service.process_image(tall_page())
+
+        self.assertEqual(result["sections"], 4)
+        self.assertEqual(len(self.prompts), 4)
+        self.assertGreater(self.max_in_flight, 1)
+        headings = [line for line in result["description"].splitlines() if line.startswith("## ")]
+        self.assertEqual(headings, [
+            "## Section 1 of 4 (pixels 0-700 from the top)",
+            "## Section 2 of 4 (pixels 700-1400 from the top)",
+            "## Section 3 of 4 (pixels 1400-2050 from the top)",
+            "## Section 4 of 4 (pixels 2050-3000 from the top)"
+        ])
+
+    async def test_failed_section_falls_back_to_the_whole_page(self):
+        """If a section cannot be described, the page is described in one call."""
+        service = self.service(fail_section=2)
+
+        result = await service.process_image(tall_page())
+
+        self.assertNotIn("sections", result)
+        self.assertEqual(self.prompts[-1], VISION_PROMPT)
+
+    async def test_short_screenshot_is_described_in_one_call(self):
+        """Pages within the height limit are not split."""
+        service = self.service()
+
+        with patch.object(settings, "VISION_SEGMENT_MAX_HEIGHT", 4000):
+            result = await service.process_image(tall_page())
+
+        self.assertEqual(self.prompts, [VISION_PROMPT])
+        self.assertNotIn("sections", result)
+
+    async def test_measured_layout_is_given_to_the_model_and_the_generation(self):
+        """The skeleton goes into the vision prompt and is appended to the description."""
+        service = self.service()
+
+        with patch.object(settings, "VISION_SEGMENT_MAX_HEIGHT", 4000), patch.object(settings, "LAYOUT_SKELETON_ENABLED", True):
+            result = await service.process_image(tall_page())
+
+        self.assertEqual(len(self.prompts), 1)
+        self.assertTrue(self.prompts[0].startswith(f"{VISION_PROMPT}\n\n{LAYOUT_PROMPT}\n\nMeasured layout of the 600x3000 px screenshot"))
+        self.assertEqual(len(result["layout"]["blocks"]), 4)
+        self.assertIn("\n\nMeasured layout of the 600x3000 px screenshot", result["description"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,247 @@
+import asyncio
+import json
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.code_generator import CodeGenerator
+from app.services.component_cache_service import component_cache
+from app.services.example_index_service import example_index
+from app.services.providers import OpenAIProvider, ProviderRegistry
+from app.services.prompt_templates import STATIC_PROMPT_PREFIX, detect_structure_hints
+
+
+class TestCodeGeneratorFigmaExtraction(unittest.TestCase):
+    def setUp(self):
+        self.generator = CodeGenerator()
+
+    def test_figma_description_uses_requested_node_document(self):
+        """Node data from the nodes endpoint should be traversed through its 'document' key."""
+        figma_data = {
+            "file_data": {"document": {"children": [{}]}},
+            "node_data": {
+                "document": {
+                    "type": "FRAME",
+                    "name": "Screen",
+                    "children": [{"type": "INSTANCE", "name": "Primary", "componentId": "c1"}]
+                },
+                "components": {"c1": {"name": "Button"}}
+            }
+        }
+        warnings = []
+
+        description = self.generator._extract_figma_description(figma_data, {}, warnings)
+
+        self.assertIn("Figma design with 1 pages.", description)
+        self.assertIn('INSTANCE "Primary" of "Button"', description)
+        self.assertEqual(warnings, [])
+
+    def test_figma_description_walks_all_top_level_frames(self):
+        """Without node data every frame of every page should be described."""
+        figma_data = {
+            "file_data": {
+                "document": {
+                    "children": [
+                        {"type": "CANVAS", "children": [{"type": "FRAME", "name": "Home", "layoutMode": "VERTICAL"}]},
+                        {"type": "CANVAS", "children": [{"type": "FRAME", "name": "Settings", "layoutMode": "HORIZONTAL"}]}
+                    ]
+                }
+            }
+        }
+
+        description = self.generator._extract_figma_description(figma_data)
+
+        self.assertIn("Figma design with 2 pages.", description)
+        self.assertIn('FRAME "Home"', description)
+        self.assertIn('FRAME "Settings"', description)
+
+
+class TestCodeGeneratorPrompt(unittest.TestCase):
+    def setUp(self):
+        example_index.clear()
+        self.generator = CodeGenerator()
+
+    def test_prompt_starts_with_shared_static_prefix(self):
+        """Every prompt should share the same prebuilt prefix, with request data only in the suffix."""
+        first = self.generator._create_prompt("A pricing table", ["#ffffff"])
+        second = self.generator._create_prompt("A login screen")
+
+        self.assertTrue(first.startswith(STATIC_PROMPT_PREFIX))
+        self.assertTrue(second.startswith(STATIC_PROMPT_PREFIX))
+        self.assertIn('UI Description:\nA pricing table', first[len(STATIC_PROMPT_PREFIX):])
+        self.assertIn('["#ffffff"]', first)
+
+    def test_similar_past_generations_are_added_to_the_suffix(self):
+        """Retrieved examples should follow the description while the prefix stays unchanged."""
+        example_output = {"components": [make_component("login-card", "LoginCardComponent")], "routing": []}
+        example_index.add("Login card with email and password inputs and a sign in button", example_output)
+
+        with patch.object(settings, "FEW_SHOT_ENABLED", True):
+            static_prefix, dynamic_suffix = self.generator._create_prompt_parts("Login card with email and password inputs and a sign in link")
+            unrelated_suffix = self.generator._create_prompt_parts("A pricing table")[1]
+
+        self.assertEqual(static_prefix, STATIC_PROMPT_PREFIX)
+        self.assertIn("SIMILAR PAST GENERATIONS", dynamic_suffix)
+        self.assertIn(json.dumps(example_output), dynamic_suffix)
+        self.assertNotIn("SIMILAR PAST GENERATIONS", unrelated_suffix)
+
+    def test_structure_hints_are_detected_case_insensitively(self):
+        """Keyword hints should be detected regardless of case and returned in prompt order."""
+        self.assertEqual(detect_structure_hints("SIDEBAR with a Sign-up FORM and product Cards"), ["form", "card", "navigation"])
+        self.assertEqual(detect_structure_hints("A hero image"), [])
+
+
+
+def make_component(name, class_name, html="<div></div>"):
+    return {
+        "componentName": name,
+        "typescript": f"@Component({{ selector: 'app-{name}', standalone: true }})\nexport class {class_name} {{}}",
+        "html": html,
+        "scss": ""
+    }
+
+
+class TestCodeGeneratorRepair(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        metrics.reset()
+        example_index.clear()
+        self.generator = CodeGenerator()
+        self.generator.providers = ProviderRegistry({"openai": OpenAIProvider(client=SimpleNamespace())})
+
+    async def test_only_invalid_components_are_regenerated(self):
+        """A broken child component should be repaired without resending the valid ones."""
+        dashboard = make_component("dashboard", "DashboardComponent", "<app-task-list></app-task-list>")
+        broken = make_component("task-list", "TaskListComponent", "<ul><li>{{ task }</ul>")
+        fixed = make_component("task-list", "TaskListComponent", "<ul><li>{{ task }}</li></ul>")
+        responses = [json.dumps({"components": [dashboard, broken]}), json.dumps({"components": [fixed]})]
+
+        with patch.object(self.generator, "_call_provider", AsyncMock(side_effect=responses)) as call:
+            result = await self.generator._generate_single("openai", "A dashboard")
+
+        self.assertEqual(result["components"], [dashboard, fixed])
+        self.assertEqual(result["component_name"], "dashboard")
+        repair_suffix = call.call_args_list[1].args[2]
+        self.assertIn("- dashboard: selector app-dashboard, class DashboardComponent", repair_suffix)
+        self.assertIn("unclosed <li>", repair_suffix)
+        self.assertNotIn(dashboard["html"], repair_suffix)
+        self.assertEqual(metrics.get_counter("component_repairs", provider="openai", outcome="repaired"), 1)
+
+    async def test_only_accepted_generations_are_indexed_as_examples(self):
+        """Valid results should be added to the example index; fallback components should not."""
+        valid = {"components": [make_component("dashboard", "DashboardComponent")], "component_name": "dashboard"}
+        fallback = self.generator._generate_fallback_component("boom")
+
+        with patch.object(self.generator, "_generate_single", AsyncMock(side_effect=[valid, fallback])), \
+             patch.object(settings, "FEW_SHOT_ENABLED", True):
+            await self.generator._generate("openai", "A dashboard with charts")
+            await self.generator._generate("openai", "Something that failed")
+
+        self.assertEqual(len(example_index), 1)
+        self.assertEqual(example_index.find_similar("A dashboard with charts")[0][0]["output"]["components"], valid["components"])
+
+    async def test_unusable_components_are_dropped_when_repair_fails(self):
+        """Components missing required keys should be dropped if the repair request fails."""
+        dashboard = make_component("dashboard", "DashboardComponent")
+        responses = [json.dumps({"components": [{"componentName": "task-list"}, dashboard]}), RuntimeError("timeout")]
+
+        with patch.object(self.generator, "_call_provider", AsyncMock(side_effect=responses)):
+            result = await self.generator._generate_single("openai", "A dashboard")
+
+        self.assertEqual(result["components"], [dashboard])
+        self.assertEqual(result["component_name"], "dashboard")
+
+
+
+class TestCodeGeneratorPlannedGeneration(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        metrics.reset()
+        component_cache.clear()
+        self.generator = CodeGenerator()
+        self.plan = {
+            "components": [
+                {"componentName": "dashboard", "purpose": "Page layout", "children": ["task-list", "task-form", "missing"]},
+                {"componentName": "task-list", "purpose": "List of tasks", "children": []},
+                {"componentName": "task-form", "purpose": "New task form", "children": []}
+            ],
+            "routing": [{"path": "", "componentName": "dashboard"}, {"path": "x", "componentName": "unknown"}]
+        }
+
+    async def test_components_are_generated_concurrently_within_the_limit(self):
+        """Each planned component should get its own request, at most GENERATION_MAX_CONCURRENCY at once."""
+        class_names = {"dashboard": "DashboardComponent", "task-list": "TaskListComponent", "task-form": "TaskFormComponent"}
+        in_flight = []
+        peak = []
+
+        async def call_provider(provider, static_prefix, dynamic_suffix, max_tokens=None, output_format="components"):
+            if output_format == "plan":
+                return self.plan
+            name = dynamic_suffix.split('Generate ONLY the "')[1].split('"')[0]
+            in_flight.append(name)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.01)
+            in_flight.remove(name)
+            return {"components": [make_component(name, class_names[name])], "routing": []}
+
+        with patch.object(settings, "GENERATION_MAX_CONCURRENCY", 2), \
+             patch.object(self.generator, "_call_provider", side_effect=call_provider) as call:
+            result = await self.generator._generate_planned("openai", "A task dashboard")
+
+        self.assertEqual([c["componentName"] for c in result["components"]], ["dashboard", "task-list", "task-form"])
+        self.assertEqual(result["component_name"], "dashboard")
+        self.assertEqual(result["routing"], [{"path": "", "componentName": "dashboard"}])
+        self.assertEqual(max(peak), 2)
+        self.assertIn("<app-task-list>, <app-task-form>.", call.call_args_list[1].args[2])
+        self.assertEqual(call.call_args_list[1].args[3], settings.COMPONENT_MAX_TOKENS)
+
+    async def test_single_component_plan_falls_back_to_single_request(self):
+        """A plan with one component should use the single-request generation."""
+        plan = {"components": [self.plan["components"][1]], "routing": []}
+        single_result = {"components": [make_component("task-list", "TaskListComponent")]}
+
+        with patch.object(settings, "GENERATION_MODE", "planned"), \
+             patch.object(self.generator, "_call_provider", AsyncMock(return_value=plan)), \
+             patch.object(self.generator, "_generate_single", AsyncMock(return_value=single_result)) as single:
+            result = await self.generator._generate("openai", "A task list")
+
+        self.assertIs(result, single_result)
+        single.assert_awaited_once_with("openai", "A task list", None)
+
+    async def test_leaf_components_are_reused_from_the_library(self):
+        """A second project with the same leaf components should only generate the parent."""
+        class_names = {"dashboard": "DashboardComponent", "task-list": "TaskListComponent", "task-form": "TaskFormComponent"}
+        generated = []
+
+        async def call_provider(provider, static_prefix, dynamic_suffix, max_tokens=None, output_format="components"):
+            if output_format == "plan":
+                return self.plan
+            name = dynamic_suffix.split('Generate ONLY the "')[1].split('"')[0]
+            generated.append(name)
+            return {"components": [make_component(name, class_names[name])], "routing": []}
+
+        def description(project):
+            return "\n".join([
+                f'FRAME "{project} dashboard" 1440x900 col gap=24',
+                '  FRAME "Task list" 800x600 col gap=8 fill=$c1',
+                '    FRAME "Task row" 800x48 row gap=12 align=min,center',
+                '      TEXT "Buy milk" color=$c2 text=$t1',
+                '      INSTANCE "Checkbox" of "Checkbox" 20x20',
+                '  FRAME "Task form" 400x300 col gap=16 pad=24 fill=$c3',
+                '    INSTANCE "Title input" of "Input" 352x40',
+                '    INSTANCE "Due date input" of "Input" 352x40',
+                '    INSTANCE "Add task" of "Button" 120x40 fill=$c4',
+            ])
+
+        with patch.object(settings, "COMPONENT_CACHE_ENABLED", True), \
+             patch.object(self.generator, "_call_provider", side_effect=call_provider):
+            await self.generator._generate_planned("openai", description("Personal"))
+            generated.clear()
+            result = await self.generator._generate_planned("openai", description("Team"))
+
+        self.assertEqual(generated, ["dashboard"])
+        self.assertEqual([c["componentName"] for c in result["components"]], ["dashboard", "task-list", "task-form"])
+        self.assertEqual(metrics.get_counter("component_cache_lookups", hit=True), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+from app.services.component_cache_service import ComponentCacheService, component_signature_text
+
+
+def make_component(name, class_name):
+    return {
+        "componentName": name,
+        "typescript": f"@Component({{ selector: 'app-{name}', templateUrl: './{name}.component.html' }})\nexport class {class_name} {{}}",
+        "html": "<header><a>Home</a></header>",
+        "scss": ""
+    }
+
+
+HEADER_PURPOSE = "Top navigation bar with the logo on the left and Home, Pricing and About links on the right"
+
+
+class TestComponentCacheService(unittest.TestCase):
+    def setUp(self):
+        self.cache = ComponentCacheService(path="", max_entries=2, similarity_threshold=0.8)
+
+    def test_similar_component_is_reused_under_the_new_name(self):
+        """A lookup with a near-identical signature should return the stored component, renamed."""
+        self.cache.store(HEADER_PURPOSE, make_component("site-header", "SiteHeaderComponent"))
+
+        component, similarity = self.cache.lookup(HEADER_PURPOSE + ".", "top-bar")
+
+        self.assertGreaterEqual(similarity, 0.8)
+        self.assertEqual(component["componentName"], "top-bar")
+        self.assertIn("selector: 'app-top-bar'", component["typescript"])
+        self.assertIn("./top-bar.component.html", component["typescript"])
+        self.assertIn("export class TopBarComponent", component["typescript"])
+
+    def test_dissimilar_and_invalid_components_are_not_returned(self):
+        """Unrelated signatures should miss and invalid components should not be stored."""
+        self.assertFalse(self.cache.store("Broken card", {"componentName": "card"}))
+        self.cache.store(HEADER_PURPOSE, make_component("site-header", "SiteHeaderComponent"))
+
+        self.assertIsNone(self.cache.lookup("Grid of product cards with price and add to cart button", "product-grid"))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """The library should stay within max_entries, evicting the least recently used entry."""
+        self.cache.store(HEADER_PURPOSE, make_component("site-header", "SiteHeaderComponent"))
+        self.cache.store("Login form with email and password fields", make_component("login-form", "LoginFormComponent"))
+        self.cache.lookup(HEADER_PURPOSE, "site-header")
+        self.cache.store("Footer with copyright and social links", make_component("site-footer", "SiteFooterComponent"))
+
+        self.assertEqual(len(self.cache), 2)
+        self.assertIsNotNone(self.cache.lookup(HEADER_PURPOSE, "site-header"))
+        self.assertIsNone(self.cache.lookup("Login form with email and password fields", "login-form"))
+
+    def test_library_is_persisted_and_reloaded(self):
+        """Entries written to COMPONENT_CACHE_PATH should be available to a new instance."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "components.jsonl")
+            ComponentCacheService(path=path).store(HEADER_PURPOSE, make_component("site-header", "SiteHeaderComponent"))
+
+            reloaded = ComponentCacheService(path=path)
+
+            self.assertIsNotNone(reloaded.lookup(HEADER_PURPOSE, "site-header"))
+
+
+
+class TestComponentSignatureText(unittest.TestCase):
+    SPEC = "\n".join([
+        'FRAME "Acme home" 1440x900 col',
+        '  FRAME "Nav bar" 1440x64 row gap=24 pad=16/32 align=space_between,center fill=$c1',
+        '    INSTANCE "Logo" of "Acme logo" 120x32',
+        '    FRAME "Links" row gap=16',
+        '      TEXT "Home" color=$c2 text=$t1 (repeated x3 with similar structure; others: "Pricing", "About")',
+        '    INSTANCE "Sign in" of "Button" 96x40 fill=$c3',
+    ])
+
+    def test_signature_comes_from_the_matching_section_without_its_text(self):
+        """The signature should be the component's subtree with labels and brand names removed."""
+        plan = {"componentName": "nav-bar", "purpose": "Top navigation with links"}
+        rebranded = self.SPEC.replace("Acme", "Globex").replace("Pricing", "Plans").replace("$c1", "$c7")
+
+        signature = component_signature_text(self.SPEC, plan, ["#FFFFFF"])
+
+        self.assertIn('FRAME "" 1440x64 row', signature)
+        self.assertNotIn("Acme", signature)
+        self.assertNotIn('FRAME "" 1440x900', signature)
+        self.assertTrue(signature.endswith("palette #ffffff"))
+        self.assertEqual(component_signature_text(rebranded, plan, ["#FFFFFF"]), signature)
+
+    def test_short_or_unmatched_sections_are_not_cached(self):
+        """Components without a section, or with too little structure, should get no signature."""
+        self.assertIsNone(component_signature_text(self.SPEC, {"componentName": "pricing-table", "purpose": "Plans"}))
+        self.assertIsNone(component_signature_text("Page header", {"componentName": "page-header", "purpose": "Page header"}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from app.core.config import settings
+from app.services import example_index_service as example_index_module
+from app.services.example_index_service import ExampleIndexService, select_examples
+
+LOGIN_DESCRIPTION = "Centered login card with a logo, email and password inputs, a remember me checkbox and a primary sign in button"
+DASHBOARD_DESCRIPTION = "Analytics dashboard with a sidebar, four KPI cards, a line chart of revenue and a table of recent orders"
+LOGIN_RESULT = {"components": [{"componentName": "login-card", "typescript": "", "html": "", "scss": ""}], "routing": []}
+
+
+class TestExampleIndexService(unittest.TestCase):
+    def setUp(self):
+        self.index = ExampleIndexService(path="", max_examples=10, min_similarity=0.3)
+
+    def test_most_similar_examples_are_returned(self):
+        """A related description should retrieve its example; an unrelated one should not."""
+        self.index.add(LOGIN_DESCRIPTION, LOGIN_RESULT)
+        self.index.add(DASHBOARD_DESCRIPTION, {"components": [], "routing": []})
+
+        matches = self.index.find_similar(LOGIN_DESCRIPTION.replace("logo", "brand logo"))
+
+        self.assertEqual(len(matches), 1)
+        self.assertEqual(matches[0][0]["output"], LOGIN_RESULT)
+        self.assertEqual(self.index.find_similar("Pricing page with three plan columns and a FAQ accordion"), [])
+
+    def test_near_duplicates_replace_each_other(self):
+        """Re-adding the same description should keep a single, most recent example."""
+        self.index.add(LOGIN_DESCRIPTION, {"components": [], "routing": []})
+        self.index.add(LOGIN_DESCRIPTION, LOGIN_RESULT)
+
+        self.assertEqual(len(self.index), 1)
+        self.assertEqual(self.index.find_similar(LOGIN_DESCRIPTION)[0][0]["output"], LOGIN_RESULT)
+
+    def test_index_is_persisted_with_signatures(self):
+        """A new instance should load the examples written to FEW_SHOT_INDEX_PATH."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "examples.jsonl")
+            ExampleIndexService(path=path).add(LOGIN_DESCRIPTION, LOGIN_RESULT)
+
+            reloaded = ExampleIndexService(path=path, min_similarity=0.3)
+
+            self.assertEqual(reloaded.find_similar(LOGIN_DESCRIPTION)[0][1], 1.0)
+
+    def test_persisted_file_is_compacted(self):
+        """Replaced and evicted examples should not make the index file grow without bound."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "examples.jsonl")
+            index = ExampleIndexService(path=path, max_examples=3)
+            for i in range(50):
+                index.add(f"{DASHBOARD_DESCRIPTION} variant {i} " + "extra " * i, LOGIN_RESULT)
+                index.add(LOGIN_DESCRIPTION, LOGIN_RESULT)
+
+            with open(path, encoding="utf-8") as file:
+                lines = file.readlines()
+            reloaded = ExampleIndexService(path=path, min_similarity=0.3)
+
+            self.assertLessEqual(len(lines), 2 * 3 + 1)
+            self.assertEqual(len(reloaded.find_similar(LOGIN_DESCRIPTION)), 1)
+            self.assertEqual(len(reloaded), len(index))
+
+    def test_select_examples_respects_token_budget(self):
+        """Examples larger than the remaining FEW_SHOT_TOKEN_BUDGET should be skipped."""
+        self.index.add(LOGIN_DESCRIPTION, LOGIN_RESULT)
+
+        with patch.object(example_index_module, "example_index", self.index), patch.object(settings, "FEW_SHOT_ENABLED", False):
+            self.assertEqual(select_examples(LOGIN_DESCRIPTION), [])
+        with patch.object(example_index_module, "example_index", self.index), patch.object(settings, "FEW_SHOT_ENABLED", True):
+            self.assertEqual(len(select_examples(LOGIN_DESCRIPTION)), 1)
+            with patch.object(settings, "FEW_SHOT_TOKEN_BUDGET", 10):
+                self.assertEqual(select_examples(LOGIN_DESCRIPTION), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import re
+import unittest
+from unittest.mock import patch
+from app.services.figma_layout_extractor import FigmaLayoutExtractor
+
+
+def _instance(name, component_id="c1", children=None):
+    return {"type": "INSTANCE", "name": name, "componentId": component_id, "children": children or []}
+
+
+def _frame(name, children=None, **props):
+    return {"type": "FRAME", "name": name, "children": children or [], **props}
+
+
+class TestFigmaLayoutExtractor(unittest.TestCase):
+    def setUp(self):
+        self.extractor = FigmaLayoutExtractor()
+        self.definitions = {"c1": {"name": "Button"}}
+
+    def test_auto_layout_and_styles_are_described(self):
+        """Auto-layout, padding, fills and text styles should appear in the spec with shared tokens."""
+        white = [{"type": "SOLID", "color": {"r": 1, "g": 1, "b": 1, "a": 1}}]
+        text_style = {"fontFamily": "Inter", "fontSize": 16, "lineHeightPx": 24, "fontWeight": 600}
+        tree = _frame(
+            "Header", [
+                {"type": "TEXT", "name": "Title", "characters": "Welcome", "style": text_style, "fills": white},
+                {"type": "RECTANGLE", "name": "Divider", "fills": white, "cornerRadius": 2},
+            ],
+            layoutMode="HORIZONTAL", itemSpacing=16, paddingTop=8, paddingBottom=8, paddingLeft=24, paddingRight=24,
+            primaryAxisAlignItems="SPACE_BETWEEN", counterAxisAlignItems="CENTER",
+            absoluteBoundingBox={"x": 0, "y": 0, "width": 1440, "height": 80}, fills=white
+        )
+
+        spec = self.extractor.extract([tree], self.definitions, [])
+
+        self.assertIn('FRAME "Header" 1440x80 row gap=16 pad=8/24 align=space_between,center fill=$c1', spec)
+        self.assertIn('  TEXT "Title" $t1 color=$c1 "Welcome"', spec)
+        self.assertIn('  RECTANGLE "Divider" fill=$c1 radius=2', spec)
+        self.assertEqual(spec.count("$c1 = #FFFFFF"), 1)
+        self.assertIn("$t1 = Inter 16/24 weight 600", spec)
+
+    def test_instances_and_warnings_are_collected(self):
+        """Instances should be summarised with counts and undefined components reported as warnings."""
+        tree = _frame("Root", [_instance("Save"), _instance("Cancel"), _instance("Ghost", component_id="missing")])
+        warnings = []
+
+        spec = self.extractor.extract([tree], self.definitions, warnings)
+
+        self.assertIn('INSTANCE "Save" of "Button"', spec)
+        self.assertIn("- Button x2", spec)
+        self.assertIn("- unknown component", spec)
+        self.assertEqual(warnings, ["Component instance 'Ghost' references undefined component"])
+
+    def test_repeated_subtrees_are_collapsed(self):
+        """Sibling subtrees that differ only in text should be emitted once with a repeat count."""
+        cards = [
+            _frame(f"Card {i}", [{"type": "TEXT", "name": "Title", "characters": f"Product {i}"}], layoutMode="VERTICAL")
+            for i in range(20)
+        ]
+        tree = _frame("Grid", cards, layoutMode="HORIZONTAL", layoutWrap="WRAP")
+
+        spec = self.extractor.extract([tree], self.definitions, [])
+
+        self.assertIn('  FRAME "Card 0" column (repeated x20 with similar structure; others: "Card 1", "Card 2"', spec)
+        self.assertNotIn('FRAME "Card 1"', spec)
+        self.assertEqual(spec.count('TEXT "Title"'), 1)
+
+    def test_hidden_subtrees_are_skipped(self):
+        """Invisible nodes and their children should not appear in the spec."""
+        tree = _frame("Root", [_frame("Hidden", [_frame("Child")], visible=False), _frame("Shown")])
+
+        spec = self.extractor.extract([tree], self.definitions, [])
+
+        self.assertNotIn("Hidden", spec)
+        self.assertNotIn("Child", spec)
+        self.assertIn('FRAME "Shown"', spec)
+
+    def test_token_budget_truncates_spec(self):
+        """Large trees should be cut off at the budget with an omission note."""
+        tree = _frame("Root", [_frame(f"Item {i}") for i in range(500)])
+
+        spec = self.extractor.extract([tree], self.definitions, [], token_budget=100)
+
+        self.assertLess(len(spec), 1000)
+        self.assertIn("more nodes omitted", spec)
+
+    def test_omission_note_counts_lines_and_nodes_separately(self):
+        """Trimmed spec lines and nodes never rendered should be reported each in their own unit."""
+        types = ["FRAME", "TEXT", "RECTANGLE", "GROUP"]
+        tree = _frame("Root", [{"type": types[i % 4], "name": f"Item {i}"} for i in range(500)])
+
+        spec = self.extractor.extract([tree], self.definitions, [], token_budget=100)
+
+        spec_lines = spec.splitlines()
+        shown = next(index for index, line in enumerate(spec_lines) if line.startswith("...")) - 1
+        match = re.fullmatch(r"\.\.\. (\d+) more spec lines and (\d+) more nodes omitted to stay within the token budget",
+                             spec_lines[shown + 1])
+        self.assertIsNotNone(match, spec_lines[shown + 1])
+        self.assertEqual(shown + int(match.group(1)) + int(match.group(2)), 501)
+
+    def test_deeply_nested_tree_does_not_hit_recursion_limit(self):
+        """A chain deeper than the interpreter recursion limit should still be traversed."""
+        root = _frame("Root")
+        current = root
+        for i in range(5000):
+            child = _instance(f"Level {i}")
+            current["children"].append(child)
+            current = child
+
+        with patch("app.services.figma_layout_extractor.settings.FIGMA_MAX_TRAVERSAL_DEPTH", 10000):
+            spec = self.extractor.extract([root], self.definitions, [])
+
+        self.assertIn("- Button x5000", spec)
+
+    def test_node_limit_stops_traversal_with_warning(self):
+        """Exceeding the node budget should stop the walk and record a warning."""
+        tree = _frame("Root", [_instance(f"Item {i}") for i in range(50)])
+        warnings = []
+
+        with patch("app.services.figma_layout_extractor.settings.FIGMA_MAX_TRAVERSAL_NODES", 10):
+            spec = self.extractor.extract([tree], self.definitions, warnings)
+
+        self.assertIn("- Button x9", spec)
+        self.assertEqual(len(warnings), 1)
+        self.assertIn("stopped after 10 nodes", warnings[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
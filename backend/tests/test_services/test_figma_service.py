@@ -0,0 +1,54 @@
+import tempfile
+import unittest
+from unittest.mock import patch
+from app.core.config import settings
+from app.services.code_generator import CodeGenerator
+from app.services.figma_service import FigmaService
+from app.utils.figma_fixtures import build_figma_file, write_figma_fixtures
+
+
+class TestFigmaServiceReplay(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        for name, value in [("FIGMA_FIXTURES_MODE", "replay"), ("FIGMA_FIXTURES_DIR", self.directory),
+                            ("FIGMA_API_BASE_URL", "http://figma.test/v1/")]:
+            patcher = patch.object(settings, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_design_is_fetched_from_fixtures_at_the_configured_base_url(self):
+        """A node fetch should be answered from the fixtures and feed the layout extraction."""
+        file_data = build_figma_file(3000, name="Replay")
+        write_figma_fixtures(self.directory, "REPLAYKEY", file_data, node_id="1:1")
+
+        design = await FigmaService().fetch_figma_design("https://www.figma.com/file/REPLAYKEY/replay", "1:1", "token")
+
+        self.assertEqual(design["file_data"]["name"], "Replay")
+        self.assertEqual(design["node_data"]["document"]["id"], "1:1")
+        self.assertIn("1:1", design["images_data"]["images"])
+        description = CodeGenerator()._extract_figma_description(design, design["file_data"]["components"], [])
+        self.assertIn('FRAME "Replay screen 1"', description)
+
+    def test_synthetic_documents_are_deterministic_and_sized(self):
+        """The same arguments should give the same document with about the requested node count."""
+        first, second = build_figma_file(5000, seed=3), build_figma_file(5000, seed=3)
+        stack, count = [first["document"]], 0
+        while stack:
+            node = stack.pop()
+            count += 1
+            stack.extend(node.get("children", []))
+
+        self.assertEqual(first, second)
+        self.assertGreaterEqual(count, 5000)
+        self.assertLess(count, 5010)
+
+    async def test_missing_fixture_is_reported_as_a_network_error(self):
+        """A design that was never recorded should fail like an unreachable Figma API."""
+        with self.assertRaisesRegex(ValueError, "Network error while accessing Figma API"):
+            await FigmaService().fetch_figma_design("https://www.figma.com/file/UNKNOWNKEY/x", None, "token")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,198 @@
+import asyncio
+import json
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.core.metrics import metrics
+from app.services import code_generator as code_generator_module
+from app.services.code_generator import CodeGenerator
+from app.services.providers import AnthropicProvider, GeminiProvider, OpenAIProvider, ProviderRegistry
+from app.services.providers import gemini_provider as gemini_module
+from app.services.providers.base import STRUCTURED_OUTPUT_TOOL_NAME
+from app.services.prompt_templates import STATIC_PROMPT_PREFIX
+
+LOGIN_FORM_TS = "@Component({ selector: 'app-login-form', standalone: true })\nexport class LoginFormComponent {}"
+VALID_RESPONSE = json.dumps({
+    "components": [{"componentName": "login-form", "typescript": LOGIN_FORM_TS, "html": "<form></form>", "scss": ""}]
+})
+
+
+class StubMessages:
+    """Records the request of a stub Anthropic/OpenAI client and returns a canned response."""
+
+    def __init__(self, response):
+        self.response = response
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        return self.response
+
+
+class TestPromptCaching(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        metrics.reset()
+        self.generator = CodeGenerator()
+
+    async def test_anthropic_sends_static_prefix_as_cacheable_system_block(self):
+        """The static prefix should be a cache_control system block and the user turn only the suffix."""
+        response = SimpleNamespace(
+            content=[SimpleNamespace(text=VALID_RESPONSE)],
+            usage=SimpleNamespace(cache_read_input_tokens=2900, cache_creation_input_tokens=0)
+        )
+        messages = StubMessages(response)
+        self.generator.providers = ProviderRegistry({"anthropic": AnthropicProvider(client=SimpleNamespace(messages=messages))})
+
+        result = await self.generator._generate_single("anthropic", "A login form")
+
+        request = messages.calls[0]
+        self.assertEqual(request["system"], [
+            {"type": "text", "text": STATIC_PROMPT_PREFIX, "cache_control": {"type": "ephemeral"}}
+        ])
+        self.assertTrue(request["messages"][0]["content"].startswith("UI Description:\nA login form"))
+        self.assertNotIn(STATIC_PROMPT_PREFIX, request["messages"][0]["content"])
+        self.assertEqual(result["component_name"], "login-form")
+        self.assertEqual(metrics.get_counter("prompt_cache_read_tokens", provider="anthropic"), 2900)
+
+    async def test_openai_sends_static_prefix_first(self):
+        """OpenAI requests should start with the unchanged prefix so automatic prefix caching applies."""
+        response = SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=VALID_RESPONSE))],
+            usage=SimpleNamespace(prompt_tokens_details=SimpleNamespace(cached_tokens=2048))
+        )
+        completions = StubMessages(response)
+        self.generator.providers = ProviderRegistry({"openai": OpenAIProvider(client=SimpleNamespace(chat=SimpleNamespace(completions=completions)))})
+
+        await self.generator._generate_single("openai", "A login form")
+
+        user_content = completions.calls[0]["messages"][1]["content"]
+        self.assertEqual(user_content[0], {"type": "text", "text": STATIC_PROMPT_PREFIX})
+        self.assertTrue(user_content[1]["text"].startswith("UI Description:\nA login form"))
+        self.assertEqual(metrics.get_counter("prompt_cache_read_tokens", provider="openai"), 2048)
+
+    async def test_gemini_uses_cached_content_for_prefix(self):
+        """Gemini should generate from a CachedContent holding the prefix and send only the suffix."""
+        self.provider = GeminiProvider(model="gemini-test")
+        self.generator.providers = ProviderRegistry({"gemini": self.provider})
+        model = MagicMock()
+        model.generate_content_async = AsyncMock(return_value=SimpleNamespace(
+            text=VALID_RESPONSE, usage_metadata=SimpleNamespace(cached_content_token_count=3000)
+        ))
+        cache_state = {"content": None, "expires_at": 0.0, "disabled": False, "retry_at": 0.0, "failures": 0}
+
+        with patch.dict(gemini_module._prompt_cache, cache_state), \
+             patch.object(gemini_module.caching.CachedContent, "create", return_value="cached-prefix") as create, \
+             patch.object(gemini_module.genai.GenerativeModel, "from_cached_content", return_value=model) as from_cache:
+            await self.generator._generate_single("gemini", "A login form")
+            await self.generator._generate_single("gemini", "A signup form")
+
+        create.assert_called_once()
+        self.assertEqual(create.call_args.kwargs["contents"], [STATIC_PROMPT_PREFIX])
+        from_cache.assert_called_with(cached_content="cached-prefix")
+        prompt = model.generate_content_async.call_args.args[0]
+        self.assertTrue(prompt.startswith("UI Description:\nA signup form"))
+        self.assertEqual(metrics.get_counter("prompt_cache_read_tokens", provider="gemini"), 6000)
+
+    async def test_gemini_falls_back_to_full_prompt_when_cache_creation_fails(self):
+        """A prefix below the minimum cacheable size should disable caching and send the full prompt."""
+        self.provider = GeminiProvider(model="gemini-test")
+        self.generator.providers = ProviderRegistry({"gemini": self.provider})
+        model = MagicMock()
+        model.generate_content_async = AsyncMock(return_value=SimpleNamespace(text=VALID_RESPONSE, usage_metadata=None))
+        cache_state = {"content": None, "expires_at": 0.0, "disabled": False, "retry_at": 0.0, "failures": 0}
+
+        with patch.dict(gemini_module._prompt_cache, cache_state), \
+             patch.object(gemini_module.caching.CachedContent, "create", side_effect=RuntimeError("too small")), \
+             patch.object(gemini_module.genai, "GenerativeModel", return_value=model):
+            await self.generator._generate_single("gemini", "A login form")
+            self.assertTrue(gemini_module._prompt_cache["disabled"])
+
+        prompt = model.generate_content_async.call_args.args[0]
+        self.assertTrue(prompt.startswith(STATIC_PROMPT_PREFIX))
+
+    async def test_gemini_transient_cache_failure_backs_off_instead_of_disabling(self):
+        """A network error creating the cache should be retried later, not disable caching."""
+        self.provider = GeminiProvider(model="gemini-test")
+        self.generator.providers = ProviderRegistry({"gemini": self.provider})
+        cache_state = {"content": None, "expires_at": 0.0, "disabled": False, "retry_at": 0.0, "failures": 0}
+
+        with patch.dict(gemini_module._prompt_cache, cache_state), \
+             patch.object(gemini_module.caching.CachedContent, "create", side_effect=ConnectionError("reset")) as create:
+            self.assertIsNone(await self.provider._cached_prefix())
+            self.assertIsNone(await self.provider._cached_prefix())
+            state = dict(gemini_module._prompt_cache)
+
+            # Once the backoff has passed the cache is created again
+            gemini_module._prompt_cache["retry_at"] = 0.0
+            create.side_effect = None
+            create.return_value = "cached-prefix"
+            self.assertEqual(await self.provider._cached_prefix(), "cached-prefix")
+
+        self.assertFalse(state["disabled"])
+        self.assertEqual(state["failures"], 1)
+        self.assertEqual(create.call_count, 2)
+
+    async def test_gemini_concurrent_requests_create_the_cache_once(self):
+        """Requests arriving while the cache is being created should wait for that creation."""
+        self.provider = GeminiProvider(model="gemini-test")
+        self.generator.providers = ProviderRegistry({"gemini": self.provider})
+        cache_state = {"content": None, "expires_at": 0.0, "disabled": False, "retry_at": 0.0, "failures": 0}
+
+        def slow_create(**kwargs):
+            time.sleep(0.05)
+            return "cached-prefix"
+
+        with patch.dict(gemini_module._prompt_cache, cache_state), \
+             patch.object(gemini_module.caching.CachedContent, "create", side_effect=slow_create) as create:
+            results = await asyncio.gather(*(self.provider._cached_prefix() for _ in range(5)))
+
+        self.assertEqual(results, ["cached-prefix"] * 5)
+        create.assert_called_once()
+
+
+class TestStructuredOutput(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        metrics.reset()
+        self.generator = CodeGenerator()
+
+    async def test_anthropic_tool_input_is_used_without_text_parsing(self):
+        """A forced tool_use block should be read as the decoded components payload."""
+        payload = json.loads(VALID_RESPONSE)
+        response = SimpleNamespace(content=[SimpleNamespace(type="tool_use", input=payload)], usage=None)
+        messages = StubMessages(response)
+        self.generator.providers = ProviderRegistry({"anthropic": AnthropicProvider(client=SimpleNamespace(messages=messages))})
+
+        with patch.object(code_generator_module.settings, "STRUCTURED_OUTPUT_ENABLED", True):
+            result = await self.generator._generate_single("anthropic", "A login form")
+
+        request = messages.calls[0]
+        self.assertEqual(request["tool_choice"], {"type": "tool", "name": STRUCTURED_OUTPUT_TOOL_NAME})
+        self.assertEqual(result["component_name"], "login-form")
+
+    async def test_openai_requests_json_schema(self):
+        """OpenAI requests should carry the strict json_schema response format."""
+        response = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=VALID_RESPONSE))], usage=None)
+        completions = StubMessages(response)
+        self.generator.providers = ProviderRegistry({"openai": OpenAIProvider(client=SimpleNamespace(chat=SimpleNamespace(completions=completions)))})
+
+        with patch.object(code_generator_module.settings, "STRUCTURED_OUTPUT_ENABLED", True):
+            await self.generator._generate_single("openai", "A login form")
+
+        response_format = completions.calls[0]["response_format"]
+        self.assertEqual(response_format["type"], "json_schema")
+        self.assertTrue(response_format["json_schema"]["strict"])
+
+    async def test_unparseable_response_is_counted_and_falls_back(self):
+        """A response with neither JSON nor code blocks should count a parse failure."""
+        response = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="Sorry, I can't."))], usage=None)
+        self.generator.providers = ProviderRegistry({"openai": OpenAIProvider(client=SimpleNamespace(chat=SimpleNamespace(completions=StubMessages(response))))})
+
+        await self.generator._generate_single("openai", "A login form")
+
+        self.assertEqual(metrics.get_counter("generation_parse_failures", provider="openai"), 1)
+        self.assertEqual(metrics.get_counter("generation_fallbacks"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+import io
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+from PIL import Image
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.ai_service import AIService
+from app.services.code_generator import CodeGenerator
+from app.services.component_cache_service import component_cache
+from app.services.example_index_service import example_index
+from app.services.providers import FakeProvider, OpenAIProvider, ProviderRegistry
+from app.utils.image_analysis import ImageAnalysis
+
+
+def png(width, height):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (240, 240, 240)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class TestProviderRegistry(unittest.TestCase):
+    def test_unknown_provider_is_rejected(self):
+        """An unknown provider name should raise the same error as a missing API key."""
+        with self.assertRaisesRegex(ValueError, "Unsupported or unconfigured VLM provider: mystery"):
+            ProviderRegistry().get("mystery")
+
+    def test_unconfigured_provider_is_rejected_and_not_kept(self):
+        """A provider without credentials should be rejected, and picked up once they are set."""
+        registry = ProviderRegistry()
+        with patch.object(settings, "OPENAI_API_KEY", None):
+            with self.assertRaises(ValueError):
+                registry.get("openai")
+        with patch.object(settings, "OPENAI_API_KEY", "test-key"):
+            self.assertIsInstance(registry.get("openai"), OpenAIProvider)
+
+    def test_adapters_are_shared(self):
+        """Every request should get the same adapter, and with it the same HTTP client."""
+        registry = ProviderRegistry()
+        self.assertIs(registry.get("fake"), registry.get("fake"))
+
+    def test_capabilities_are_declared_for_every_provider(self):
+        """The capability table should cover every provider and mark the fake one as uncached."""
+        capabilities = ProviderRegistry.capabilities()
+        self.assertEqual(set(capabilities), {"openai", "anthropic", "gemini", "fake"})
+        self.assertEqual(capabilities["fake"].prompt_caching, "none")
+        self.assertEqual(capabilities["openai"].prompt_caching, "automatic")
+        self.assertTrue(all(capability.json_mode for capability in capabilities.values()))
+
+    def test_model_name_comes_from_the_settings(self):
+        """Model names should be read from the settings without creating a client."""
+        with patch.object(settings, "ANTHROPIC_MODEL", "claude-test"):
+            self.assertEqual(ProviderRegistry.model_name("anthropic"), "claude-test")
+        self.assertEqual(ProviderRegistry.model_name("mystery"), "")
+
+
+class TestFakeProvider(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        metrics.reset()
+        component_cache.clear()
+        example_index.clear()
+        for name, value in [("DEFAULT_VLM_PROVIDER", "fake"), ("GENERATION_MODE", "single"), ("COLOR_PALETTE_SIZE", 0),
+                            ("IMAGE_PROCESS_WORKERS", 0)]:
+            patcher = patch.object(settings, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_pipeline_runs_end_to_end_without_api_keys(self):
+        """The fake provider should describe an image and generate a valid component from it."""
+        description = await AIService().process_image(png(320, 200))
+        self.assertEqual(description["source"], "fake")
+        self.assertIn("320x200", description["description"])
+
+        generated = await CodeGenerator().generate_from_image_description(description)
+
+        self.assertEqual(generated.component_name, "fake-page")
+        self.assertIn("FakePageComponent", generated.component_ts)
+        self.assertEqual(metrics.get_counter("generation_fallbacks"), 0)
+
+    async def test_structured_and_text_outputs_carry_the_same_payload(self):
+        """Structured output should be the decoded form of the text output."""
+        provider = FakeProvider()
+        structured = await provider.generate("", "A page", None, "components", True, False)
+        text = await provider.generate("", "A page", None, "components", False, False)
+
+        self.assertEqual(CodeGenerator()._parse_provider_output(structured.output), CodeGenerator()._parse_provider_output(text.output))
+        self.assertIsInstance(structured.output, dict)
+
+    async def test_recorded_responses_are_replayed_in_turn(self):
+        """Fixtures of the requested kind should be replayed round-robin, other kinds generated."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "responses.jsonl")
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(json.dumps({"kind": "describe", "output": "First page"}) + "\n")
+                file.write(json.dumps({"kind": "describe", "output": "Second page"}) + "\n")
+            with patch.object(settings, "FAKE_PROVIDER_FIXTURES_PATH", path):
+                provider = FakeProvider()
+
+        image = ImageAnalysis(png(10, 10))
+        outputs = [(await provider.describe_image(image, "", 100)).output for _ in range(3)]
+        generated = await provider.generate("", "A page", None, "components", True, False)
+
+        self.assertEqual(outputs, ["First page", "Second page", "First page"])
+        self.assertEqual(generated.output["components"][0]["componentName"], "fake-page")
+
+    async def test_latency_covers_first_token_jitter_and_output_rate(self):
+        """A call should take the latency, at most the jitter more, plus its tokens at the output rate."""
+        provider = FakeProvider(fixtures={"describe": ["x" * 40]})
+        with patch.object(settings, "FAKE_PROVIDER_LATENCY_SECONDS", 0.02), \
+             patch.object(settings, "FAKE_PROVIDER_JITTER_SECONDS", 0.02), \
+             patch.object(settings, "FAKE_PROVIDER_TOKENS_PER_SECOND", 500):
+            start = time.perf_counter()
+            await provider.describe_image(ImageAnalysis(png(10, 10)), "", 100)
+            elapsed = time.perf_counter() - start
+
+        # 40 characters are about 12 tokens, 0.024 s at 500 tokens per second
+        self.assertGreaterEqual(elapsed, 0.04)
+        self.assertLess(elapsed, 0.2)
+
+    async def test_fast_tier_answers_sooner(self):
+        """Calls on the fast tier should wait FAKE_PROVIDER_FAST_SPEEDUP times less."""
+        provider = FakeProvider(fixtures={})
+        with patch.object(settings, "FAKE_PROVIDER_LATENCY_SECONDS", 0.2), \
+             patch.object(settings, "FAKE_PROVIDER_FAST_SPEEDUP", 10):
+            start = time.perf_counter()
+            await provider.generate("", "A page", None, "components", True, False, tier="fast")
+            elapsed = time.perf_counter() - start
+
+        self.assertGreaterEqual(elapsed, 0.02)
+        self.assertLess(elapsed, 0.15)
+
+
+if __name__ == "__main__":
+    unittest.main()
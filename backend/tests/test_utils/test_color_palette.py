@@ -0,0 +1,48 @@
+import io
+import unittest
+from PIL import Image, ImageDraw
+from app.services.prompt_templates import build_dynamic_suffix
+from app.utils.color_palette import extract_palette
+
+
+def screenshot_bytes(image_format="PNG"):
+    """A 600x400 mock UI: white page, dark navy header band and an orange button."""
+    image = Image.new("RGB", (600, 400), (255, 255, 255))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle([0, 0, 599, 119], fill=(20, 33, 61))
+    draw.rectangle([200, 250, 399, 309], fill=(252, 163, 17))
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+class TestColorPalette(unittest.TestCase):
+    def test_dominant_colors_are_returned_with_coverage(self):
+        """Each flat region should give one color, ordered by the share of the image it covers."""
+        palette = extract_palette(screenshot_bytes())
+
+        self.assertEqual([color["hex"] for color in palette], ["#ffffff", "#14213d", "#fca311"])
+        self.assertAlmostEqual(palette[0]["coverage"], 0.65, delta=0.02)
+        self.assertAlmostEqual(palette[1]["coverage"], 0.30, delta=0.02)
+        self.assertAlmostEqual(palette[2]["coverage"], 0.05, delta=0.02)
+
+    def test_jpeg_noise_is_merged_into_perceptual_clusters(self):
+        """Compression artifacts should not split a flat color into several entries."""
+        palette = extract_palette(screenshot_bytes("JPEG"))
+
+        self.assertEqual(len(palette), 3)
+        self.assertAlmostEqual(sum(color["coverage"] for color in palette), 1.0, delta=0.02)
+
+    def test_undecodable_data_gives_an_empty_palette(self):
+        """Bytes that are not an image should not raise."""
+        self.assertEqual(extract_palette(b"not an image"), [])
+
+    def test_palette_is_formatted_with_coverage_in_the_prompt(self):
+        """Palette entries should reach the prompt's color section with their share of the image."""
+        suffix = build_dynamic_suffix("A header", [{"hex": "#14213d", "coverage": 0.3}, "#ffffff"])
+
+        self.assertIn('["#14213d" (30% of the image), "#ffffff"]', suffix)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.usage import RequestUsage, begin_request_usage, token_window
+from app.services.code_generator import CodeGenerator
+from app.services.component_cache_service import component_cache
+from app.services.example_index_service import example_index
+from app.services.providers import FakeProvider, ProviderRegistry
+from app.utils.complexity import count_regions, estimate_complexity, route_by_complexity
+from app.utils.figma_fixtures import build_figma_file
+
+
+class TierRecordingProvider(FakeProvider):
+    """Fake provider that remembers the model tier of each generation."""
+
+    def __init__(self):
+        super().__init__(fixtures={})
+        self.tiers = []
+
+    async def generate(self, static_prefix, dynamic_suffix, max_tokens, output_format, structured, cache_prefix, tier="strong"):
+        self.tiers.append(tier)
+        return await super().generate(static_prefix, dynamic_suffix, max_tokens, output_format, structured, cache_prefix, tier=tier)
+
+
+class TestComplexity(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        metrics.reset()
+        token_window.reset()
+        component_cache.clear()
+        example_index.clear()
+        for name, value in [("DEFAULT_VLM_PROVIDER", "fake"), ("GENERATION_MODE", "single"), ("MODEL_TIERING_ENABLED", True),
+                            ("TIERING_FAST_MAX_FIGMA_NODES", 150), ("TIERING_FAST_MAX_REGIONS", 4),
+                            ("TIERING_FAST_MAX_DESCRIPTION_TOKENS", 800), ("FIGMA_DESCRIPTION_TOKEN_BUDGET", 6000),
+                            ("FAKE_PROVIDER_LATENCY_SECONDS", 0), ("FAKE_PROVIDER_JITTER_SECONDS", 0),
+                            ("FAKE_PROVIDER_TOKENS_PER_SECOND", 0), ("REQUEST_TOKEN_BUDGET", 0), ("MINUTE_TOKEN_BUDGET", 0)]:
+            patcher = patch.object(settings, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_design_within_every_limit_is_simple(self):
+        """A design is simple only if no signal exceeds its limit."""
+        simple = estimate_complexity(figma_nodes=40, description="A button")
+        self.assertEqual(simple.tier, "fast")
+        self.assertAlmostEqual(simple.score, 40 / 150)
+
+        self.assertEqual(estimate_complexity(figma_nodes=400).tier, "strong")
+        self.assertEqual(estimate_complexity(regions=6).tier, "strong")
+        self.assertEqual(estimate_complexity(description="word " * 1000).tier, "strong")
+
+        # A limit of 0 ignores its signal
+        with patch.object(settings, "TIERING_FAST_MAX_REGIONS", 0):
+            self.assertEqual(estimate_complexity(regions=60).tier, "fast")
+
+    def test_regions_count_columns(self):
+        """Each column of a multi-column block is a region of its own."""
+        skeleton = {"blocks": [{"columns": []}, {"columns": [[0, 0, 1, 1], [2, 0, 1, 1], [4, 0, 1, 1]]}, {"columns": []}]}
+
+        self.assertEqual(count_regions(skeleton), 5)
+        self.assertEqual(count_regions(None), 0)
+
+    async def generate_figma(self, node_count, usage):
+        """Generate code from a synthetic Figma file as one request; return the tiers used."""
+        provider = TierRecordingProvider()
+        code_generator = CodeGenerator()
+        code_generator.providers = ProviderRegistry({"fake": provider})
+        design = {"file_data": build_figma_file(node_count, name=f"Design of {node_count} nodes")}
+
+        async def pipeline():
+            begin_request_usage(usage)
+            await code_generator.generate_from_figma_data(design)
+        await asyncio.ensure_future(pipeline())
+        return provider.tiers
+
+    async def test_small_designs_use_the_fast_tier(self):
+        """A small Figma design should be generated on the fast tier and a large one on the strong tier."""
+        self.assertEqual(await self.generate_figma(30, RequestUsage("figma")), ["fast"])
+        self.assertEqual(await self.generate_figma(2000, RequestUsage("figma")), ["strong"])
+
+        self.assertEqual(metrics.get_counter("model_tier_decisions", endpoint="figma", stage="generate", tier="fast"), 1)
+        self.assertEqual(metrics.get_counter("model_tier_decisions", endpoint="figma", stage="generate", tier="strong"), 1)
+
+    async def test_downgraded_request_stays_on_the_fast_tier(self):
+        """Complexity should never move a request downgraded by a token budget back to the strong tier."""
+        usage = RequestUsage("figma")
+        usage.choose_tier("fast")
+        usage.downgraded = True
+
+        self.assertEqual(await self.generate_figma(2000, usage), ["fast"])
+
+    def test_disabled_tiering_keeps_the_strong_tier(self):
+        """Without MODEL_TIERING_ENABLED no decision is made."""
+        with patch.object(settings, "MODEL_TIERING_ENABLED", False):
+            self.assertIsNone(route_by_complexity("generate", figma_nodes=1))
+        self.assertEqual(metrics.get_counter("model_tier_decisions", endpoint="none", stage="generate", tier="fast"), 0)
+
+    def test_figma_node_count_is_measured_during_extraction(self):
+        """The layout extraction should report how many visible nodes the design has."""
+        stats = {}
+        CodeGenerator()._extract_figma_description({"file_data": build_figma_file(300)}, {}, [], stats)
+
+        self.assertGreaterEqual(stats["nodes"], 300)
+        self.assertLess(stats["nodes"], 310)
+
+
+if __name__ == "__main__":
+    unittest.main()
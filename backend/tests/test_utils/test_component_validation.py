@@ -0,0 +1,66 @@
+import unittest
+from app.utils.component_validation import check_template, to_kebab_case, validate_component, validate_components
+
+
+def make_component(name="user-card", selector="app-user-card", class_name="UserCardComponent", html="<div>{{ user.name }}</div>", scss=":host { display: block; }"):
+    return {
+        "componentName": name,
+        "typescript": f"@Component({{\n  selector: '{selector}',\n  standalone: true\n}})\nexport class {class_name} {{\n  label = '}}';\n}}",
+        "html": html,
+        "scss": scss,
+    }
+
+
+class TestValidateComponent(unittest.TestCase):
+    def test_valid_component_has_no_problems(self):
+        """A consistent component should pass, including braces inside TypeScript strings."""
+        self.assertEqual(validate_component(make_component()), [])
+
+    def test_missing_keys_are_reported(self):
+        """Missing required keys should be reported without further checks."""
+        problems = validate_component({"componentName": "user-card", "typescript": "export class A {}"})
+
+        self.assertEqual(problems, ["missing or non-string 'html'", "missing or non-string 'scss'"])
+
+    def test_selector_and_class_must_match_component_name(self):
+        """Selector and exported class should be derived from componentName."""
+        problems = validate_component(make_component(selector="app-card", class_name="ProfileComponent"))
+
+        self.assertIn("selector 'app-card' does not match expected 'app-user-card'", problems)
+        self.assertIn("class 'ProfileComponent' does not match expected 'UserCardComponent'", problems)
+
+    def test_unbalanced_template_and_styles_are_reported(self):
+        """Unclosed elements, stray closing tags and unbalanced braces should be flagged."""
+        problems = validate_component(make_component(html="<section><p>{{ title }</section></span>", scss=".a { color: red;"))
+
+        self.assertIn("html: unclosed <p>", problems)
+        self.assertIn("html: unexpected </span>", problems)
+        self.assertIn("html: 1 unclosed '{'", problems)
+        self.assertIn("scss: 1 unclosed '{'", problems)
+
+    def test_validate_components_returns_only_invalid_indexes(self):
+        """Only invalid entries should appear in the result, keyed by index."""
+        components = [make_component(), "not a component", make_component(html="<div>")]
+
+        self.assertEqual(sorted(validate_components(components)), [1, 2])
+
+
+class TestCheckTemplate(unittest.TestCase):
+    def test_angular_template_features_are_accepted(self):
+        """Void, self-closing and commented elements, bindings with '>' and control flow should pass."""
+        html = (
+            "<!-- <div> -->\n<img src=\"a.png\"><app-icon />\n"
+            "@if (count > 0) {\n  <button (click)=\"count > 1 && dec()\">-</button>\n}\n"
+        )
+
+        self.assertEqual(check_template(html), [])
+
+    def test_kebab_case_conversion(self):
+        """Names in PascalCase, snake_case or kebab-case should normalize to kebab-case."""
+        for name in ("UserCard", "user_card", "user-card", "userCard"):
+            with self.subTest(name=name):
+                self.assertEqual(to_kebab_case(name), "user-card")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+from app.utils.figma_traversal import walk_figma_nodes, LIMIT_REACHED
+
+
+def _chain(length):
+    """A chain of `length` nested frames; the innermost one is at depth length - 1."""
+    root = {"type": "FRAME", "name": "Level 0", "children": []}
+    current = root
+    for i in range(1, length):
+        child = {"type": "FRAME", "name": f"Level {i}", "children": []}
+        current["children"].append(child)
+        current = child
+    return root
+
+
+def _frames(count):
+    return [{"type": "FRAME", "name": f"Frame {i}", "children": []} for i in range(count)]
+
+
+class TestWalkFigmaNodes(unittest.TestCase):
+    def test_top_level_nodes_are_walked_in_order(self):
+        """A list of roots should be walked in document order, each at depth 0."""
+        roots = [{"name": "A", "children": [{"name": "A1"}]}, {"name": "B"}]
+
+        walked = [(kind, node["name"], depth) for kind, node, depth in walk_figma_nodes(roots)]
+
+        self.assertEqual(walked, [("node", "A", 0), ("node", "A1", 1), ("node", "B", 0)])
+
+    def test_exactly_max_nodes_are_walked_without_warning(self):
+        """A design of exactly max_nodes nodes should be walked in full."""
+        walked = list(walk_figma_nodes(_frames(10), max_nodes=10))
+
+        self.assertEqual(len(walked), 10)
+        self.assertTrue(all(kind == "node" for kind, _, _ in walked))
+
+    def test_node_limit_reports_the_configured_value(self):
+        """One node over max_nodes should stop the walk with a warning naming max_nodes."""
+        walked = list(walk_figma_nodes(_frames(11), max_nodes=10))
+
+        self.assertEqual(sum(kind == "node" for kind, _, _ in walked), 10)
+        self.assertEqual(walked[-1][0], LIMIT_REACHED)
+        self.assertIn("after 10 nodes", walked[-1][1])
+
+    def test_nodes_at_max_depth_are_walked_without_warning(self):
+        """Nodes down to depth max_depth should be walked in full."""
+        walked = list(walk_figma_nodes(_chain(6), max_depth=5))
+
+        self.assertEqual([depth for _, _, depth in walked], [0, 1, 2, 3, 4, 5])
+        self.assertTrue(all(kind == "node" for kind, _, _ in walked))
+
+    def test_depth_limit_reports_the_configured_value(self):
+        """Nodes below max_depth should be skipped with a warning naming max_depth."""
+        walked = list(walk_figma_nodes(_chain(7), max_depth=5))
+
+        self.assertEqual(max(depth for kind, _, depth in walked if kind == "node"), 5)
+        self.assertEqual(walked[-1][0], LIMIT_REACHED)
+        self.assertIn("depth limit (5)", walked[-1][1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import io
+import unittest
+from unittest.mock import patch
+from PIL import Image
+from app.utils import image_analysis
+from app.utils.image_analysis import ImageAnalysis
+
+
+def image_bytes(image_format="PNG", size=(300, 200)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, (20, 33, 61)).save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+class TestImageAnalysis(unittest.TestCase):
+    def test_header_properties_do_not_decode_pixels(self):
+        """Dimensions and format come from the header alone."""
+        with patch.object(image_analysis, "load_sample", side_effect=AssertionError("decoded")):
+            analysis = ImageAnalysis(image_bytes("JPEG"))
+
+            self.assertEqual(analysis.dimensions, (300, 200))
+            self.assertEqual(analysis.format, "JPEG")
+            self.assertEqual(analysis.mime_type, "image/jpeg")
+
+    def test_pixels_are_decoded_once(self):
+        """The thumbnail is decoded on first use and reused by every palette."""
+        analysis = ImageAnalysis(image_bytes())
+
+        with patch.object(image_analysis, "load_sample", wraps=image_analysis.load_sample) as load_sample:
+            first = analysis.palette(6)
+            second = analysis.palette(3)
+            analysis.thumbnail
+
+        self.assertEqual(load_sample.call_count, 1)
+        self.assertEqual(first, [{"hex": "#14213d", "coverage": 1.0}])
+        self.assertEqual(second, first)
+        self.assertLessEqual(max(analysis.thumbnail.size), 128)
+
+    def test_mime_type_is_detected_from_the_bytes(self):
+        """Without a known MIME type the signature decides; a given one is kept."""
+        self.assertEqual(ImageAnalysis(image_bytes("PNG")).mime_type, "image/png")
+        self.assertEqual(ImageAnalysis(image_bytes("WEBP")).mime_type, "image/webp")
+        self.assertEqual(ImageAnalysis(b"data", "image/gif").mime_type, "image/gif")
+
+    def test_undecodable_data_is_reported_without_raising(self):
+        """Garbage bytes give empty results rather than errors."""
+        analysis = ImageAnalysis(b"not an image")
+
+        self.assertEqual(analysis.dimensions, (0, 0))
+        self.assertIsNone(analysis.thumbnail)
+        self.assertEqual(analysis.palette(), [])
+        self.assertEqual(analysis.mime_type, "image/jpeg")
+
+
+if __name__ == "__main__":
+    unittest.main()
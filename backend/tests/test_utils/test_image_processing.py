@@ -0,0 +1,55 @@
+import io
+import unittest
+from fastapi import HTTPException, UploadFile
+from PIL import Image
+from app.utils.image_processing import read_image_upload, sniff_image_type
+
+
+def png_bytes(width=32, height=32):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 30, 30)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class TestImageUpload(unittest.IsolatedAsyncioTestCase):
+    def test_sniff_image_type(self):
+        """Image formats should be detected from their leading bytes, not the file name."""
+        self.assertEqual(sniff_image_type(png_bytes()), "image/png")
+        self.assertEqual(sniff_image_type(b"\xff\xd8\xff\xe0rest"), "image/jpeg")
+        self.assertEqual(sniff_image_type(b"RIFF\x00\x00\x00\x00WEBPVP8 "), "image/webp")
+        self.assertIsNone(sniff_image_type(b"%PDF-1.7"))
+
+    async def test_upload_is_read_in_chunks_and_spooled(self):
+        """A valid image should be copied to a spooled file that rolls over to disk when large."""
+        data = png_bytes(400, 400) + b"\0" * (300 * 1024)
+        upload, mime_type = await read_image_upload(UploadFile(io.BytesIO(data)), len(data), 128 * 1024)
+        try:
+            self.assertEqual(mime_type, "image/png")
+            self.assertTrue(upload._rolled)
+            self.assertEqual(upload.read(), data)
+        finally:
+            upload.close()
+
+    async def test_non_image_is_rejected_after_the_first_chunk(self):
+        """Bytes that are not an image should be rejected without reading the rest."""
+        source = io.BytesIO(b"MZ" + b"\0" * (1024 * 1024))
+
+        with self.assertRaises(HTTPException) as context:
+            await read_image_upload(UploadFile(source), 10 * 1024 * 1024, 1024 * 1024)
+
+        self.assertEqual(context.exception.status_code, 415)
+        self.assertLess(source.tell(), 1024 * 1024)
+
+    async def test_oversized_image_is_rejected_while_reading(self):
+        """The size limit should be enforced as chunks arrive."""
+        source = io.BytesIO(png_bytes() + b"\0" * (1024 * 1024))
+
+        with self.assertRaises(HTTPException) as context:
+            await read_image_upload(UploadFile(source), 200 * 1024, 1024 * 1024)
+
+        self.assertEqual(context.exception.status_code, 413)
+        self.assertLess(source.tell(), 400 * 1024)
+
+
+if __name__ == "__main__":
+    unittest.main()
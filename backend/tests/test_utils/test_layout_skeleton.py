@@ -0,0 +1,72 @@
+import io
+import unittest
+from PIL import Image, ImageDraw
+from app.services.prompt_templates import format_layout_skeleton
+from app.utils.layout_skeleton import extract_layout_skeleton
+
+
+def landing_page(image_format="PNG"):
+    """A 1440x1200 mock landing page: navy header, gray hero, three cards and an orange banner."""
+    image = Image.new("RGB", (1440, 1200), (255, 255, 255))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle([0, 0, 1439, 79], fill=(20, 33, 61))
+    draw.rectangle([40, 30, 140, 50], fill=(255, 255, 255))
+    draw.rectangle([1200, 30, 1300, 50], fill=(255, 255, 255))
+    draw.rectangle([120, 160, 1319, 559], fill=(235, 235, 240))
+    for i in range(3):
+        draw.rectangle([120 + i * 412, 640, 496 + i * 412, 939], outline=(180, 180, 180), width=2)
+    draw.rectangle([120, 1000, 1319, 1099], fill=(252, 163, 17))
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+class TestLayoutSkeleton(unittest.TestCase):
+    def assertBoxAlmostEqual(self, actual, expected, delta=6):
+        for actual_value, expected_value in zip(actual, expected):
+            self.assertAlmostEqual(actual_value, expected_value, delta=delta, msg=f"{actual} != {expected}")
+
+    def test_blocks_columns_and_spacing_are_measured(self):
+        """Each section is a block in screenshot pixels; the card row has three columns."""
+        skeleton = extract_layout_skeleton(landing_page())
+
+        self.assertEqual((skeleton["width"], skeleton["height"]), (1440, 1200))
+        blocks = skeleton["blocks"]
+        self.assertEqual(len(blocks), 4)
+        self.assertTrue(blocks[0]["band"])
+        self.assertBoxAlmostEqual(blocks[0]["box"], [0, 0, 1440, 80])
+        self.assertEqual(len(blocks[0]["columns"]), 2)
+        self.assertBoxAlmostEqual(blocks[1]["box"], [120, 160, 1200, 400])
+        self.assertFalse(blocks[1]["band"])
+        self.assertEqual(len(blocks[2]["columns"]), 3)
+        for column, left in zip(blocks[2]["columns"], (120, 532, 944)):
+            self.assertBoxAlmostEqual(column, [left, 640, 376, 300])
+        self.assertBoxAlmostEqual(blocks[3]["box"], [120, 1000, 1200, 100])
+        self.assertTrue(all(value % 4 == 0 for value in skeleton["spacing"]))
+
+    def test_jpeg_artifacts_do_not_change_the_blocks(self):
+        """Compression noise should not add or merge blocks."""
+        png = extract_layout_skeleton(landing_page())
+        jpeg = extract_layout_skeleton(landing_page("JPEG"))
+
+        self.assertEqual(len(jpeg["blocks"]), len(png["blocks"]))
+        for jpeg_block, png_block in zip(jpeg["blocks"], png["blocks"]):
+            self.assertBoxAlmostEqual(jpeg_block["box"], png_block["box"])
+            self.assertEqual(len(jpeg_block["columns"]), len(png_block["columns"]))
+
+    def test_undecodable_data_gives_no_skeleton(self):
+        self.assertIsNone(extract_layout_skeleton(b"not an image"))
+
+    def test_skeleton_is_formatted_for_the_prompt(self):
+        """The prompt lists one line per block with its box and columns."""
+        text = format_layout_skeleton(extract_layout_skeleton(landing_page()))
+
+        lines = text.splitlines()
+        self.assertTrue(lines[0].startswith("Measured layout of the 1440x1200 px screenshot"))
+        self.assertTrue(lines[2].startswith("- Full-width band 0, 0, 1440, "))
+        self.assertIn(": 3 columns at 120, 640, ", text)
+        self.assertTrue(lines[-1].startswith("- Most common vertical spacing between blocks: "))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+from app.utils.minhash import MinHashLSH, estimate_similarity, minhash_signature, normalize_text, shingles
+
+
+class TestMinHash(unittest.TestCase):
+    def test_normalization_ignores_case_numbers_and_punctuation(self):
+        """Sizes and formatting should not change the shingles."""
+        self.assertEqual(normalize_text("Header, 1440x80 -- Logo!"), "header 0x0 logo")
+        self.assertEqual(shingles("Nav bar 12px"), shingles("nav  BAR 16px"))
+
+    def test_similarity_estimates_jaccard(self):
+        """Near-identical texts should score high and unrelated texts low."""
+        base = "top navigation bar with logo on the left and four text links on the right and a sign in button"
+        similar = base + " and a cart icon"
+        unrelated = "product grid of cards each with an image title price and add to cart button"
+
+        signature = minhash_signature(shingles(base))
+
+        self.assertEqual(estimate_similarity(signature, minhash_signature(shingles(base))), 1.0)
+        self.assertGreater(estimate_similarity(signature, minhash_signature(shingles(similar))), 0.6)
+        self.assertLess(estimate_similarity(signature, minhash_signature(shingles(unrelated))), 0.2)
+
+    def test_lsh_query_insert_and_remove(self):
+        """The index should return similar entries above the threshold and forget removed ones."""
+        index = MinHashLSH()
+        login = minhash_signature(shingles("login form with email and password fields and a submit button"))
+        footer = minhash_signature(shingles("footer with copyright notice and social media links"))
+        index.insert("login", login)
+        index.insert("footer", footer)
+
+        self.assertEqual(index.query(login, 0.8), [("login", 1.0)])
+        index.remove("login")
+        self.assertEqual(index.query(login, 0.8), [])
+        self.assertEqual(len(index), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
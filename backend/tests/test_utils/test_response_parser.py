@@ -0,0 +1,148 @@
+import json
+import random
+import time
+import unittest
+from app.services.code_generator import CodeGenerator
+from app.utils.response_parser import scan_response
+
+PAYLOAD = {
+    "components": [{
+        "componentName": "product-card",
+        "typescript": "@Component({ selector: 'app-product-card' })\nexport class ProductCardComponent { label = \"}\"; }",
+        "html": "<div class=\"card\">{{ product.name }} ```not a fence```</div>",
+        "scss": ":host { display: block; }"
+    }],
+    "routing": [{"path": "", "componentName": "product-card"}]
+}
+
+
+class TestScanResponse(unittest.TestCase):
+    def test_finds_fenced_blocks_with_languages(self):
+        """Fenced blocks should be reported in order with their language tags."""
+        text = "Intro\n```ts\nexport class A {}\n```\nthen\n```html\n<p>{{ a }}</p>\n```\n"
+
+        scan = scan_response(text)
+
+        self.assertEqual([(b.language, b.content) for b in scan.fenced_blocks], [
+            ("ts", "export class A {}"),
+            ("html", "<p>{{ a }}</p>"),
+        ])
+        self.assertEqual(scan.json_objects, [])
+
+    def test_balanced_object_ignores_braces_in_strings(self):
+        """Braces and escaped quotes inside JSON strings must not affect nesting."""
+        raw = json.dumps(PAYLOAD)
+        text = f"Here you go: {raw} Let me know if you need changes {{like this}}."
+
+        scan = scan_response(text)
+
+        self.assertEqual(scan.json_objects[0], raw)
+        self.assertEqual(json.loads(scan.json_objects[0]), PAYLOAD)
+
+    def test_unclosed_outer_object_keeps_nested_objects(self):
+        """A truncated wrapper should not hide complete objects nested inside it."""
+        text = '{"result": {"components": []}, "other": {"a": 1'
+
+        scan = scan_response(text)
+
+        self.assertEqual(scan.json_objects, ['{"components": []}'])
+
+    def test_unclosed_fence_runs_to_end(self):
+        """A fence cut off by a truncated response should be reported as unclosed."""
+        scan = scan_response("```json\n{\"components\": [")
+
+        self.assertEqual(len(scan.fenced_blocks), 1)
+        self.assertFalse(scan.fenced_blocks[0].closed)
+
+    def test_stray_brace_in_prose_does_not_hide_fences(self):
+        """An unclosed `{` in prose should not swallow the fenced blocks after it."""
+        text = (
+            "Note: the template uses a { placeholder.\n```typescript\nexport class FooComponent {}\n```\n"
+            "```html\n<p>{{ foo }}</p>\n```\n```scss\np { color: red; }\n```"
+        )
+
+        scan = scan_response(text)
+
+        self.assertEqual([(b.language, b.content) for b in scan.fenced_blocks], [
+            ("typescript", "export class FooComponent {}"),
+            ("html", "<p>{{ foo }}</p>"),
+            ("scss", "p { color: red; }"),
+        ])
+        self.assertEqual(scan.json_objects, [])
+        self.assertEqual(CodeGenerator()._parse_ai_response(text)["component_name"], "foo")
+
+
+class TestParseAiResponse(unittest.TestCase):
+    def setUp(self):
+        self.generator = CodeGenerator()
+
+    def test_parses_json_fence(self):
+        """A ```json block should be parsed even when surrounded by prose with braces."""
+        text = "Sure {see below}:\n```json\n" + json.dumps(PAYLOAD, indent=2) + "\n```\nDone."
+
+        result = self.generator._parse_ai_response(text)
+
+        self.assertEqual(result["component_name"], "product-card")
+        self.assertEqual(result["routing"], PAYLOAD["routing"])
+
+    def test_parses_raw_object_after_decoy_object(self):
+        """The components object should be picked even if other balanced objects come first."""
+        text = 'Config: {"theme": "dark"}\n' + json.dumps(PAYLOAD) + "\nTrailing {junk"
+
+        result = self.generator._parse_ai_response(text)
+
+        self.assertEqual(result["components"], PAYLOAD["components"])
+
+    def test_falls_back_to_code_blocks(self):
+        """Without valid JSON the first TypeScript, HTML and SCSS blocks should be used."""
+        text = (
+            "```typescript\nexport class UserProfileComponent {}\n```\n"
+            "```html\n<p>Profile</p>\n```\n```css\np { color: red; }\n```"
+        )
+
+        result = self.generator._parse_ai_response(text)
+
+        self.assertEqual(result["component_name"], "user-profile")
+        self.assertEqual(result["component_html"], "<p>Profile</p>")
+        self.assertEqual(result["component_scss"], "p { color: red; }")
+
+    def test_fuzzed_malformed_responses(self):
+        """Randomly corrupted responses must yield a components list or a ValueError, nothing else."""
+        rng = random.Random(1234)
+        base = "Here is the code:\n```json\n" + json.dumps(PAYLOAD, indent=2) + "\n```\n"
+        noise = ['{', '}', '"', '\\', '```', '\n', '```json\n', '{"components": [', ']}']
+
+        for _ in range(300):
+            text = list(base)
+            for _ in range(rng.randint(1, 8)):
+                operation = rng.random()
+                position = rng.randint(0, len(text))
+                if operation < 0.4:
+                    text.insert(position, rng.choice(noise))
+                elif operation < 0.7 and text:
+                    del text[min(position, len(text) - 1)]
+                else:
+                    text = text[:position]
+            corrupted = "".join(text)
+
+            try:
+                result = self.generator._parse_ai_response(corrupted)
+            except ValueError:
+                continue
+
+            self.assertIsInstance(result["components"], list)
+            self.assertTrue(result["components"])
+
+    def test_pathological_input_is_linear(self):
+        """Inputs that made the old DOTALL regexes backtrack heavily should parse quickly."""
+        text = '{"components": ' * 20000 + "x" * 20000
+
+        start = time.perf_counter()
+        with self.assertRaises(ValueError):
+            self.generator._parse_ai_response(text)
+
+        self.assertLess(time.perf_counter() - start, 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
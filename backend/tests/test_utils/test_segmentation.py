@@ -0,0 +1,70 @@
+import io
+import unittest
+import numpy as np
+from PIL import Image, ImageDraw
+from app.utils.segmentation import find_section_gaps, plan_sections, split_screenshot
+
+
+def tall_page(image_format="PNG"):
+    """A 600x3000 page: blocks of noisy content separated by white gaps, and a navy footer."""
+    rng = np.random.default_rng(1)
+    page = np.full((3000, 600, 3), 255, dtype=np.uint8)
+    for top in (100, 800, 1500, 2100):
+        page[top:top + 500, 50:550] = rng.integers(0, 255, (500, 500, 3), dtype=np.uint8)
+    page[2700:] = (20, 33, 61)
+    image = Image.fromarray(page)
+    ImageDraw.Draw(image).text((60, 2800), "Footer", fill=(255, 255, 255))
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+class TestSegmentation(unittest.TestCase):
+    def test_gaps_are_found_between_content_blocks(self):
+        """White runs between blocks are gaps; a background change is cut on the change."""
+        gray = np.asarray(Image.open(io.BytesIO(tall_page())).convert("L"))
+
+        cuts = [cut for cut, _ in find_section_gaps(gray)]
+
+        self.assertEqual(cuts[:4], [50, 700, 1400, 2050])
+        self.assertIn(2700, cuts)
+
+    def test_sections_are_cut_at_gaps_within_the_height_limit(self):
+        """Each section ends at the best gap before the limit, never inside a content block."""
+        gaps = [(50, 100), (700, 200), (1400, 200), (2050, 100), (2700, 400)]
+
+        sections = plan_sections(3000, gaps, 1000, 6)
+
+        self.assertEqual(sections, [(0, 700), (700, 1400), (1400, 2050), (2050, 3000)])
+
+    def test_section_count_is_capped(self):
+        """Pages that need more sections than allowed get taller sections instead."""
+        sections = plan_sections(10000, [], 1000, 4)
+
+        self.assertLessEqual(len(sections), 4)
+        self.assertEqual(sections[0][0], 0)
+        self.assertEqual(sections[-1][1], 10000)
+
+    def test_split_screenshot_crops_sections_in_the_source_format(self):
+        """Crops cover the page top to bottom and keep JPEG sources as JPEG."""
+        sections = split_screenshot(tall_page("JPEG"), 1000, 6)
+
+        self.assertGreater(len(sections), 2)
+        self.assertEqual(sections[0][0], 0)
+        self.assertEqual(sections[-1][1], 3000)
+        for (top, bottom, data, mime_type), following in zip(sections, sections[1:] + [None]):
+            self.assertEqual(mime_type, "image/jpeg")
+            self.assertEqual(Image.open(io.BytesIO(data)).size, (600, bottom - top))
+            if following is not None:
+                self.assertEqual(bottom, following[0])
+
+    def test_short_or_undecodable_images_are_not_split(self):
+        """Images within the limit come back whole; garbage gives no sections."""
+        data = tall_page()
+
+        self.assertEqual(split_screenshot(data, 4000, 6), [(0, 3000, data, "image/png")])
+        self.assertEqual(split_screenshot(b"not an image", 1000, 6), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
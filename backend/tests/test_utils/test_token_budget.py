@@ -0,0 +1,96 @@
+import unittest
+from app.core.metrics import metrics
+from app.services.code_generator import CodeGenerator
+from app.utils.token_budget import estimate_image_tokens, estimate_tokens, collapse_repeated_blocks, compact_text
+
+
+class TestTokenBudget(unittest.TestCase):
+    def test_estimate_tokens_depends_on_provider(self):
+        """Providers with denser tokenizers should report more tokens for the same text."""
+        text = "x" * 700
+
+        self.assertEqual(estimate_tokens(text, "openai"), 175)
+        self.assertEqual(estimate_tokens(text, "anthropic"), 200)
+        self.assertEqual(estimate_tokens("", "openai"), 0)
+
+    def test_estimate_image_tokens_follows_provider_rules(self):
+        """Image token estimates should follow each provider's resizing and tiling rules."""
+        # OpenAI: 1024x1024 is scaled to 768x768, four 512px tiles
+        self.assertEqual(estimate_image_tokens(1024, 1024, "openai"), 85 + 170 * 4)
+        # 2048x4096 is scaled to 1024x2048, then to 768x1536: six tiles
+        self.assertEqual(estimate_image_tokens(2048, 4096, "openai"), 85 + 170 * 6)
+        # Anthropic: the long side is fitted in 1568 pixels, then width * height / 750
+        self.assertEqual(estimate_image_tokens(1000, 1000, "anthropic"), 1334)
+        self.assertEqual(estimate_image_tokens(3136, 1568, "anthropic"), estimate_image_tokens(1568, 784, "anthropic"))
+        # Gemini: one tile for small images, otherwise 258 per 768px tile
+        self.assertEqual(estimate_image_tokens(300, 300, "gemini"), 258)
+        self.assertEqual(estimate_image_tokens(1280, 2400, "gemini"), 258 * 2 * 4)
+        self.assertEqual(estimate_image_tokens(0, 100, "openai"), 0)
+
+    def test_collapse_repeated_blocks(self):
+        """Consecutive sibling blocks differing only in text or numbers should collapse."""
+        lines = [
+            "List:",
+            "  - Item 1 \"Apples\"",
+            "    price 10",
+            "  - Item 2 \"Pears\"",
+            "    price 12",
+            "  - Footer",
+        ]
+
+        self.assertEqual(collapse_repeated_blocks(lines), [
+            "List:",
+            "  - Item 1 \"Apples\" (repeated x2 with similar structure; others: \"Pears\")",
+            "    price 10",
+            "  - Footer",
+        ])
+
+    def test_compact_text_keeps_short_text_unchanged(self):
+        """Text within budget should be returned as-is."""
+        self.assertEqual(compact_text("A small header", 100, "openai"), "A small header")
+
+    def test_compact_text_summarises_beyond_budget(self):
+        """Text over budget should keep its beginning and end and list omitted sections."""
+        sections = []
+        for i in range(100):
+            sections.append(f"Section {i}:")
+            sections.append(f"  The section number {i} has a unique layout {'x' * i}.")
+        text = "\n".join(sections)
+
+        compacted = compact_text(text, 500, "openai")
+
+        self.assertLessEqual(estimate_tokens(compacted, "openai"), 500)
+        self.assertTrue(compacted.startswith("Section 0:"))
+        self.assertIn("Section 99:", compacted)
+        self.assertIn("lines omitted to fit the prompt budget; omitted sections:", compacted)
+
+    def test_compact_text_cuts_inside_a_single_long_line(self):
+        """A description without newlines should keep its start and end, not just the marker."""
+        text = "word " * 19999 + "end"
+
+        compacted = compact_text(text, 2000, "openai")
+
+        self.assertLessEqual(estimate_tokens(compacted, "openai"), 2000)
+        self.assertGreater(len(compacted), 4000)
+        self.assertTrue(compacted.startswith("word word"))
+        self.assertTrue(compacted.endswith("word end"))
+        self.assertIn("characters omitted to fit the prompt budget", compacted)
+
+        # A long paragraph between short lines is cut too, not dropped
+        compacted = compact_text("Header\n" + text + "\nFooter", 500, "openai")
+        self.assertTrue(compacted.startswith("Header\nword word"))
+        self.assertTrue(compacted.endswith("word end\nFooter"))
+
+    def test_prompt_token_count_is_recorded(self):
+        """Building a prompt should report its estimated size in the prompt_tokens metric."""
+        metrics.reset()
+
+        prompt = CodeGenerator()._create_prompt("A login form", provider="anthropic")
+
+        histogram = next(h for h in metrics.snapshot()["histograms"] if h["name"] == "prompt_tokens")
+        self.assertEqual(histogram["labels"], {"provider": "anthropic"})
+        self.assertEqual(histogram["value"]["max"], estimate_tokens(prompt, "anthropic"))
+
+
+if __name__ == "__main__":
+    unittest.main()